@@ -0,0 +1,26 @@
+"""Example code for CPX-AP and CPX-E systems with asyncio"""
+
+# import the library
+import asyncio
+from cpx_io.cpx_system.cpx_ap.async_cpx_ap import AsyncCpxAp
+from cpx_io.cpx_system.cpx_e.async_cpx_e import AsyncCpxE
+
+
+async def main():
+    # create() connects and sets up the system, the context manager closes the connection
+    async with await AsyncCpxAp.create(ip_address="192.168.1.1") as myCPXAP:
+        async with await AsyncCpxE.create(
+            ip_address="192.168.1.2", modules="60E-EP-MLP"
+        ) as myCPXE:
+            # modules are addressed by their position, the IO of both systems
+            # runs concurrently in the same event loop
+            ap_inputs, e_inputs = await asyncio.gather(
+                myCPXAP.read_channels(1), myCPXE.read_channels(1)
+            )
+            print(ap_inputs, e_inputs)
+
+            # write the first digital output of the CPX-E module at position 2
+            await myCPXE.write_channel(2, 0, True)
+
+
+asyncio.run(main())
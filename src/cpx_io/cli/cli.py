@@ -2,9 +2,9 @@
 
 import argparse
 import logging
-from importlib.metadata import version
 from cpx_io.cli.cpx_e import add_cpx_e_parser
 from cpx_io.cli.cpx_ap import add_cpx_ap_parser
+from cpx_io.utils.helpers import library_version
 from cpx_io.utils.logging import Logging
 
 
@@ -22,7 +22,7 @@ def main():
     args, _ = parser.parse_known_args()
 
     if args.version:
-        print(f"festo-cpx-io v{version('festo-cpx-io')}")
+        print(f"festo-cpx-io v{library_version()}")
         return
 
     # recreate argument parser for consistent help text
@@ -0,0 +1,265 @@
+"""Async CPX Base"""
+
+import asyncio
+
+from pymodbus.client import AsyncModbusTcpClient
+from cpx_io.cpx_system.cpx_base import (
+    CpxConnectionError,
+    MAX_READ_REGISTERS,
+    MAX_WRITE_REGISTERS,
+    ModuleAttributesMixin,
+    check_response,
+    connection_errors,
+    register_data_chunks,
+    register_struct,
+    register_words,
+)
+from cpx_io.cpx_system.register_transaction import (
+    read_device_info,
+    run_async,
+    set_timeout,
+)
+from cpx_io.cpx_system.retry_policy import (
+    RetryPolicy,
+    default_read_policy,
+    default_write_policy,
+)
+from cpx_io.cpx_system.transport_metrics import (
+    MeteredTransportMixin,
+    TransportMetrics,
+)
+from cpx_io.utils.helpers import register_chunks
+from cpx_io.utils.logging import Logging
+
+
+class AsyncCpxBase(ModuleAttributesMixin, MeteredTransportMixin):
+    """A class to connect to the Festo CPX system with asyncio. This is the awaitable
+    counterpart of CpxBase and is built on the pymodbus AsyncModbusTcpClient, so one event
+    loop can drive many systems without a thread per device. The requests are recorded
+    in the same transport metrics as in CpxBase, see stats()."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    # timeout register (register_address, length) of the system and whether it only
+    # supports single register writes
+    TIMEOUT_REGISTER = None
+    TIMEOUT_SINGLE_CMDS = False
+
+    def __init__(
+        self,
+        ip_address: str = None,
+        timeout: float = None,
+        read_policy: RetryPolicy = None,
+        write_policy: RetryPolicy = None,
+    ):
+        """Constructor of AsyncCpxBase class. The connection is established with
+        startup(), use create() to do both in one step.
+
+        :param ip_address: Required IP address as string e.g. ('192.168.1.1')
+        :type ip_address: str
+        :param timeout: Modbus timeout (in s) that should be configured on the slave
+        :type timeout: float
+        :param read_policy: (optional) Retry policy of all register reads, see CpxBase
+        :type read_policy: RetryPolicy
+        :param write_policy: (optional) Retry policy of all register writes, see CpxBase
+        :type write_policy: RetryPolicy
+        """
+        self._modules = []
+        self._module_names = []
+        self.ip_address = ip_address
+        self.timeout = timeout
+        self.client = None
+        self.io_lock = asyncio.Lock()
+        self.read_policy = read_policy or default_read_policy()
+        self.write_policy = write_policy or default_write_policy()
+        self.metrics = TransportMetrics()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.shutdown()
+
+    @classmethod
+    async def create(cls, **kwargs):
+        """Creates an object of the class and awaits its startup.
+
+        :return: The connected and configured system
+        :rtype: AsyncCpxBase
+        """
+        system = cls(**kwargs)
+        await system.startup()
+        return system
+
+    async def startup(self) -> None:
+        """Connects to the system and configures the timeout"""
+        await self.connect()
+        if not self.connected():
+            return
+
+        if self.timeout is not None:
+            await self.set_timeout(int(self.timeout * 1000))
+        else:
+            Logging.logger.info(
+                "Timeout is not specified. Not setting the timeout on target device."
+            )
+
+    async def set_timeout(self, timeout_ms: int) -> None:
+        """Sets the modbus timeout to the provided value
+
+        :param timeout_ms: Modbus timeout in ms (milli-seconds)
+        :type timeout_ms: int
+        """
+        await run_async(
+            set_timeout(
+                timeout_ms, self.TIMEOUT_REGISTER, single_cmds=self.TIMEOUT_SINGLE_CMDS
+            ),
+            self,
+        )
+
+    async def connect(self) -> None:
+        """Connects to the CPX system"""
+        if self.ip_address is None:
+            Logging.logger.info("Not connected since no IP address was provided")
+            return
+
+        self.client = AsyncModbusTcpClient(host=self.ip_address)
+        if await self.client.connect():
+            Logging.logger.info(f"Connected to {self.ip_address}:502")
+        else:
+            Logging.logger.warning(
+                f"Failed to connect to {self.ip_address}:502 via modbus"
+            )
+            message = (
+                "Modbus connection to the CPX system failed."
+                "Check your connection and network configuration."
+            )
+            raise CpxConnectionError(message)
+
+    @property
+    def modules(self) -> list:
+        """getter function for private modules property"""
+        return self._modules
+
+    async def shutdown(self):
+        """Shutdown function"""
+        if self.client is None:
+            Logging.logger.info("No connection to close")
+            return False
+
+        async with self.io_lock:
+            self.client.close()
+        Logging.logger.info("Connection closed")
+        return False
+
+    def connected(self) -> bool:
+        """Returns information about connection status"""
+        return self.client is not None and self.client.connected
+
+    async def read_device_info(self) -> dict:
+        """Reads device info from the CPX system and returns dict with containing values
+
+        return: Contains device information values
+        rtype: dict
+        """
+        return await run_async(read_device_info(), self)
+
+    async def _execute(self, request):
+        """Executes a modbus request and records it in the metrics"""
+        with self.metrics.measure("execute", "device"):
+            async with self.io_lock:
+                return await self.client.execute(False, request)
+
+    async def read_reg_data(self, register: int, length: int = 1) -> bytes:
+        """Reads and returns register(s) from Modbus server without interpreting the data.
+        Reads of more than MAX_READ_REGISTERS registers are split into several requests
+        that are awaited together and returned as one buffer.
+
+        :param register: adress of the first register to read
+        :type register: int
+        :param length: number of registers to read (default: 1)
+        :type length: int
+        :return: Register(s) content
+        :rtype: bytes
+        """
+        if length > MAX_READ_REGISTERS:
+            return b"".join(
+                await asyncio.gather(
+                    *(
+                        self.read_reg_data(chunk, chunk_length)
+                        for chunk, chunk_length in register_chunks(
+                            register, length, MAX_READ_REGISTERS
+                        )
+                    )
+                )
+            )
+        with self._measure("read", register, length * 2):
+            return await self.read_policy.call_async(
+                self._read_holding_registers, register, length
+            )
+
+    async def _read_holding_registers(self, register: int, length: int) -> bytes:
+        """One read request without retries"""
+        with connection_errors():
+            async with self.io_lock:
+                response = await self.client.read_holding_registers(
+                    address=register, count=length
+                )
+        registers = check_response(response).registers
+        return register_struct(len(registers)).pack(*registers)
+
+    async def write_reg_data(self, data: bytes, register: int) -> None:
+        """Write bytes object data to register(s). Writes of more than
+        MAX_WRITE_REGISTERS registers are split into several requests that are awaited
+        together. Failed requests are repeated according to the write_policy, if the
+        last attempt fails a ConnectionAbortedError is raised.
+
+        :param data: data to write to the register(s)
+        :type data: bytes
+        :param register: adress of the first register to write
+        :type register: int
+        """
+        data, reg = register_words(data)
+        if len(reg) > MAX_WRITE_REGISTERS:
+            await asyncio.gather(
+                *(
+                    self.write_reg_data(chunk_data, chunk_register)
+                    for chunk_data, chunk_register in register_data_chunks(
+                        data, register
+                    )
+                )
+            )
+            return
+        with self._measure("write", register, len(data)):
+            await self.write_policy.call_async(
+                self._write_registers, register, list(reg)
+            )
+
+    async def _write_registers(self, register: int, reg: list[int]) -> None:
+        """One write multiple registers request without retries"""
+        with connection_errors():
+            async with self.io_lock:
+                response = await self.client.write_registers(register, reg)
+        check_response(response, f"Writing register {register} failed")
+
+    async def _write_register(self, register: int, value: int) -> None:
+        """One write single register request without retries"""
+        with connection_errors():
+            async with self.io_lock:
+                response = await self.client.write_register(register, value)
+        check_response(response, f"Writing register {register} failed")
+
+    async def write_reg_data_with_single_cmds(self, data: bytes, register: int) -> None:
+        """Write bytes object data to register(s), with only single register writes.
+
+        :param data: data to write to the register(s)
+        :type data: bytes
+        :param register: adress of the first register to write
+        :type register: int
+        """
+        data, reg = register_words(data)
+        with self._measure("write", register, len(data)):
+            for offset, d in enumerate(reg):
+                await self.write_policy.call_async(
+                    self._write_register, register + offset, d
+                )
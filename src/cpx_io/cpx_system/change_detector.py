@@ -0,0 +1,145 @@
+"""cpx_io - ChangeDetector class for edge and value change events of input channels."""
+
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+# a single BOOL channel changed from False to True
+RISING = "rising"
+# a single BOOL channel changed from True to False
+FALLING = "falling"
+# any other channel changed its value
+CHANGED = "changed"
+
+
+@dataclass(frozen=True)
+class ChannelChange:
+    """Change of one input channel between two snapshots"""
+
+    position: int
+    channel: int
+    kind: str
+    old_value: Any
+    new_value: Any
+    timestamp: float
+
+
+class ChangeDetector:
+    """Compares successive snapshots of an input area and reports the channels that
+    changed. The snapshots are compared with one XOR, only the changed bits are mapped
+    back to (module position, channel) and only the channels they belong to are
+    decoded, so the cost of an update is proportional to the number of changes and not
+    to the number of channels.
+
+    The channel layout of every module is added with watch() from a codec (see
+    ChannelCodec) that provides bit_span() and decode_channel() for each channel.
+    """
+
+    def __init__(self):
+        # (position, channel, decode function) of every watched channel
+        self._entries = []
+        # indices into _entries by bit of the snapshot
+        self._bit_map = []
+        # bits of the snapshot that belong to a watched channel
+        self._mask = 0
+        self._previous = None
+        self._cycle = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(channels={len(self._entries)})"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def watch(self, position: int, register: int, codec) -> None:
+        """Adds all channels of a module to the detector. Channels with a data type
+        the codec can not decode are skipped.
+
+        :param position: Module position reported in the changes
+        :type position: int
+        :param register: Register offset of the channel data of the module in the
+            snapshot
+        :type register: int
+        :param codec: Codec of the input channels of the module
+        :type codec: ChannelCodec
+        """
+        for channel in range(len(codec)):
+            if not codec.is_supported(channel):
+                continue
+            decode = partial(codec.decode_channel, channel, register=-register)
+            bit_offset, bits = codec.bit_span(channel)
+            first = register * 16 + bit_offset
+            if len(self._bit_map) < first + bits:
+                self._bit_map.extend([()] * (first + bits - len(self._bit_map)))
+            for bit in range(first, first + bits):
+                self._bit_map[bit] += (len(self._entries),)
+            self._mask |= ((1 << bits) - 1) << first
+            self._entries.append((position, channel, decode))
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets the last snapshot, the next update() only records a new baseline"""
+        self._previous = None
+        self._cycle = None
+
+    def update(
+        self, data: bytes, timestamp: float = None, cycle: int = None
+    ) -> list[ChannelChange]:
+        """Compares the snapshot with the previous one and returns the changes. The
+        first snapshot after creating or resetting the detector only records the
+        baseline and returns no changes.
+
+        :param data: Snapshot of the input area
+        :type data: bytes
+        :param timestamp: (optional) Time of the snapshot, default now
+        :type timestamp: float
+        :param cycle: (optional) Cycle number of the snapshot, a snapshot with the
+            same cycle number as the previous one is not compared again
+        :type cycle: int
+        :return: Changed channels in the order of their position in the snapshot
+        :rtype: list[ChannelChange]
+        """
+        if cycle is not None:
+            if cycle == self._cycle:
+                return []
+            self._cycle = cycle
+        data = bytes(data)
+        previous, self._previous = self._previous, data
+        if previous is None or len(previous) != len(data) or previous == data:
+            return []
+
+        changed = (
+            int.from_bytes(previous, "little") ^ int.from_bytes(data, "little")
+        ) & self._mask
+        if not changed:
+            return []
+        if timestamp is None:
+            timestamp = time.time()
+
+        changes = []
+        visited = set()
+        while changed:
+            lowest = changed & -changed
+            changed ^= lowest
+            for index in self._bit_map[lowest.bit_length() - 1]:
+                if index not in visited:
+                    visited.add(index)
+                    change = self._compare(index, previous, data, timestamp)
+                    if change is not None:
+                        changes.append(change)
+        return changes
+
+    def _compare(
+        self, index: int, previous: bytes, data: bytes, timestamp: float
+    ) -> ChannelChange | None:
+        """Returns the change of one watched channel or None if its value is equal"""
+        position, channel, decode = self._entries[index]
+        old_value, new_value = decode(previous), decode(data)
+        if old_value == new_value:
+            return None
+        if isinstance(new_value, bool):
+            kind = RISING if new_value else FALLING
+        else:
+            kind = CHANGED
+        return ChannelChange(position, channel, kind, old_value, new_value, timestamp)
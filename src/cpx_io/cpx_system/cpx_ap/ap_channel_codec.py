@@ -0,0 +1,331 @@
+"""Precompiled decoding and encoding of the channel data of an AP module"""
+
+import struct
+from typing import Any
+
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+from cpx_io.utils.helpers import div_ceil, import_numpy
+
+# struct format character, size in bytes and value range of the channel data types
+CHANNEL_FORMATS = {
+    "INT8": ("b", 1, -0x80, 0x7F),
+    "UINT8": ("B", 1, 0, 0xFF),
+    "INT16": ("h", 2, -0x8000, 0x7FFF),
+    "UINT16": ("H", 2, 0, 0xFFFF),
+}
+
+# kinds of the plan entries
+_BOOL = 0
+_BOOL_ARRAY = 1
+_VALUE = 2
+_ARRAY = 3
+_UNSUPPORTED = 4
+
+
+class ChannelCodec:
+    """Decode and encode plan of a list of channels. The byte offsets, struct.Struct
+    objects and bit masks of all channels are computed once, so reading the channels
+    only unpacks the values from the data and writing only packs them into the buffer.
+    """
+
+    def __init__(self, channels: list[Channel]):
+        """Constructor of the ChannelCodec class.
+
+        :param channels: Channels in the order of the values
+        :type channels: list[Channel]
+        """
+        self.channels = channels
+        self._decode_plan = tuple(self._compile_decode(c) for c in channels)
+        self._encode_plan = tuple(self._compile_encode(c) for c in channels)
+        self._bit_spans = tuple(self._compile_bit_span(c) for c in channels)
+        # numpy plan, compiled on the first decode_array()
+        self._array_plan = None
+
+    def __len__(self):
+        return len(self._decode_plan)
+
+    def __reduce__(self):
+        # struct.Struct objects can not be pickled, the plan is compiled again
+        return (ChannelCodec, (self.channels,))
+
+    @staticmethod
+    def _byteorder(channel: Channel) -> str:
+        return "<" if channel.byte_swap_needed else ">"
+
+    @staticmethod
+    def _compile_decode(channel: Channel) -> tuple:
+        """Returns the decode plan entry of the channel"""
+        if channel.data_type == "BOOL":
+            if channel.array_size:
+                # in an array the bits follow the channel bit offset
+                bits = range(
+                    channel.bit_offset, channel.bit_offset + channel.array_size
+                )
+                return (_BOOL_ARRAY, tuple((b // 8, b % 8) for b in bits), None)
+            return (_BOOL, channel.bit_offset // 8, channel.bit_offset % 8)
+
+        if channel.data_type not in CHANNEL_FORMATS:
+            return (_UNSUPPORTED, channel.data_type, None)
+
+        code = CHANNEL_FORMATS[channel.data_type][0]
+        order = ChannelCodec._byteorder(channel)
+        if channel.array_size:
+            fmt = struct.Struct(f"{order}{channel.array_size}{code}")
+            return (_ARRAY, fmt, channel.bit_offset // 8)
+        return (_VALUE, struct.Struct(order + code), channel.bit_offset // 8)
+
+    @staticmethod
+    def _compile_bit_span(channel: Channel) -> tuple[int, int]:
+        """Returns (bit offset, bit count) of the data of the channel"""
+        if channel.data_type == "BOOL":
+            bits = channel.array_size or 1
+        elif channel.data_type in CHANNEL_FORMATS:
+            bits = CHANNEL_FORMATS[channel.data_type][1] * 8 * (channel.array_size or 1)
+        else:
+            bits = channel.bits or 1
+        return channel.bit_offset, bits
+
+    @staticmethod
+    def _compile_encode(channel: Channel) -> tuple:
+        """Returns the encode plan entry of the channel"""
+        if channel.array_size:
+            step = channel.bits // channel.array_size
+            bit_offsets = tuple(
+                channel.bit_offset + i * step for i in range(channel.array_size)
+            )
+        else:
+            bit_offsets = (channel.bit_offset,)
+
+        if channel.data_type == "BOOL":
+            masks = tuple((b // 8, 1 << (b % 8)) for b in bit_offsets)
+            if channel.array_size:
+                return (_BOOL_ARRAY, masks, channel)
+            return (_BOOL, masks[0], channel)
+
+        if channel.data_type not in CHANNEL_FORMATS:
+            return (_UNSUPPORTED, None, channel)
+
+        code, _, low, high = CHANNEL_FORMATS[channel.data_type]
+        fmt = struct.Struct(ChannelCodec._byteorder(channel) + code)
+        offsets = tuple(b // 8 for b in bit_offsets)
+        if channel.array_size:
+            return (_ARRAY, (fmt, offsets, low, high), channel)
+        return (_VALUE, (fmt, offsets[0], low, high), channel)
+
+    def decode(self, data: bytes) -> list:
+        """Interpret the data as the values of the channels
+
+        :param data: Register data that contains the channels
+        :type data: bytes
+        :return: Value of every channel, a list for array channels
+        :rtype: list
+        """
+        view = memoryview(data)
+        result = []
+        append = result.append
+        for kind, first, second in self._decode_plan:
+            if kind == _BOOL:
+                append((view[first] >> second) & 1 == 1)
+            elif kind == _VALUE:
+                append(first.unpack_from(view, second)[0])
+            elif kind == _BOOL_ARRAY:
+                append([(view[pos] >> bit) & 1 == 1 for pos, bit in first])
+            elif kind == _ARRAY:
+                append(list(first.unpack_from(view, second)))
+            else:
+                raise NotImplementedError(f"Data type {first} is not implemented")
+        return result
+
+    def is_supported(self, index: int) -> bool:
+        """Returns False if the data type of the channel can not be decoded"""
+        return self._decode_plan[index][0] != _UNSUPPORTED
+
+    def bit_span(self, index: int) -> tuple[int, int]:
+        """Returns the bits that contain one channel
+
+        :param index: Index of the channel in the channel list
+        :type index: int
+        :return: (bit offset, bit count) relative to the channel data
+        :rtype: tuple[int, int]
+        """
+        return self._bit_spans[index]
+
+    def span(self, index: int) -> tuple[int, int]:
+        """Returns the registers that contain one channel
+
+        :param index: Index of the channel in the channel list
+        :type index: int
+        :return: (register offset, register count) relative to the channel data
+        :rtype: tuple[int, int]
+        """
+        bit_offset, bits = self._bit_spans[index]
+        first = bit_offset // 16
+        return first, div_ceil(bit_offset + bits, 16) - first
+
+    def decode_channel(self, index: int, data: bytes, register: int = 0) -> Any:
+        """Interpret the data as the value of one channel
+
+        :param index: Index of the channel in the channel list
+        :type index: int
+        :param data: Register data that contains the channel, e.g. the registers
+            given by span()
+        :type data: bytes
+        :param register: (optional) Register offset of data in the channel data
+        :type register: int
+        :return: Value of the channel, a list for array channels
+        :rtype: Any
+        """
+        kind, first, second = self._decode_plan[index]
+        view = memoryview(data)
+        base = register * 2
+        if kind == _BOOL:
+            return (view[first - base] >> second) & 1 == 1
+        if kind == _VALUE:
+            return first.unpack_from(view, second - base)[0]
+        if kind == _BOOL_ARRAY:
+            return [(view[pos - base] >> bit) & 1 == 1 for pos, bit in first]
+        if kind == _ARRAY:
+            return list(first.unpack_from(view, second - base))
+        raise NotImplementedError(f"Data type {first} is not implemented")
+
+    def encode(self, values: list, buffer: bytearray) -> None:
+        """Insert the values of all channels into the buffer
+
+        :param values: Value of every channel
+        :type values: list
+        :param buffer: Data of the channels, is changed in place
+        :type buffer: bytearray
+        """
+        for entry, value in zip(self._encode_plan, values):
+            self._encode_entry(entry, value, buffer)
+
+    def encode_channel(self, index: int, value: Any, buffer: bytearray) -> None:
+        """Insert the value of one channel into the buffer
+
+        :param index: Index of the channel in the channel list
+        :type index: int
+        :param value: Value of the channel
+        :type value: Any
+        :param buffer: Data of the channels, is changed in place
+        :type buffer: bytearray
+        """
+        self._encode_entry(self._encode_plan[index], value, buffer)
+
+    @staticmethod
+    def _encode_entry(entry: tuple, value: Any, buffer: bytearray) -> None:
+        kind, plan, channel = entry
+        if kind == _BOOL:
+            if isinstance(value, (list, tuple, dict)):
+                raise TypeError(
+                    f"Type {type(value)} is not supported for channel type BOOL"
+                )
+            pos, mask = plan
+            buffer[pos] = buffer[pos] | mask if value else buffer[pos] & ~mask
+        elif kind == _BOOL_ARRAY:
+            for i, (pos, mask) in enumerate(plan):
+                buffer[pos] = buffer[pos] | mask if value[i] else buffer[pos] & ~mask
+        elif kind == _VALUE:
+            if isinstance(value, (list, tuple, dict)):
+                raise TypeError(
+                    f"Type {type(value)} is not supported for channel type "
+                    f"{channel.data_type}"
+                )
+            fmt, pos, low, high = plan
+            ChannelCodec._check_range(channel, value, low, high)
+            fmt.pack_into(buffer, pos, value)
+        elif kind == _ARRAY:
+            fmt, offsets, low, high = plan
+            for i, pos in enumerate(offsets):
+                ChannelCodec._check_range(channel, value[i], low, high)
+                fmt.pack_into(buffer, pos, value[i])
+        else:
+            raise NotImplementedError(
+                f"Output data type {channel.data_type} is not implemented"
+            )
+
+    def _compile_array(self) -> tuple:
+        """Returns the numpy plan: the dtype of the result (None for a plain bool
+        array), the bit indices of the BOOL channels and the dtype fields of the other
+        channels in the data"""
+        np = import_numpy()
+        names, formats, bool_bits = [], [], []
+        value_fields = {"names": [], "formats": [], "offsets": []}
+        for i, channel in enumerate(self.channels):
+            name = f"channel_{i}"
+            shape = (channel.array_size,) if channel.array_size else ()
+            if channel.data_type == "BOOL":
+                bits = [channel.bit_offset + b for b in range(channel.array_size or 1)]
+                bool_bits.append((name, np.array(bits) if shape else bits[0]))
+                formats.append(("?", shape))
+            elif channel.data_type in CHANNEL_FORMATS:
+                code, size, _, _ = CHANNEL_FORMATS[channel.data_type]
+                kind = "i" if code.islower() else "u"
+                fmt = (f"{self._byteorder(channel)}{kind}{size}", shape)
+                value_fields["names"].append(name)
+                value_fields["formats"].append(fmt)
+                value_fields["offsets"].append(channel.bit_offset // 8)
+                formats.append(fmt)
+            else:
+                raise NotImplementedError(
+                    f"Data type {channel.data_type} is not implemented"
+                )
+            names.append(name)
+
+        if not bool_bits or value_fields["names"] or any(s for _, s in formats):
+            return (
+                np.dtype({"names": names, "formats": formats}),
+                bool_bits,
+                value_fields,
+            )
+        # only single BOOL channels, decoded into a plain bool array
+        return None, np.array([index for _, index in bool_bits]), None
+
+    def decode_array(self, data):
+        """Interpret the data as the values of the channels with numpy. The data of many
+        samples is decoded at once without a loop over the samples.
+
+        If all channels are single BOOL channels, the result is a bool array with one
+        entry per channel. Otherwise it is a structured array with one field
+        "channel_<index>" per channel.
+
+        :param data: Register data that contains the channels or a 2-dimensional
+            uint8 array with the data of one sample per row
+        :type data: bytes | numpy.ndarray
+        :return: Values of the channels, one row per sample if data is 2-dimensional
+        :rtype: numpy.ndarray
+        """
+        np = import_numpy()
+        if self._array_plan is None:
+            self._array_plan = self._compile_array()
+        dtype, bool_bits, value_fields = self._array_plan
+
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            raw = np.frombuffer(data, np.uint8)
+        else:
+            raw = np.asarray(data, np.uint8)
+        single = raw.ndim == 1
+        raw = np.ascontiguousarray(raw.reshape(1, -1) if single else raw)
+
+        bits = None
+        if len(bool_bits):
+            # pylint: disable=no-member
+            # the return type of numpy.unpackbits is not inferred correctly
+            bits = np.unpackbits(raw, axis=1, bitorder="little").view(np.bool_)
+        if dtype is None:
+            return bits[0, bool_bits] if single else bits[:, bool_bits]
+
+        result = np.empty(len(raw), dtype)
+        for name, index in bool_bits:
+            result[name] = bits[:, index]
+        if value_fields["names"]:
+            values = raw.view(np.dtype(dict(value_fields, itemsize=raw.shape[1])))
+            for name in value_fields["names"]:
+                result[name] = values[name][:, 0]
+        return result[0] if single else result
+
+    @staticmethod
+    def _check_range(channel: Channel, value: Any, low: int, high: int) -> None:
+        if not low <= value <= high:
+            raise OverflowError(
+                f"Value {value} is out of range for channel type {channel.data_type}"
+            )
@@ -1,5 +1,6 @@
 """Documentation generator for AP systems"""
 
+import hashlib
 import inspect
 import json
 from datetime import datetime
@@ -7,6 +8,8 @@ from cpx_io.cpx_system.cpx_ap.ap_product_categories import ProductCategory
 from cpx_io.cpx_system.cpx_ap.ap_supported_functions import (
     SUPPORTED_PRODUCT_FUNCTIONS_DICT,
 )
+from cpx_io.utils.helpers import library_version
+from cpx_io.utils.logging import Logging
 
 
 def _generage_channel_data(channels: list, module_is_io_link: bool = False) -> dict:
@@ -179,11 +182,62 @@ def _write_module_markdown(f, m):
     _write_module_parameters(f, m)
 
 
-def generate_system_information_file(ap_system) -> None:
-    """Saves a readable document that includes the system information in the apdd path"""
+def topology_hash(ap_system) -> str:
+    """Returns a hash of everything the system documentation is generated from except
+    the creation date: library version, paths and type, firmware and name of every
+    module. It is cheap compared to generating the documentation."""
+    topology = [
+        library_version(),
+        ap_system.ip_address,
+        ap_system.docu_path,
+        ap_system.apdd_path,
+    ]
+    for m in ap_system.modules:
+        topology.append(
+            [
+                m.position,
+                m.information.order_text,
+                m.information.fw_version,
+                m.apdd_information.module_code,
+                m.name,
+            ]
+        )
+    return hashlib.sha256(json.dumps(topology).encode("utf-8")).hexdigest()
+
+
+def _recorded_topology_hash(file_name: str) -> str:
+    """Returns the topology hash of an existing json documentation or None"""
+    try:
+        with open(file_name, "r", encoding="utf-8") as f:
+            return json.load(f).get("Topology Hash")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def generate_system_information_file(ap_system, force: bool = False) -> bool:
+    """Saves a readable document that includes the system information in the docu path.
+    The documentation is not written again if the topology hash recorded in the
+    existing json file matches the system.
+
+    :param ap_system: CpxAp system to document
+    :type ap_system: CpxAp
+    :param force: (optional) Write the documentation even if it is up to date
+    :type force: bool
+    :return: True if the documentation was written, False if it was up to date
+    :rtype: bool
+    """
+    file_name = (
+        ap_system.docu_path
+        + f"/system_information_{ap_system.ip_address.replace('.','-')}"
+    )
+    current_hash = topology_hash(ap_system)
+    if not force and _recorded_topology_hash(file_name + ".json") == current_hash:
+        Logging.logger.debug(f"System documentation {file_name} is up to date")
+        return False
 
     system_data = {
         "Information": "AP System description",
+        "Topology Hash": current_hash,
         "IP-Address": ap_system.ip_address,
         "Number of modules": len(ap_system.modules),
         "Creation Date": datetime.now().strftime("%d-%m-%Y %H:%M:%S"),
@@ -192,27 +246,13 @@ def generate_system_information_file(ap_system) -> None:
         "Modules": _generate_module_data(ap_system.modules),
     }
 
-    # json
-    with open(
-        ap_system.docu_path
-        + f"/system_information_{ap_system.ip_address.replace('.','-')}.json",
-        "w",
-        encoding="utf-8",
-    ) as f:
-        f.write(json.dumps(system_data, indent=4))
-
     # markup
-    with open(
-        ap_system.docu_path
-        + f"/system_information_{ap_system.ip_address.replace('.','-')}.md",
-        "w",
-        encoding="utf-8",
-    ) as f:
+    with open(file_name + ".md", "w", encoding="utf-8") as f:
         f.write(f"# {system_data['Information']}\n")
         f.write(
             "Documentation of your AP system that is autogenerated by reading "
             "in all the information from all connected modules. This file will be "
-            "updated everytime you make an instance of the CpxAp Object and is "
+            "updated when the system changes and is "
             "saved in the festo-cpx-io folder in your user directory depending on "
             f"your operating system *{ap_system.docu_path}*\n"
         )
@@ -224,3 +264,9 @@ def generate_system_information_file(ap_system) -> None:
         f.write("\n# Modules\n")
         for m in system_data["Modules"]:
             _write_module_markdown(f, m)
+
+    # json, written last since it records the topology hash
+    with open(file_name + ".json", "w", encoding="utf-8") as f:
+        f.write(json.dumps(system_data, indent=4))
+    Logging.logger.debug(f"Saved system documentation {file_name}")
+    return True
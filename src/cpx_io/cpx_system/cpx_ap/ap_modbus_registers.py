@@ -15,6 +15,7 @@ MODULE_COUNT = ModbusRegister(12000, 1)
 TIMEOUT = ModbusRegister(14000, 2)
 
 # module information
+MODULE_INFORMATION = ModbusRegister(15000, 37)  # complete block of one module
 MODULE_CODE = ModbusRegister(15000, 2)
 MODULE_CLASS = ModbusRegister(15002, 1)
 COMMUNICATION_PROFILE = ModbusRegister(15003, 1)
@@ -27,6 +28,8 @@ FW_VERSION = ModbusRegister(15009, 3)
 SERIAL_NUMBER = ModbusRegister(15012, 2)
 PRODUCT_KEY = ModbusRegister(15014, 6)
 ORDER_TEXT = ModbusRegister(15020, 17)
+# module code up to the serial number, identifies a module at its position
+MODULE_FINGERPRINT = ModbusRegister(15000, 14)
 
 # IO-Link ISDU access
 ISDU_STATUS = ModbusRegister(34000, 1)
@@ -1,13 +1,15 @@
 """Generic AP module implementation from APDD"""
 
 import struct
-import copy
 import inspect
+import threading
 import time
-from typing import Any, Union
+from dataclasses import replace
+from typing import Any, Callable, Union
 from collections import namedtuple
-from cpx_io.cpx_system.cpx_base import CpxBase, CpxRequestError
+from cpx_io.cpx_system.cpx_base import CpxBase
 from cpx_io.cpx_system.cpx_module import CpxModule
+from cpx_io.cpx_system.transport_metrics import measured
 from cpx_io.cpx_system.cpx_ap.ap_product_categories import ProductCategory
 from cpx_io.cpx_system.cpx_ap.ap_supported_datatypes import (
     SUPPORTED_IOL_DATATYPES,
@@ -20,11 +22,12 @@ from cpx_io.cpx_system.cpx_ap.ap_supported_functions import (
     PARAMETER_FUNCTIONS,
     SUPPORTED_PRODUCT_FUNCTIONS_DICT,
 )
-from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+from cpx_io.cpx_system.cpx_ap.ap_channel_codec import ChannelCodec
 from cpx_io.cpx_system.cpx_ap.dataclasses.module_diagnosis import ModuleDiagnosis
 from cpx_io.cpx_system.cpx_ap.dataclasses.system_parameters import SystemParameters
 from cpx_io.cpx_system.cpx_ap.dataclasses.channels import Channels
-from cpx_io.cpx_system.cpx_ap import ap_modbus_registers
+from cpx_io.cpx_system.cpx_ap import ap_protocol
+from cpx_io.cpx_system.register_transaction import run
 from cpx_io.utils.helpers import (
     div_ceil,
     channel_range_check,
@@ -35,6 +38,40 @@ from cpx_io.utils.helpers import (
 from cpx_io.utils.logging import Logging
 from cpx_io.cpx_system.cpx_ap.dataclasses.apdd_information import ApddInformation
 
+ModuleDicts = namedtuple("ModuleDicts", ["parameters", "diagnosis"])
+
+# guards building the tables of a module when they are accessed from several threads
+_DEFINITIONS_LOCK = threading.Lock()
+
+
+class _SharedDefinitions:
+    """Builds the parameter, diagnosis and variant tables from their sources once.
+    Modules created with ApModule.shared_copy() share the tables."""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ("_sources", "_tables")
+
+    def __init__(self, sources):
+        self._sources = sources
+        self._tables = None
+
+    def load(self) -> tuple:
+        """Returns (ModuleDicts, variant list), must be called with _DEFINITIONS_LOCK"""
+        if self._tables is None:
+            parameter_list, diagnosis_list, variant_list = (
+                source() if callable(source) else source for source in self._sources
+            )
+            module_dicts = ModuleDicts(
+                parameters={p.parameter_id: p for p in parameter_list},
+                diagnosis={
+                    int(d.diagnosis_id.lstrip("0x"), base=16): d for d in diagnosis_list
+                },
+            )
+            self._tables = (module_dicts, variant_list)
+            self._sources = None
+        return self._tables
+
 
 class ApModule(CpxModule):
     """Generic AP module class. This includes all functions that are shared
@@ -50,16 +87,19 @@ class ApModule(CpxModule):
         self,
         apdd_information: ApddInformation,
         channels: tuple,
-        parameter_list: list,
-        diagnosis_list: list,
-        variant_list: list,
+        parameter_list: list | Callable[[], list],
+        diagnosis_list: list | Callable[[], list],
+        variant_list: list | Callable[[], list],
         variant_switch_parameter: int | None,
     ):
+        """Constructor of the ApModule class. parameter_list, diagnosis_list and
+        variant_list can also be functions without arguments that build the list. They
+        are called on the first access of module_dicts or variant_list.
+        """
         super().__init__(name=apdd_information.name)
         self.information = None
         self.name = apdd_information.name
         self.apdd_information = apdd_information
-        self.variant_list = variant_list
         self.variant_switch_parameter = variant_switch_parameter
 
         self.channels = Channels(
@@ -78,15 +118,72 @@ class ApModule(CpxModule):
             )
             if self.output_byte_size % 2 == 1:
                 self.output_byte_size += 1
-        ModuleDicts = namedtuple("ModuleDicts", ["parameters", "diagnosis"])
-        self.module_dicts = ModuleDicts(
-            parameters={p.parameter_id: p for p in parameter_list},
-            diagnosis={
-                int(d.diagnosis_id.lstrip("0x"), base=16): d for d in diagnosis_list
-            },
+        self._definitions = _SharedDefinitions(
+            (parameter_list, diagnosis_list, variant_list)
         )
+        self._module_dicts = None
+        self._variant_list = None
+
+        # decode/encode plans of the input and output channels, see _channel_codec()
+        self._codecs = {}
 
         self.fieldbus_parameters = None
+        self.input_image = None
+        self.output_image = None
+
+    def _load_definitions(self) -> None:
+        """Builds the parameter, diagnosis and variant tables on first access"""
+        with _DEFINITIONS_LOCK:
+            if self._definitions is None:
+                return
+            module_dicts, variant_list = self._definitions.load()
+            if self._module_dicts is None:
+                self._module_dicts = module_dicts
+            if self._variant_list is None:
+                self._variant_list = variant_list
+            self._definitions = None
+
+    def shared_copy(self) -> "ApModule":
+        """Returns a new module of the same type that is not added to a system yet.
+        The new module shares the definitions (APDD information, channels, parameters,
+        diagnosis and variants) with this module, only the position in the system,
+        the register offsets and the module information are its own.
+
+        :return: New module
+        :rtype: ApModule
+        """
+        module = type(self).__new__(type(self))
+        module.__dict__.update(self.__dict__)
+        CpxModule.__init__(module, name=self.apdd_information.name)
+        module.information = None
+        module.fieldbus_parameters = None
+        module.input_image = None
+        module.output_image = None
+        # the compiled plans only depend on the shared channels
+        module._codecs = dict(self._codecs)  # pylint: disable=protected-access
+        return module
+
+    @property
+    def module_dicts(self) -> ModuleDicts:
+        """Parameters by parameter id and diagnosis by diagnosis id of the module"""
+        if self._module_dicts is None:
+            self._load_definitions()
+        return self._module_dicts
+
+    @module_dicts.setter
+    def module_dicts(self, value: ModuleDicts) -> None:
+        self._module_dicts = value
+
+    @property
+    def variant_list(self) -> list:
+        """Variants that are described in the APDD of the module"""
+        if self._variant_list is None:
+            self._load_definitions()
+        return self._variant_list
+
+    @variant_list.setter
+    def variant_list(self, value: list) -> None:
+        self._variant_list = value
 
     def __repr__(self):
         return f"{self.name} (idx: {self.position}, type: {self.apdd_information.module_type})"
@@ -162,6 +259,16 @@ class ApModule(CpxModule):
 
     def _configure(self, base: CpxBase, position: int) -> None:
         """This function is used by CpxBase to setup the system."""
+        self._configure_registers(base, position)
+
+        # IO-Link special parameter
+        if self.apdd_information.product_category == ProductCategory.IO_LINK.value:
+            self.fieldbus_parameters = self.read_fieldbus_parameters()
+
+    def _configure_registers(self, base, position: int) -> None:
+        """Sets up the register layout of the module in base without accessing the
+        system. The base must provide the next_output_register, next_input_register
+        and next_diagnosis_register."""
         super()._configure(base=base, position=position)
 
         self.system_entry_registers.diagnosis = self.base.next_diagnosis_register
@@ -170,138 +277,124 @@ class ApModule(CpxModule):
         self.base.next_input_register += div_ceil(self.information.input_size, 2)
         self.base.next_diagnosis_register += 6  # always 6 registers per module
 
-        # IO-Link special parameter
-        if self.apdd_information.product_category == ProductCategory.IO_LINK.value:
-            self.fieldbus_parameters = self.read_fieldbus_parameters()
-
-    @staticmethod
-    def _convert_datum_to_bytes(channel: Channel, datum) -> bytes:
-        """Convert a datum of a single channel (e.g. in a case of an array) into bytes"""
-        if channel.byte_swap_needed:
-            byteorder = "little"
+    def _channel_codec(self, direction: str) -> ChannelCodec:
+        """Returns the compiled codec of the "inputs" or "outputs" channels. It is
+        compiled again only if the channel list was replaced."""
+        channels = getattr(self.channels, direction)
+        codec = self._codecs.get(direction)
+        if codec is None or codec.channels is not channels:
+            codec = ChannelCodec(channels)
+            self._codecs[direction] = codec
+        return codec
+
+    def _read_input_data(self, length: int, register: int = None) -> bytes:
+        """Read the input registers of the module, or length registers from register
+        on. If the base provides an input process image, the data is taken from the
+        latest snapshot instead of the device."""
+        if register is None:
+            register = self.system_entry_registers.inputs
+        if self.input_image is not None:
+            data = self.input_image.read(register, length)
+            if data is not None:
+                return data
+        return self.base.read_reg_data(register, length)
+
+    def _read_output_data(self, register: int, length: int) -> bytes:
+        """Read output registers of the module. If the base provides an output
+        shadow image, the data is taken from the shadow."""
+        if self.output_image is not None:
+            return self.output_image.read(register, length)
+        return self.base.read_reg_data(register, length)
+
+    def _write_output_data(self, data: bytes, register: int) -> None:
+        """Write output registers of the module. If the base provides an output
+        shadow image, the data is flushed with the next cycle or immediately if the
+        IOThread of the base stopped."""
+        if self.output_image is not None:
+            self.output_image.write(data, register)
+            if self.base.io_thread_stopped():
+                self.base.flush_outputs()
         else:
-            byteorder = "big"
-        if channel.data_type == "BOOL":
-            return (int(datum) << (channel.bit_offset % 8)).to_bytes(
-                1, byteorder=byteorder
+            self.base.write_reg_data(data, register)
+
+    def _split_io_link_input_data(self, data: bytes) -> list:
+        """Split the input data of an IO-Link master into the data of each port"""
+        # IO-Link splits into byte_channel_size chunks. Assumes all channels are the same
+        byte_channel_size = self.channels.inouts[0].array_size
+        # for IO-Link only the channels.inouts are relevant, cut to the correct size
+        data = data[: len(self.channels.inouts * byte_channel_size)]
+
+        channels = [
+            data[i : i + byte_channel_size]
+            for i in range(0, len(data), byte_channel_size)
+        ]
+
+        # cut to actual IO-Link device size if available
+        return [
+            (
+                (c[: self.fieldbus_parameters[i]["Input data length"]])
+                if self.fieldbus_parameters[i]["Input data length"] > 0
+                else None
             )
-        if channel.data_type == "INT8":
-            return datum.to_bytes(1, byteorder=byteorder, signed=True)
-        if channel.data_type == "UINT8":
-            return datum.to_bytes(1, byteorder=byteorder)
-        if channel.data_type == "INT16":
-            return datum.to_bytes(2, byteorder=byteorder, signed=True)
-        if channel.data_type == "UINT16":
-            return datum.to_bytes(2, byteorder=byteorder)
-        raise NotImplementedError(
-            f"Output data type {channel.data_type} is not implemented"
-        )
+            for i, c in enumerate(channels)
+        ]
 
-    @staticmethod
-    def _convert_channel_data_to_bytes(channel: Channel, new_data, prev_data) -> None:
-        """Convert the new_data with the given channel information to a byte(s)
-        and insert them into the prev_data at the given channel bit_offset position
-        """
-        current_offset = channel.bit_offset
-        start_index = current_offset // 8
-        if channel.array_size:
-            current_channel = copy.deepcopy(channel)
-            for i in range(channel.array_size):
-                start_index = (
-                    current_offset + i * (channel.bits // channel.array_size)
-                ) // 8
-                current_channel.bit_offset = channel.bit_offset + i * (
-                    channel.bits // channel.array_size
-                )
-                values = ApModule._convert_datum_to_bytes(current_channel, new_data[i])
-                if channel.data_type == "BOOL":
-                    # mask out bit for bools only
-                    prev_data[start_index] = values[0] | (
-                        prev_data[start_index] & ~(1 << current_channel.bit_offset)
-                    )
-                else:
-                    for offset, val in enumerate(values):
-                        prev_data[start_index + offset] = val
-        else:
-            if isinstance(new_data, (list, tuple, dict)):
-                raise TypeError(
-                    f"Type {type(new_data)} is not supported for channel type {channel.data_type}"
-                )
-            values = ApModule._convert_datum_to_bytes(channel, new_data)
-            if channel.data_type == "BOOL":
-                # mask out bit for bools only
-                prev_data[start_index] = values[0] | (
-                    prev_data[start_index] & ~(1 << (channel.bit_offset % 8))
-                )
-            else:
-                for offset, val in enumerate(values):
-                    prev_data[start_index + offset] = val
+    def _encode_output_channels(self, data: list[Any]) -> bytearray:
+        """Convert the values of all output channels into the output data of the module"""
+        prev_data = bytearray(self.output_byte_size)
+        self._channel_codec("outputs").encode(data, prev_data)
+        return prev_data
+
+    def _output_channel_span(self, channel: int) -> tuple[int, int]:
+        """Return (register offset, size in bytes) of the registers that contain
+        the output channel"""
+        output_index = self.channels.outputs[channel].bit_offset // 16
+        # add one to the size if the output_index was rounded down
+        size = (
+            div_ceil(
+                self.channels.outputs[channel].bit_offset
+                + self.channels.outputs[channel].bits,
+                16,
+            )
+            * 2
+        ) - output_index * 2
+        return output_index, size
+
+    def _encode_output_channel(
+        self, channel: int, value: Any, old_data: bytes
+    ) -> bytes:
+        """Insert the value of one output channel into old_data, the current content of
+        the registers given by _output_channel_span(), and return the new content"""
+        output_index, size = self._output_channel_span(channel)
+        prev_data = bytearray(self.output_byte_size)
+        for i in range(size):
+            prev_data[i + output_index * 2] = old_data[i]
+        self._channel_codec("outputs").encode_channel(channel, value, prev_data)
+        return prev_data[output_index * 2 : output_index * 2 + size]
+
+    def _pad_io_link_output_value(self, value: bytes) -> bytes:
+        """Pad an IO-Link output value to the full port size of the master"""
+        if not all(
+            c.data_type in SUPPORTED_IOL_DATATYPES
+            for c in self.channels.inputs + self.channels.outputs + self.channels.inouts
+        ):
+            raise TypeError("Datatypes are not supported for IO-Link modules")
 
-    @staticmethod
-    def _extract_channel_datum_from_bytes(channel: Channel, reg_data: bytes) -> Any:
-        """Interpret a single value for a given channel in the given bytes"""
-        if channel.data_type == "BOOL":
-            return (reg_data[0] >> (channel.bit_offset % 8)) & 1 == 1
-        byteorder = "<" if channel.byte_swap_needed else ">"
-        if channel.data_type == "INT8":
-            decode_string = byteorder + "b"
-        elif channel.data_type == "UINT8":
-            decode_string = byteorder + "B"
-        elif channel.data_type == "INT16":
-            decode_string = byteorder + "h"
-        elif channel.data_type == "UINT16":
-            decode_string = byteorder + "H"
-        else:
-            raise NotImplementedError(f"Data type {channel.data_type} is not supported")
-        return struct.unpack(decode_string, reg_data)[0]
+        byte_channel_size = self.channels.inouts[0].array_size
 
-    @staticmethod
-    def _extract_channel_list_data_from_bytes(
-        channel_description: list[Channel], reg_data: bytes
-    ) -> list:
-        """Interpret the bytes as the channels in the channel_description"""
-        result = []
-        for channel in channel_description:
-            if channel.data_type not in ("BOOL", "UINT8", "INT8", "UINT16", "INT16"):
-                raise NotImplementedError(
-                    f"Data type {channel.data_type} is not implemented"
-                )
-            pos = channel.bit_offset // 8
-            if channel.data_type in ("UINT8", "INT8", "BOOL"):
-                entry_size = 1
-            else:
-                assert channel.data_type in ("UINT16", "INT16")
-                entry_size = 2
-            if channel.array_size:
-                array = []
-                cloned_channel = copy.deepcopy(channel)
-                for i in range(0, channel.array_size):
-                    if channel.data_type == "BOOL":
-                        # in an array the channel bit offset stays constant
-                        cloned_channel.bit_offset = channel.bit_offset + i
-                        pos = cloned_channel.bit_offset // 8
-                        array.append(
-                            ApModule._extract_channel_datum_from_bytes(
-                                cloned_channel, reg_data[pos : pos + entry_size]
-                            )
-                        )
-                    else:
-                        array.append(
-                            ApModule._extract_channel_datum_from_bytes(
-                                channel,
-                                reg_data[
-                                    pos + i * entry_size : pos + (i + 1) * entry_size
-                                ],
-                            )
-                        )
-                result.append(array)
-            else:
-                result.append(
-                    ApModule._extract_channel_datum_from_bytes(
-                        channel, reg_data[pos : pos + entry_size]
-                    )
-                )
-        return result
+        if len(value) != byte_channel_size:
+            Logging.logger.info(
+                f"Length of value {value} does not match master channel size"
+                f" of {byte_channel_size} bytes. Shorter values must be padded left!"
+            )
+
+        # add missing bytes for full modbus register
+        if len(value) % 2:
+            value += b"\x00"
+        # add missing bytes for full master length
+        if len(value) < byte_channel_size:
+            value += b"\x00" * (byte_channel_size - len(value))
+        return value
 
     @CpxBase.require_base
     def read_output_channels(self) -> list:
@@ -318,62 +411,81 @@ class ApModule(CpxModule):
         values = []
 
         if self.channels.outputs:
-            data = self.base.read_reg_data(
+            data = self._read_output_data(
                 self.system_entry_registers.outputs, byte_output_size
             )
 
-            values = ApModule._extract_channel_list_data_from_bytes(
-                self.channels.outputs, data
-            )
+            values = self._channel_codec("outputs").decode(data)
 
         Logging.logger.info(f"{self.name}: Reading output channels: {values}")
         return values
 
+    def _array_codec(self, input_bits: int) -> ChannelCodec:
+        """Returns the compiled codec of the input channels followed by the output
+        channels, whose data starts input_bits after the input data"""
+        inputs, outputs = self.channels.inputs, self.channels.outputs
+        cached = self._codecs.get("all")
+        if (
+            cached is None
+            or cached[0] is not inputs
+            or cached[1] is not outputs
+            or cached[2] != input_bits
+        ):
+            channels = inputs + [
+                replace(c, bit_offset=c.bit_offset + input_bits) for c in outputs
+            ]
+            cached = (inputs, outputs, input_bits, ChannelCodec(channels))
+            self._codecs["all"] = cached
+        return cached[3]
+
+    def _read_channels_array(self):
+        """Read all channels from module and decode them into a numpy array"""
+        if self.apdd_information.product_category == ProductCategory.IO_LINK.value:
+            raise NotImplementedError(
+                f"{self}: as_array is not supported for IO-Link modules"
+            )
+        data = b""
+        if self.channels.inputs:
+            data = self._read_input_data(div_ceil(self.information.input_size, 2))
+        input_bits = len(data) * 8
+        if self.channels.outputs:
+            data += self._read_output_data(
+                self.system_entry_registers.outputs,
+                div_ceil(self.information.output_size, 2),
+            )
+        return self._array_codec(input_bits).decode_array(data)
+
     @CpxBase.require_base
-    def read_channels(self) -> list:
+    def read_channels(self, as_array: bool = False) -> list:
         """Read all channels from module and interpret them as the module intends.
 
+        With as_array=True the channels are decoded with numpy (optional dependency,
+        pip install festo-cpx-io[numpy]). If all channels are single BOOL channels the
+        result is a bool array, otherwise a structured record with one field
+        "channel_<index>" per channel. See ChannelCodec.decode_array().
+
+        :param as_array: (optional) Return a numpy array instead of a list
+        :type as_array: bool
         :return: List of values of the channels
         :rtype: list
         """
         self._check_function_supported(inspect.currentframe().f_code.co_name)
+        if as_array:
+            return self._read_channels_array()
         byte_input_size = div_ceil(self.information.input_size, 2)
         values = []
 
         if self.channels.inputs:
-            data = self.base.read_reg_data(
-                self.system_entry_registers.inputs, byte_input_size
-            )
+            data = self._read_input_data(byte_input_size)
 
             if self.apdd_information.product_category == ProductCategory.IO_LINK.value:
-                # IO-Link splits into byte_channel_size chunks. Assumes all channels are the same
-                byte_channel_size = self.channels.inouts[0].array_size
-                # for IO-Link only the channels.inouts are relevant, cut to the correct size
-                data = data[: len(self.channels.inouts * byte_channel_size)]
-
-                channels = [
-                    data[i : i + byte_channel_size]
-                    for i in range(0, len(data), byte_channel_size)
-                ]
-
-                # cut to actual IO-Link device size if available
-                channel_data = [
-                    (
-                        (c[: self.fieldbus_parameters[i]["Input data length"]])
-                        if self.fieldbus_parameters[i]["Input data length"] > 0
-                        else None
-                    )
-                    for i, c in enumerate(channels)
-                ]
-
+                channel_data = self._split_io_link_input_data(data)
                 Logging.logger.info(
                     f"{self.name}: Reading IO-Link channels: {channel_data}"
                 )
                 return channel_data
 
-            values = ApModule._extract_channel_list_data_from_bytes(
-                self.channels.inputs, data
-            )
+            values = self._channel_codec("inputs").decode(data)
 
         Logging.logger.info(f"{self.name}: Reading input channels: {values}")
 
@@ -408,15 +520,36 @@ class ApModule(CpxModule):
         """
         self._check_function_supported(inspect.currentframe().f_code.co_name)
 
-        channel_count = (
-            len([c for c in self.channels.inputs if c.direction == "in"])
-            + len([c for c in self.channels.outputs if c.direction == "out"])
-            + len(self.channels.inouts)
-        )
-
-        channel_range_check(channel, channel_count)
+        if self.apdd_information.product_category == ProductCategory.IO_LINK.value:
+            channel_count = (
+                len([c for c in self.channels.inputs if c.direction == "in"])
+                + len([c for c in self.channels.outputs if c.direction == "out"])
+                + len(self.channels.inouts)
+            )
+            channel_range_check(channel, channel_count)
+            return self.read_channels()[channel]
+
+        inputs = self._channel_codec("inputs")
+        outputs = self._channel_codec("outputs")
+        channel_range_check(channel, len(inputs) + len(outputs))
+
+        # read only the registers that contain the channel
+        if channel < len(inputs):
+            offset, length = inputs.span(channel)
+            data = self._read_input_data(
+                length, self.system_entry_registers.inputs + offset
+            )
+            value = inputs.decode_channel(channel, data, offset)
+        else:
+            index = channel - len(inputs)
+            offset, length = outputs.span(index)
+            data = self._read_output_data(
+                self.system_entry_registers.outputs + offset, length
+            )
+            value = outputs.decode_channel(index, data, offset)
 
-        return self.read_channels()[channel]
+        Logging.logger.info(f"{self.name}: Reading channel {channel}: {value}")
+        return value
 
     @CpxBase.require_base
     def write_channels(self, data: list[Any]) -> None:
@@ -438,10 +571,9 @@ class ApModule(CpxModule):
         if self.apdd_information.product_category == ProductCategory.IO_LINK.value:
             self.__handle_io_link_on_write_channels(data)
         else:
-            prev_data = bytearray(self.output_byte_size)
-            for idx, channel in enumerate(self.channels.outputs):
-                ApModule._convert_channel_data_to_bytes(channel, data[idx], prev_data)
-            self.base.write_reg_data(prev_data, self.system_entry_registers.outputs)
+            self._write_output_data(
+                self._encode_output_channels(data), self.system_entry_registers.outputs
+            )
 
     def __handle_io_link_on_write_channels(self, data):
         """Handles a write_channels of a list with bytes"""
@@ -457,7 +589,7 @@ class ApModule(CpxModule):
             )
 
         all_register_data = b"".join(data)
-        self.base.write_reg_data(all_register_data, self.system_entry_registers.outputs)
+        self._write_output_data(all_register_data, self.system_entry_registers.outputs)
         Logging.logger.info(f"{self.name}: Setting IO-LINK channels to {data}")
 
     @CpxBase.require_base
@@ -478,30 +610,9 @@ class ApModule(CpxModule):
 
         # IO-Link special
         if self.apdd_information.product_category == ProductCategory.IO_LINK.value:
-            if not all(
-                c.data_type in SUPPORTED_IOL_DATATYPES
-                for c in self.channels.inputs
-                + self.channels.outputs
-                + self.channels.inouts
-            ):
-                raise TypeError("Datatypes are not supported for IO-Link modules")
-
+            value = self._pad_io_link_output_value(value)
             byte_channel_size = self.channels.inouts[0].array_size
-
-            if len(value) != byte_channel_size:
-                Logging.logger.info(
-                    f"Length of value {value} does not match master channel size"
-                    f" of {byte_channel_size} bytes. Shorter values must be padded left!"
-                )
-
-            # add missing bytes for full modbus register
-            if len(value) % 2:
-                value += b"\x00"
-            # add missing bytes for full master length
-            if len(value) < byte_channel_size:
-                value += b"\x00" * (byte_channel_size - len(value))
-
-            self.base.write_reg_data(
+            self._write_output_data(
                 value,
                 self.system_entry_registers.outputs + byte_channel_size // 2 * channel,
             )
@@ -509,28 +620,13 @@ class ApModule(CpxModule):
                 f"{self.name}: Setting IO-Link channel {channel} to {value}"
             )
         else:
-            output_index = self.channels.outputs[channel].bit_offset // 16
-            # add one to the size if the output_index was rounded down
-            size = (
-                div_ceil(
-                    self.channels.outputs[channel].bit_offset
-                    + self.channels.outputs[channel].bits,
-                    16,
-                )
-                * 2
-            ) - output_index * 2
-            prev_data = bytearray(self.output_byte_size)
-            old_data = self.base.read_reg_data(
-                self.system_entry_registers.outputs + output_index, size
-            )
-            for i in range(size):
-                prev_data[i + output_index * 2] = old_data[i]
-            ApModule._convert_channel_data_to_bytes(
-                self.channels.outputs[channel], value, prev_data
+            output_index, size = self._output_channel_span(channel)
+            old_data = self._read_output_data(
+                self.system_entry_registers.outputs + output_index, size // 2
             )
             # only write necessary register
-            self.base.write_reg_data(
-                prev_data[output_index * 2 : output_index * 2 + size],
+            self._write_output_data(
+                self._encode_output_channel(channel, value, old_data),
                 self.system_entry_registers.outputs + output_index,
             )
 
@@ -626,7 +722,7 @@ class ApModule(CpxModule):
             value_str = value
             value = parameter.enums.enum_values.get(value)
             # overwrite the parameter datatype from enum
-            parameter.data_type = parameter.enums.data_type
+            parameter = replace(parameter, data_type=parameter.enums.data_type)
 
             if value is None:
                 raise TypeError(
@@ -680,7 +776,7 @@ class ApModule(CpxModule):
         # PARAMETER HANDLING
         parameter = self.get_parameter_from_identifier(parameter)
         if parameter.enums:  # overwrite the parameter datatype from enum
-            parameter.data_type = parameter.enums.data_type
+            parameter = replace(parameter, data_type=parameter.enums.data_type)
 
         # INSTANCE HANDLING
         instances = self._check_instances(parameter, instances)
@@ -897,27 +993,27 @@ class ApModule(CpxModule):
             return channels_pqi
         return channels_pqi[channel]
 
-    @CpxBase.require_base
-    def read_fieldbus_parameters(self) -> list[dict]:
-        """Read all fieldbus parameters (status/information) for all channels.
-
-        :return: a dict of parameters for every channel.
-        :rtype: list[dict]
-        """
-        self._check_function_supported(inspect.currentframe().f_code.co_name)
-
-        params = {
-            "port_status_info": self.module_dicts.parameters.get(20074),
-            "revision_id": self.module_dicts.parameters.get(20075),
-            "transmission_rate": self.module_dicts.parameters.get(20076),
-            "actual_cycle_time": self.module_dicts.parameters.get(20077),
-            "actual_vendor_id": self.module_dicts.parameters.get(20078),
-            "actual_device_id": self.module_dicts.parameters.get(20079),
-            "iolink_input_data_length": self.module_dicts.parameters.get(20108),
-            "iolink_output_data_length": self.module_dicts.parameters.get(20109),
-        }
-        channel_params = []
+    def _fieldbus_parameter_list(self) -> list:
+        """Returns the parameters that are read for every port by read_fieldbus_parameters
+        in the order expected by _fieldbus_parameter_dict"""
+        return [
+            self.module_dicts.parameters.get(parameter_id)
+            for parameter_id in (
+                20074,  # port status info
+                20075,  # revision id
+                20076,  # transmission rate
+                20077,  # actual cycle time
+                20078,  # actual vendor id
+                20079,  # actual device id
+                20108,  # io-link input data length
+                20109,  # io-link output data length
+            )
+        ]
 
+    @staticmethod
+    def _fieldbus_parameter_dict(values: list) -> dict:
+        """Interpret the parameter values of one port read in the order of
+        _fieldbus_parameter_list"""
         port_status_dict = {
             0: "NO_DEVICE",
             1: "DEACTIVATED",
@@ -930,50 +1026,33 @@ class ApModule(CpxModule):
             255: "NOT_AVAILABLE",
         }
         transmission_rate_dict = {0: "not detected", 1: "COM1", 2: "COM2", 3: "COM3"}
+        return {
+            "Port status information": port_status_dict.get(values[0]),
+            "Revision ID": values[1],
+            "Transmission rate": transmission_rate_dict.get(values[2]),
+            "Actual cycle time [in 100 us]": values[3],
+            "Actual vendor ID": values[4],
+            "Actual device ID": values[5],
+            "Input data length": values[6],
+            "Output data length": values[7],
+        }
+
+    @CpxBase.require_base
+    def read_fieldbus_parameters(self) -> list[dict]:
+        """Read all fieldbus parameters (status/information) for all channels.
 
+        :return: a dict of parameters for every channel.
+        :rtype: list[dict]
+        """
+        self._check_function_supported(inspect.currentframe().f_code.co_name)
+
+        params = self._fieldbus_parameter_list()
+        channel_params = []
         for channel_item in range(4):
-            port_status_information = port_status_dict.get(
-                self.base.read_parameter(
-                    self.position, params.get("port_status_info"), channel_item
-                ),
-            )
-            revision_id = self.base.read_parameter(
-                self.position, params.get("revision_id"), channel_item
-            )
-            transmission_rate = transmission_rate_dict.get(
-                self.base.read_parameter(
-                    self.position, params.get("transmission_rate"), channel_item
-                ),
-            )
-            actual_cycle_time = self.base.read_parameter(
-                self.position, params.get("actual_cycle_time"), channel_item
-            )
-            actual_vendor_id = self.base.read_parameter(
-                self.position, params.get("actual_vendor_id"), channel_item
-            )
-            actual_device_id = self.base.read_parameter(
-                self.position, params.get("actual_device_id"), channel_item
-            )
-            input_data_length = self.base.read_parameter(
-                self.position, params.get("iolink_input_data_length"), channel_item
-            )
-            output_data_length = self.base.read_parameter(
-                self.position,
-                params.get("iolink_output_data_length"),
-                channel_item,
-            )
-            channel_params.append(
-                {
-                    "Port status information": port_status_information,
-                    "Revision ID": revision_id,
-                    "Transmission rate": transmission_rate,
-                    "Actual cycle time [in 100 us]": actual_cycle_time,
-                    "Actual vendor ID": actual_vendor_id,
-                    "Actual device ID": actual_device_id,
-                    "Input data length": input_data_length,
-                    "Output data length": output_data_length,
-                }
-            )
+            values = [
+                self.base.read_parameter(self.position, p, channel_item) for p in params
+            ]
+            channel_params.append(self._fieldbus_parameter_dict(values))
 
         Logging.logger.info(
             f"{self.name}: Reading fieldbus parameters for all channels: {channel_params}"
@@ -998,7 +1077,63 @@ class ApModule(CpxModule):
 
         return channels
 
+    @staticmethod
+    def _decode_isdu_data(ret: bytes, actual_length: int, data_type: str) -> Any:
+        """Interpret the data read from the ISDU data registers as data_type"""
+        if data_type == "raw":
+            return ret[:actual_length]
+        if data_type == "str":
+            return ret.decode("ascii").split("\x00", 1)[0]
+        ret = ret[:actual_length]
+        if data_type == "uint":
+            return int.from_bytes(ret, byteorder="big")
+        if data_type in ["sint", "int"]:
+            return int.from_bytes(ret, byteorder="big", signed=True)
+        if data_type == "bool":
+            return bool.from_bytes(ret, byteorder="big")
+        if data_type == "float":
+            return struct.unpack("!f", ret)[0]
+        # this is unnecessary but required for consistent return statements
+        raise TypeError(f"Datatype '{data_type}' is not supported by read_isdu()")
+
+    @staticmethod
+    def _encode_isdu_data(data: Union[bytes, str, int, bool]) -> tuple:
+        """Convert data for an ISDU write and return (data, length) as bytes"""
+        if isinstance(data, bytes):
+            length = (len(data)).to_bytes(2, "little")
+
+        elif isinstance(data, str):
+            length = (len(data)).to_bytes(2, "little")
+            data = data.encode(encoding="ascii")
+
+        elif isinstance(data, bool):
+            length = (1).to_bytes(2, "little")
+            data = data.to_bytes(1, byteorder="big")
+
+        elif isinstance(data, int):
+            # calculate bytelength of integer
+            length_int = (data.bit_length() + 7) // 8
+            if length_int == 0:
+                length_int = 1
+            length = length_int.to_bytes(2, "little")
+
+            # negative data needs to be filled with 0xff on uneven bytes
+            if data < 0 and length_int % 2:
+                data = data.to_bytes(length_int + 1, byteorder="big", signed=data < 0)
+            else:
+                data = data.to_bytes(length_int, byteorder="big", signed=data < 0)
+
+        elif isinstance(data, float):
+            data = struct.pack("!f", data)
+            length = len(data).to_bytes(2, "little")
+
+        else:
+            raise TypeError(f"Datatype '{type(data)}' is not supported by write_isdu()")
+
+        return data, length
+
     @CpxBase.require_base
+    @measured("isdu", "isdu", owner="base")
     def read_isdu(
         self,
         channels: Union[list[int], int],
@@ -1025,100 +1160,21 @@ class ApModule(CpxModule):
         """
         self._check_function_supported(inspect.currentframe().f_code.co_name)
 
-        results = []
-
-        index = index.to_bytes(2, "little")
-        subindex = subindex.to_bytes(2, "little")
-
-        channels = self.cast_channel_argument_to_list(channels=channels)
-
-        for channel in channels:
-            module_index = (self.position + 1).to_bytes(2, "little")
-            channel = (channel + 1).to_bytes(2, "little")
-            length = (0).to_bytes(2, "little")  # always zero when reading
-
-            # command: 50 Read(with byte swap), 51 write(with byte swap), 100 read, 101 write
-            # it's easiest if we stay on 100 and byteorder "big"
-            command = (100).to_bytes(2, "little")
-
-            # checking the availability in the SUPPORTED_ISDU_DATATYPES is not required but
-            # keeps the two files synchronized during development
-            if data_type not in SUPPORTED_ISDU_DATATYPES:
-                raise TypeError(
-                    f"Datatype '{data_type}' is not supported by read_isdu()"
-                )
-
-            # select module, starts with 1
-            self.base.write_reg_data(
-                module_index, ap_modbus_registers.ISDU_MODULE_NO.register_address
-            )
-            # select channel, starts with 1
-            self.base.write_reg_data(
-                channel, ap_modbus_registers.ISDU_CHANNEL.register_address
-            )
-            # select index
-            self.base.write_reg_data(
-                index, ap_modbus_registers.ISDU_INDEX.register_address
-            )
-            # select subindex
-            self.base.write_reg_data(
-                subindex, ap_modbus_registers.ISDU_SUBINDEX.register_address
-            )
-            # select length of data in bytes
-            self.base.write_reg_data(
-                length, ap_modbus_registers.ISDU_LENGTH.register_address
-            )
-            # command
-            self.base.write_reg_data(
-                command, ap_modbus_registers.ISDU_COMMAND.register_address
-            )
+        # checking the availability in the SUPPORTED_ISDU_DATATYPES is not required but
+        # keeps the two files synchronized during development
+        if data_type not in SUPPORTED_ISDU_DATATYPES:
+            raise TypeError(f"Datatype '{data_type}' is not supported by read_isdu()")
 
-            stat, cnt = 1, 0
-            while stat > 0 and cnt < 1000:
-                stat = int.from_bytes(
-                    self.base.read_reg_data(*ap_modbus_registers.ISDU_STATUS),
-                    byteorder="little",
-                )
-                cnt += 1
-            if cnt >= 1000:
-                raise CpxRequestError("ISDU data read failed")
-
-            # read back the actual length from the length register
-            actual_length = int.from_bytes(
-                self.base.read_reg_data(
-                    ap_modbus_registers.ISDU_LENGTH.register_address
-                ),
-                byteorder="little",
-            )
-
-            ret = self.base.read_reg_data(
-                ap_modbus_registers.ISDU_DATA.register_address, actual_length
+        results = []
+        for channel in self.cast_channel_argument_to_list(channels=channels):
+            ret, actual_length = run(
+                ap_protocol.read_isdu(self.position, channel, index, subindex),
+                self.base,
             )
             Logging.logger.info(
                 f"{self.name}: Reading ISDU for channel {channel}: {ret}"
             )
-
-            if data_type == "raw":
-                results.append(ret[:actual_length])
-            elif data_type == "str":
-                results.append(ret.decode("ascii").split("\x00", 1)[0])
-            elif data_type == "uint":
-                ret = ret[:actual_length]
-                results.append(int.from_bytes(ret, byteorder="big"))
-            elif data_type in ["sint", "int"]:
-                ret = ret[:actual_length]
-                results.append(int.from_bytes(ret, byteorder="big", signed=True))
-            elif data_type == "bool":
-                ret = ret[:actual_length]
-                results.append(bool.from_bytes(ret, byteorder="big"))
-            elif data_type == "float":
-                ret = ret[:actual_length]
-                results.append(struct.unpack("!f", ret)[0])
-            else:
-                # this is unnecessary but required for consistent return statements
-                raise TypeError(
-                    f"Datatype '{data_type}' is not supported by read_isdu()"
-                )
+            results.append(self._decode_isdu_data(ret, actual_length, data_type))
 
         if len(results) == 1:
             return results[0]
@@ -1126,6 +1182,7 @@ class ApModule(CpxModule):
         return results
 
     @CpxBase.require_base
+    @measured("isdu", "isdu", owner="base")
     def write_isdu(
         self,
         data: Union[bytes, str, int, bool],
@@ -1148,99 +1205,18 @@ class ApModule(CpxModule):
         """
         self._check_function_supported(inspect.currentframe().f_code.co_name)
 
-        index = (index).to_bytes(2, "little")
-        subindex = (subindex).to_bytes(2, "little")
-
+        raw, length = self._encode_isdu_data(data)
         channels = self.cast_channel_argument_to_list(channels=channels)
-
         for channel in channels:
-            module_index = (self.position + 1).to_bytes(2, "little")
-            channel = (channel + 1).to_bytes(2, "little")
-
-            if isinstance(data, bytes):
-                length = (len(data)).to_bytes(2, "little")
-                command = (101).to_bytes(2, "little")  # write without byteswap
-
-            elif isinstance(data, str):
-                length = (len(data)).to_bytes(2, "little")
-                command = (101).to_bytes(2, "little")  # write without byteswap
-                data = data.encode(encoding="ascii")
-
-            elif isinstance(data, bool):
-                length = (1).to_bytes(2, "little")
-                command = (101).to_bytes(2, "little")  # write without byteswap
-                data = data.to_bytes(1, byteorder="big")
-
-            elif isinstance(data, int):
-                # calculate bytelength of integer
-                length_int = (data.bit_length() + 7) // 8
-                if length_int == 0:
-                    length_int = 1
-                length = length_int.to_bytes(2, "little")
-                command = (101).to_bytes(2, "little")  # write without byteswap
-
-                # negative data needs to be filled with 0xff on uneven bytes
-                if data < 0 and length_int % 2:
-                    data = data.to_bytes(
-                        length_int + 1, byteorder="big", signed=data < 0
-                    )
-                else:
-                    data = data.to_bytes(length_int, byteorder="big", signed=data < 0)
-
-            elif isinstance(data, float):
-                data = struct.pack("!f", data)
-                command = (101).to_bytes(2, "little")  # write without byteswap
-                length = len(data).to_bytes(2, "little")
-
-            else:
-                raise TypeError(
-                    f"Datatype '{type(data)}' is not supported by write_isdu()"
-                )
-
-            # select module, starts with 1
-            self.base.write_reg_data(
-                module_index, ap_modbus_registers.ISDU_MODULE_NO.register_address
-            )
-            # select channel, starts with 1
-            self.base.write_reg_data(
-                channel, ap_modbus_registers.ISDU_CHANNEL.register_address
-            )
-            # select index
-            self.base.write_reg_data(
-                index, ap_modbus_registers.ISDU_INDEX.register_address
-            )
-            # select subindex
-            self.base.write_reg_data(
-                subindex, ap_modbus_registers.ISDU_SUBINDEX.register_address
-            )
-            # select length of data in bytes
-            self.base.write_reg_data(
-                length, ap_modbus_registers.ISDU_LENGTH.register_address
-            )
-            # write data to data register
-            self.base.write_reg_data(
-                data, ap_modbus_registers.ISDU_DATA.register_address
-            )
-            # command
-            self.base.write_reg_data(
-                command, ap_modbus_registers.ISDU_COMMAND.register_address
-            )
-
-        stat, cnt = 1, 0
-        while stat > 0 and cnt < 1000:
-            stat = int.from_bytes(
-                self.base.read_reg_data(*ap_modbus_registers.ISDU_STATUS),
-                byteorder="little",
-            )
-            cnt += 1
-        if cnt >= 1000:
-            raise CpxRequestError(
-                "ISDU data write failed\nThis can happen if the device denies "
-                "access to the requested isdu parameter with the given data"
+            run(
+                ap_protocol.write_isdu(
+                    self.position, channel, index, subindex, raw, length
+                ),
+                self.base,
             )
 
         Logging.logger.info(
-            f"{self.name}: Write ISDU {data} to channels {channels} ({index},{subindex})"
+            f"{self.name}: Write ISDU {raw} to channels {channels} ({index},{subindex})"
         )
 
     @CpxBase.require_base
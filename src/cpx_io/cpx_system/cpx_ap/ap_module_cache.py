@@ -0,0 +1,192 @@
+"""Persistent cache of the modules built from the APDDs"""
+
+import json
+import os
+from dataclasses import asdict
+from functools import partial
+
+from cpx_io.cpx_system.cpx_ap.ap_module import ApModule
+from cpx_io.cpx_system.cpx_ap.ap_parameter import Parameter, ParameterEnum
+from cpx_io.cpx_system.cpx_ap.builder.apdd_information_builder import Variant
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+from cpx_io.cpx_system.cpx_ap.dataclasses.apdd_information import ApddInformation
+from cpx_io.cpx_system.cpx_ap.dataclasses.module_diagnosis import ModuleDiagnosis
+from cpx_io.utils.helpers import library_version
+from cpx_io.utils.logging import Logging
+
+# increase if the stored representation of the module definitions changes
+CACHE_FORMAT = 4
+
+
+def _parameter_from_data(data: dict) -> Parameter:
+    if data is None:
+        return None
+    enums = data.get("enums")
+    return Parameter(
+        **{**data, "enums": ParameterEnum(**enums) if enums is not None else None}
+    )
+
+
+def _parameters_from_data(data: list) -> list:
+    return [_parameter_from_data(d) for d in data]
+
+
+def _diagnosis_from_data(data: list) -> list:
+    return [ModuleDiagnosis(**d) for d in data]
+
+
+def _variants_from_data(data: list) -> list:
+    return [Variant(**d) for d in data]
+
+
+def module_to_data(module: ApModule) -> dict:
+    """Returns the definitions of a freshly built module as plain data that can be
+    stored as json"""
+    inouts = module.channels.inouts
+    inputs = module.channels.inputs[: len(module.channels.inputs) - len(inouts)]
+    outputs = module.channels.outputs[: len(module.channels.outputs) - len(inouts)]
+    switch = module.variant_switch_parameter
+    return {
+        "apdd_information": asdict(module.apdd_information),
+        "channels": [[asdict(c) for c in group] for group in (inputs, outputs, inouts)],
+        "parameters": [asdict(p) for p in module.module_dicts.parameters.values()],
+        "diagnosis": [asdict(d) for d in module.module_dicts.diagnosis.values()],
+        "variants": [asdict(v) for v in module.variant_list],
+        "variant_switch_parameter": asdict(switch) if switch is not None else None,
+    }
+
+
+def module_from_data(data: dict) -> ApModule:
+    """Returns a new module built from the plain data of module_to_data(). The
+    parameter, diagnosis and variant tables are only built when they are accessed."""
+    return ApModule(
+        ApddInformation(**data["apdd_information"]),
+        tuple([Channel(**c) for c in group] for group in data["channels"]),
+        partial(_parameters_from_data, data["parameters"]),
+        partial(_diagnosis_from_data, data["diagnosis"]),
+        partial(_variants_from_data, data["variants"]),
+        _parameter_from_data(data["variant_switch_parameter"]),
+    )
+
+
+class ApModuleCache:
+    """Cache of freshly built modules (channels, parameters, diagnosis and variants)
+    keyed by (order_text, fw_version, module_code). It is stored as json in the
+    apdd_path, so warm startups skip parsing the APDD and building the module.
+
+    The file only contains the field values of the definition dataclasses, loading it
+    never executes code or restores other objects than these definitions.
+
+    Every entry remembers the modification time and size of the APDD it was built
+    from and is rebuilt when the APDD changes. The cache is discarded completely when
+    the library version changes. Every get() returns a new module object.
+    """
+
+    FILE_NAME = "module_definitions.json"
+
+    def __init__(self, apdd_path: str):
+        """Constructor of the ApModuleCache class. The cache file is read immediately.
+
+        :param apdd_path: Path where the APDDs and the cache file are saved
+        :type apdd_path: str
+        """
+        self.path = os.path.join(apdd_path, self.FILE_NAME)
+        self._header = {"format": CACHE_FORMAT, "version": library_version()}
+        self._entries = {}
+        self._dirty = False
+        self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            if {k: content.get(k) for k in self._header} != self._header:
+                Logging.logger.debug(f"Discarding outdated cache {self.path}")
+                return
+            self._entries = {
+                tuple(entry["key"]): (tuple(entry["stamp"]), entry["module"])
+                for entry in content["modules"]
+            }
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            Logging.logger.warning(f"Ignoring unreadable cache {self.path}: {e}")
+            self._entries = {}
+
+    @staticmethod
+    def _stamp(apdd_file: str) -> tuple:
+        """Modification time and size that identify the content of the APDD"""
+        try:
+            stat = os.stat(apdd_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, key: tuple, apdd_file: str) -> ApModule:
+        """Returns a new module built from the cached definition or None if there is
+        no valid entry for key.
+
+        :param key: (order_text, fw_version, module_code) of the module
+        :type key: tuple
+        :param apdd_file: Path of the APDD the module is built from
+        :type apdd_file: str
+        :return: Module that is not yet added to a system or None
+        :rtype: ApModule
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stamp, data = entry
+        if stamp != self._stamp(apdd_file):
+            Logging.logger.debug(f"Cached module {key} is outdated")
+            return None
+        try:
+            return module_from_data(data)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            # e.g. fields that were renamed since the entry was written
+            Logging.logger.debug(f"Dropping unreadable cache entry {key}: {e}")
+            del self._entries[key]
+            self._dirty = True
+            return None
+
+    def put(self, key: tuple, apdd_file: str, module: ApModule) -> None:
+        """Stores the definition of a freshly built module that is not yet added to a
+        system. Nothing is stored if the APDD file does not exist.
+
+        :param key: (order_text, fw_version, module_code) of the module
+        :type key: tuple
+        :param apdd_file: Path of the APDD the module is built from
+        :type apdd_file: str
+        :param module: Module as returned by build_ap_module()
+        :type module: ApModule
+        """
+        stamp = self._stamp(apdd_file)
+        if stamp is None:
+            return
+        self._entries[key] = (stamp, module_to_data(module))
+        self._dirty = True
+
+    def save(self) -> None:
+        """Writes the cache file if entries were added or removed"""
+        if not self._dirty:
+            return
+        content = {
+            **self._header,
+            "modules": [
+                {"key": list(key), "stamp": list(stamp), "module": data}
+                for key, (stamp, data) in self._entries.items()
+            ],
+        }
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(content, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            Logging.logger.warning(f"Could not save cache {self.path}: {e}")
+            return
+        self._dirty = False
+        Logging.logger.debug(f"Saved {len(self._entries)} modules to {self.path}")
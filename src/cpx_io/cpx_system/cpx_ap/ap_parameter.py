@@ -7,7 +7,7 @@ from typing import Any
 from cpx_io.utils.logging import Logging
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Parameter:
     """Parameter dataclass"""
 
@@ -33,7 +33,7 @@ class Parameter:
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ParameterEnum:
     """ParameterEnum dataclass"""
 
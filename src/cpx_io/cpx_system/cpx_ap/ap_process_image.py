@@ -0,0 +1,212 @@
+"""Process image of the CPX-AP system"""
+
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable
+
+from cpx_io.cpx_system.cpx_base import MAX_READ_REGISTERS, MAX_WRITE_REGISTERS
+from cpx_io.utils.helpers import div_ceil
+
+
+@dataclass(frozen=True)
+class ProcessImageSnapshot:
+    """Consistent copy of a process data area taken in one cycle"""
+
+    data: bytes
+    timestamp: float
+    cycle: int
+
+
+class InputProcessImage:
+    """Input process image of the CPX-AP system. The whole contiguous input area is read
+    with as few requests as possible in every cycle and the modules are served from the
+    latest snapshot instead of reading their registers individually."""
+
+    def __init__(self, start_register: int, length: int):
+        """Constructor of the InputProcessImage class.
+
+        :param start_register: First register of the input area
+        :type start_register: int
+        :param length: Number of registers of the input area
+        :type length: int
+        """
+        self.start_register = start_register
+        self.length = length
+        self.snapshot = None
+        self._cycle = 0
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(start_register={self.start_register}, "
+            f"length={self.length}, cycle={self._cycle})"
+        )
+
+    def update(
+        self, read_reg_data: Callable[[int, int], bytes]
+    ) -> ProcessImageSnapshot:
+        """Reads the complete input area and replaces the current snapshot. If reading
+        fails, the snapshot is invalidated so that no stale data is served.
+
+        :param read_reg_data: Function that reads (register, length) and returns bytes
+        :type read_reg_data: Callable
+        :return: The new snapshot
+        :rtype: ProcessImageSnapshot
+        """
+        data = bytearray()
+        try:
+            for offset in range(0, self.length, MAX_READ_REGISTERS):
+                count = min(MAX_READ_REGISTERS, self.length - offset)
+                data += read_reg_data(self.start_register + offset, count)
+        except Exception:
+            self.snapshot = None
+            raise
+
+        self._cycle += 1
+        self.snapshot = ProcessImageSnapshot(
+            data=bytes(data), timestamp=time.time(), cycle=self._cycle
+        )
+        return self.snapshot
+
+    def read(self, register: int, length: int) -> bytes | None:
+        """Returns the registers from the latest snapshot or None if there is no valid
+        snapshot or the registers are not part of the image.
+
+        :param register: First register to read
+        :type register: int
+        :param length: Number of registers to read
+        :type length: int
+        :return: Register(s) content
+        :rtype: bytes | None
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        offset = register - self.start_register
+        if offset < 0 or offset + length > self.length:
+            return None
+        return snapshot.data[offset * 2 : (offset + length) * 2]
+
+
+class OutputProcessImage:
+    """Shadow image of the output area of the CPX-AP system. Writes only update the
+    shadow and mark the touched registers as dirty. All dirty registers are flushed to
+    the device with a minimal number of write requests once per cycle."""
+
+    def __init__(self, start_register: int, length: int):
+        """Constructor of the OutputProcessImage class.
+
+        :param start_register: First register of the output area
+        :type start_register: int
+        :param length: Number of registers of the output area
+        :type length: int
+        """
+        self.start_register = start_register
+        self.length = length
+        self._data = bytearray(length * 2)
+        self._dirty = set()
+        self._lock = Lock()
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(start_register={self.start_register}, "
+            f"length={self.length}, dirty={len(self._dirty)})"
+        )
+
+    @property
+    def dirty(self) -> bool:
+        """True if there are writes that are not flushed to the device yet"""
+        return bool(self._dirty)
+
+    def load(self, read_reg_data: Callable[[int, int], bytes]) -> None:
+        """Reads the current output area from the device into the shadow image.
+
+        :param read_reg_data: Function that reads (register, length) and returns bytes
+        :type read_reg_data: Callable
+        """
+        data = bytearray()
+        for offset in range(0, self.length, MAX_READ_REGISTERS):
+            count = min(MAX_READ_REGISTERS, self.length - offset)
+            data += read_reg_data(self.start_register + offset, count)
+        with self._lock:
+            self._data[:] = data
+            self._dirty.clear()
+
+    def _check_range(self, register: int, byte_length: int) -> int:
+        """Returns the byte offset of register in the image or raises IndexError"""
+        offset = (register - self.start_register) * 2
+        if offset < 0 or offset + byte_length > len(self._data):
+            raise IndexError(
+                f"Register range {register}..{register + div_ceil(byte_length, 2)} "
+                f"is not part of {self}"
+            )
+        return offset
+
+    def read(self, register: int, length: int) -> bytes:
+        """Returns the registers from the shadow image including unflushed writes.
+
+        :param register: First register to read
+        :type register: int
+        :param length: Number of registers to read
+        :type length: int
+        :return: Register(s) content
+        :rtype: bytes
+        """
+        offset = self._check_range(register, length * 2)
+        with self._lock:
+            return bytes(self._data[offset : offset + length * 2])
+
+    def write(self, data: bytes, register: int) -> None:
+        """Writes data into the shadow image and marks the registers as dirty.
+
+        :param data: data to write to the register(s)
+        :type data: bytes
+        :param register: First register to write
+        :type register: int
+        """
+        offset = self._check_range(register, len(data))
+        first = register - self.start_register
+        with self._lock:
+            self._data[offset : offset + len(data)] = data
+            self._dirty.update(range(first, first + div_ceil(len(data), 2)))
+
+    def _dirty_ranges(self) -> list[tuple[int, int]]:
+        """Groups the dirty registers into (offset, length) ranges. Each range fits into
+        one write request. Clean registers in between are rewritten with their shadow
+        value if that saves a request."""
+        ranges = []
+        for offset in sorted(self._dirty):
+            if ranges and offset < ranges[-1][0] + MAX_WRITE_REGISTERS:
+                ranges[-1][1] = offset + 1 - ranges[-1][0]
+            else:
+                ranges.append([offset, 1])
+        return [tuple(r) for r in ranges]
+
+    def flush(self, write_reg_data: Callable[[bytes, int], None]) -> int:
+        """Writes all dirty registers to the device. Registers whose write fails are
+        marked dirty again and retried with the next flush.
+
+        :param write_reg_data: Function that writes (data, register)
+        :type write_reg_data: Callable
+        :return: Number of write requests sent
+        :rtype: int
+        """
+        with self._lock:
+            ranges = self._dirty_ranges()
+            payloads = [
+                (offset, bytes(self._data[offset * 2 : (offset + length) * 2]))
+                for offset, length in ranges
+            ]
+            self._dirty.clear()
+
+        for i, (offset, payload) in enumerate(payloads):
+            try:
+                write_reg_data(payload, self.start_register + offset)
+            except Exception:
+                with self._lock:
+                    for pending_offset, pending_length in ranges[i:]:
+                        self._dirty.update(
+                            range(pending_offset, pending_offset + pending_length)
+                        )
+                raise
+        return len(payloads)
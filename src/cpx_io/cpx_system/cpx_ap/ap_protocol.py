@@ -0,0 +1,274 @@
+"""Register transactions of the CPX-AP system that are shared by CpxAp, ApModule and
+AsyncCpxAp. See register_transaction for how they are executed."""
+
+from typing import Any, Generator
+
+from cpx_io.cpx_system.cpx_base import CpxRequestError
+from cpx_io.cpx_system.cpx_ap import ap_modbus_registers
+from cpx_io.cpx_system.cpx_ap.ap_parameter import Parameter
+from cpx_io.cpx_system.register_transaction import Step, read, read_length, write
+from cpx_io.utils.boollist import bytes_to_boollist
+from cpx_io.utils.helpers import div_ceil
+from cpx_io.utils.logging import Logging
+
+# bits of the global diagnosis state, the rest of the bits are "reserved"
+DIAGNOSIS_KEYS = (
+    "Device available",
+    "Current",
+    "Voltage",
+    "Temperature",
+    "reserved",
+    "Movement",
+    "Configuration / Parameters",
+    "Monitoring",
+    "Communication",
+    "Safety",
+    "Internal Hardware",
+    "Software",
+    "Maintenance",
+    "Misc",
+    "reserved(14)",
+    "reserved(15)",
+    "External Device",
+    "Security",
+    "Encoder",
+)
+
+# execution codes of the parameter interface
+PARAMETER_READ = 1
+PARAMETER_WRITE = 2
+PARAMETER_ERROR = 4
+PARAMETER_COMPLETED = 16
+
+# ISDU commands: 50 read (with byte swap), 51 write (with byte swap), 100 read, 101 write
+ISDU_READ = 100
+ISDU_WRITE = 101
+
+
+def diagnosis_status_parameter(module_count: int) -> Parameter:
+    """Returns the parameter of the diagnosis status of all modules. The type size is
+    overwritten with the actual module count + 1 (see datasheet)."""
+    return Parameter(
+        parameter_id=20196,
+        parameter_instances={"FirstIndex": 0, "NumberOfInstances": 1},
+        is_writable=False,
+        array_size=module_count + 1,
+        data_type="UINT8",
+        default_value=0,
+        description="AP diagnosis status for each Module",
+        name="AP diagnosis status",
+    )
+
+
+def read_module_count() -> Generator[Step, Any, int]:
+    """Transaction that reads the IO module count"""
+    reg = yield read(*ap_modbus_registers.MODULE_COUNT)
+    value = int.from_bytes(reg, byteorder="little")
+    Logging.logger.debug(f"Total module count: {value}")
+    return value
+
+
+def read_apdd_information(position: int, information) -> Generator[Step, Any, Any]:
+    """Transaction that reads the module information of the module at position with
+    one request and returns it decoded with information.from_bytes()"""
+    register, length = ap_modbus_registers.MODULE_INFORMATION
+    data = yield read(register + length * position, length)
+    info = information.from_bytes(data)
+    Logging.logger.debug(f"Reading ApInformation: {info}")
+    return info
+
+
+def read_all_apdd_information(
+    module_count: int, information
+) -> Generator[Step, Any, list]:
+    """Transaction that reads the contiguous module information blocks of all modules
+    and returns them decoded with information.from_bytes()"""
+    register, length = ap_modbus_registers.MODULE_INFORMATION
+    data = yield read(register, length * module_count)
+    infos = [
+        information.from_bytes(data[i * length * 2 : (i + 1) * length * 2])
+        for i in range(module_count)
+    ]
+    Logging.logger.debug(f"Reading ApInformation of {module_count} modules")
+    return infos
+
+
+def read_global_diagnosis_state(register: int) -> Generator[Step, Any, dict]:
+    """Transaction that reads the global diagnosis state starting at register"""
+    reg = yield read_length(register, 2)
+    bits = bytes_to_boollist(reg)
+    return {key: bits[i] for i, key in enumerate(DIAGNOSIS_KEYS)}
+
+
+def _wait_for_parameter_request(register: int) -> Generator[Step, Any, None]:
+    """Polls the execution register of the parameter interface until the request is
+    completed"""
+    # 1=read, 2=write, 3=busy, 4=error(request failed), 16=completed(request successful)
+    exe_code = 0
+    while exe_code != PARAMETER_COMPLETED:
+        reg = yield read(register)
+        exe_code = int.from_bytes(reg, byteorder="little") & 0xFF
+        if exe_code == PARAMETER_ERROR:
+            raise CpxRequestError
+
+
+def write_parameter(
+    position: int, param_id: int, instance: int, data: bytes
+) -> Generator[Step, Any, None]:
+    """Transaction that writes the raw data of a parameter. Raises CpxRequestError
+    if the request is denied.
+
+    :param position: Module position index starting with 0
+    :type position: int
+    :param param_id: Parameter ID (see datasheet)
+    :type param_id: int
+    :param instance: Parameter Instance (typically used to define the channel, see datasheet)
+    :type instance: int
+    :param data: data as bytes object
+    :type data: bytes
+    """
+    param_reg = ap_modbus_registers.PARAMETERS.register_address
+    # module indexing starts with 1 (see datasheet)
+    module_index = (position + 1).to_bytes(2, byteorder="little")
+    header = param_id.to_bytes(2, byteorder="little") + instance.to_bytes(
+        2, byteorder="little"
+    )
+
+    # prepare the command
+    yield write(module_index + header, param_reg)
+    # write length in bytes
+    yield write(len(data).to_bytes(2, byteorder="little"), param_reg + 4)
+    # write data to register
+    yield write(data, param_reg + 10)
+    # execute the command
+    yield write(PARAMETER_WRITE.to_bytes(2, byteorder="little"), param_reg + 3)
+    yield from _wait_for_parameter_request(param_reg + 3)
+
+    Logging.logger.debug(f"Wrote data {data} to module position: {position}")
+
+
+def read_parameter(
+    position: int, param_id: int, instance: int
+) -> Generator[Step, Any, bytes]:
+    """Transaction that reads the raw data of a parameter. Raises CpxRequestError if
+    the request is denied.
+
+    :param position: Module position index starting with 0
+    :type position: int
+    :param param_id: Parameter ID (see datasheet)
+    :type param_id: int
+    :param instance: Parameter Instance (typically used to define the channel, see datasheet)
+    :type instance: int
+    :return: Parameter register values
+    :rtype: bytes
+    """
+    param_reg = ap_modbus_registers.PARAMETERS.register_address
+    # module indexing starts with 1 (see datasheet)
+    module_index = (position + 1).to_bytes(2, byteorder="little")
+    header = param_id.to_bytes(2, byteorder="little") + instance.to_bytes(
+        2, byteorder="little"
+    )
+
+    # prepare and execute the read command
+    yield write(
+        module_index + header + PARAMETER_READ.to_bytes(2, byteorder="little"),
+        param_reg,
+    )
+    yield from _wait_for_parameter_request(param_reg + 3)
+
+    # get datalength in bytes from register 10004
+    length_bytes = int.from_bytes((yield read(param_reg + 4)), byteorder="little")
+    # read 16 bit registers
+    data = yield read(param_reg + 10, div_ceil(length_bytes, 2))
+
+    Logging.logger.debug(
+        f"Read parameter {param_id}: {data} from module position: {position}"
+    )
+    return data
+
+
+def _isdu_request(
+    position: int,
+    channel: int,
+    index: int,
+    subindex: int,
+    length: bytes,
+    data: bytes,
+    command: int,
+) -> Generator[Step, Any, None]:
+    """Sends one ISDU request, data is not written if it is None"""
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    # select module and channel, both start with 1
+    yield write(
+        (position + 1).to_bytes(2, "little"),
+        ap_modbus_registers.ISDU_MODULE_NO.register_address,
+    )
+    yield write(
+        (channel + 1).to_bytes(2, "little"),
+        ap_modbus_registers.ISDU_CHANNEL.register_address,
+    )
+    yield write(
+        index.to_bytes(2, "little"), ap_modbus_registers.ISDU_INDEX.register_address
+    )
+    yield write(
+        subindex.to_bytes(2, "little"),
+        ap_modbus_registers.ISDU_SUBINDEX.register_address,
+    )
+    # select length of data in bytes
+    yield write(length, ap_modbus_registers.ISDU_LENGTH.register_address)
+    if data is not None:
+        yield write(data, ap_modbus_registers.ISDU_DATA.register_address)
+    yield write(
+        command.to_bytes(2, "little"), ap_modbus_registers.ISDU_COMMAND.register_address
+    )
+
+
+def _wait_for_isdu_request(message: str) -> Generator[Step, Any, None]:
+    """Polls the ISDU status until the request is finished"""
+    stat, cnt = 1, 0
+    while stat > 0 and cnt < 1000:
+        reg = yield read(*ap_modbus_registers.ISDU_STATUS)
+        stat = int.from_bytes(reg, byteorder="little")
+        cnt += 1
+    if cnt >= 1000:
+        raise CpxRequestError(message)
+
+
+def read_isdu(
+    position: int, channel: int, index: int, subindex: int
+) -> Generator[Step, Any, tuple]:
+    """Transaction that reads an ISDU from one channel of an IO-Link module. Raises
+    CpxRequestError when the read failed.
+
+    :return: (data, actual_length), decode it with ApModule._decode_isdu_data()
+    :rtype: tuple[bytes, int]
+    """
+    # length is always zero when reading
+    yield from _isdu_request(
+        position, channel, index, subindex, b"\x00\x00", None, ISDU_READ
+    )
+    yield from _wait_for_isdu_request("ISDU data read failed")
+
+    # read back the actual length from the length register
+    actual_length = int.from_bytes(
+        (yield read(ap_modbus_registers.ISDU_LENGTH.register_address)),
+        byteorder="little",
+    )
+    data = yield read(ap_modbus_registers.ISDU_DATA.register_address, actual_length)
+    return data, actual_length
+
+
+def write_isdu(
+    position: int, channel: int, index: int, subindex: int, data: bytes, length: bytes
+) -> Generator[Step, Any, None]:
+    """Transaction that writes an ISDU to one channel of an IO-Link module. data and
+    length are encoded with ApModule._encode_isdu_data(). Raises CpxRequestError when
+    the write failed."""
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    yield from _isdu_request(
+        position, channel, index, subindex, length, data, ISDU_WRITE
+    )
+    yield from _wait_for_isdu_request(
+        "ISDU data write failed\nThis can happen if the device denies "
+        "access to the requested isdu parameter with the given data"
+    )
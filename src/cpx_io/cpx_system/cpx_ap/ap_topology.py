@@ -0,0 +1,76 @@
+"""Persistent snapshot of the module topology of one CPX-AP system"""
+
+import json
+import os
+from dataclasses import asdict
+
+from cpx_io.utils.logging import Logging
+
+# increase if the stored representation changes incompatibly
+TOPOLOGY_FORMAT = 1
+
+
+class ApTopologySnapshot:
+    """Module count and module information of the system at one IP address, stored
+    as json in the apdd_path. It is used to skip reading the complete module
+    information on a reconnect as long as the fingerprint of the modules is unchanged.
+    """
+
+    def __init__(self, apdd_path: str, ip_address: str):
+        """Constructor of the ApTopologySnapshot class.
+
+        :param apdd_path: Path where the APDDs and the snapshot are saved
+        :type apdd_path: str
+        :param ip_address: IP address of the system
+        :type ip_address: str
+        """
+        self.ip_address = ip_address
+        self.path = os.path.join(apdd_path, f"topology_{ip_address}.json")
+
+    def load(self, module_count: int, info_class: type) -> list:
+        """Returns the stored module information or None if there is no snapshot of
+        a system with module_count modules.
+
+        :param module_count: Current number of modules of the system
+        :type module_count: int
+        :param info_class: Class of the module information (CpxAp.ApInformation)
+        :type info_class: type
+        :return: Module information of every module position or None
+        :rtype: list
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if (
+                snapshot["format"] != TOPOLOGY_FORMAT
+                or snapshot["module_count"] != module_count
+            ):
+                return None
+            return [info_class(**module) for module in snapshot["modules"]]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            Logging.logger.warning(f"Ignoring unreadable topology {self.path}: {e}")
+            return None
+
+    def save(self, infos: list) -> None:
+        """Stores the module information of all modules
+
+        :param infos: Module information of every module position
+        :type infos: list
+        """
+        snapshot = {
+            "format": TOPOLOGY_FORMAT,
+            "ip_address": self.ip_address,
+            "module_count": len(infos),
+            "modules": [asdict(info) for info in infos],
+        }
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            Logging.logger.warning(f"Could not save topology {self.path}: {e}")
+            return
+        Logging.logger.debug(f"Saved topology of {len(infos)} modules to {self.path}")
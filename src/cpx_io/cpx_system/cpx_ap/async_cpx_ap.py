@@ -0,0 +1,528 @@
+"""Asyncio implementation of the CPX-AP system"""
+
+import asyncio
+from typing import Any, List, Union
+
+from cpx_io.cpx_system.async_cpx_base import AsyncCpxBase
+from cpx_io.cpx_system.cpx_ap import ap_modbus_registers, ap_protocol
+from cpx_io.cpx_system.cpx_ap.ap_module import ApModule
+from cpx_io.cpx_system.cpx_ap.ap_parameter import (
+    Parameter,
+    parameter_pack,
+    parameter_unpack,
+)
+from cpx_io.cpx_system.cpx_ap.ap_product_categories import ProductCategory
+from cpx_io.cpx_system.cpx_ap.ap_supported_datatypes import SUPPORTED_ISDU_DATATYPES
+from cpx_io.cpx_system.cpx_ap.cpx_ap import (
+    CpxAp,
+    build_modules,
+    download_apdds,
+    gateway_position,
+    missing_apdds,
+)
+from cpx_io.cpx_system.register_transaction import run_async
+from cpx_io.cpx_system.transport_metrics import measured
+from cpx_io.utils.helpers import channel_range_check, div_ceil
+from cpx_io.utils.logging import Logging
+
+# pylint: disable=protected-access
+# intended: the module objects only describe the system, all IO is done by AsyncCpxAp
+
+
+class AsyncCpxAp(AsyncCpxBase):
+    """CPX-AP class for asyncio. The system is set up from the APDDs like in CpxAp, but
+    all process data and parameter access is done with coroutines of this class. The
+    module objects are used to describe the system and are addressed by their position.
+
+    Example:
+        async with await AsyncCpxAp.create(ip_address="192.168.1.1") as cpxap:
+            values = await cpxap.read_channels(1)
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    ApInformation = CpxAp.ApInformation
+    Diagnostics = CpxAp.Diagnostics
+    REGISTER_REGIONS = CpxAp.REGISTER_REGIONS
+    TIMEOUT_REGISTER = ap_modbus_registers.TIMEOUT
+
+    def __init__(self, timeout: float = None, apdd_path: str = None, **kwargs):
+        """Constructor of the AsyncCpxAp class. The system is not accessed before
+        startup() is awaited, use AsyncCpxAp.create() to do both in one step.
+
+        :param timeout: Modbus timeout (in s) that should be configured on the slave
+        :type timeout: float
+        :param apdd_path: (optional) Path where the description files of the modules are saved
+        :type apdd_path: str
+        """
+        super().__init__(timeout=timeout, **kwargs)
+        self._apdd_path = apdd_path
+
+        self.next_output_register = None
+        self.next_input_register = None
+
+        self.global_diagnosis_register = ap_modbus_registers.DIAGNOSIS.register_address
+        self.next_diagnosis_register = self.global_diagnosis_register + 6
+        self.gateway_module_id = None
+        self.interface_lock = asyncio.Lock()
+
+    async def startup(self) -> None:
+        """Connects to the system, configures the timeout and sets up all modules"""
+        await super().startup()
+        if not self.connected():
+            return
+
+        if not self._apdd_path:
+            self._apdd_path = await asyncio.to_thread(CpxAp.create_apdd_path)
+
+        await self._setup_modules()
+
+    async def _setup_modules(self) -> None:
+        """Reads the module information of all modules, loads their APDDs and adds the
+        built modules to the system. The APDDs are downloaded and the modules are built
+        in worker threads like in CpxAp."""
+        infos = await self.read_all_apdd_information()
+
+        missing = await asyncio.to_thread(missing_apdds, self._apdd_path, infos)
+        module_apdds = await self._download_apdds(missing, infos) if missing else {}
+
+        modules = await asyncio.to_thread(
+            lambda: list(build_modules(self._apdd_path, infos, module_apdds))
+        )
+        for module, info in zip(modules, infos):
+            await self._add_module(module, info)
+        self.gateway_module_id = gateway_position(infos)
+
+    async def _download_apdds(self, missing: dict, infos: list[ApInformation]) -> dict:
+        """Downloads the missing APDDs from the modules like CpxAp in parallel over one
+        keep-alive HTTP session, without blocking the event loop
+
+        :param missing: module index of every missing APDD name
+        :type missing: dict[str, int]
+        :param infos: ApInformation of all modules
+        :type infos: list[ApInformation]
+        :return: APDD of every missing APDD name
+        :rtype: dict[str, dict]
+        """
+        return await asyncio.to_thread(
+            download_apdds,
+            self.ip_address,
+            self._apdd_path,
+            missing,
+            infos,
+            workers=CpxAp.APDD_DOWNLOAD_WORKERS,
+        )
+
+    async def _add_module(self, module: ApModule, info: ApInformation) -> ApModule:
+        """Adds one module to the base. The register layout is set up like in
+        CpxAp._add_module(), the IO-Link fieldbus parameters are read asynchronously.
+
+        :param module: Object of the already built module
+        :type module: ApModule
+        :param info: Object containing the read-out info from the module
+        :type info: ApInformation
+        """
+        module.information = info
+
+        # if it's the first module to add, set the starting registers
+        if self.next_input_register is None and self.next_output_register is None:
+            self.next_output_register = ap_modbus_registers.OUTPUTS.register_address
+            self.next_input_register = ap_modbus_registers.INPUTS.register_address
+
+        module._configure_registers(self, len(self._modules))
+        self._modules.append(module)
+        self.update_module_names()
+
+        if module.apdd_information.product_category == ProductCategory.IO_LINK.value:
+            module.fieldbus_parameters = await self.read_fieldbus_parameters(
+                module.position
+            )
+
+        Logging.logger.debug(f"Added module {module.name} ({type(module).__name__})")
+        return module
+
+    @property
+    def apdd_path(self):
+        """getter function for private apdd_path property"""
+        return self._apdd_path
+
+    def _module(self, position: int) -> ApModule:
+        """Returns the module at position"""
+        return self._modules[position]
+
+    async def set_timeout(self, timeout_ms: int) -> None:
+        """Sets the modbus timeout to the provided value
+
+        :param timeout_ms: Modbus timeout in ms (milli-seconds)
+        :type timeout_ms: int
+        """
+        async with self.interface_lock:
+            await super().set_timeout(timeout_ms)
+
+    async def read_module_count(self) -> int:
+        """Reads and returns IO module count as integer
+
+        :return: Number of the total amount of connected modules
+        :rtype: int
+        """
+        async with self.interface_lock:
+            return await run_async(ap_protocol.read_module_count(), self)
+
+    async def read_apdd_information(self, position: int) -> ApInformation:
+        """Reads and returns detailed information for a specific IO module with
+        one request.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :return: ApInformation object containing all the module information from the module
+        :rtype: ApInformation
+        """
+        async with self.interface_lock:
+            return await run_async(
+                ap_protocol.read_apdd_information(position, self.ApInformation), self
+            )
+
+    async def read_all_apdd_information(
+        self, module_count: int = None
+    ) -> list[ApInformation]:
+        """Reads and returns detailed information for all IO modules in as few
+        requests as the Modbus limits allow.
+
+        :param module_count: (optional) Number of modules, read from the system if None
+        :type module_count: int
+        :return: ApInformation object for every module position
+        :rtype: list[ApInformation]
+        """
+        if module_count is None:
+            module_count = await self.read_module_count()
+        async with self.interface_lock:
+            return await run_async(
+                ap_protocol.read_all_apdd_information(module_count, self.ApInformation),
+                self,
+            )
+
+    async def read_diagnostic_status(self) -> list[Diagnostics]:
+        """Read the diagnostic status and return a Diagnostics object for each module
+
+        :ret value: Diagnostics status for every module
+        :rtype: list[Diagnostics]
+        """
+        ap_diagnosis_parameter = ap_protocol.diagnosis_status_parameter(
+            await self.read_module_count()
+        )
+        reg = await self.read_parameter(self.gateway_module_id, ap_diagnosis_parameter)
+        return [self.Diagnostics.from_int(r) for r in reg]
+
+    async def read_global_diagnosis_state(self) -> dict:
+        """Read the global diagnosis state from the cpx system. See
+        CpxAp.read_global_diagnosis_state() for the keys of the returned dict.
+
+        :ret value: Diagnosis state
+        :rtype: dict"""
+        async with self.interface_lock:
+            return await run_async(
+                ap_protocol.read_global_diagnosis_state(self.global_diagnosis_register),
+                self,
+            )
+
+    async def write_parameter(
+        self,
+        position: int,
+        parameter: Parameter,
+        data: Union[list[int], int, bool],
+        instance: int = 0,
+    ) -> None:
+        """Write parameters via module position, param_id, instance (=channel) and data to write
+        Raises "CpxRequestError" if request denied
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param parameter: AP Parameter
+        :type parameter: Parameter
+        :param data: list of 16 bit signed integers, one signed 16 bit integer or bool to write
+        :type data: list | int | bool
+        :param instance: Parameter Instance (typically used to define the channel, see datasheet)
+        :type instance: int
+        """
+        raw = parameter_pack(parameter, data)
+        await self._write_parameter_raw(position, parameter.parameter_id, instance, raw)
+
+    async def read_parameter(
+        self, position: int, parameter: Parameter, instance: int = 0
+    ) -> Any:
+        """Read parameter
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param parameter: AP Parameter
+        :type parameter: Parameter
+        :param instance: (optional) Parameter Instance (typically the channel, see datasheet)
+        :type instance: int
+        :return: Parameter value
+        :rtype: Any
+        """
+        raw = await self._read_parameter_raw(position, parameter.parameter_id, instance)
+        return parameter_unpack(parameter, raw)
+
+    @measured("parameter", "parameters")
+    async def _write_parameter_raw(
+        self, position: int, param_id: int, instance: int, data: bytes
+    ) -> None:
+        """Writes the raw data of a parameter, see CpxAp._write_parameter_raw()"""
+        async with self.interface_lock:
+            await run_async(
+                ap_protocol.write_parameter(position, param_id, instance, data), self
+            )
+
+    @measured("parameter", "parameters")
+    async def _read_parameter_raw(
+        self, position: int, param_id: int, instance: int
+    ) -> bytes:
+        """Reads the raw data of a parameter, see CpxAp._read_parameter_raw()"""
+        async with self.interface_lock:
+            return await run_async(
+                ap_protocol.read_parameter(position, param_id, instance), self
+            )
+
+    async def read_fieldbus_parameters(self, position: int) -> list[dict]:
+        """Read all fieldbus parameters (status/information) for all channels of an
+        IO-Link module.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :return: a dict of parameters for every channel.
+        :rtype: list[dict]
+        """
+        module = self._module(position)
+        module._check_function_supported("read_fieldbus_parameters")
+        params = module._fieldbus_parameter_list()
+        channel_params = []
+        for channel_item in range(4):
+            values = [
+                await self.read_parameter(position, p, channel_item) for p in params
+            ]
+            channel_params.append(module._fieldbus_parameter_dict(values))
+        return channel_params
+
+    async def _read_output_channels(self, module: ApModule) -> list:
+        """Read the output channels of module"""
+        if not module.channels.outputs:
+            return []
+        data = await self.read_reg_data(
+            module.system_entry_registers.outputs,
+            div_ceil(module.information.output_size, 2),
+        )
+        return module._channel_codec("outputs").decode(data)
+
+    async def read_channels(self, position: int) -> list:
+        """Read all channels from the module at position and interpret them as the
+        module intends. See ApModule.read_channels().
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :return: List of values of the channels
+        :rtype: list
+        """
+        module = self._module(position)
+        module._check_function_supported("read_channels")
+        values = []
+
+        if module.channels.inputs:
+            data = await self.read_reg_data(
+                module.system_entry_registers.inputs,
+                div_ceil(module.information.input_size, 2),
+            )
+            if (
+                module.apdd_information.product_category
+                == ProductCategory.IO_LINK.value
+            ):
+                channel_data = module._split_io_link_input_data(data)
+                Logging.logger.info(
+                    f"{module.name}: Reading IO-Link channels: {channel_data}"
+                )
+                return channel_data
+
+            values = module._channel_codec("inputs").decode(data)
+
+        values += await self._read_output_channels(module)
+        Logging.logger.info(f"{module.name}: Reading channels: {values}")
+        return values
+
+    async def read_channel(self, position: int, channel: int) -> Any:
+        """Read back the value of one channel of the module at position.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param channel: Channel number, starting with 0
+        :type channel: int
+        :return: Value of the channel
+        :rtype: Any
+        """
+        module = self._module(position)
+        module._check_function_supported("read_channel")
+        if module.apdd_information.product_category == ProductCategory.IO_LINK.value:
+            values = await self.read_channels(position)
+            channel_range_check(channel, len(values))
+            return values[channel]
+
+        inputs = module._channel_codec("inputs")
+        outputs = module._channel_codec("outputs")
+        channel_range_check(channel, len(inputs) + len(outputs))
+
+        # read only the registers that contain the channel
+        if channel < len(inputs):
+            codec, index = inputs, channel
+            register = module.system_entry_registers.inputs
+        else:
+            codec, index = outputs, channel - len(inputs)
+            register = module.system_entry_registers.outputs
+        offset, length = codec.span(index)
+        data = await self.read_reg_data(register + offset, length)
+        return codec.decode_channel(index, data, offset)
+
+    async def write_channels(self, position: int, data: list[Any]) -> None:
+        """Write all output channels of the module at position. See
+        ApModule.write_channels().
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param data: list of values for each output channel
+        :type data: list
+        """
+        module = self._module(position)
+        module._check_function_supported("write_channels")
+
+        if len(data) != len(module.channels.outputs):
+            raise ValueError(
+                f"Data must be list of {len(module.channels.outputs)} elements"
+            )
+
+        if module.apdd_information.product_category == ProductCategory.IO_LINK.value:
+            if not all(isinstance(d, bytes) for d in data):
+                raise TypeError(
+                    f"{module.name}: datatype for IO-Link channels must be bytes"
+                )
+            byte_channel_size = module.channels.inouts[0].array_size
+            if any(len(d) != byte_channel_size for d in data):
+                raise ValueError(
+                    f"Your current IO-Link datalength {byte_channel_size} does "
+                    f"not match the provided bytes length."
+                )
+            register_data = b"".join(data)
+        else:
+            register_data = module._encode_output_channels(data)
+
+        await self.write_reg_data(register_data, module.system_entry_registers.outputs)
+        Logging.logger.info(f"{module.name}: Setting channels to {data}")
+
+    async def write_channel(self, position: int, channel: int, value: Any) -> None:
+        """Set one output channel of the module at position. See ApModule.write_channel().
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param channel: Channel number, starting with 0
+        :type channel: int
+        :param value: Value that should be written to the channel
+        :type value: Any
+        """
+        module = self._module(position)
+        module._check_function_supported("write_channel")
+        channel_range_check(channel, len(module.channels.outputs))
+
+        if module.apdd_information.product_category == ProductCategory.IO_LINK.value:
+            value = module._pad_io_link_output_value(value)
+            byte_channel_size = module.channels.inouts[0].array_size
+            await self.write_reg_data(
+                value,
+                module.system_entry_registers.outputs
+                + byte_channel_size // 2 * channel,
+            )
+        else:
+            output_index, size = module._output_channel_span(channel)
+            register = module.system_entry_registers.outputs + output_index
+            async with self.interface_lock:
+                old_data = await self.read_reg_data(register, size // 2)
+                await self.write_reg_data(
+                    module._encode_output_channel(channel, value, old_data), register
+                )
+        Logging.logger.info(f"{module.name}: Setting channel {channel} to {value}")
+
+    @measured("isdu", "isdu")
+    async def read_isdu(
+        self,
+        position: int,
+        channels: Union[List[int], int],
+        index: int,
+        subindex: int = 0,
+        data_type: str = "raw",
+    ) -> Any:
+        """Read isdu (device parameter) from defined channel of an IO-Link module.
+        See ApModule.read_isdu(). Raises CpxRequestError when read failed.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param channels: list of channels or single channel number(s), starting with 0
+        :type channels: list[int] | int
+        :param index: io-link parameter index
+        :type index: int
+        :param subindex: (optional) io-link parameter subindex, defaults to 0
+        :type subindex: int
+        :param data_type: (optional) datatype for correct interpretation
+        :type data_type: str
+        :return: list of values or single value depending on the datatype for each channel
+        :rtype: list[any] | any
+        """
+        # pylint: disable=too-many-arguments, too-many-positional-arguments
+        module = self._module(position)
+        module._check_function_supported("read_isdu")
+        if data_type not in SUPPORTED_ISDU_DATATYPES:
+            raise TypeError(f"Datatype '{data_type}' is not supported by read_isdu()")
+
+        results = []
+        for channel in module.cast_channel_argument_to_list(channels=channels):
+            async with self.interface_lock:
+                ret, actual_length = await run_async(
+                    ap_protocol.read_isdu(position, channel, index, subindex), self
+                )
+            results.append(ApModule._decode_isdu_data(ret, actual_length, data_type))
+
+        if len(results) == 1:
+            return results[0]
+        return results
+
+    @measured("isdu", "isdu")
+    async def write_isdu(
+        self,
+        position: int,
+        data: Union[bytes, str, int, bool],
+        channels: Union[List[int], int],
+        index: int,
+        subindex: int = 0,
+    ) -> None:
+        """Write isdu (device parameter) to defined channel of an IO-Link module.
+        See ApModule.write_isdu(). Raises CpxRequestError when write failed.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param data: Data to write.
+        :type data: bytes|str|int|bool
+        :param channels: list of channel numbers or single channel number, starting with 0
+        :type channels: list[int] | int
+        :param index: io-link parameter index
+        :type index: int
+        :param subindex: io-link parameter subindex
+        :type subindex: int
+        """
+        # pylint: disable=too-many-arguments, too-many-positional-arguments
+        module = self._module(position)
+        module._check_function_supported("write_isdu")
+        raw, length = ApModule._encode_isdu_data(data)
+
+        for channel in module.cast_channel_argument_to_list(channels=channels):
+            async with self.interface_lock:
+                await run_async(
+                    ap_protocol.write_isdu(
+                        position, channel, index, subindex, raw, length
+                    ),
+                    self,
+                )
@@ -1,5 +1,6 @@
 """ApModule builder function from APDD"""
 
+from functools import partial
 from cpx_io.cpx_system.cpx_ap.builder.apdd_information_builder import (
     build_apdd_information,
     build_actual_variant,
@@ -43,17 +44,12 @@ def build_ap_module(apdd: dict, module_code: int) -> ApModule:
     )
     Logging.logger.debug(f"InOutput Channels: {inout_channel_list}")
 
-    parameter_list = build_parameter_list(apdd=apdd)
-    Logging.logger.debug(f"Parameters: {parameter_list}")
-
-    diagnosis_list = build_diagnosis_list(apdd=apdd)
-    Logging.logger.debug(f"Diagnosis: {diagnosis_list}")
-
+    # parameters and diagnosis are only built when the module accesses them
     return ApModule(
         apdd_information,
         (input_channel_list, output_channel_list, inout_channel_list),
-        parameter_list,
-        diagnosis_list,
+        partial(build_parameter_list, apdd=apdd),
+        partial(build_diagnosis_list, apdd=apdd),
         variant_list,
         build_parameter(get_variant_switch_parameter(apdd=apdd), {}),
     )
@@ -6,7 +6,7 @@ from cpx_io.cpx_system.cpx_ap.dataclasses.apdd_information import ApddInformatio
 from cpx_io.utils.logging import Logging
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Variant:
     """Variant dataclass"""
 
@@ -1,8 +1,7 @@
 """Channel builder functions from APDD"""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import List
-import copy
 
 
 @dataclass
@@ -15,7 +14,7 @@ class ChannelGroup:
     parameter_group_ids: List[int]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Channel:
     """Channel dataclass"""
 
@@ -83,16 +82,19 @@ def build_channel_list(apdd, variant, direction=None):
         if channel_type.channel_id in channel_group_dict:
             num_channels = channel_group_dict[channel_type.channel_id]["Count"]
             if "BitOffset" in channel_group_dict[channel_type.channel_id]:
-                channel_type.bit_offset = channel_group_dict[channel_type.channel_id][
-                    "BitOffset"
-                ]
+                channel_type = replace(
+                    channel_type,
+                    bit_offset=channel_group_dict[channel_type.channel_id]["BitOffset"],
+                )
             assert channel_type.bit_offset % 8 == 0
-            for i in range(0, num_channels):
-                new_channel = copy.deepcopy(channel_type)
-                new_channel.bit_offset = channel_type.bit_offset + (
-                    i * channel_type.bits
+            # the channels only differ in the bit offset, the other fields are shared
+            channel_list.extend(
+                replace(
+                    channel_type,
+                    bit_offset=channel_type.bit_offset + (i * channel_type.bits),
                 )
-                channel_list.append(new_channel)
+                for i in range(0, num_channels)
+            )
 
     # split them in input and output channels
     if direction is not None:
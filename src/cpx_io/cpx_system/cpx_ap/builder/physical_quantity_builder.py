@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import Dict
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PhysicalUnit:
     """PhysicalUnits dataclass"""
 
@@ -2,41 +2,294 @@
 
 import json
 import struct
-from typing import Any, List, Union
-from dataclasses import dataclass
-from threading import Lock
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Union
+from dataclasses import astuple, dataclass
+from threading import Lock, RLock, Thread
 
 import os
 import platformdirs
-import requests
-from cpx_io.cpx_system.cpx_base import CpxBase, CpxRequestError, CpxInitError
-from cpx_io.cpx_system.cpx_ap.builder.ap_module_builder import build_ap_module
+from cpx_io.cpx_system.cpx_base import (
+    CpxBase,
+    CpxInitError,
+    MAX_READ_REGISTERS,
+)
 from cpx_io.cpx_system.cpx_ap.ap_module import ApModule
+from cpx_io.cpx_system.cpx_ap.ap_module_cache import ApModuleCache
+from cpx_io.cpx_system.cpx_ap.ap_topology import ApTopologySnapshot
 from cpx_io.cpx_system.cpx_ap.ap_supported_functions import (
     SUPPORTED_PRODUCT_FUNCTIONS_DICT,
 )
 
-from cpx_io.cpx_system.cpx_ap import ap_modbus_registers
-from cpx_io.cpx_system.cpx_ap.ap_docu_generator import generate_system_information_file
+from cpx_io.cpx_system.cpx_ap import ap_modbus_registers, ap_protocol
+from cpx_io.cpx_system.cpx_ap.ap_product_categories import ProductCategory
+from cpx_io.cpx_system.cpx_ap.ap_process_image import (
+    InputProcessImage,
+    OutputProcessImage,
+)
 from cpx_io.cpx_system.cpx_ap.ap_parameter import (
     Parameter,
     parameter_pack,
     parameter_unpack,
 )
 from cpx_io.utils.helpers import (
+    channel_range_check,
     div_ceil,
     convert_uint32_to_octett,
     convert_to_mac_string,
 )
+from cpx_io.cpx_system.change_detector import ChangeDetector, ChannelChange
+from cpx_io.cpx_system.io_scheduler import CYCLIC
+from cpx_io.cpx_system.subscriptions import (
+    COALESCE,
+    DROP_OLDEST,
+    DiagnosisChange,
+    EventDispatcher,
+    Subscription,
+)
 from cpx_io.cpx_system.io_thread import IOThread
-from cpx_io.utils.boollist import bytes_to_boollist
+from cpx_io.cpx_system.register_transaction import run, set_timeout
+from cpx_io.cpx_system.startup_trace import StartupReport, StartupTrace
+from cpx_io.cpx_system.transport_metrics import measured
 from cpx_io.utils.logging import Logging
 
 
+def build_ap_module(apdd: dict, module_code: int) -> ApModule:
+    """Builds a module from its APDD. The builders are only imported if a module is
+    not found in the module cache."""
+    # pylint: disable=import-outside-toplevel
+    from cpx_io.cpx_system.cpx_ap.builder import ap_module_builder
+
+    return ap_module_builder.build_ap_module(apdd, module_code)
+
+
+def generate_system_information_file(ap_system, force: bool = False) -> bool:
+    """Writes the system documentation. The generator is only imported if the
+    documentation is generated."""
+    # pylint: disable=import-outside-toplevel
+    from cpx_io.cpx_system.cpx_ap import ap_docu_generator
+
+    return ap_docu_generator.generate_system_information_file(ap_system, force=force)
+
+
+def _untraced(name: str, module: int = None):
+    """Startup phase of a system without startup trace"""
+    # pylint: disable=unused-argument
+    return nullcontext()
+
+
+def missing_apdds(apdd_path: str, infos: list) -> dict:
+    """Returns the module index of every APDD that is not saved in apdd_path. Modules
+    of the same type share one APDD, so every missing APDD is loaded once.
+
+    :param apdd_path: Path where the description files of the modules are saved
+    :type apdd_path: str
+    :param infos: ApInformation of all modules
+    :type infos: list[ApInformation]
+    :return: module index of every missing APDD name
+    :rtype: dict[str, int]
+    """
+    apdds = os.listdir(apdd_path)
+    missing = {}
+    for i, info in enumerate(infos):
+        if info.apdd_name not in apdds:
+            missing.setdefault(info.apdd_name, i)
+    return missing
+
+
+def download_apdds(
+    ip_address: str,
+    apdd_path: str,
+    missing: dict,
+    infos: list,
+    grab_apdd: Callable = None,
+    workers: int = 8,
+    keepalive: Callable = None,
+    keepalive_interval: float = 0.5,
+    startup_phase: Callable = _untraced,
+) -> dict:
+    """Downloads the missing APDDs from the modules in parallel over one keep-alive
+    HTTP session and saves them in apdd_path.
+
+    :param ip_address: IP address of the system
+    :type ip_address: str
+    :param apdd_path: Path where the description files of the modules are saved
+    :type apdd_path: str
+    :param missing: module index of every missing APDD name
+    :type missing: dict[str, int]
+    :param infos: ApInformation of all modules
+    :type infos: list[ApInformation]
+    :param grab_apdd: (optional) Downloads one APDD, default: CpxAp._grab_apdd()
+    :type grab_apdd: Callable
+    :param workers: (optional) Maximum number of APDDs that are downloaded at the same time
+    :type workers: int
+    :param keepalive: (optional) Called every keepalive_interval while downloading,
+        e.g. to keep the modbus connection alive
+    :type keepalive: Callable
+    :param keepalive_interval: (optional) Interval (in s) of the keepalive calls
+    :type keepalive_interval: float
+    :param startup_phase: (optional) Returns the context manager of a startup phase
+    :type startup_phase: Callable
+    :return: APDD of every missing APDD name
+    :rtype: dict[str, dict]
+    """
+    # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-locals
+    # only needed if APDDs are missing, importing it takes longer than the rest
+    # pylint: disable=import-outside-toplevel
+    import requests
+
+    if grab_apdd is None:
+        grab_apdd = CpxAp._grab_apdd  # pylint: disable=protected-access
+
+    def download(i: int, session) -> dict:
+        with startup_phase("apdd_download", i):
+            return grab_apdd(ip_address, i, apdd_path, infos[i].fw_version, session)
+
+    workers = min(workers, len(missing))
+    with requests.Session() as session:
+        # one pooled connection per worker
+        session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="ApddDownload"
+        ) as executor:
+            futures = {
+                apdd_name: executor.submit(download, i, session)
+                for apdd_name, i in missing.items()
+            }
+            pending = set(futures.values())
+            while pending:
+                done, pending = wait(
+                    pending, timeout=keepalive_interval, return_when=FIRST_EXCEPTION
+                )
+                if any(future.exception() for future in done):
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+                # if the webserver access is rather slow then the modbus connection
+                # can timeout
+                if keepalive is not None:
+                    keepalive()
+
+    module_apdds = {apdd_name: future.result() for apdd_name, future in futures.items()}
+    Logging.logger.debug(
+        f"Loaded apdds {list(module_apdds)} from the modules and saved to {apdd_path}"
+    )
+    return module_apdds
+
+
+def build_modules(
+    apdd_path: str, infos: list, apdds: dict, startup_phase: Callable = _untraced
+):
+    """Yields the module of every module information in infos. Identical modules are
+    built once and then restored from the module cache, modules of the same type in
+    one system share the definitions of the first one. The cache is saved when all
+    modules are built.
+
+    :param apdd_path: Path where the description files of the modules are saved
+    :type apdd_path: str
+    :param infos: ApInformation of all modules
+    :type infos: list[ApInformation]
+    :param apdds: Already loaded APDD of every APDD name, e.g. the downloaded ones
+    :type apdds: dict[str, dict]
+    :param startup_phase: (optional) Returns the context manager of a startup phase
+    :type startup_phase: Callable
+    :return: Generator of the modules that are not yet added to a system
+    :rtype: Generator[ApModule]
+    """
+    cache = ApModuleCache(apdd_path)
+    templates = {}
+    for i, info in enumerate(infos):
+        key = (info.order_text, info.fw_version, info.module_code)
+        if templates.get(key) is not None:
+            module = templates[key].shared_copy()
+            Logging.logger.debug(f"Module index {i} shares the definitions")
+        else:
+            module = _build_module(apdd_path, i, info, cache, apdds, startup_phase)
+            templates[key] = module
+        yield module
+    cache.save()
+
+
+def _build_module(
+    apdd_path: str,
+    position: int,
+    info,
+    cache: ApModuleCache,
+    apdds: dict,
+    startup_phase: Callable,
+) -> ApModule:
+    """Returns the module from the cache or builds it from its APDD"""
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    apdd_name = info.apdd_name
+    apdd_file = apdd_path + "/" + apdd_name
+    key = (info.order_text, info.fw_version, info.module_code)
+    with startup_phase("module_cache", position):
+        module = cache.get(key, apdd_file)
+    if module is not None:
+        Logging.logger.debug(f"Loaded module index {position} from cache")
+        return module
+    # if correct apdd exists in folder, use it!
+    if apdd_name not in apdds:
+        with (
+            startup_phase("apdd_load", position),
+            open(apdd_file, "r", encoding="utf-8") as f,
+        ):
+            apdds[apdd_name] = json.load(f)
+        Logging.logger.debug(
+            f"Loaded apdd {apdd_name} for module index {position} from filesystem"
+        )
+    with startup_phase("module_build", position):
+        module = build_ap_module(apdds[apdd_name], info.module_code)
+        cache.put(key, apdd_file, module)
+    return module
+
+
+def gateway_position(infos: list) -> int:
+    """Returns the index of the first bus module (gateway) in infos
+
+    :param infos: ApInformation of all modules
+    :type infos: list[ApInformation]
+    :return: Module index of the gateway
+    :rtype: int
+    """
+    for i, info in enumerate(infos):
+        if "-EP-" in info.order_text:
+            return i
+    raise CpxInitError(message="Gateway not Found")
+
+
 class CpxAp(CpxBase):
     """CPX-AP base class"""
 
-    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-instance-attributes, too-many-public-methods, too-many-lines
+
+    # maximum number of APDDs that are downloaded from the modules at the same time
+    APDD_DOWNLOAD_WORKERS = 8
+    # interval (in s) of the modbus keep-alive requests while APDDs are downloaded
+    APDD_KEEPALIVE_INTERVAL = 0.5
+
+    REGISTER_REGIONS = (
+        *(
+            (
+                register.register_address,
+                register.register_address + register.length,
+                name,
+            )
+            for register, name in (
+                (ap_modbus_registers.OUTPUTS, "outputs"),
+                (ap_modbus_registers.INPUTS, "inputs"),
+                (ap_modbus_registers.PARAMETERS, "parameters"),
+                (ap_modbus_registers.DIAGNOSIS, "diagnosis"),
+            )
+        ),
+        (
+            ap_modbus_registers.ISDU_STATUS.register_address,
+            ap_modbus_registers.ISDU_DATA.register_address
+            + ap_modbus_registers.ISDU_DATA.length,
+            "isdu",
+        ),
+    )
 
     @dataclass
     class ApInformation:
@@ -56,6 +309,58 @@ class CpxAp(CpxBase):
         product_key: str = None
         order_text: str = None
 
+        @property
+        def apdd_name(self) -> str:
+            """File name of the APDD of the module in the apdd_path"""
+            return self.order_text + "_v" + self.fw_version.replace(".", "-") + ".json"
+
+        def fingerprint(self) -> tuple:
+            """Values of the module that are compared to detect a changed topology
+            (see ap_modbus_registers.MODULE_FINGERPRINT)"""
+            # all fields from module_code up to serial_number
+            return astuple(self)[:10]
+
+        @classmethod
+        def from_bytes(cls, data: bytes):
+            """Initializes an ApInformation from the module information block
+            (see ap_modbus_registers.MODULE_INFORMATION)"""
+
+            def field(modbus_register) -> bytes:
+                offset = (
+                    modbus_register.register_address
+                    - ap_modbus_registers.MODULE_INFORMATION.register_address
+                ) * 2
+                return data[offset : offset + modbus_register.length * 2]
+
+            def uint(modbus_register) -> int:
+                return int.from_bytes(
+                    field(modbus_register), byteorder="little", signed=False
+                )
+
+            return cls(
+                module_code=uint(ap_modbus_registers.MODULE_CODE),
+                module_class=uint(ap_modbus_registers.MODULE_CLASS),
+                communication_profiles=uint(ap_modbus_registers.COMMUNICATION_PROFILE),
+                input_size=uint(ap_modbus_registers.INPUT_SIZE),
+                output_channels=uint(ap_modbus_registers.INPUT_CHANNELS),
+                output_size=uint(ap_modbus_registers.OUTPUT_SIZE),
+                input_channels=uint(ap_modbus_registers.OUTPUT_CHANNELS),
+                hw_version=uint(ap_modbus_registers.HW_VERSION),
+                fw_version=".".join(
+                    str(x)
+                    for x in struct.unpack(
+                        "<HHH", field(ap_modbus_registers.FW_VERSION)
+                    )
+                ),
+                serial_number=hex(uint(ap_modbus_registers.SERIAL_NUMBER)),
+                product_key=field(ap_modbus_registers.PRODUCT_KEY)
+                .decode("ascii")
+                .strip("\x00"),
+                order_text=field(ap_modbus_registers.ORDER_TEXT)
+                .decode("ascii")
+                .strip("\x00"),
+            )
+
     @dataclass
     class Diagnostics(CpxBase.BitwiseReg8):
         """Diagnostic information"""
@@ -71,6 +376,7 @@ class CpxAp(CpxBase):
         _7: None  # spacer for not-used bit
 
     # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-branches
+    # pylint: disable=too-many-statements
     def __init__(
         self,
         timeout: float = None,
@@ -78,6 +384,9 @@ class CpxAp(CpxBase):
         docu_path: str = None,
         generate_docu: bool = True,
         cycle_time: float = 0.01,
+        process_image: bool = False,
+        output_image: bool = False,
+        startup_trace: bool = False,
         **kwargs,
     ):
         """Constructor of the CpxAp class.
@@ -87,6 +396,8 @@ class CpxAp(CpxBase):
         description files (APDD) of the modules. If there is a change in the system a reconnect is
         always required and this will also update the documentation. The filename will always
         include the ip-address, so you can have multiple systems with individual documentations.
+        The documentation is generated in a background thread and only if the system changed
+        since it was written last.
 
         :param timeout: Modbus timeout (in s) that should be configured on the slave
         :type timeout: float
@@ -95,13 +406,31 @@ class CpxAp(CpxBase):
         :param docu_path: (optional) Path where the documentation files are saved
         :type docu_path: str
         :param generate_docu: (optional) parameter to disable the generation of the documentation
-            this is useful for big systems when the generation takes too long
+            in the background. It can still be generated with generate_documentation()
         :type generate_docu: bool
         :param cycle_time: (optional) Cycle time (in s) for refreshing the connection automatically
             to avoid timeouts. If None, no automatic refresh is done.
         :type cycle_time: float
+        :param process_image: (optional) Read the complete input area with one bulk read
+            per cycle and serve read_channels() of all modules from this snapshot. If
+            cycle_time is None, the image is only refreshed when calling perform_io()
+        :type process_image: bool
+        :param output_image: (optional) Keep a shadow image of all outputs. Channel writes
+            only update the shadow and all changed outputs are flushed together once per
+            cycle. If cycle_time is None, outputs are only written when calling
+            perform_io() or flush_outputs(). If the IOThread stopped, every channel
+            write is flushed immediately
+        :type output_image: bool
+        :param startup_trace: (optional) Record the wall time and Modbus requests of
+            every startup phase per module, see startup_report
+        :type startup_trace: bool
         """
+        start = time.perf_counter()
         super().__init__(**kwargs)
+        self._startup_trace = None
+        if startup_trace:
+            self._startup_trace = StartupTrace(self.metrics)
+            self._startup_trace.add("connect", None, time.perf_counter() - start)
         if not self.connected():
             return
 
@@ -110,10 +439,14 @@ class CpxAp(CpxBase):
 
         self.global_diagnosis_register = ap_modbus_registers.DIAGNOSIS.register_address
         self.next_diagnosis_register = self.global_diagnosis_register + 6
-        self.interface_lock = Lock()
+        # reentrant, so the IO thread can hold it for the complete diagnosis update
+        self.interface_lock = RLock()
+        self._module_count = None
+        self._diagnosis_summary = None
 
         if timeout is not None:
-            self.set_timeout(int(timeout * 1000))
+            with self._startup_phase("timeout"):
+                self.set_timeout(int(timeout * 1000))
         else:
             Logging.logger.info(
                 "Timeout is not specified. Not setting the timeout on target device."
@@ -129,66 +462,505 @@ class CpxAp(CpxBase):
         else:
             self._docu_path = self.create_docu_path()
 
-        apdds = os.listdir(self._apdd_path)
-
-        self.gateway_module_id = None
-        for i in range(self.read_module_count()):
-            info = self.read_apdd_information(i)
-            apdd_name = (
-                info.order_text + "_v" + info.fw_version.replace(".", "-") + ".json"
-            )
-
-            # if correct apdd exists in folder, use it!
-            if apdd_name in apdds:
-                with open(
-                    self._apdd_path + "/" + apdd_name, "r", encoding="utf-8"
-                ) as f:
-                    module_apdd = json.load(f)
-                Logging.logger.debug(
-                    f"Loaded apdd {apdd_name} for module index {i} from filesystem"
-                )
-
-            # if it does not exist, load it from the module
-            else:
-                module_apdd = self._grab_apdd(
-                    self.ip_address, i, self._apdd_path, info.fw_version
-                )
-                Logging.logger.debug(
-                    f"Loaded apdd {apdd_name} from module index {i} and saved to {self._apdd_path}"
-                )
-                # if the webserver access is rather slow then the modbus connection can timeout
-                self.check_connection_and_try_reconnect()
-
-            module = build_ap_module(module_apdd, info.module_code)
-            self._add_module(module, info)
-            if "-EP-" in info.order_text and self.gateway_module_id is None:
-                self.gateway_module_id = i
-        if self.gateway_module_id is None:
-            raise CpxInitError(message="Gateway not Found")
+        self._setup_modules()
 
+        self.docu_thread = None
         if generate_docu:
-            generate_system_information_file(self)
+            self.docu_thread = Thread(
+                target=self._generate_documentation_in_background,
+                name="DocuGenerator",
+                daemon=True,
+            )
+            self.docu_thread.start()
+
+        self.input_image = None
+        self.output_image = None
+        self.change_detector = None
+        self._subscriptions = []
+        self._subscription_lock = Lock()
+        self._subscription_detector = None
+        self._subscribed_diagnosis = None
+        self._dispatcher = EventDispatcher()
+        with self._startup_phase("process_image"):
+            if process_image:
+                self.enable_process_image()
+            if output_image:
+                self.enable_output_image()
 
         self.diagnosis_status = []
+        self.last_io_error = None
+        self.io_errors = 0
         self.io_thread = None
         if cycle_time is not None:
             self.io_thread = IOThread(self.perform_io, cycle_time=cycle_time)
             self.io_thread.start()
 
+        if self._startup_trace is not None:
+            self._startup_trace.add(
+                "total",
+                None,
+                time.perf_counter() - start,
+                self.metrics.request_count(),
+            )
+
+    @property
+    def startup_report(self) -> StartupReport:
+        """Wall time and Modbus requests of the startup phases per module or None if
+        the constructor was called without startup_trace. The phases are "connect",
+        "timeout", "module_information", "apdd_download", "apdd_load", "module_cache",
+        "module_build", "module_configure" (including IO-Link fieldbus parameters),
+        "process_image" and "total". "documentation" is added when the generation in
+        the background is finished."""
+        trace = getattr(self, "_startup_trace", None)
+        return None if trace is None else trace.report()
+
+    def _startup_phase(self, name: str, module: int = None):
+        """Returns a context manager that records a startup phase if it is traced"""
+        trace = getattr(self, "_startup_trace", None)
+        return nullcontext() if trace is None else trace.phase(name, module)
+
+    def _setup_modules(self) -> None:
+        """Reads the module information of all modules, loads their APDDs and adds the
+        built modules to the system"""
+        with self._startup_phase("module_information"):
+            infos = self._read_topology()
+
+        missing = missing_apdds(self._apdd_path, infos)
+        module_apdds = self._download_apdds(missing, infos) if missing else {}
+
+        self.gateway_module_id = None
+        for i, module in enumerate(
+            build_modules(self._apdd_path, infos, module_apdds, self._startup_phase)
+        ):
+            with self._startup_phase("module_configure", i):
+                self._add_module(module, infos[i])
+        self.gateway_module_id = gateway_position(infos)
+
+    def _read_topology(self) -> list[ApInformation]:
+        """Returns the module information of all modules. If the stored topology of
+        this system matches the fingerprints of the modules, it is used instead of
+        reading the complete module information."""
+        module_count = self.read_module_count()
+        topology = ApTopologySnapshot(self._apdd_path, self.ip_address)
+        infos = topology.load(module_count, self.ApInformation)
+        if infos is not None and self.read_module_fingerprints(module_count) == [
+            info.fingerprint() for info in infos
+        ]:
+            Logging.logger.debug(f"Topology of {module_count} modules is unchanged")
+            return infos
+
+        infos = self.read_all_apdd_information(module_count)
+        topology.save(infos)
+        return infos
+
+    def _download_apdds(self, missing: dict, infos: list[ApInformation]) -> dict:
+        """Downloads the missing APDDs from the modules in parallel over one keep-alive
+        HTTP session. The modbus connection is kept alive in the meantime.
+
+        :param missing: module index of every missing APDD name
+        :type missing: dict[str, int]
+        :param infos: ApInformation of all modules
+        :type infos: list[ApInformation]
+        :return: APDD of every missing APDD name
+        :rtype: dict[str, dict]
+        """
+        return download_apdds(
+            self.ip_address,
+            self._apdd_path,
+            missing,
+            infos,
+            grab_apdd=self._grab_apdd,
+            workers=self.APDD_DOWNLOAD_WORKERS,
+            keepalive=self.check_connection_and_try_reconnect,
+            keepalive_interval=self.APDD_KEEPALIVE_INTERVAL,
+            startup_phase=self._startup_phase,
+        )
+
+    def _generate_documentation_in_background(self) -> None:
+        try:
+            with self._startup_phase("documentation"):
+                generate_system_information_file(self)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # nobody could handle the error in the background thread
+            Logging.logger.warning(f"Generating the system documentation failed: {e}")
+
+    def generate_documentation(self, force: bool = False) -> bool:
+        """Writes the system documentation to the docu_path. A generation started in
+        the background by the constructor is awaited first.
+
+        :param force: (optional) Write the documentation even if it is up to date
+        :type force: bool
+        :return: True if the documentation was written, False if it was up to date
+        :rtype: bool
+        """
+        if getattr(self, "docu_thread", None) is not None:
+            self.docu_thread.join()
+        return generate_system_information_file(self, force=force)
+
     def shutdown(self):
         """Shutdown function"""
         if hasattr(self, "io_thread"):
             if self.io_thread is not None:
                 self.io_thread.stop()
+        if getattr(self, "docu_thread", None) is not None:
+            self.docu_thread.join()
+        if getattr(self, "output_image", None) is not None:
+            self.flush_outputs()
+        if getattr(self, "_dispatcher", None) is not None:
+            self._dispatcher.shutdown(timeout=1.0)
         super().shutdown()
         return False
 
-    def perform_io(self) -> None:
+    def reconnect(self):
+        """Shutdown modbus connection and reconnect. The module count and the global
+        diagnosis are read again afterwards, the modules may have changed meanwhile."""
+        self._module_count = None
+        self._diagnosis_summary = None
+        super().reconnect()
+
+    def perform_io(self, raise_errors: bool = False) -> None:
         """
         This function is called periodically by the IOThread.
-        It reads the current diagnosis status.
+        It flushes pending outputs, refreshes the process image (if enabled), updates
+        the diagnosis status and evaluates the subscriptions.
+        The process data is exchanged in the cyclic lane and therefore served before
+        waiting acyclic requests. The diagnosis is skipped while an acyclic transaction
+        (e.g. a parameter access) holds the interface, so it cannot stall the cycle.
+        A failing step does not stop the cycle: the error is logged, counted in
+        io_errors and kept in last_io_error, and the step is repeated with the next
+        cycle (outputs whose flush failed stay pending).
+
+        :param raise_errors: (optional) Raise the first error of the cycle after all
+            steps were performed
+        :type raise_errors: bool
+        """
+        errors = []
+        with self.io_lock.lane(CYCLIC):
+            self._perform_io_step(self.flush_outputs, errors)
+            if self.input_image is not None:
+                self._perform_io_step(self._update_process_image, errors)
+        self._perform_io_step(self._update_diagnosis_status, errors)
+        if self._subscriptions:
+            self._perform_io_step(self._evaluate_subscriptions, errors)
+        if errors and raise_errors:
+            raise errors[0]
+
+    def _perform_io_step(self, step, errors: list) -> None:
+        """Performs one step of the IO cycle and adds its error to errors"""
+        try:
+            step()
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            # the IOThread stops on errors and nobody would flush the outputs anymore
+            self.last_io_error = error
+            self.io_errors += 1
+            errors.append(error)
+            Logging.logger.error(f"IO cycle step {step.__name__} failed: {error!r}")
+
+    def _update_process_image(self) -> None:
+        """Reads a new snapshot of the input process image"""
+        self.input_image.update(self.read_reg_data)
+
+    def io_thread_stopped(self) -> bool:
+        """Returns True if the IOThread was started but does not run anymore. Channel
+        writes to the output image are then flushed immediately.
+
+        :return: True if the IOThread stopped
+        :rtype: bool
+        """
+        io_thread = getattr(self, "io_thread", None)
+        return io_thread is not None and not io_thread.is_alive()
+
+    def _update_diagnosis_status(self) -> None:
+        """Reads the global diagnosis registers and reads the diagnosis status of all
+        modules only if they changed since the last update. The global registers are
+        read with one request, the diagnosis status needs a complete parameter
+        transaction. If another thread holds the interface, the update is skipped
+        instead of waiting for it."""
+        # pylint: disable=consider-using-with
+        if not self.interface_lock.acquire(blocking=False):
+            return
+        try:
+            summary = self.read_reg_data(
+                self.global_diagnosis_register,
+                length=self.next_diagnosis_register - self.global_diagnosis_register,
+            )
+            if summary != self._diagnosis_summary:
+                self.diagnosis_status = self.read_diagnostic_status()
+                self._diagnosis_summary = summary
+        finally:
+            self.interface_lock.release()
+
+    def enable_process_image(self) -> InputProcessImage:
+        """Creates the input process image for all modules and reads the first snapshot.
+        From then on, read_channels() of the modules is served from the latest snapshot.
+
+        :return: The input process image
+        :rtype: InputProcessImage
+        """
+        start_register = ap_modbus_registers.INPUTS.register_address
+        length = (self.next_input_register or start_register) - start_register
+        self.input_image = InputProcessImage(start_register, length)
+        self.input_image.update(self.read_reg_data)
+        for module in self._modules:
+            module.input_image = self.input_image
+        Logging.logger.debug(f"Enabled {self.input_image}")
+        return self.input_image
+
+    def disable_process_image(self) -> None:
+        """Removes the input process image. The modules read their registers directly again."""
+        for module in self._modules:
+            module.input_image = None
+        self.input_image = None
+
+    def enable_output_image(self) -> OutputProcessImage:
+        """Creates the output shadow image for all modules and loads the current outputs.
+        From then on, channel writes of the modules are flushed once per cycle.
+
+        :return: The output shadow image
+        :rtype: OutputProcessImage
+        """
+        start_register = ap_modbus_registers.OUTPUTS.register_address
+        length = (self.next_output_register or start_register) - start_register
+        self.output_image = OutputProcessImage(start_register, length)
+        self.output_image.load(self.read_reg_data)
+        for module in self._modules:
+            module.output_image = self.output_image
+        Logging.logger.debug(f"Enabled {self.output_image}")
+        return self.output_image
+
+    def disable_output_image(self) -> None:
+        """Flushes pending outputs and removes the output shadow image. The modules
+        write their registers directly again."""
+        if self.output_image is not None:
+            self.flush_outputs()
+        for module in self._modules:
+            module.output_image = None
+        self.output_image = None
+
+    def flush_outputs(self) -> int:
+        """Writes all pending outputs of the shadow image to the device.
+
+        :return: Number of write requests sent
+        :rtype: int
+        """
+        if self.output_image is None:
+            return 0
+        return self.output_image.flush(self.write_reg_data)
+
+    def _create_change_detector(self) -> ChangeDetector:
+        """Returns a change detector for the input channels of all modules except
+        IO-Link modules and records the current inputs as baseline"""
+        # the codecs of the modules are not part of the public API
+        # pylint: disable=protected-access
+        start_register = ap_modbus_registers.INPUTS.register_address
+        detector = ChangeDetector()
+        for module in self._modules:
+            if (
+                module.channels.inputs
+                and module.apdd_information.product_category
+                != ProductCategory.IO_LINK.value
+            ):
+                detector.watch(
+                    module.position,
+                    module.system_entry_registers.inputs - start_register,
+                    module._channel_codec("inputs"),
+                )
+        self._detect_changes(detector)
+        return detector
+
+    def _detect_changes(self, detector: ChangeDetector) -> list[ChannelChange]:
+        """Compares the current inputs with the previous ones of the detector"""
+        if self.input_image is not None:
+            snapshot = self.input_image.snapshot
+            if snapshot is None:
+                return []
+            return detector.update(snapshot.data, snapshot.timestamp, snapshot.cycle)
+
+        start_register = ap_modbus_registers.INPUTS.register_address
+        length = (self.next_input_register or start_register) - start_register
+        if length == 0:
+            return []
+        with self.io_lock.lane(CYCLIC):
+            data = self.read_reg_data(start_register, length)
+        return detector.update(data)
+
+    def enable_change_detection(self) -> ChangeDetector:
+        """Creates the change detector for the input channels of all modules and
+        records the current inputs as baseline. IO-Link modules are not watched.
+
+        :return: The change detector
+        :rtype: ChangeDetector
+        """
+        self.change_detector = self._create_change_detector()
+        Logging.logger.debug(f"Enabled {self.change_detector}")
+        return self.change_detector
+
+    def disable_change_detection(self) -> None:
+        """Removes the change detector"""
+        self.change_detector = None
+
+    def detect_changes(self) -> list[ChannelChange]:
+        """Returns the input channels that changed since the last call. Single BOOL
+        channels are reported as RISING or FALLING, all other channels as CHANGED.
+        Changes that are reverted between two calls are not reported.
+
+        With the input process image enabled (process_image=True) the latest snapshot
+        is compared and nothing is read from the device, otherwise the complete input
+        area is read with one bulk read. The change detection is enabled on the first
+        call, which only records the baseline. Subscriptions use their own detector
+        and are not affected by this function.
+
+        :return: Changed channels in the order of the input area
+        :rtype: list[ChannelChange]
+        """
+        if self.change_detector is None:
+            self.enable_change_detection()
+            return []
+        return self._detect_changes(self.change_detector)
+
+    # pylint: disable=too-many-arguments
+    def subscribe(
+        self,
+        module: int | ApModule,
+        channel: int,
+        callback: Callable[[ChannelChange], Any],
+        *,
+        debounce: float = 0.0,
+        min_interval: float = 0.0,
+        overflow: str = DROP_OLDEST,
+        queue_size: int = 64,
+    ) -> Subscription:
+        """Calls callback with a ChannelChange whenever the input channel changes.
+        The changes are evaluated in every I/O cycle (perform_io()), the callbacks run
+        on the worker threads of the event dispatcher, so a slow callback never stalls
+        the I/O cycle. Enable the process image (process_image=True) to evaluate the
+        subscriptions without an additional read of the inputs per cycle.
+
+        :param module: Module position or module
+        :type module: int | ApModule
+        :param channel: Channel number, None for all input channels of the module
+        :type channel: int
+        :param callback: Called with the ChannelChange on a worker thread
+        :type callback: Callable
+        :param debounce: (optional) Time (in s) a new value must be stable before it
+            is reported
+        :type debounce: float
+        :param min_interval: (optional) Minimum time (in s) between two callbacks of
+            one channel, changes in between are merged into one event
+        :type min_interval: float
+        :param overflow: (optional) DROP_OLDEST or COALESCE, what to do with new
+            events if the callback can not keep up
+        :type overflow: str
+        :param queue_size: (optional) Maximum number of pending events
+        :type queue_size: int
+        :return: Subscription, cancel it with unsubscribe()
+        :rtype: Subscription
+        """
+        position = module if isinstance(module, int) else module.position
+        if channel is not None:
+            channel_range_check(channel, len(self._modules[position].channels.inputs))
+        subscription = Subscription(
+            ChannelChange,
+            position,
+            channel,
+            callback,
+            debounce=debounce,
+            min_interval=min_interval,
+            overflow=overflow,
+            queue_size=queue_size,
+        )
+        if self._subscription_detector is None:
+            self._subscription_detector = self._create_change_detector()
+        return self._add_subscription(subscription)
+
+    # pylint: disable=too-many-arguments
+    def subscribe_diagnosis(
+        self,
+        callback: Callable[[DiagnosisChange], Any],
+        module: int | ApModule = None,
+        *,
+        debounce: float = 0.0,
+        min_interval: float = 0.0,
+        overflow: str = COALESCE,
+        queue_size: int = 64,
+    ) -> Subscription:
+        """Calls callback with a DiagnosisChange whenever the diagnosis status (see
+        read_diagnostic_status()) of the module changes. The changes are evaluated in
+        every I/O cycle (perform_io()), the callbacks run on the worker threads of the
+        event dispatcher. See subscribe() for the parameters.
+
+        :param callback: Called with the DiagnosisChange on a worker thread
+        :type callback: Callable
+        :param module: (optional) Module position or module, default all modules
+        :type module: int | ApModule
+        :return: Subscription, cancel it with unsubscribe()
+        :rtype: Subscription
+        """
+        position = (
+            module if module is None or isinstance(module, int) else module.position
+        )
+        subscription = Subscription(
+            DiagnosisChange,
+            position,
+            None,
+            callback,
+            debounce=debounce,
+            min_interval=min_interval,
+            overflow=overflow,
+            queue_size=queue_size,
+        )
+        return self._add_subscription(subscription)
+
+    def _add_subscription(self, subscription: Subscription) -> Subscription:
+        self._dispatcher.add(subscription)
+        with self._subscription_lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        Logging.logger.debug(f"Added {subscription}")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Cancels the subscription, pending callbacks are discarded
+
+        :param subscription: Subscription returned by subscribe() or
+            subscribe_diagnosis()
+        :type subscription: Subscription
         """
-        self.diagnosis_status = self.read_diagnostic_status()
+        subscription.cancel()
+        with self._subscription_lock:
+            self._subscriptions = [s for s in self._subscriptions if s.active]
+
+    @property
+    def subscriptions(self) -> list[Subscription]:
+        """Active subscriptions"""
+        return list(self._subscriptions)
+
+    def _evaluate_subscriptions(self) -> None:
+        """Detects the channel and diagnosis changes of this cycle and offers them to
+        all subscriptions"""
+        subscriptions = [s for s in self._subscriptions if s.active]
+        if not subscriptions:
+            return
+        events = []
+        if any(s.event_type is ChannelChange for s in subscriptions):
+            events += self._detect_changes(self._subscription_detector)
+        if any(s.event_type is DiagnosisChange for s in subscriptions):
+            events += self._diagnosis_changes()
+        now = time.monotonic()
+        for subscription in subscriptions:
+            subscription.evaluate(events, now)
+
+    def _diagnosis_changes(self) -> list[DiagnosisChange]:
+        """Compares the diagnosis status with the one of the previous cycle"""
+        status = self.diagnosis_status
+        previous, self._subscribed_diagnosis = self._subscribed_diagnosis, status
+        if previous is None or previous is status:
+            return []
+        timestamp = time.time()
+        return [
+            DiagnosisChange(position, old, new, timestamp)
+            for position, (old, new) in enumerate(zip(previous, status))
+            if old != new
+        ]
 
     def delete_apdds(self) -> None:
         """Delete all downloaded apdds in the apdds path.
@@ -248,31 +1020,8 @@ class CpxAp(CpxBase):
         :param timeout_ms: Modbus timeout in ms (milli-seconds)
         :type timeout_ms: int
         """
-
-        if 0 < timeout_ms < 100:
-            timeout_ms = 100
-            Logging.logger.warning(
-                f"Setting the timeout below 100 ms can lead to "
-                f"exclusion from the system. To prevent this, "
-                f"the timeout is limited to a minimum of {timeout_ms} ms"
-            )
-        Logging.logger.info(f"Setting modbus timeout to {timeout_ms} ms")
-        value_to_write = timeout_ms.to_bytes(
-            length=ap_modbus_registers.TIMEOUT.length * 2, byteorder="little"
-        )
         with self.interface_lock:
-            self.write_reg_data(
-                value_to_write, ap_modbus_registers.TIMEOUT.register_address
-            )
-
-            # Check if it actually succeeded
-            indata = int.from_bytes(
-                self.read_reg_data(*ap_modbus_registers.TIMEOUT),
-                byteorder="little",
-                signed=False,
-            )
-        if indata != timeout_ms:
-            Logging.logger.error("Setting of modbus timeout was not successful")
+            run(set_timeout(timeout_ms, ap_modbus_registers.TIMEOUT), self)
 
     def _add_module(self, module: ApModule, info: ApInformation) -> None:
         """Adds one module to the base. This is required to use the module.
@@ -305,9 +1054,8 @@ class CpxAp(CpxBase):
         :rtype: int
         """
         with self.interface_lock:
-            reg = self.read_reg_data(*ap_modbus_registers.MODULE_COUNT)
-        value = int.from_bytes(reg, byteorder="little")
-        Logging.logger.debug(f"Total module count: {value}")
+            value = run(ap_protocol.read_module_count(), self)
+        self._module_count = value
         return value
 
     def print_system_information(self) -> None:
@@ -364,7 +1112,8 @@ class CpxAp(CpxBase):
                 print("\t(No readable channels available)")
 
     def read_apdd_information(self, position: int) -> ApInformation:
-        """Reads and returns detailed information for a specific IO module
+        """Reads and returns detailed information for a specific IO module with
+        one request.
 
         :param position: Module position index starting with 0
         :type position: int
@@ -372,127 +1121,94 @@ class CpxAp(CpxBase):
         :rtype: ApInformation
         """
         with self.interface_lock:
-            info = self.ApInformation(
-                module_code=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(ap_modbus_registers.MODULE_CODE, position)
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                module_class=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(ap_modbus_registers.MODULE_CLASS, position)
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                communication_profiles=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(
-                            ap_modbus_registers.COMMUNICATION_PROFILE, position
-                        )
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                input_size=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(ap_modbus_registers.INPUT_SIZE, position)
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                output_channels=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(
-                            ap_modbus_registers.INPUT_CHANNELS, position
-                        )
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                output_size=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(ap_modbus_registers.OUTPUT_SIZE, position)
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                input_channels=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(
-                            ap_modbus_registers.OUTPUT_CHANNELS, position
-                        )
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                hw_version=int.from_bytes(
-                    self.read_reg_data(
-                        *self._module_offset(ap_modbus_registers.HW_VERSION, position)
-                    ),
-                    byteorder="little",
-                    signed=False,
-                ),
-                fw_version=".".join(
-                    str(x)
-                    for x in struct.unpack(
-                        "<HHH",
-                        self.read_reg_data(
-                            *self._module_offset(
-                                ap_modbus_registers.FW_VERSION, position
-                            )
-                        ),
-                    )
-                ),
-                serial_number=hex(
-                    int.from_bytes(
-                        self.read_reg_data(
-                            *self._module_offset(
-                                ap_modbus_registers.SERIAL_NUMBER, position
-                            )
-                        ),
-                        byteorder="little",
-                        signed=False,
-                    )
-                ),
-                product_key=(
-                    self.read_reg_data(
-                        *self._module_offset(ap_modbus_registers.PRODUCT_KEY, position)
-                    )
-                    .decode("ascii")
-                    .strip("\x00")
-                ),
-                order_text=(
-                    self.read_reg_data(
-                        *self._module_offset(ap_modbus_registers.ORDER_TEXT, position)
-                    )
-                    .decode("ascii")
-                    .strip("\x00")
-                ),
+            return run(
+                ap_protocol.read_apdd_information(position, self.ApInformation), self
             )
-        Logging.logger.debug(f"Reading ApInformation: {info}")
-        return info
+
+    def read_all_apdd_information(
+        self, module_count: int = None
+    ) -> list[ApInformation]:
+        """Reads and returns detailed information for all IO modules. The information
+        blocks of all modules are contiguous, so they are read together in as few
+        requests as the Modbus limits allow (pipelined if enabled).
+
+        :param module_count: (optional) Number of modules, read from the system if None
+        :type module_count: int
+        :return: ApInformation object for every module position
+        :rtype: list[ApInformation]
+        """
+        if module_count is None:
+            module_count = self.read_module_count()
+        with self.interface_lock:
+            return run(
+                ap_protocol.read_all_apdd_information(module_count, self.ApInformation),
+                self,
+            )
+
+    def read_module_fingerprints(self, module_count: int = None) -> list[tuple]:
+        """Reads the module code, sizes, versions and serial number of all modules.
+        Several neighbouring modules are read with one request, so this needs fewer
+        requests than read_all_apdd_information().
+
+        :param module_count: (optional) Number of modules, read from the system if None
+        :type module_count: int
+        :return: Fingerprint (see ApInformation.fingerprint()) for every module position
+        :rtype: list[tuple]
+        """
+        if module_count is None:
+            module_count = self.read_module_count()
+        stride = ap_modbus_registers.MODULE_INFORMATION.length
+        register, length = ap_modbus_registers.MODULE_FINGERPRINT
+        # a request spans from the first to the end of the last fingerprint
+        per_request = (MAX_READ_REGISTERS - length) // stride + 1
+        blocks = [
+            (
+                register + stride * first,
+                stride * (min(per_request, module_count - first) - 1) + length,
+            )
+            for first in range(0, module_count, per_request)
+        ]
+        with self.interface_lock:
+            data = self.read_reg_blocks(blocks)
+        return [
+            self.ApInformation.from_bytes(
+                block[i * stride * 2 : (i * stride + length) * 2]
+            ).fingerprint()
+            for block in data
+            for i in range(div_ceil(len(block) // 2, stride))
+        ]
+
+    def read_all_channels(self, as_array: bool = False) -> list:
+        """Read the channels of all modules. With the input process image enabled
+        (process_image=True) the inputs of all modules are taken from the same snapshot.
+
+        :param as_array: (optional) Decode the channels of every module into a numpy
+            array, see ApModule.read_channels()
+        :type as_array: bool
+        :return: Channel values of every module position, None for modules without
+            channels
+        :rtype: list
+        """
+        return [
+            (
+                module.read_channels(as_array=as_array)
+                if module.is_function_supported("read_channels")
+                else None
+            )
+            for module in self._modules
+        ]
 
     def read_diagnostic_status(self) -> list[Diagnostics]:
-        """Read the diagnostic status and return a Diagnostics object for each module
+        """Read the diagnostic status and return a Diagnostics object for each module.
+        The module count is read once and then taken from the last read_module_count().
 
         :ret value: Diagnostics status for every module
         :rtype: list[Diagnostics]
         """
-        # overwrite the type size with the actual module count + 1 (see datasheet)
-        ap_diagnosis_parameter = Parameter(
-            parameter_id=20196,
-            parameter_instances={"FirstIndex": 0, "NumberOfInstances": 1},
-            is_writable=False,
-            array_size=self.read_module_count() + 1,
-            data_type="UINT8",
-            default_value=0,
-            description="AP diagnosis status for each Module",
-            name="AP diagnosis status",
-        )
-
+        module_count = self._module_count
+        if module_count is None:
+            module_count = self.read_module_count()
+        ap_diagnosis_parameter = ap_protocol.diagnosis_status_parameter(module_count)
         reg = self.read_parameter(self.gateway_module_id, ap_diagnosis_parameter)
         return [self.Diagnostics.from_int(r) for r in reg]
 
@@ -504,34 +1220,10 @@ class CpxAp(CpxBase):
         :ret value: Diagnosis state
         :rtype: dict"""
         with self.interface_lock:
-            reg = self.read_reg_data(self.global_diagnosis_register, length=2)
-        diagnosis_keys = [
-            "Device available",
-            "Current",
-            "Voltage",
-            "Temperature",
-            "reserved",
-            "Movement",
-            "Configuration / Parameters",
-            "Monitoring",
-            "Communication",
-            "Safety",
-            "Internal Hardware",
-            "Software",
-            "Maintenance",
-            "Misc",
-            "reserved(14)",
-            "reserved(15)",
-            "External Device",
-            "Security",
-            "Encoder",
-        ]
-        # the rest of the bits are "reserved" and therefore trunctuated
-        diagnosis_dict = {
-            diagnosis_keys[i]: bytes_to_boollist(reg)[i]
-            for i in range(len(diagnosis_keys))
-        }
-        return diagnosis_dict
+            return run(
+                ap_protocol.read_global_diagnosis_state(self.global_diagnosis_register),
+                self,
+            )
 
     def read_active_diagnosis_count(self) -> int:
         """Read count of currently active diagnosis from the cpx system
@@ -609,6 +1301,7 @@ class CpxAp(CpxBase):
         data = parameter_unpack(parameter, raw)
         return data
 
+    @measured("parameter", "parameters")
     def _write_parameter_raw(
         self, position: int, param_id: int, instance: int, data: bytes
     ) -> None:
@@ -624,37 +1317,10 @@ class CpxAp(CpxBase):
         :param data: data as bytes object
         :type data: bytes
         """
-
-        param_reg = ap_modbus_registers.PARAMETERS.register_address
-        # module indexing starts with 1 (see datasheet)
-        module_index = (position + 1).to_bytes(2, byteorder="little")
-        param_id = param_id.to_bytes(2, byteorder="little")
-        instance = instance.to_bytes(2, byteorder="little")
-        # length in bytes
-        length_bytes = len(data).to_bytes(2, byteorder="little")
-        command = (2).to_bytes(2, byteorder="little")  # 1=read, 2=write
-
         with self.interface_lock:
-            # prepare the command
-            self.write_reg_data(module_index + param_id + instance, param_reg)
-            # write length in bytes
-            self.write_reg_data(length_bytes, param_reg + 4)
-            # write data to register
-            self.write_reg_data(data, param_reg + 10)
-            # execute the command
-            self.write_reg_data(command, param_reg + 3)
-
-            exe_code = 0
-            while exe_code != 16:
-                exe_code = int.from_bytes(
-                    self.read_reg_data(param_reg + 3), byteorder="little"
-                )
-                # 1=read, 2=write, 3=busy, 4=error(request failed), 16=completed(request successful)
-                if exe_code == 4:
-                    raise CpxRequestError
-
-        Logging.logger.debug(f"Wrote data {data} to module position: {position - 1}")
+            run(ap_protocol.write_parameter(position, param_id, instance, data), self)
 
+    @measured("parameter", "parameters")
     def _read_parameter_raw(self, position: int, param_id: int, instance: int) -> bytes:
         """Read parameters via module position, param_id, instance (=channel)
         Raises "CpxRequestError" if request denied
@@ -668,56 +1334,26 @@ class CpxAp(CpxBase):
         :return: Parameter register values
         :rtype: bytes
         """
-
-        param_reg = ap_modbus_registers.PARAMETERS.register_address
-        # module indexing starts with 1 (see datasheet)
-        module_index = (position + 1).to_bytes(2, byteorder="little")
-        param_id = param_id.to_bytes(2, byteorder="little")
-        instance = instance.to_bytes(2, byteorder="little")
-        command = (1).to_bytes(2, byteorder="little")  # 1=read, 2=write
-
         with self.interface_lock:
-            # prepare and execute the read command
-            self.write_reg_data(module_index + param_id + instance + command, param_reg)
-
-            # 1=read, 2=write, 3=busy, 4=error(request failed), 16=completed(request successful)
-            exe_code = 0
-            while exe_code != 16:
-                exe_code = (
-                    int.from_bytes(
-                        self.read_reg_data(param_reg + 3), byteorder="little"
-                    )
-                    & 0xFF
-                )
-                if exe_code == 4:
-                    raise CpxRequestError
-
-            # get datalength in bytes from register 10004
-            length_bytes = int.from_bytes(
-                self.read_reg_data(param_reg + 4), byteorder="little"
-            )
-            # read 16 bit registers
-            length_registers = div_ceil(length_bytes, 2)
-            data = self.read_reg_data(param_reg + 10, length_registers)
-
-        Logging.logger.debug(
-            f"Read parameter {param_id}: {data} from module position: {position - 1}"
-        )
-
-        return data
-
-    def _module_offset(self, modbus_command: tuple, module: int) -> int:
-        register, length = modbus_command
-        return ((register + 37 * module), length)
+            return run(ap_protocol.read_parameter(position, param_id, instance), self)
 
     @staticmethod
     def _grab_apdd(
-        ip_address, module_index: int, apdd_path: str, fw_version: str
+        ip_address,
+        module_index: int,
+        apdd_path: str,
+        fw_version: str,
+        session=None,
     ) -> json:
-        """Grabs all apdd from module and saves them in apdd_path"""
+        """Grabs all apdd from module and saves them in apdd_path. If a requests.Session
+        is given, its pooled keep-alive connections are used for the request."""
+        if session is None:
+            # pylint: disable=import-outside-toplevel
+            import requests as session
+
         # Module indexs in ap start with 1
         url = f"http://{ip_address}/cgi-bin/ap-file-get?slot={module_index + 1}&filenumber=6"
-        response = requests.get(url, timeout=100)
+        response = session.get(url, timeout=100)
         # Check if the request was successful (status code 200)
         if response.status_code == 200:
             json_data = response.json()
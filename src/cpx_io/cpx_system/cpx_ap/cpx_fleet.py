@@ -0,0 +1,243 @@
+"""Fleet of CPX-AP systems that are started and polled together"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from threading import Lock
+
+from cpx_io.cpx_system.cpx_ap.cpx_ap import CpxAp
+from cpx_io.cpx_system.cpx_ap.ap_process_image import ProcessImageSnapshot
+from cpx_io.cpx_system.io_thread import IOThread
+from cpx_io.utils.logging import Logging
+
+
+@dataclass
+class DeviceStatistics:
+    """Latency and error statistics of one system in the fleet. Latencies are in s."""
+
+    # pylint: disable=too-many-instance-attributes
+    cycles: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    skipped_cycles: int = 0
+    last_error: str = None
+    startup_time: float = None
+    last_latency: float = None
+    min_latency: float = None
+    max_latency: float = None
+    total_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean latency of all successful cycles or None if there was none"""
+        successful = self.cycles - self.errors
+        if successful <= 0:
+            return None
+        return self.total_latency / successful
+
+    def add_cycle(self, latency: float) -> None:
+        """Adds a successful cycle with the given latency"""
+        self.cycles += 1
+        self.consecutive_errors = 0
+        self.last_latency = latency
+        self.total_latency += latency
+        self.min_latency = (
+            latency if self.min_latency is None else min(self.min_latency, latency)
+        )
+        self.max_latency = (
+            latency if self.max_latency is None else max(self.max_latency, latency)
+        )
+
+    def add_error(self, error: Exception) -> None:
+        """Adds a failed cycle"""
+        self.cycles += 1
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.last_error = repr(error)
+
+
+class CpxFleet:
+    """Starts many CPX-AP systems in parallel and polls all of them with one shared
+    scheduler instead of one IOThread per system. Every system is set up with an input
+    process image so that fleet-wide snapshots are available without additional requests.
+
+    A cycle waits at most io_timeout for the systems. A system whose previous cycle is
+    still running is skipped, a system that keeps failing is polled again only after
+    an exponential backoff, so an unreachable system does not stall the others.
+
+    Example:
+        with CpxFleet(["192.168.1.1", "192.168.1.2"], generate_docu=False) as fleet:
+            inputs = fleet.read_all_inputs()
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    # backoff (in s) after the first failed cycle of a system, doubled with every
+    # further failed cycle up to MAX_RETRY_BACKOFF
+    RETRY_BACKOFF = 0.1
+    MAX_RETRY_BACKOFF = 10.0
+
+    def __init__(
+        self,
+        ip_addresses: list[str],
+        cycle_time: float = 0.01,
+        max_workers: int = 16,
+        io_timeout: float = 1.0,
+        **kwargs,
+    ):
+        """Constructor of the CpxFleet class. All systems are created in parallel. Systems
+        that fail to start are logged and listed in failed_systems, the others are used.
+
+        :param ip_addresses: IP addresses of all systems
+        :type ip_addresses: list[str]
+        :param cycle_time: (optional) Cycle time (in s) of the shared scheduler that
+            refreshes process data and diagnosis of all systems. If None, no automatic
+            refresh is done and perform_io() must be called by the user.
+        :type cycle_time: float
+        :param max_workers: (optional) Maximum number of systems that are started or
+            polled at the same time
+        :type max_workers: int
+        :param io_timeout: (optional) Maximum time (in s) a cycle waits for the systems.
+            Systems that did not finish are skipped until their cycle is done
+        :type io_timeout: float
+        :param kwargs: Additional arguments that are passed to every CpxAp, e.g. timeout
+        """
+        kwargs.setdefault("process_image", True)
+        # the systems are polled by the fleet, not by their own IOThread
+        kwargs["cycle_time"] = None
+
+        self.systems = {}
+        self.failed_systems = {}
+        self.io_timeout = io_timeout
+        self._running = {}
+        self._retry_at = {}
+        self.statistics = {ip: DeviceStatistics() for ip in ip_addresses}
+        self._statistics_lock = Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="CpxFleet"
+        )
+
+        futures = {
+            ip: self._executor.submit(self._start_system, ip, kwargs)
+            for ip in ip_addresses
+        }
+        for ip, future in futures.items():
+            try:
+                self.systems[ip] = future.result()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                # one broken system must not prevent the others from starting
+                Logging.logger.error(f"Failed to start CPX-AP system {ip}: {error!r}")
+                self.failed_systems[ip] = error
+                self.statistics[ip].last_error = repr(error)
+
+        Logging.logger.info(
+            f"Started {len(self.systems)} of {len(ip_addresses)} CPX-AP systems"
+        )
+
+        self.io_thread = None
+        if cycle_time is not None:
+            self.io_thread = IOThread(self.perform_io, cycle_time=cycle_time)
+            self.io_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self.systems)})"
+
+    def _start_system(self, ip_address: str, kwargs: dict) -> CpxAp:
+        """Creates one system and records its startup time"""
+        start = time.perf_counter()
+        system = CpxAp(ip_address=ip_address, **kwargs)
+        self.statistics[ip_address].startup_time = time.perf_counter() - start
+        return system
+
+    def _perform_system_io(self, ip_address: str, system: CpxAp) -> None:
+        """Performs one cycle of one system and records its statistics"""
+        start = time.perf_counter()
+        try:
+            system.perform_io(raise_errors=True)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            # keep polling the other systems, the error is part of the statistics
+            Logging.logger.warning(f"IO cycle of {ip_address} failed: {error!r}")
+            with self._statistics_lock:
+                stats = self.statistics[ip_address]
+                stats.add_error(error)
+                backoff = self.RETRY_BACKOFF * 2 ** (stats.consecutive_errors - 1)
+            self._retry_at[ip_address] = time.monotonic() + min(
+                backoff, self.MAX_RETRY_BACKOFF
+            )
+            return
+        with self._statistics_lock:
+            self.statistics[ip_address].add_cycle(time.perf_counter() - start)
+
+    def _is_due(self, ip_address: str, now: float) -> bool:
+        """Returns True if the previous cycle of the system is done and its retry
+        backoff expired"""
+        running = self._running.get(ip_address)
+        if running is not None and not running.done():
+            return False
+        return self._retry_at.get(ip_address, 0.0) <= now
+
+    def perform_io(self) -> None:
+        """Performs one IO cycle (outputs, process image and diagnosis) of all systems
+        in parallel and waits at most io_timeout for them. Systems whose previous cycle
+        is still running or that are in their retry backoff are skipped. This function
+        is called periodically by the IOThread."""
+        now = time.monotonic()
+        futures = []
+        for ip, system in self.systems.items():
+            if not self._is_due(ip, now):
+                with self._statistics_lock:
+                    self.statistics[ip].skipped_cycles += 1
+                continue
+            self._running[ip] = self._executor.submit(
+                self._perform_system_io, ip, system
+            )
+            futures.append(self._running[ip])
+        if futures:
+            wait(futures, timeout=self.io_timeout)
+
+    def read_all_inputs(self) -> dict[str, ProcessImageSnapshot]:
+        """Returns the latest input process image snapshot of every system. The snapshot
+        is None if the last cycle of the system failed.
+
+        :return: Snapshot per IP address
+        :rtype: dict[str, ProcessImageSnapshot]
+        """
+        return {
+            ip: (system.input_image.snapshot if system.input_image else None)
+            for ip, system in self.systems.items()
+        }
+
+    def read_all_diagnosis(self) -> dict[str, list]:
+        """Returns the diagnosis status of the last cycle of every system.
+
+        :return: List of CpxAp.Diagnostics per IP address
+        :rtype: dict[str, list]
+        """
+        return {ip: system.diagnosis_status for ip, system in self.systems.items()}
+
+    def read_statistics(self) -> dict[str, DeviceStatistics]:
+        """Returns a copy of the latency and error statistics of every system.
+
+        :return: Statistics per IP address
+        :rtype: dict[str, DeviceStatistics]
+        """
+        with self._statistics_lock:
+            return {
+                ip: DeviceStatistics(**vars(stats))
+                for ip, stats in self.statistics.items()
+            }
+
+    def shutdown(self) -> None:
+        """Stops the shared scheduler and shuts down all systems"""
+        if self.io_thread is not None:
+            self.io_thread.stop()
+            self.io_thread = None
+        for system in self.systems.values():
+            system.shutdown()
+        self._executor.shutdown(wait=True)
@@ -3,7 +3,7 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ModuleDiagnosis:
     """Diagnosis information of the module"""
 
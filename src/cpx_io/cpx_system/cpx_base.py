@@ -1,16 +1,75 @@
 """CPX Base"""
 
 import struct
+from contextlib import contextmanager
 from dataclasses import dataclass, fields
-from functools import wraps
-from threading import Lock
+from functools import lru_cache, wraps
 
 from pymodbus.client import ModbusTcpClient
 from pymodbus.exceptions import ConnectionException
-from pymodbus.pdu.mei_message import ReadDeviceInformationRequest
+from cpx_io.cpx_system.io_scheduler import IoScheduler, LaneStatistics
+from cpx_io.cpx_system.modbus_pipeline import ModbusPipeline
+from cpx_io.cpx_system.retry_policy import (
+    RetryPolicy,
+    default_read_policy,
+    default_write_policy,
+)
+from cpx_io.cpx_system.register_transaction import read_device_info, run
+from cpx_io.cpx_system.transport_metrics import (
+    MeteredTransportMixin,
+    TransportMetrics,
+)
+from cpx_io.utils.helpers import register_chunks
 from cpx_io.utils.logging import Logging
 from cpx_io.utils.boollist import boollist_to_bytes, bytes_to_boollist
 
+# modbus limits a single read request to 125 and a write request to 123 registers
+MAX_READ_REGISTERS = 125
+MAX_WRITE_REGISTERS = 123
+
+
+@lru_cache(maxsize=None)
+def register_struct(count: int) -> struct.Struct:
+    """Returns the (cached) struct of count registers in little endian byte order"""
+    return struct.Struct(f"<{count}H")
+
+
+def register_words(data: bytes) -> tuple[bytes, tuple[int, ...]]:
+    """Returns data padded to full registers and its register values"""
+    # if odd number of bytes, add one zero byte
+    if len(data) % 2 != 0:
+        data = bytes(data) + b"\x00"
+    return data, register_struct(len(data) // 2).unpack(data)
+
+
+def register_data_chunks(data: bytes, register: int) -> list[tuple[bytes, int]]:
+    """Splits register data that exceeds one write request into (data, register)
+    chunks of at most MAX_WRITE_REGISTERS registers"""
+    return [
+        (data[(chunk - register) * 2 : (chunk - register + length) * 2], chunk)
+        for chunk, length in register_chunks(
+            register, len(data) // 2, MAX_WRITE_REGISTERS
+        )
+    ]
+
+
+@contextmanager
+def connection_errors():
+    """Context manager that raises connection errors of pymodbus as
+    ConnectionAbortedError, which is repeated by the retry policies"""
+    try:
+        yield
+    except ConnectionException as e:
+        raise ConnectionAbortedError(str(e)) from e
+
+
+def check_response(response, message: str = None):
+    """Raises ConnectionAbortedError with message (default: the message of the
+    response) if response is an error response, otherwise returns response"""
+    if response.isError():
+        raise ConnectionAbortedError(response.message if message is None else message)
+    return response
+
 
 class CpxInitError(Exception):
     """
@@ -45,20 +104,58 @@ class CpxConnectionError(Exception):
         super().__init__(message)
 
 
-class CpxBase:
+class ModuleAttributesMixin:
+    """Mixin of the systems that exposes every module as attribute named after it"""
+
+    # pylint: disable=too-few-public-methods
+
+    def update_module_names(self):
+        """Updates the module name list and attributes accordingly"""
+        for name in self._module_names:
+            delattr(self, name)
+
+        self._module_names = [module.name for module in self._modules]
+        for name, module in zip(self._module_names, self._modules):
+            setattr(self, name, module)
+
+
+class CpxBase(ModuleAttributesMixin, MeteredTransportMixin):
     """A class to connect to the Festo CPX system and read data from IO modules"""
 
-    def __init__(self, ip_address: str = None):
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        ip_address: str = None,
+        pipeline_depth: int = None,
+        read_policy: RetryPolicy = None,
+        write_policy: RetryPolicy = None,
+    ):
         """Constructor of CpxBase class.
 
         :param ip_address: Required IP address as string e.g. ('192.168.1.1')
         :type ip_address: str
+        :param pipeline_depth: (optional) Send register reads and writes over a pipelined
+            Modbus TCP connection that keeps up to pipeline_depth requests in flight.
+            If None, every request waits for its response before the next one is sent.
+        :type pipeline_depth: int
+        :param read_policy: (optional) Retry policy of all register reads. If None, a
+            failed read raises immediately.
+        :type read_policy: RetryPolicy
+        :param write_policy: (optional) Retry policy of all register writes. If None,
+            writes are attempted up to 5 times with a short exponential backoff.
+        :type write_policy: RetryPolicy
         """
         self._modules = []
         self._module_names = []
         self.base = None
         self.ip_address = ip_address
-        self.io_lock = Lock()
+        # all requests share the connection, cyclic requests are served first
+        self.io_lock = IoScheduler()
+        self.pipeline = None
+        self.read_policy = read_policy or default_read_policy()
+        self.write_policy = write_policy or default_write_policy()
+        self.metrics = TransportMetrics()
 
         if ip_address is None:
             Logging.logger.info("Not connected since no IP address was provided")
@@ -75,23 +172,55 @@ class CpxBase:
             )
             raise CpxConnectionError(message)
 
+        if pipeline_depth is not None:
+            self.enable_pipelining(pipeline_depth)
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.shutdown()
 
-    def update_module_names(self):
-        """Updates the module name list and attributes accordingly"""
-        for name in self._module_names:
-            delattr(self, name)
-
-        self._module_names = [module.name for module in self._modules]
-        for name, module in zip(self._module_names, self._modules):
-            setattr(self, name, module)
+    def enable_pipelining(self, depth: int = 8) -> ModbusPipeline:
+        """Opens a pipelined Modbus TCP connection for all register reads and writes.
+        Requests are matched to their responses by the Modbus transaction id, so up to
+        depth requests can be outstanding at the same time. The pipelined requests
+        bypass the cyclic and acyclic lanes of the io_lock, so cyclic process data is
+        not served before acyclic requests. reconnect() and
+        check_connection_and_try_reconnect() reopen a lost pipelined connection.
+
+        :param depth: Maximum number of requests in flight
+        :type depth: int
+        :return: The pipelined transport
+        :rtype: ModbusPipeline
+        """
+        self.disable_pipelining()
+        pipeline = ModbusPipeline(self.ip_address, depth=depth)
+        if not pipeline.connect():
+            raise CpxConnectionError("Pipelined modbus connection failed")
+        self.pipeline = pipeline
+        Logging.logger.info(f"Enabled {pipeline}")
+        return pipeline
+
+    def _reopen_pipeline(self) -> None:
+        """Replaces the pipelined connection by a new one with the same depth"""
+        pipeline = self.pipeline
+        pipeline.close()
+        reopened = ModbusPipeline(self.ip_address, depth=pipeline.depth)
+        if not reopened.connect():
+            raise CpxConnectionError("Pipelined modbus reconnection failed")
+        self.pipeline = reopened
+        Logging.logger.info(f"Reopened {reopened}")
+
+    def disable_pipelining(self) -> None:
+        """Closes the pipelined connection, the requests are sent one after another again"""
+        pipeline, self.pipeline = getattr(self, "pipeline", None), None
+        if pipeline is not None:
+            pipeline.close()
 
     def shutdown(self):
         """Shutdown function"""
+        self.disable_pipelining()
         if hasattr(self, "client"):
             with self.io_lock:
                 self.client.close()
@@ -105,6 +234,7 @@ class CpxBase:
         with self.io_lock:
             self.client.close()
             self.client = ModbusTcpClient(host=self.ip_address)
+            self.metrics.record_reconnect()
             if self.client.connect():
                 Logging.logger.info(f"Reconnected to {self.ip_address}:502")
             else:
@@ -112,6 +242,17 @@ class CpxBase:
                     f"Failed to reconnect to {self.ip_address}:502 via modbus"
                 )
                 raise CpxConnectionError("reconnection failed")
+        if self.pipeline is not None:
+            self._reopen_pipeline()
+
+    def io_statistics(self) -> dict[str, LaneStatistics]:
+        """Returns the queue depth and wait time statistics of the cyclic and the
+        acyclic request lane. Requests over a pipelined connection are not included.
+
+        :return: Statistics per lane
+        :rtype: dict[str, LaneStatistics]
+        """
+        return self.io_lock.statistics()
 
     def connected(self) -> bool:
         """Returns information about connection status"""
@@ -127,6 +268,12 @@ class CpxBase:
                 self.client.read_device_information()
         except ConnectionException:
             pass
+        # the pipelined connection is not reconnected by the modbus library
+        if self.pipeline is not None and not self.pipeline.connected:
+            try:
+                self._reopen_pipeline()
+            except CpxConnectionError as e:
+                Logging.logger.warning(f"{e}, retrying with the next check")
 
     def read_device_info(self) -> dict:
         """Reads device info from the CPX system and returns dict with containing values
@@ -134,27 +281,12 @@ class CpxBase:
         return: Contains device information values
         rtype: dict
         """
-        dev_info = {}
-
-        # Read device information
-        rreq = ReadDeviceInformationRequest(0x1, 0)
-        with self.io_lock:
-            rres = self.client.execute(False, rreq)
-        dev_info["vendor_name"] = rres.information[0].decode("ascii")
-        dev_info["product_code"] = rres.information[1].decode("ascii")
-        dev_info["revision"] = rres.information[2].decode("ascii")
+        return run(read_device_info(), self)
 
-        rreq = ReadDeviceInformationRequest(0x2, 0)
-        with self.io_lock:
-            rres = self.client.execute(False, rreq)
-        dev_info["vendor_url"] = rres.information[3].decode("ascii")
-        dev_info["product_name"] = rres.information[4].decode("ascii")
-        dev_info["model_name"] = rres.information[5].decode("ascii")
-
-        for key, value in dev_info.items():
-            Logging.logger.debug(f"{key.replace('_',' ').title()}: {value}")
-
-        return dev_info
+    def _execute(self, request):
+        """Executes a modbus request and records it in the metrics"""
+        with self.metrics.measure("execute", "device"), self.io_lock:
+            return self.client.execute(False, request)
 
     @dataclass
     class _BitwiseReg:
@@ -192,7 +324,9 @@ class CpxBase:
         byte_size: int = 2
 
     def read_reg_data(self, register: int, length: int = 1) -> bytes:
-        """Reads and returns register(s) from Modbus server without interpreting the data
+        """Reads and returns register(s) from Modbus server without interpreting the data.
+        Reads of more than MAX_READ_REGISTERS registers are split into several requests
+        (pipelined if enabled) and returned as one buffer.
 
         :param register: adress of the first register to read
         :type register: int
@@ -201,44 +335,177 @@ class CpxBase:
         :return: Register(s) content
         :rtype: bytes
         """
-        try:
-            with self.io_lock:
-                response = self.client.read_holding_registers(
-                    address=register, count=length
+        if length > MAX_READ_REGISTERS:
+            return b"".join(
+                self.read_reg_blocks(
+                    register_chunks(register, length, MAX_READ_REGISTERS)
                 )
-        except ConnectionException as e:
-            raise ConnectionAbortedError(str(e)) from e
-        if response.isError():
-            raise ConnectionAbortedError(response.message)
+            )
+        with self._measure("read", register, length * 2):
+            if self.pipeline is not None:
+                return self.read_policy.call(
+                    self.pipeline.read_holding_registers, register, length
+                )
+            return self.read_policy.call(self._read_holding_registers, register, length)
 
-        data = struct.pack("<" + "H" * len(response.registers), *response.registers)
-        return data
+    def read_reg_into(self, buffer, register: int, length: int = 1) -> int:
+        """Reads register(s) from Modbus server into a writable buffer (e.g. a reusable
+        bytearray) without allocating a new bytes object for the data. Reads of more
+        than MAX_READ_REGISTERS registers are split into several requests (pipelined if
+        enabled).
+
+        :param buffer: writable bytes-like object of at least 2 * length bytes
+        :type buffer: bytearray | memoryview
+        :param register: adress of the first register to read
+        :type register: int
+        :param length: number of registers to read (default: 1)
+        :type length: int
+        :return: Number of bytes written into buffer
+        :rtype: int
+        """
+        view = memoryview(buffer).cast("B")
+        if len(view) < length * 2:
+            raise ValueError(
+                f"Buffer of {len(view)} bytes is too small for {length} registers"
+            )
+        if self.pipeline is not None:
+            offset = 0
+            for data in self.read_reg_blocks(
+                register_chunks(register, length, MAX_READ_REGISTERS)
+            ):
+                view[offset : offset + len(data)] = data
+                offset += len(data)
+            return offset
+
+        for chunk, count in register_chunks(register, length, MAX_READ_REGISTERS):
+            with self._measure("read", chunk, count * 2):
+                self.read_policy.call(
+                    self._read_holding_registers_into,
+                    view,
+                    (chunk - register) * 2,
+                    chunk,
+                    count,
+                )
+        return length * 2
+
+    def _holding_registers(self, register: int, length: int) -> list[int]:
+        """One read request without retries, returns the register values"""
+        with connection_errors(), self.io_lock:
+            response = self.client.read_holding_registers(
+                address=register, count=length
+            )
+        return check_response(response).registers
+
+    def _read_holding_registers(self, register: int, length: int) -> bytes:
+        """One read request without retries"""
+        registers = self._holding_registers(register, length)
+        return register_struct(len(registers)).pack(*registers)
+
+    def _read_holding_registers_into(
+        self, buffer: memoryview, offset: int, register: int, length: int
+    ) -> None:
+        """One read request without retries, the data is packed into buffer at offset"""
+        registers = self._holding_registers(register, length)
+        register_struct(len(registers)).pack_into(buffer, offset, *registers)
+
+    def read_reg_blocks(self, blocks: list[tuple[int, int]]) -> list[bytes]:
+        """Reads several register blocks. With pipelining enabled all requests are sent
+        before the first response is awaited, so the blocks cost about one network
+        round trip. Otherwise the blocks are read one after another.
+
+        :param blocks: list of (register, length) tuples
+        :type blocks: list[tuple[int, int]]
+        :return: Content of every block in the same order
+        :rtype: list[bytes]
+        """
+        if self.pipeline is not None:
+            # the blocks are recorded as one request since they share the round trip
+            nbytes = sum(length for _, length in blocks) * 2
+            with self._measure("read", blocks[0][0], nbytes):
+                return self.read_policy.call(self.pipeline.read_blocks, blocks)
+        return [self.read_reg_data(register, length) for register, length in blocks]
 
     def write_reg_data(self, data: bytes, register: int) -> None:
-        """Write bytes object data to register(s).
+        """Write bytes object data to register(s). Writes of more than
+        MAX_WRITE_REGISTERS registers are split into several requests (pipelined if
+        enabled). Failed requests are repeated according to the write_policy, if the
+        last attempt fails a ConnectionAbortedError is raised.
 
         :param data: data to write to the register(s)
         :type data: bytes
         :param register: adress of the first register to write
         :type register: int
         """
+        self.write_reg_from(data, register)
+
+    def write_reg_from(self, buffer, register: int) -> None:
+        """Write the content of a bytes-like buffer (e.g. a memoryview of a reusable
+        bytearray) to register(s) without copying it. Behaves like write_reg_data().
+
+        :param buffer: data to write to the register(s)
+        :type buffer: bytes | bytearray | memoryview
+        :param register: adress of the first register to write
+        :type register: int
+        """
+        data = memoryview(buffer).cast("B")
         # if odd number of bytes, add one zero byte
         if len(data) % 2 != 0:
-            data += b"\x00"
-        # Convert to list of words
-        reg = list(struct.unpack("<" + "H" * (len(data) // 2), data))
-        # Write data
-        return_value = None
-        retries = 3
-        while return_value is None or return_value.isError():
+            data = memoryview(bytes(data) + b"\x00")
+        if len(data) // 2 > MAX_WRITE_REGISTERS:
+            self._write_reg_chunks(data, register)
+            return
+        with self._measure("write", register, len(data)):
+            if self.pipeline is not None:
+                self._write_reg_data_pipelined(data, register)
+            else:
+                reg = list(register_words(data)[1])
+                self.write_policy.call(self._write_registers, register, reg)
+
+    def _write_registers(self, register: int, reg: list[int]) -> None:
+        """One write multiple registers request without retries"""
+        with connection_errors(), self.io_lock:
+            response = self.client.write_registers(register, reg)
+        check_response(response, f"Writing register {register} failed")
+
+    def _write_register(self, register: int, value: int) -> None:
+        """One write single register request without retries"""
+        with connection_errors(), self.io_lock:
+            response = self.client.write_register(register, value)
+        check_response(response, f"Writing register {register} failed")
+
+    def _write_reg_chunks(self, data: bytes, register: int) -> None:
+        """Writes data that exceeds one write request in chunks. With pipelining enabled
+        all chunks are sent before the first response is awaited."""
+        chunks = register_data_chunks(data, register)
+        if self.pipeline is None:
+            for chunk_data, chunk_register in chunks:
+                self.write_reg_data(chunk_data, chunk_register)
+            return
+
+        # the chunks are recorded as one request since they share the round trip
+        with self._measure("write", register, len(data)):
+            self._write_chunks_pipelined(chunks)
+
+    def _write_chunks_pipelined(self, chunks: list[tuple[bytes, int]]) -> None:
+        """Sends all (data, register) chunks before the first response is awaited"""
+        futures = []
+        for chunk_data, chunk_register in chunks:
             try:
-                with self.io_lock:
-                    return_value = self.client.write_registers(register, reg)
-            except ConnectionException:
-                pass
-            if retries < 0:
-                break
-            retries -= 1
+                futures.append(self.pipeline.submit_write(chunk_data, chunk_register))
+            except ConnectionAbortedError:
+                futures.append(None)
+        for future, (chunk_data, chunk_register) in zip(futures, chunks):
+            try:
+                if future is None:
+                    raise ConnectionAbortedError
+                self.pipeline.write_result(future)
+            except ConnectionAbortedError:
+                # retry the failed chunk on its own
+                self._write_reg_data_pipelined(chunk_data, chunk_register)
+
+    def _write_reg_data_pipelined(self, data: bytes, register: int) -> None:
+        """Write data over the pipelined connection according to the write_policy"""
+        self.write_policy.call(self.pipeline.write_registers, data, register)
 
     def write_reg_data_with_single_cmds(self, data: bytes, register: int) -> None:
         """Write bytes object data to register(s), with only single register writes.
@@ -250,24 +517,10 @@ class CpxBase:
         :param register: adress of the first register to write
         :type register: int
         """
-        # if odd number of bytes, add one zero byte
-        if len(data) % 2 != 0:
-            data += b"\x00"
-        # Convert to list of words
-        reg = list(struct.unpack("<" + "H" * (len(data) // 2), data))
-        # Write data
-        for offset, d in enumerate(reg):
-            return_value = None
-            retries = 3
-            while return_value is None or return_value.isError():
-                try:
-                    with self.io_lock:
-                        return_value = self.client.write_register(register + offset, d)
-                except ConnectionException:
-                    pass
-                if retries < 0:
-                    break
-                retries -= 1
+        data, reg = register_words(data)
+        with self._measure("write", register, len(data)):
+            for offset, d in enumerate(reg):
+                self.write_policy.call(self._write_register, register + offset, d)
 
     @staticmethod
     def require_base(func):
@@ -0,0 +1,210 @@
+"""Asyncio implementation of the CPX-E system"""
+
+import asyncio
+import struct
+from typing import Any
+
+from cpx_io.cpx_system.async_cpx_base import AsyncCpxBase
+from cpx_io.cpx_system.cpx_e import cpx_e_modbus_registers, cpx_e_protocol
+from cpx_io.cpx_system.cpx_e.cpx_e import CpxE, CpxEModuleLayoutMixin
+from cpx_io.cpx_system.cpx_e.e16di import CpxE16Di
+from cpx_io.cpx_system.cpx_e.e4aiui import CpxE4AiUI
+from cpx_io.cpx_system.cpx_e.e4aoui import CpxE4AoUI
+from cpx_io.cpx_system.cpx_e.e8do import CpxE8Do
+from cpx_io.cpx_system.register_transaction import run_async
+from cpx_io.cpx_system.transport_metrics import measured
+from cpx_io.utils.boollist import boollist_to_bytes, bytes_to_boollist
+from cpx_io.utils.helpers import channel_range_check
+from cpx_io.utils.logging import Logging
+
+
+class AsyncCpxE(CpxEModuleLayoutMixin, AsyncCpxBase):
+    """CPX-E class for asyncio. The module layout is set up like in CpxE, the process
+    data of the digital and analog modules is accessed with coroutines of this class
+    addressed by the module position.
+
+    Example:
+        async with await AsyncCpxE.create(ip_address="192.168.1.1", modules=[...]) as cpxe:
+            values = await cpxe.read_channels(1)
+    """
+
+    REGISTER_REGIONS = CpxE.REGISTER_REGIONS
+    TIMEOUT_REGISTER = cpx_e_modbus_registers.TIMEOUT
+    TIMEOUT_SINGLE_CMDS = True
+
+    def __init__(self, modules: list = None, timeout: float = None, **kwargs):
+        """Constructor of the AsyncCpxE class. The system is not accessed before
+        startup() is awaited, use AsyncCpxE.create() to do both in one step.
+
+        :param modules: List of module instances e.g. [CpxEEp(), CpxE8Do(), CpxE16Di()]
+            or the typecode of the system
+        :type modules: list | str
+        :param timeout: Modbus timeout (in s) that should be configured on the slave
+        :type timeout: float
+        """
+        super().__init__(timeout=timeout, **kwargs)
+
+        self.next_output_register = None
+        self.next_input_register = None
+
+        self.modules = modules
+        self.function_number_lock = asyncio.Lock()
+
+    @measured("parameter", "function_number")
+    async def write_function_number(self, function_number: int, value: int) -> None:
+        """Write parameters via function number
+
+        :param function_number: Function number (see datasheet)
+        :type function_number: int
+        :param value: Value to write to function number
+        :type value: int
+        """
+        async with self.function_number_lock:
+            await run_async(
+                cpx_e_protocol.write_function_number(function_number, value), self
+            )
+
+    @measured("parameter", "function_number")
+    async def read_function_number(self, function_number: int) -> int:
+        """Read parameters via function number
+
+        :param function_number: Function number (see datasheet)
+        :type function_number: int
+        :return: Value read from function number
+        :rtype: int
+        """
+        async with self.function_number_lock:
+            return await run_async(
+                cpx_e_protocol.read_function_number(function_number), self
+            )
+
+    async def module_count(self) -> int:
+        """reads the module configuration register from the system
+
+        :returns: total module count
+        :rtype: int
+        """
+        return await run_async(cpx_e_protocol.module_count(), self)
+
+    async def read_fault_detection(self) -> list[bool]:
+        """reads the fault detection register from the system
+
+        :returns: list of bools with Errors (True = Error)
+        :rtype: list[bool]"""
+        return await run_async(cpx_e_protocol.read_fault_detection(), self)
+
+    async def read_status(self) -> tuple:
+        """reads the status register.
+
+        :returns: tuple (Write-protected, Force active)
+        :rtype: tuple
+        """
+        return await run_async(cpx_e_protocol.read_status(), self)
+
+    async def read_device_identification(self) -> int:
+        """reads device identification
+
+        :returns: Objects IDO 1,2,3,4,5
+        :rtype: int
+        """
+        return await self.read_function_number(43)
+
+    def _module(self, position: int, supported: tuple):
+        """Returns the module at position if it is one of the supported types"""
+        channel_range_check(position, len(self._modules))
+        module = self._modules[position]
+        if not isinstance(module, supported):
+            raise NotImplementedError(
+                f"{module} is not supported by {type(self).__name__}"
+            )
+        return module
+
+    async def read_channels(self, position: int) -> list:
+        """Read all channels of the module at position. Supported are CpxE16Di, CpxE8Do,
+        CpxE4AiUI and CpxE4AoUI.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :return: Values of all channels
+        :rtype: list[bool] | list[int]
+        """
+        module = self._module(position, (CpxE16Di, CpxE8Do, CpxE4AiUI, CpxE4AoUI))
+        if isinstance(module, CpxE16Di):
+            ret = bytes_to_boollist(
+                await self.read_reg_data(module.system_entry_registers.inputs)
+            )
+        elif isinstance(module, CpxE8Do):
+            ret = bytes_to_boollist(
+                await self.read_reg_data(module.system_entry_registers.inputs),
+                num_bytes=1,
+            )
+        else:
+            reg = await self.read_reg_data(
+                module.system_entry_registers.inputs, length=4
+            )
+            ret = list(struct.unpack("<" + "h" * (len(reg) // 2), reg))
+        Logging.logger.info(f"{module.name}: Reading channels: {ret}")
+        return ret
+
+    async def read_channel(self, position: int, channel: int) -> Any:
+        """Read back the value of one channel of the module at position
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param channel: Channel number, starting with 0
+        :type channel: int
+        :return: Value of the channel
+        :rtype: bool | int
+        """
+        values = await self.read_channels(position)
+        channel_range_check(channel, len(values))
+        return values[channel]
+
+    async def write_channels(self, position: int, data: list) -> None:
+        """Write all channels of the module at position. Supported are CpxE8Do and
+        CpxE4AoUI.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param data: list of bool values for CpxE8Do or int values for CpxE4AoUI
+        :type data: list[bool] | list[int]
+        """
+        module = self._module(position, (CpxE8Do, CpxE4AoUI))
+        if isinstance(module, CpxE8Do):
+            if len(data) != 8:
+                raise ValueError(f"Data len error: expected: 8, got: {len(data)}")
+            reg_data = boollist_to_bytes(data)
+        else:
+            if len(data) != 4:
+                raise ValueError(f"Data len error: expected: 4, got: {len(data)}")
+            reg_data = struct.pack("<hhhh", *data)
+        await self.write_reg_data(reg_data, module.system_entry_registers.outputs)
+        Logging.logger.info(f"{module.name}: Setting channels to {data}")
+
+    async def write_channel(self, position: int, channel: int, value: Any) -> None:
+        """Write one channel of the module at position. Supported are CpxE8Do and
+        CpxE4AoUI.
+
+        :param position: Module position index starting with 0
+        :type position: int
+        :param channel: Channel number, starting with 0
+        :type channel: int
+        :param value: Value that should be written to the channel
+        :type value: bool | int
+        """
+        module = self._module(position, (CpxE8Do, CpxE4AoUI))
+        if isinstance(module, CpxE8Do):
+            channel_range_check(channel, 8)
+            # the digital outputs are written together, read back the echo first
+            data = await self.read_channels(position)
+            data[channel] = value
+            await self.write_reg_data(
+                boollist_to_bytes(data), module.system_entry_registers.outputs
+            )
+        else:
+            channel_range_check(channel, 4)
+            await self.write_reg_data(
+                value.to_bytes(2, byteorder="little", signed=True),
+                module.system_entry_registers.outputs + channel,
+            )
+        Logging.logger.info(f"{module.name}: Setting channel {channel} to {value}")
@@ -3,41 +3,24 @@
 from cpx_io.utils.logging import Logging
 from cpx_io.utils.helpers import module_list_from_typecode
 from cpx_io.cpx_system.cpx_base import CpxBase, CpxInitError
-from cpx_io.cpx_system.cpx_e import cpx_e_modbus_registers
+from cpx_io.cpx_system.cpx_e import cpx_e_modbus_registers, cpx_e_protocol
 from cpx_io.cpx_system.cpx_e.cpx_e_module_definitions import CPX_E_MODULE_ID_DICT
 from cpx_io.cpx_system.cpx_e.eep import CpxEEp
-from cpx_io.utils.boollist import bytes_to_boollist
+from cpx_io.cpx_system.change_detector import ChangeDetector, ChannelChange
+from cpx_io.cpx_system.cpx_ap.ap_channel_codec import ChannelCodec
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+from cpx_io.cpx_system.io_scheduler import CYCLIC
+from cpx_io.cpx_system.register_transaction import run, set_timeout
+from cpx_io.cpx_system.transport_metrics import measured
 
 # pylint: disable=duplicate-code
 # intended: cpx_e and cpx_ap have similar, but not same functions
 
 
-class CpxE(CpxBase):
-    """CPX-E base class"""
-
-    def __init__(self, modules: list = None, timeout: float = None, **kwargs):
-        """Constructor of the CpxE class.
-
-        :param modules: List of module instances e.g. [CpxEEp(), CpxE8Do(), CpxE16Di()]
-        :type modules: list
-        """
-        super().__init__(**kwargs)
-        self._control_bit_value = 1 << 15
-        self._write_bit_value = 1 << 13
-
-        self.next_output_register = None
-        self.next_input_register = None
-
-        self.modules = modules
-
-        if timeout is not None:
-            self.set_timeout(int(timeout * 1000))
-        else:
-            Logging.logger.info(
-                "Timeout is not specified. Not setting the timeout on target device."
-            )
-
-        Logging.logger.debug(f"Created {self}")
+class CpxEModuleLayoutMixin:
+    """Mixin of CpxE and AsyncCpxE that sets up the register layout of the modules
+    from a module list or the typecode of the system. The layout is pure register
+    arithmetic and does not access the system."""
 
     def __repr__(self):
         return f"{type(self).__name__}: [{', '.join(str(x) for x in self.modules)}]"
@@ -102,36 +85,79 @@ class CpxE(CpxBase):
             "Busmodule to be compatible with this software"
         )
 
+    def add_module(self, module):
+        """Adds one module to the base. This is required to use the module.
+
+        :param module: the module that should be added to the system
+        """
+        # we do not want to expose the configure function in the public API
+        # pylint: disable=protected-access
+        module._configure(self, len(self._modules))
+        self._modules.append(module)
+        if [type(mod) for mod in self._modules].count(CpxEEp) > 1:
+            Logging.logger.warning(
+                "Module CpxEEp is assigned multiple times. This is most likey incorrect."
+            )
+        self.update_module_names()
+        Logging.logger.debug(f"Added module {module.name} ({type(module).__name__})")
+        return module
+
+
+class CpxE(CpxEModuleLayoutMixin, CpxBase):
+    """CPX-E base class"""
+
+    REGISTER_REGIONS = (
+        (
+            cpx_e_modbus_registers.PROCESS_DATA_OUTPUTS.register_address,
+            cpx_e_modbus_registers.MODULE_CONFIGURATION.register_address,
+            "outputs",
+        ),
+        (
+            cpx_e_modbus_registers.MODULE_CONFIGURATION.register_address,
+            cpx_e_modbus_registers.PROCESS_DATA_INPUTS.register_address,
+            "diagnosis",
+        ),
+        (
+            cpx_e_modbus_registers.PROCESS_DATA_INPUTS.register_address,
+            cpx_e_modbus_registers.TIMEOUT.register_address,
+            "inputs",
+        ),
+    )
+
+    def __init__(self, modules: list = None, timeout: float = None, **kwargs):
+        """Constructor of the CpxE class.
+
+        :param modules: List of module instances e.g. [CpxEEp(), CpxE8Do(), CpxE16Di()]
+        :type modules: list
+        """
+        super().__init__(**kwargs)
+        self.next_output_register = None
+        self.next_input_register = None
+        self.change_detector = None
+
+        self.modules = modules
+
+        if timeout is not None:
+            self.set_timeout(int(timeout * 1000))
+        else:
+            Logging.logger.info(
+                "Timeout is not specified. Not setting the timeout on target device."
+            )
+
+        Logging.logger.debug(f"Created {self}")
+
     def set_timeout(self, timeout_ms: int) -> None:
         """Sets the modbus timeout to the provided value
 
         :param timeout_ms: Modbus timeout in ms (milli-seconds)
         :type timeout_ms: int
         """
-
-        if 0 < timeout_ms < 100:
-            timeout_ms = 100
-            Logging.logger.warning(
-                f"Setting the timeout below 100 ms can lead to "
-                f"exclusion from the system. To prevent this, "
-                f"the timeout is limited to a minimum of {timeout_ms} ms"
-            )
-        Logging.logger.info(f"Setting modbus timeout to {timeout_ms} ms")
-        value_to_write = timeout_ms.to_bytes(
-            length=cpx_e_modbus_registers.TIMEOUT.length * 2, byteorder="little"
-        )
-        self.write_reg_data_with_single_cmds(
-            value_to_write, cpx_e_modbus_registers.TIMEOUT.register_address
+        run(
+            set_timeout(timeout_ms, cpx_e_modbus_registers.TIMEOUT, single_cmds=True),
+            self,
         )
-        # Check if it actually succeeded
-        indata = int.from_bytes(
-            self.read_reg_data(*cpx_e_modbus_registers.TIMEOUT),
-            byteorder="little",
-            signed=False,
-        )
-        if indata != timeout_ms:
-            Logging.logger.error("Setting of modbus timeout was not successful")
 
+    @measured("parameter", "function_number")
     def write_function_number(self, function_number: int, value: int) -> None:
         """Write parameters via function number
 
@@ -140,41 +166,9 @@ class CpxE(CpxBase):
         :param value: Value to write to function number
         :type value: int
         """
-        value_bytes = value.to_bytes(2, byteorder="little")
-        self.write_reg_data(
-            value_bytes, cpx_e_modbus_registers.DATA_SYSTEM_TABLE_WRITE.register_address
-        )
-        # need to write 0 first because there might be an
-        # old unknown configuration in the register
-        self.write_reg_data(
-            b"\x00\x00", cpx_e_modbus_registers.PROCESS_DATA_OUTPUTS.register_address
-        )
-
-        write_data = (
-            self._control_bit_value | self._write_bit_value | function_number
-        ).to_bytes(2, byteorder="little")
-
-        self.write_reg_data(
-            write_data,
-            cpx_e_modbus_registers.PROCESS_DATA_OUTPUTS.register_address,
-        )
-
-        data = 0
-        its = 0
-        while (data & self._control_bit_value) == 0 and its < 1000:
-            data = int.from_bytes(
-                self.read_reg_data(*cpx_e_modbus_registers.PROCESS_DATA_INPUTS),
-                byteorder="little",
-            )
-            its += 1
-
-        if its >= 1000:
-            raise ConnectionError()
-
-        Logging.logger.debug(
-            f"Wrote value {value} to function number {function_number}"
-        )
+        run(cpx_e_protocol.write_function_number(function_number, value), self)
 
+    @measured("parameter", "function_number")
     def read_function_number(self, function_number: int) -> int:
         """Read parameters via function number
 
@@ -183,43 +177,7 @@ class CpxE(CpxBase):
         :return: Value read from function number
         :rtype: int
         """
-        # need to write 0 first because there might be an
-        # old unknown configuration in the register
-        self.write_reg_data(
-            b"\x00\x00", cpx_e_modbus_registers.PROCESS_DATA_OUTPUTS.register_address
-        )
-
-        write_data = (self._control_bit_value | function_number).to_bytes(
-            2, byteorder="little"
-        )
-
-        self.write_reg_data(
-            write_data,
-            cpx_e_modbus_registers.PROCESS_DATA_OUTPUTS.register_address,
-        )
-
-        data = 0
-        its = 0
-        while (data & self._control_bit_value) == 0 and its < 1000:
-            data = int.from_bytes(
-                self.read_reg_data(*cpx_e_modbus_registers.PROCESS_DATA_INPUTS),
-                byteorder="little",
-            )
-            its += 1
-
-        if its >= 1000:
-            raise ConnectionError()
-
-        data &= ~self._control_bit_value
-        value = int.from_bytes(
-            self.read_reg_data(*cpx_e_modbus_registers.DATA_SYSTEM_TABLE_READ),
-            byteorder="little",
-        )
-
-        Logging.logger.debug(
-            f"Read value {value} from function number {function_number}"
-        )
-        return value
+        return run(cpx_e_protocol.read_function_number(function_number), self)
 
     def module_count(self) -> int:
         """reads the module configuration register from the system
@@ -227,22 +185,14 @@ class CpxE(CpxBase):
         :returns: total module count
         :rtype: int
         """
-        data = int.from_bytes(
-            self.read_reg_data(*cpx_e_modbus_registers.MODULE_CONFIGURATION),
-            byteorder="little",
-        )
-        Logging.logger.debug(f"Read {data} from MODULE_CONFIGURATION register")
-        return bin(data).count("1")  # python 3.9 compatible `int.bit_count()` function
+        return run(cpx_e_protocol.module_count(), self)
 
     def read_fault_detection(self) -> list[bool]:
         """reads the fault detection register from the system
 
         :returns: list of bools with Errors (True = Error)
         :rtype: list[bool]"""
-        data = self.read_reg_data(*cpx_e_modbus_registers.FAULT_DETECTION)
-
-        Logging.logger.debug(f"Read {data} from FAULT_DETECTION register")
-        return bytes_to_boollist(data[:6], 3)
+        return run(cpx_e_protocol.read_fault_detection(), self)
 
     def read_status(self) -> tuple:
         """reads the status register.
@@ -250,12 +200,7 @@ class CpxE(CpxBase):
         :returns: tuple (Write-protected, Force active)
         :rtype: tuple
         """
-        write_protect_bit = 11
-        force_active_bit = 15
-        data = self.read_reg_data(*cpx_e_modbus_registers.STATUS_REGISTER)
-        Logging.logger.debug(f"Read {data} from STATUS_REGISTER register")
-        data = bytes_to_boollist(data)
-        return (data[write_protect_bit], data[force_active_bit])
+        return run(cpx_e_protocol.read_status(), self)
 
     def read_device_identification(self) -> int:
         """reads device identification
@@ -271,14 +216,81 @@ class CpxE(CpxBase):
 
         :param module: the module that should be added to the system
         """
-        # we do not want to expose the configure function in the public API
-        # pylint: disable=protected-access
-        module._configure(self, len(self._modules))
-        self._modules.append(module)
-        if [type(mod) for mod in self._modules].count(CpxEEp) > 1:
-            Logging.logger.warning(
-                "Module CpxEEp is assigned multiple times. This is most likey incorrect."
-            )
-        self.update_module_names()
-        Logging.logger.debug(f"Added module {module.name} ({type(module).__name__})")
+        module = super().add_module(module)
+        # the channel layout changed, detect_changes() records a new baseline
+        self.change_detector = None
         return module
+
+    @staticmethod
+    def _input_channel_codec(module) -> ChannelCodec:
+        """Returns the codec of the input channels of module, built from its
+        INPUT_CHANNEL_TYPES. The channels follow each other in the input registers,
+        values are little endian."""
+        channels = []
+        bit_offset = 0
+        for i, data_type in enumerate(getattr(module, "INPUT_CHANNEL_TYPES", ())):
+            bits = 1 if data_type == "BOOL" else 16
+            channels.append(
+                Channel(
+                    array_size=None,
+                    bits=bits,
+                    bit_offset=bit_offset,
+                    byte_swap_needed=True,
+                    channel_id=i,
+                    data_type=data_type,
+                    description="",
+                    direction="in",
+                    name="Input %d",
+                    parameter_group_ids=None,
+                    profile_list=[],
+                )
+            )
+            bit_offset += bits
+        return ChannelCodec(channels)
+
+    def enable_change_detection(self) -> ChangeDetector:
+        """Creates the change detector for the input channels of all modules and
+        records the current inputs as baseline. Modules without INPUT_CHANNEL_TYPES
+        (e.g. CPX-E-1CI, CPX-E-4IOL) are not watched.
+
+        :return: The change detector
+        :rtype: ChangeDetector
+        """
+        start_register = cpx_e_modbus_registers.PROCESS_DATA_INPUTS.register_address
+        detector = ChangeDetector()
+        for module in self._modules:
+            detector.watch(
+                module.position,
+                module.system_entry_registers.inputs - start_register,
+                self._input_channel_codec(module),
+            )
+        self.change_detector = detector
+        self.detect_changes()
+        Logging.logger.debug(f"Enabled {detector}")
+        return detector
+
+    def disable_change_detection(self) -> None:
+        """Removes the change detector"""
+        self.change_detector = None
+
+    def detect_changes(self) -> list[ChannelChange]:
+        """Reads the complete input area with one bulk read and returns the input
+        channels that changed since the last call. Single BOOL channels are reported
+        as RISING or FALLING, all other channels as CHANGED. Changes that are
+        reverted between two calls are not reported. The change detection is enabled
+        on the first call, which only records the baseline.
+
+        :return: Changed channels in the order of the input area
+        :rtype: list[ChannelChange]
+        """
+        if self.change_detector is None:
+            self.enable_change_detection()
+            return []
+
+        start_register = cpx_e_modbus_registers.PROCESS_DATA_INPUTS.register_address
+        length = (self.next_input_register or start_register) - start_register
+        if length == 0:
+            return []
+        with self.io_lock.lane(CYCLIC):
+            data = self.read_reg_data(start_register, length)
+        return self.change_detector.update(data)
@@ -0,0 +1,93 @@
+"""Register transactions of the CPX-E system that are shared by CpxE and AsyncCpxE.
+See register_transaction for how they are executed."""
+
+from typing import Any, Generator
+
+from cpx_io.cpx_system.cpx_e import cpx_e_modbus_registers
+from cpx_io.cpx_system.register_transaction import Step, read, write
+from cpx_io.utils.boollist import bytes_to_boollist
+from cpx_io.utils.logging import Logging
+
+CONTROL_BIT = 1 << 15
+WRITE_BIT = 1 << 13
+
+WRITE_PROTECT_BIT = 11
+FORCE_ACTIVE_BIT = 15
+
+
+def _execute_function_number(command: int) -> Generator[Step, Any, None]:
+    """Starts a function number request and waits until it is acknowledged"""
+    # need to write 0 first because there might be an
+    # old unknown configuration in the register
+    yield write(
+        b"\x00\x00", cpx_e_modbus_registers.PROCESS_DATA_OUTPUTS.register_address
+    )
+    yield write(
+        command.to_bytes(2, byteorder="little"),
+        cpx_e_modbus_registers.PROCESS_DATA_OUTPUTS.register_address,
+    )
+
+    data = 0
+    its = 0
+    while (data & CONTROL_BIT) == 0 and its < 1000:
+        data = int.from_bytes(
+            (yield read(*cpx_e_modbus_registers.PROCESS_DATA_INPUTS)),
+            byteorder="little",
+        )
+        its += 1
+
+    if its >= 1000:
+        raise ConnectionError()
+
+
+def write_function_number(
+    function_number: int, value: int
+) -> Generator[Step, Any, None]:
+    """Transaction that writes value to the function number"""
+    yield write(
+        value.to_bytes(2, byteorder="little"),
+        cpx_e_modbus_registers.DATA_SYSTEM_TABLE_WRITE.register_address,
+    )
+    yield from _execute_function_number(CONTROL_BIT | WRITE_BIT | function_number)
+
+    Logging.logger.debug(f"Wrote value {value} to function number {function_number}")
+
+
+def read_function_number(function_number: int) -> Generator[Step, Any, int]:
+    """Transaction that reads the value of the function number"""
+    yield from _execute_function_number(CONTROL_BIT | function_number)
+    value = int.from_bytes(
+        (yield read(*cpx_e_modbus_registers.DATA_SYSTEM_TABLE_READ)),
+        byteorder="little",
+    )
+
+    Logging.logger.debug(f"Read value {value} from function number {function_number}")
+    return value
+
+
+def module_count() -> Generator[Step, Any, int]:
+    """Transaction that reads the module configuration register and returns the total
+    module count"""
+    data = int.from_bytes(
+        (yield read(*cpx_e_modbus_registers.MODULE_CONFIGURATION)),
+        byteorder="little",
+    )
+    Logging.logger.debug(f"Read {data} from MODULE_CONFIGURATION register")
+    return bin(data).count("1")  # python 3.9 compatible `int.bit_count()` function
+
+
+def read_fault_detection() -> Generator[Step, Any, list]:
+    """Transaction that reads the fault detection register and returns a list of bools
+    (True = Error)"""
+    data = yield read(*cpx_e_modbus_registers.FAULT_DETECTION)
+    Logging.logger.debug(f"Read {data} from FAULT_DETECTION register")
+    return bytes_to_boollist(data[:6], 3)
+
+
+def read_status() -> Generator[Step, Any, tuple]:
+    """Transaction that reads the status register and returns (Write-protected,
+    Force active)"""
+    data = yield read(*cpx_e_modbus_registers.STATUS_REGISTER)
+    Logging.logger.debug(f"Read {data} from STATUS_REGISTER register")
+    data = bytes_to_boollist(data)
+    return (data[WRITE_PROTECT_BIT], data[FORCE_ACTIVE_BIT])
@@ -16,6 +16,9 @@ from cpx_io.cpx_system.cpx_e.cpx_e_enums import DebounceTime, SignalExtension
 class CpxE16Di(CpxModule):
     """Class for CPX-E-16DI module"""
 
+    # data types of the input channels, see CpxE.detect_changes()
+    INPUT_CHANNEL_TYPES = ("BOOL",) * 16
+
     def __getitem__(self, key):
         return self.read_channel(key)
 
@@ -17,6 +17,9 @@ from cpx_io.cpx_system.cpx_e.cpx_e_enums import ChannelRange
 class CpxE4AoUI(CpxModule):
     """Class for CPX-E-4AO-UI module"""
 
+    # data types of the input channels, see CpxE.detect_changes()
+    INPUT_CHANNEL_TYPES = ("INT16",) * 4
+
     def __getitem__(self, key):
         return self.read_channel(key)
 
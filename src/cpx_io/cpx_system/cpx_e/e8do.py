@@ -12,6 +12,9 @@ from cpx_io.utils.logging import Logging
 class CpxE8Do(CpxModule):
     """Class for CPX-E-8DO module"""
 
+    # data types of the input channels, see CpxE.detect_changes()
+    INPUT_CHANNEL_TYPES = ("BOOL",) * 8
+
     def __getitem__(self, key):
         return self.read_channel(key)
 
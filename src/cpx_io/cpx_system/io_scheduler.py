@@ -0,0 +1,132 @@
+"""cpx_io - IoScheduler class for prioritizing cyclic over acyclic Modbus requests."""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+# cyclic process data exchange, served before any waiting acyclic request
+CYCLIC = "cyclic"
+# parameter, ISDU, diagnosis and other multi-step transactions
+ACYCLIC = "acyclic"
+LANES = (CYCLIC, ACYCLIC)
+
+
+@dataclass
+class LaneStatistics:
+    """Queue and wait time statistics of one lane. Wait times are in s."""
+
+    requests: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    @property
+    def mean_wait_time(self) -> float:
+        """Mean time a request waited for the connection"""
+        if self.requests == 0:
+            return 0.0
+        return self.total_wait_time / self.requests
+
+
+class IoScheduler:
+    """Grants the Modbus connection to one request at a time. Requests of the cyclic
+    lane are always served before waiting requests of the acyclic lane, so a long
+    acyclic transaction only delays process data by a single request.
+
+    The lane is selected per thread with lane(). Requests of threads without a
+    selected lane use the acyclic lane. The scheduler is used like a lock:
+
+        with scheduler.lane(CYCLIC):
+            with scheduler:
+                client.read_holding_registers(...)
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._busy = False
+        self._local = threading.local()
+        self._statistics = {lane: LaneStatistics() for lane in LANES}
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    @property
+    def current_lane(self) -> str:
+        """Lane of the calling thread"""
+        return getattr(self._local, "lane", ACYCLIC)
+
+    @contextmanager
+    def lane(self, lane: str):
+        """Selects the lane for all requests of the calling thread in this context.
+
+        :param lane: CYCLIC or ACYCLIC
+        :type lane: str
+        """
+        if lane not in LANES:
+            raise ValueError(f"Lane must be one of {LANES}, not {lane}")
+        previous = self.current_lane
+        self._local.lane = lane
+        try:
+            yield self
+        finally:
+            self._local.lane = previous
+
+    def acquire(self) -> None:
+        """Waits until the connection is granted to the calling thread"""
+        lane = self.current_lane
+        stats = self._statistics[lane]
+        start = time.perf_counter()
+        with self._condition:
+            stats.queue_depth += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, stats.queue_depth)
+            self._condition.wait_for(lambda: self._may_run(lane))
+            stats.queue_depth -= 1
+            self._busy = True
+
+            wait_time = time.perf_counter() - start
+            stats.requests += 1
+            stats.total_wait_time += wait_time
+            stats.max_wait_time = max(stats.max_wait_time, wait_time)
+
+    def _may_run(self, lane: str) -> bool:
+        if self._busy:
+            return False
+        return lane == CYCLIC or self._statistics[CYCLIC].queue_depth == 0
+
+    def release(self) -> None:
+        """Releases the connection to the next waiting request"""
+        with self._condition:
+            self._busy = False
+            self._condition.notify_all()
+
+    def locked(self) -> bool:
+        """Returns True if a request currently holds the connection"""
+        return self._busy
+
+    def statistics(self) -> dict[str, LaneStatistics]:
+        """Returns a copy of the statistics of every lane.
+
+        :return: Statistics per lane
+        :rtype: dict[str, LaneStatistics]
+        """
+        with self._condition:
+            return {
+                lane: LaneStatistics(**vars(stats))
+                for lane, stats in self._statistics.items()
+            }
+
+    def reset_statistics(self) -> None:
+        """Resets the request counters and wait times of all lanes"""
+        with self._condition:
+            # waiting requests still hold their statistics, keep the queue depth
+            for stats in self._statistics.values():
+                stats.requests = 0
+                stats.max_queue_depth = stats.queue_depth
+                stats.total_wait_time = 0.0
+                stats.max_wait_time = 0.0
@@ -0,0 +1,255 @@
+"""Pipelined Modbus TCP transport that keeps several requests in flight"""
+
+import socket
+import struct
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from cpx_io.utils.logging import Logging
+
+# MBAP header: transaction id, protocol id (always 0), length of the rest, unit id
+MBAP_HEADER = struct.Struct(">HHHB")
+READ_HOLDING_REGISTERS = 0x03
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+
+class ModbusPipeline:
+    """Modbus TCP transport that sends up to depth requests before the first response
+    arrives. Responses are matched to their requests by the transaction id of the MBAP
+    header, so the throughput is no longer limited to one request per round trip.
+
+    The register data is exchanged as bytes in the same (little endian per register)
+    representation that CpxBase.read_reg_data() uses.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 502,
+        depth: int = 8,
+        timeout: float = 3.0,
+        device_id: int = 1,
+    ):
+        """Constructor of the ModbusPipeline class. The connection is opened with connect().
+
+        :param host: IP address of the Modbus server
+        :type host: str
+        :param port: (optional) Modbus TCP port
+        :type port: int
+        :param depth: (optional) Maximum number of requests in flight
+        :type depth: int
+        :param timeout: (optional) Time (in s) to wait for a response
+        :type timeout: float
+        :param device_id: (optional) Modbus unit id
+        :type device_id: int
+        """
+        # pylint: disable=too-many-arguments, too-many-positional-arguments
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.host = host
+        self.port = port
+        self.depth = depth
+        self.timeout = timeout
+        self.device_id = device_id
+
+        self._socket = None
+        self._reader = None
+        self._send_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(depth)
+        self._pending = {}
+        self._transaction_id = 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.host}:{self.port}, depth={self.depth})"
+
+    @property
+    def connected(self) -> bool:
+        """Returns information about connection status"""
+        return self._socket is not None
+
+    def connect(self) -> bool:
+        """Opens the TCP connection and starts the response reader.
+
+        :return: True if the connection was established
+        :rtype: bool
+        """
+        try:
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+        except OSError as e:
+            Logging.logger.warning(f"{self} failed to connect: {e}")
+            return False
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # the reader blocks until data arrives, timeouts are handled per request
+        sock.settimeout(None)
+        self._socket = sock
+        self._reader = threading.Thread(
+            target=self._read_responses, name=f"{self}", daemon=True
+        )
+        self._reader.start()
+        return True
+
+    def close(self) -> None:
+        """Closes the connection. Requests in flight fail with ConnectionAbortedError."""
+        sock, self._socket = self._socket, None
+        if sock is None:
+            return
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join(self.timeout)
+        self._fail_pending(ConnectionAbortedError("Connection closed"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+            self._slots.release()
+
+    def _receive_exactly(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionAbortedError("Connection closed by server")
+            data += chunk
+        return bytes(data)
+
+    def _read_responses(self) -> None:
+        """Reader thread that resolves the futures of the pending requests"""
+        try:
+            while self._socket is not None:
+                header = self._receive_exactly(MBAP_HEADER.size)
+                transaction_id, _, length, _ = MBAP_HEADER.unpack(header)
+                pdu = self._receive_exactly(length - 1)
+                with self._pending_lock:
+                    future = self._pending.pop(transaction_id, None)
+                if future is None:
+                    Logging.logger.warning(
+                        f"{self}: dropped response with unknown transaction id "
+                        f"{transaction_id}"
+                    )
+                    continue
+                self._slots.release()
+                future.set_result(pdu)
+        except (OSError, ConnectionAbortedError, AttributeError) as e:
+            if self._socket is not None:
+                Logging.logger.warning(f"{self}: connection lost: {e}")
+                self.close()
+            self._fail_pending(ConnectionAbortedError(str(e)))
+
+    def submit(self, pdu: bytes) -> Future:
+        """Sends one request PDU as soon as a pipeline slot is free.
+
+        :param pdu: Modbus PDU (function code and data)
+        :type pdu: bytes
+        :return: Future that resolves to the response PDU
+        :rtype: Future
+        """
+        # the slot is released by the reader thread when the response arrives
+        # pylint: disable=consider-using-with
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ConnectionAbortedError(f"{self}: no free pipeline slot")
+        future = Future()
+        with self._send_lock:
+            sock = self._socket
+            if sock is None:
+                self._slots.release()
+                raise ConnectionAbortedError(f"{self} is not connected")
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            transaction_id = self._transaction_id
+            future.transaction_id = transaction_id
+            with self._pending_lock:
+                self._pending[transaction_id] = future
+            try:
+                sock.sendall(
+                    MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, self.device_id)
+                    + pdu
+                )
+            except OSError as e:
+                with self._pending_lock:
+                    self._pending.pop(transaction_id, None)
+                self._slots.release()
+                raise ConnectionAbortedError(str(e)) from e
+        return future
+
+    def _result(self, future: Future, function_code: int) -> bytes:
+        """Waits for the response PDU and raises on Modbus exception responses"""
+        try:
+            pdu = future.result(self.timeout)
+        # before Python 3.11 this is not the builtin TimeoutError
+        except FutureTimeoutError as e:
+            # give up the request, a late response is dropped by the reader
+            with self._pending_lock:
+                timed_out = self._pending.pop(future.transaction_id, None)
+            if timed_out is not None:
+                self._slots.release()
+            raise ConnectionAbortedError(f"{self}: no response") from e
+        if pdu[0] == function_code | 0x80:
+            raise ConnectionAbortedError(
+                f"{self}: exception code {pdu[1]} for function code {function_code}"
+            )
+        return pdu
+
+    @staticmethod
+    def _swap_registers(data: bytes) -> bytes:
+        """Converts between big endian (Modbus) and little endian register data"""
+        swapped = bytearray(data)
+        swapped[0::2], swapped[1::2] = data[1::2], data[0::2]
+        return bytes(swapped)
+
+    def submit_read(self, register: int, length: int) -> Future:
+        """Sends a read holding registers request without waiting for the response.
+        Use read_result() to get the data."""
+        return self.submit(
+            struct.pack(">BHH", READ_HOLDING_REGISTERS, register, length)
+        )
+
+    def read_result(self, future: Future) -> bytes:
+        """Returns the register data of a request sent with submit_read()"""
+        pdu = self._result(future, READ_HOLDING_REGISTERS)
+        return self._swap_registers(pdu[2 : 2 + pdu[1]])
+
+    def submit_write(self, data: bytes, register: int) -> Future:
+        """Sends a write multiple registers request without waiting for the response.
+        Use write_result() to check the response."""
+        if len(data) % 2 != 0:
+            data += b"\x00"
+        return self.submit(
+            struct.pack(
+                ">BHHB", WRITE_MULTIPLE_REGISTERS, register, len(data) // 2, len(data)
+            )
+            + self._swap_registers(data)
+        )
+
+    def write_result(self, future: Future) -> None:
+        """Waits for the response of a request sent with submit_write()"""
+        self._result(future, WRITE_MULTIPLE_REGISTERS)
+
+    def read_holding_registers(self, register: int, length: int) -> bytes:
+        """Reads register(s) and returns their content"""
+        return self.read_result(self.submit_read(register, length))
+
+    def write_registers(self, data: bytes, register: int) -> None:
+        """Writes data to register(s)"""
+        self.write_result(self.submit_write(data, register))
+
+    def read_blocks(self, blocks: list[tuple[int, int]]) -> list[bytes]:
+        """Reads several register blocks. All requests are sent before the first
+        response is awaited, so up to depth blocks cost one network round trip.
+
+        :param blocks: list of (register, length) tuples
+        :type blocks: list[tuple[int, int]]
+        :return: Content of every block in the same order
+        :rtype: list[bytes]
+        """
+        futures = [self.submit_read(register, length) for register, length in blocks]
+        return [self.read_result(future) for future in futures]
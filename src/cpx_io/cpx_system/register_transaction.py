@@ -0,0 +1,141 @@
+"""Register transactions that are shared by the blocking and the asyncio clients.
+
+A transaction is a generator that encodes the requests of one handshake, keeps its
+state and decodes the responses, but does no IO itself. It yields one Step per
+register request and receives the result of the request (the read data or None).
+run() executes the steps with a CpxBase, run_async() awaits them with an AsyncCpxBase.
+"""
+
+from typing import Any, Generator, NamedTuple
+
+from pymodbus.pdu.mei_message import ReadDeviceInformationRequest
+from cpx_io.utils.logging import Logging
+
+# device identification objects of the basic (0x1) and regular (0x2) category
+DEVICE_INFORMATION_OBJECTS = {
+    0x1: {0: "vendor_name", 1: "product_code", 2: "revision"},
+    0x2: {3: "vendor_url", 4: "product_name", 5: "model_name"},
+}
+
+
+class Step(NamedTuple):
+    """One register request of a transaction, method is called on the base"""
+
+    method: str
+    args: tuple
+    kwargs: dict
+
+
+def read(register: int, length: int = None) -> Step:
+    """Step that reads registers, the transaction receives the data as bytes"""
+    if length is None:
+        return Step("read_reg_data", (register,), {})
+    return Step("read_reg_data", (register, length), {})
+
+
+def read_length(register: int, length: int) -> Step:
+    """Step that reads registers with the length passed as keyword"""
+    return Step("read_reg_data", (register,), {"length": length})
+
+
+def write(data: bytes, register: int) -> Step:
+    """Step that writes data to registers"""
+    return Step("write_reg_data", (data, register), {})
+
+
+def write_single(data: bytes, register: int) -> Step:
+    """Step that writes data with single register writes"""
+    return Step("write_reg_data_with_single_cmds", (data, register), {})
+
+
+def execute(request) -> Step:
+    """Step that executes a modbus request, the transaction receives the response"""
+    return Step("_execute", (request,), {})
+
+
+Transaction = Generator[Step, Any, Any]
+
+
+def run(transaction: Transaction, base) -> Any:
+    """Executes all steps of transaction with the blocking base and returns the result
+    of the transaction
+
+    :param transaction: Transaction generator
+    :type transaction: Generator
+    :param base: Base that executes the register requests
+    :type base: CpxBase
+    :return: Result of the transaction
+    :rtype: Any
+    """
+    result = None
+    try:
+        while True:
+            step = transaction.send(result)
+            result = getattr(base, step.method)(*step.args, **step.kwargs)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_async(transaction: Transaction, base) -> Any:
+    """Awaits all steps of transaction with the asyncio base and returns the result of
+    the transaction
+
+    :param transaction: Transaction generator
+    :type transaction: Generator
+    :param base: Base that executes the register requests
+    :type base: AsyncCpxBase
+    :return: Result of the transaction
+    :rtype: Any
+    """
+    result = None
+    try:
+        while True:
+            step = transaction.send(result)
+            result = await getattr(base, step.method)(*step.args, **step.kwargs)
+    except StopIteration as stop:
+        return stop.value
+
+
+def set_timeout(
+    timeout_ms: int, register, single_cmds: bool = False
+) -> Generator[Step, Any, None]:
+    """Transaction that sets the modbus timeout and checks it by reading it back
+
+    :param timeout_ms: Modbus timeout in ms (milli-seconds)
+    :type timeout_ms: int
+    :param register: Timeout register (register_address, length)
+    :type register: ModbusRegister
+    :param single_cmds: Write the timeout with single register writes
+    :type single_cmds: bool
+    """
+    if 0 < timeout_ms < 100:
+        timeout_ms = 100
+        Logging.logger.warning(
+            f"Setting the timeout below 100 ms can lead to "
+            f"exclusion from the system. To prevent this, "
+            f"the timeout is limited to a minimum of {timeout_ms} ms"
+        )
+    Logging.logger.info(f"Setting modbus timeout to {timeout_ms} ms")
+    value_to_write = timeout_ms.to_bytes(length=register.length * 2, byteorder="little")
+    step = write_single if single_cmds else write
+    yield step(value_to_write, register.register_address)
+
+    # Check if it actually succeeded
+    indata = int.from_bytes((yield read(*register)), byteorder="little", signed=False)
+    if indata != timeout_ms:
+        Logging.logger.error("Setting of modbus timeout was not successful")
+
+
+def read_device_info() -> Generator[Step, Any, dict]:
+    """Transaction that reads the device identification objects of the basic and the
+    regular category and returns them as dict"""
+    dev_info = {}
+    for read_code, objects in DEVICE_INFORMATION_OBJECTS.items():
+        response = yield execute(ReadDeviceInformationRequest(read_code, 0))
+        for object_id, name in objects.items():
+            dev_info[name] = response.information[object_id].decode("ascii")
+
+    for key, value in dev_info.items():
+        Logging.logger.debug(f"{key.replace('_',' ').title()}: {value}")
+
+    return dev_info
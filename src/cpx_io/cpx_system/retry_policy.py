@@ -0,0 +1,191 @@
+"""cpx_io - RetryPolicy class for repeating failed Modbus transactions"""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from cpx_io.utils.logging import Logging
+
+
+@dataclass
+class RetryStatistics:
+    """Counters of one retry policy"""
+
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+
+
+class RetryPolicy:
+    """Repeats a Modbus transaction that failed with ConnectionAbortedError. The delay
+    between two attempts grows exponentially from initial_delay up to max_delay and is
+    varied randomly by +/- jitter (relative), so several clients do not retry in lockstep.
+    No further attempt is started if it would exceed the deadline of the call.
+
+    If the last attempt fails, on_failure is called and the error is raised.
+
+    Example:
+        policy = RetryPolicy(attempts=5, initial_delay=0.01, deadline=0.5)
+        cpxap = CpxAp(ip_address="192.168.1.1", write_policy=policy)
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        attempts: int = 1,
+        initial_delay: float = 0.0,
+        max_delay: float = 1.0,
+        multiplier: float = 2.0,
+        jitter: float = 0.1,
+        deadline: float = None,
+        on_retry: Callable[[int, Exception, float], None] = None,
+        on_failure: Callable[[Exception], None] = None,
+    ):
+        """Constructor of the RetryPolicy class.
+
+        :param attempts: (optional) Maximum number of attempts per call, 1 means no retry
+        :type attempts: int
+        :param initial_delay: (optional) Delay (in s) before the first retry
+        :type initial_delay: float
+        :param max_delay: (optional) Upper limit (in s) of the delay between two attempts
+        :type max_delay: float
+        :param multiplier: (optional) Factor the delay grows with every retry
+        :type multiplier: float
+        :param jitter: (optional) Relative random variation of the delay, 0.1 is +/- 10 %
+        :type jitter: float
+        :param deadline: (optional) Time (in s) after the start of a call in which all
+            attempts must be finished. If None, only the number of attempts is limited.
+        :type deadline: float
+        :param on_retry: (optional) Called with (attempt, error, delay) before a retry
+        :type on_retry: Callable[[int, Exception, float], None]
+        :param on_failure: (optional) Called with the error if the last attempt failed
+        :type on_failure: Callable[[Exception], None]
+        """
+        # pylint: disable=too-many-arguments, too-many-positional-arguments
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        if not 0.0 <= jitter <= 1.0:
+            raise ValueError("jitter must be between 0 and 1")
+        self.attempts = attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.on_retry = on_retry
+        self.on_failure = on_failure
+
+        self._statistics = RetryStatistics()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(attempts={self.attempts}, "
+            f"initial_delay={self.initial_delay}, deadline={self.deadline})"
+        )
+
+    def delay(self, retry: int) -> float:
+        """Returns the delay (in s) before the given retry, starting with 0
+
+        :param retry: Number of the retry
+        :type retry: int
+        :return: Delay including jitter
+        :rtype: float
+        """
+        delay = min(self.max_delay, self.initial_delay * self.multiplier**retry)
+        if self.jitter:
+            delay *= random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        return min(self.max_delay, delay)
+
+    def _next_delay(self, attempt: int, start: float, error: Exception) -> float:
+        """Returns the delay before the next attempt or None if the call failed"""
+        if attempt < self.attempts:
+            delay = self.delay(attempt - 1)
+            elapsed = time.monotonic() - start
+            if self.deadline is None or elapsed + delay < self.deadline:
+                with self._lock:
+                    self._statistics.retries += 1
+                Logging.logger.debug(
+                    f"Attempt {attempt} failed ({error}), retrying in {delay:.3f} s"
+                )
+                if self.on_retry is not None:
+                    self.on_retry(attempt, error, delay)
+                return delay
+
+        with self._lock:
+            self._statistics.failures += 1
+        Logging.logger.warning(f"Giving up after {attempt} attempt(s): {error}")
+        if self.on_failure is not None:
+            self.on_failure(error)
+        return None
+
+    def _start(self) -> float:
+        with self._lock:
+            self._statistics.calls += 1
+        return time.monotonic()
+
+    def call(self, operation: Callable[..., Any], *args) -> Any:
+        """Calls operation(*args) until it succeeds or the policy gives up.
+
+        :param operation: Transaction that raises ConnectionAbortedError on failure
+        :type operation: Callable
+        :return: Return value of the successful attempt
+        """
+        start = self._start()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return operation(*args)
+            except ConnectionAbortedError as error:
+                delay = self._next_delay(attempt, start, error)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def call_async(self, operation: Callable[..., Any], *args) -> Any:
+        """Awaits operation(*args) until it succeeds or the policy gives up.
+
+        :param operation: Coroutine function that raises ConnectionAbortedError on failure
+        :type operation: Callable
+        :return: Return value of the successful attempt
+        """
+        start = self._start()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await operation(*args)
+            except ConnectionAbortedError as error:
+                delay = self._next_delay(attempt, start, error)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    def statistics(self) -> RetryStatistics:
+        """Returns a copy of the call, retry and failure counters
+
+        :return: Counters of this policy
+        :rtype: RetryStatistics
+        """
+        with self._lock:
+            return RetryStatistics(**vars(self._statistics))
+
+    def reset_statistics(self) -> None:
+        """Resets all counters"""
+        with self._lock:
+            self._statistics = RetryStatistics()
+
+
+def default_read_policy() -> RetryPolicy:
+    """Reads are not repeated, a failed read raises immediately"""
+    return RetryPolicy(attempts=1)
+
+
+def default_write_policy() -> RetryPolicy:
+    """Writes are attempted up to 5 times with a short exponential backoff"""
+    return RetryPolicy(attempts=5, initial_delay=0.005, max_delay=0.1)
@@ -0,0 +1,119 @@
+"""cpx_io - StartupTrace class for profiling the startup of a system"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from cpx_io.cpx_system.transport_metrics import TransportMetrics
+
+
+@dataclass
+class StartupPhase:
+    """One phase of the startup. module is the module index or None for phases of the
+    whole system. requests is the number of Modbus requests of the system during the
+    phase, so parallel phases (e.g. downloads) can include requests of each other."""
+
+    name: str
+    module: int | None
+    duration: float
+    requests: int = 0
+
+
+@dataclass
+class StartupReport:
+    """Phases of the startup in the order they finished. Times are in s."""
+
+    phases: list[StartupPhase] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """Wall time of the complete startup"""
+        return sum(p.duration for p in self.phases if p.name == "total")
+
+    @property
+    def requests(self) -> int:
+        """Modbus requests of the complete startup"""
+        return sum(p.requests for p in self.phases if p.name == "total")
+
+    def durations_by_phase(self) -> dict[str, float]:
+        """Returns the summed duration of every phase name"""
+        durations = {}
+        for p in self.phases:
+            durations[p.name] = durations.get(p.name, 0.0) + p.duration
+        return durations
+
+    def durations_by_module(self) -> dict[int, float]:
+        """Returns the summed duration of all phases of every module"""
+        durations = {}
+        for p in self.phases:
+            if p.module is not None:
+                durations[p.module] = durations.get(p.module, 0.0) + p.duration
+        return durations
+
+    def slowest(self, count: int = 5) -> list[StartupPhase]:
+        """Returns the count module phases that took longest"""
+        module_phases = [p for p in self.phases if p.module is not None]
+        return sorted(module_phases, key=lambda p: p.duration, reverse=True)[:count]
+
+
+class StartupTrace:
+    """Records the wall time and Modbus requests of the phases of a startup"""
+
+    def __init__(self, metrics: TransportMetrics):
+        """Constructor of the StartupTrace class.
+
+        :param metrics: Transport metrics of the system the requests are counted from
+        :type metrics: TransportMetrics
+        """
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._phases = []
+
+    def add(
+        self, name: str, module: int | None, duration: float, requests: int = 0
+    ) -> None:
+        """Adds a phase that was measured outside of phase()
+
+        :param name: Name of the phase, e.g. "module_information"
+        :type name: str
+        :param module: Module index or None for the whole system
+        :type module: int | None
+        :param duration: Wall time (in s) of the phase
+        :type duration: float
+        :param requests: (optional) Modbus requests of the phase
+        :type requests: int
+        """
+        with self._lock:
+            self._phases.append(StartupPhase(name, module, duration, requests))
+
+    @contextmanager
+    def phase(self, name: str, module: int = None):
+        """Context manager that records the enclosed code as one phase, also if it
+        raises an error
+
+        :param name: Name of the phase, e.g. "module_build"
+        :type name: str
+        :param module: (optional) Module index or None for the whole system
+        :type module: int
+        """
+        requests = self.metrics.request_count()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(
+                name,
+                module,
+                time.perf_counter() - start,
+                self.metrics.request_count() - requests,
+            )
+
+    def report(self) -> StartupReport:
+        """Returns the phases recorded so far
+
+        :return: Report with a copy of all phases
+        :rtype: StartupReport
+        """
+        with self._lock:
+            return StartupReport(list(self._phases))
@@ -0,0 +1,294 @@
+"""cpx_io - Subscriptions to channel and diagnosis changes with asynchronous callbacks."""
+
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, replace
+from queue import SimpleQueue
+from typing import Any, Callable
+
+from cpx_io.cpx_system.change_detector import CHANGED, FALLING, RISING, ChannelChange
+from cpx_io.utils.logging import Logging
+
+# a full queue drops its oldest pending event
+DROP_OLDEST = "drop_oldest"
+# a new event is merged into the pending event of the same channel or module, a full
+# queue drops its oldest pending event
+COALESCE = "coalesce"
+OVERFLOW_POLICIES = (DROP_OLDEST, COALESCE)
+
+
+@dataclass(frozen=True)
+class DiagnosisChange:
+    """Change of the diagnosis status of one module"""
+
+    position: int
+    old_value: Any
+    new_value: Any
+    timestamp: float
+
+
+def _merge(first, second):
+    """Returns one event from first.old_value to second.new_value or None if the value
+    is back to where it started"""
+    if first.old_value == second.new_value:
+        return None
+    if isinstance(second, ChannelChange):
+        if isinstance(second.new_value, bool):
+            kind = RISING if second.new_value else FALLING
+        else:
+            kind = CHANGED
+        return replace(second, old_value=first.old_value, kind=kind)
+    return replace(second, old_value=first.old_value)
+
+
+def _key(event) -> tuple:
+    return (event.position, getattr(event, "channel", None))
+
+
+class Subscription:
+    """Interest in the changes of a channel, of all channels of a module or of the
+    diagnosis of a module. The changes are evaluated in the I/O cycle with debounce
+    and min_interval and are then queued for the callback, which runs on a worker of
+    the EventDispatcher.
+
+    Counters: delivered (callbacks run), dropped (events lost due to a full queue),
+    coalesced (events merged into a pending one) and errors (callbacks that raised).
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        event_type: type,
+        position: int,
+        channel: int,
+        callback: Callable,
+        *,
+        debounce: float = 0.0,
+        min_interval: float = 0.0,
+        overflow: str = DROP_OLDEST,
+        queue_size: int = 64,
+    ):
+        """Constructor of the Subscription class.
+
+        :param event_type: ChannelChange or DiagnosisChange
+        :type event_type: type
+        :param position: Module position, None for all modules
+        :type position: int
+        :param channel: Channel number, None for all channels
+        :type channel: int
+        :param callback: Called with every event
+        :type callback: Callable
+        :param debounce: (optional) Time (in s) a new value must be stable before it
+            is reported, changes that are reverted within this time are not reported
+        :type debounce: float
+        :param min_interval: (optional) Minimum time (in s) between two events of the
+            same channel or module. Changes in between are merged into one event that
+            is reported when the interval has passed
+        :type min_interval: float
+        :param overflow: (optional) DROP_OLDEST or COALESCE
+        :type overflow: str
+        :param queue_size: (optional) Maximum number of pending events
+        :type queue_size: int
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Overflow policy must be one of {OVERFLOW_POLICIES}")
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1")
+        self.event_type = event_type
+        self.position = position
+        self.channel = channel
+        self.callback = callback
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.overflow = overflow
+        self.queue_size = queue_size
+        self.active = True
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        # evaluated in the I/O cycle only
+        self._unstable = {}
+        self._held = {}
+        self._last_event_time = {}
+        # guarded by the lock of the dispatcher
+        self._queue = deque()
+        self._scheduled = False
+        self._dispatcher = None
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}({self.event_type.__name__}, "
+            f"position={self.position}, channel={self.channel}, "
+            f"delivered={self.delivered}, dropped={self.dropped})"
+        )
+
+    def cancel(self) -> None:
+        """Stops the subscription, pending events are discarded"""
+        self.active = False
+
+    def matches(self, event) -> bool:
+        """Returns True if the event belongs to this subscription"""
+        return (
+            isinstance(event, self.event_type)
+            and (self.position is None or event.position == self.position)
+            and (self.channel is None or event.channel == self.channel)
+        )
+
+    def evaluate(self, events: list, now: float = None) -> None:
+        """Offers the events of one I/O cycle to the subscription and releases the
+        debounced and held events that are due. Must be called in every cycle.
+
+        :param events: Changes of this cycle, events of other subscriptions are ignored
+        :type events: list
+        :param now: (optional) Monotonic time of the cycle
+        :type now: float
+        """
+        if now is None:
+            now = time.monotonic()
+        for event in events:
+            if not self.matches(event):
+                continue
+            if self.debounce > 0:
+                key = _key(event)
+                pending = self._unstable.get(key, (None, None))[0]
+                merged = event if pending is None else _merge(pending, event)
+                # the stable time starts again with every change
+                self._unstable[key] = (merged, now)
+            else:
+                self._release(event, now)
+
+        for key, (event, since) in list(self._unstable.items()):
+            if now - since >= self.debounce:
+                del self._unstable[key]
+                if event is not None:
+                    self._release(event, now)
+
+        for key, event in list(self._held.items()):
+            if now - self._last_event_time[key] >= self.min_interval:
+                del self._held[key]
+                self._last_event_time[key] = now
+                self._dispatcher.submit(self, event)
+
+    def _release(self, event, now: float) -> None:
+        """Passes the event to the dispatcher or holds it until min_interval passed"""
+        key = _key(event)
+        if key in self._held:
+            merged = _merge(self._held[key], event)
+            if merged is None:
+                del self._held[key]
+            else:
+                self._held[key] = merged
+            return
+        last = self._last_event_time.get(key)
+        if self.min_interval > 0 and last is not None:
+            if now - last < self.min_interval:
+                self._held[key] = event
+                return
+        self._last_event_time[key] = now
+        self._dispatcher.submit(self, event)
+
+    def _push(self, event) -> None:
+        """Adds the event to the queue with the overflow policy, called with the lock
+        of the dispatcher"""
+        if self.overflow == COALESCE:
+            key = _key(event)
+            for i, pending in enumerate(self._queue):
+                if _key(pending) == key:
+                    merged = _merge(pending, event)
+                    if merged is None:
+                        del self._queue[i]
+                    else:
+                        self._queue[i] = merged
+                    self.coalesced += 1
+                    return
+        if len(self._queue) >= self.queue_size:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(event)
+
+
+class EventDispatcher:
+    """Runs the callbacks of the subscriptions on a pool of worker threads. Every
+    subscription has its own bounded queue, so submitting never blocks the I/O thread
+    and a slow callback only delays its own events. The callbacks of one subscription
+    run one after another in the order of the events."""
+
+    def __init__(self, workers: int = 2):
+        """Constructor of the EventDispatcher class.
+
+        :param workers: (optional) Number of worker threads
+        :type workers: int
+        """
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._ready = SimpleQueue()
+        self._threads = []
+
+    def __repr__(self):
+        return f"{type(self).__name__}(workers={self.workers})"
+
+    def add(self, subscription: Subscription) -> Subscription:
+        """Connects the subscription to this dispatcher and starts the workers"""
+        subscription._dispatcher = self  # pylint: disable=protected-access
+        with self._lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(
+                        target=self._run, name=f"EventDispatcher-{i}", daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+        return subscription
+
+    def submit(self, subscription: Subscription, event) -> None:
+        """Queues the event for the callback of the subscription"""
+        # pylint: disable=protected-access
+        if not subscription.active:
+            return
+        with self._lock:
+            subscription._push(event)
+            if subscription._queue and not subscription._scheduled:
+                subscription._scheduled = True
+                self._ready.put(subscription)
+
+    def _run(self) -> None:
+        # pylint: disable=protected-access
+        while True:
+            subscription = self._ready.get()
+            if subscription is None:
+                return
+            with self._lock:
+                event = subscription._queue.popleft() if subscription._queue else None
+            if event is not None and subscription.active:
+                try:
+                    subscription.callback(event)
+                    subscription.delivered += 1
+                # a failing callback must not stop the worker
+                except Exception:  # pylint: disable=broad-exception-caught
+                    subscription.errors += 1
+                    Logging.logger.error(traceback.format_exc())
+            with self._lock:
+                if subscription._queue and subscription.active:
+                    self._ready.put(subscription)
+                else:
+                    subscription._queue.clear()
+                    subscription._scheduled = False
+
+    def shutdown(self, timeout: float = None) -> None:
+        """Stops the workers. Running callbacks are finished, events that are still
+        queued are discarded.
+
+        :param timeout: (optional) Maximum time (in s) to wait for each worker
+        :type timeout: float
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._ready.put(None)
+        for thread in threads:
+            thread.join(timeout)
@@ -0,0 +1,325 @@
+"""cpx_io - TransportMetrics class for request counts and latency histograms"""
+
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+
+# operations that are recorded once per Modbus request (or pipelined group)
+MODBUS_OPERATIONS = ("read", "write", "execute")
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in the style of an HDR histogram. Values are
+    recorded in ns and grouped in buckets that keep the top significant_bits of the
+    value, so percentiles are exact to 2**-(significant_bits - 1), i.e. below 2 % with
+    the default of 7 bits, independent of the magnitude of the latency."""
+
+    def __init__(self, significant_bits: int = 7):
+        self.significant_bits = significant_bits
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._buckets = {}
+
+    def record(self, value_ns: int) -> None:
+        """Adds one value (in ns)"""
+        shift = value_ns.bit_length() - self.significant_bits
+        key = (value_ns >> shift) << shift if shift > 0 else value_ns
+        self._buckets[key] = self._buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += value_ns
+        self.min = value_ns if self.min is None else min(self.min, value_ns)
+        self.max = value_ns if self.max is None else max(self.max, value_ns)
+
+    def percentile(self, percent: float) -> int:
+        """Returns the value (in ns) below which percent of the recorded values lie
+
+        :param percent: Percentile between 0 and 100
+        :type percent: float
+        :return: Lower bound of the bucket of the percentile, None if empty
+        :rtype: int
+        """
+        if self.count == 0:
+            return None
+        target = percent / 100 * self.count
+        seen = 0
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen >= target:
+                return min(max(key, self.min), self.max)
+        return self.max
+
+
+@dataclass
+class OperationStatistics:
+    """Statistics of one operation in one register region. Times are in s."""
+
+    # pylint: disable=too-many-instance-attributes
+    count: int = 0
+    errors: int = 0
+    bytes: int = 0
+    total_time: float = 0.0
+    min_time: float = None
+    max_time: float = None
+    p50: float = None
+    p90: float = None
+    p99: float = None
+    p999: float = None
+
+    @property
+    def mean_time(self) -> float:
+        """Mean time of all requests or None if there was none"""
+        if self.count == 0:
+            return None
+        return self.total_time / self.count
+
+
+@dataclass
+class MetricsSnapshot:
+    """Snapshot of the transport metrics of one system.
+
+    operations is keyed by operation ("read", "write", "execute", "parameter", "isdu")
+    and then by register region (e.g. "outputs", "inputs", "parameters", "diagnosis",
+    "isdu"). Retries and failures are the counters of the read and write policies.
+    """
+
+    operations: dict[str, dict[str, OperationStatistics]] = field(default_factory=dict)
+    retries: int = 0
+    failures: int = 0
+    reconnects: int = 0
+    duration: float = 0.0
+
+
+def _seconds(value_ns: int) -> float:
+    return None if value_ns is None else value_ns / 1e9
+
+
+class _OperationRecord:
+    """Histogram plus error and byte counters of one (operation, region)"""
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ("histogram", "errors", "bytes")
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.bytes = 0
+
+    def statistics(self) -> OperationStatistics:
+        """Returns the statistics in s"""
+        histogram = self.histogram
+        return OperationStatistics(
+            count=histogram.count,
+            errors=self.errors,
+            bytes=self.bytes,
+            total_time=histogram.total / 1e9,
+            min_time=_seconds(histogram.min),
+            max_time=_seconds(histogram.max),
+            p50=_seconds(histogram.percentile(50)),
+            p90=_seconds(histogram.percentile(90)),
+            p99=_seconds(histogram.percentile(99)),
+            p999=_seconds(histogram.percentile(99.9)),
+        )
+
+
+class TransportMetrics:
+    """Always-on collector of request counts, bytes, errors and latencies per
+    operation and register region. Recording is a dictionary lookup and a few integer
+    operations, percentiles are only computed for snapshot()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}
+        self._reconnects = 0
+        self._start = time.perf_counter()
+
+    def record(
+        self,
+        operation: str,
+        region: str,
+        duration_ns: int,
+        nbytes: int = 0,
+        error: bool = False,
+    ) -> None:
+        """Records one request.
+
+        :param operation: Operation type, e.g. "read"
+        :type operation: str
+        :param region: Register region, e.g. "inputs"
+        :type region: str
+        :param duration_ns: Duration of the request in ns
+        :type duration_ns: int
+        :param nbytes: (optional) Number of transferred data bytes
+        :type nbytes: int
+        :param error: (optional) True if the request failed
+        :type error: bool
+        """
+        # pylint: disable=too-many-arguments, too-many-positional-arguments
+        key = (operation, region)
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                record = self._records[key] = _OperationRecord()
+            record.histogram.record(duration_ns)
+            if error:
+                record.errors += 1
+            else:
+                record.bytes += nbytes
+
+    @contextmanager
+    def measure(self, operation: str, region: str, nbytes: int = 0):
+        """Context manager that records the with block as one request. The request is
+        recorded as failed if the block raises.
+
+        :param operation: Operation type, e.g. "read"
+        :type operation: str
+        :param region: Register region, e.g. "inputs"
+        :type region: str
+        :param nbytes: (optional) Number of transferred data bytes
+        :type nbytes: int
+        """
+        with _timed(
+            lambda duration, error: self.record(
+                operation, region, duration, 0 if error else nbytes, error
+            )
+        ):
+            yield
+
+    def request_count(self) -> int:
+        """Returns the number of recorded Modbus requests of all regions. Composite
+        operations (e.g. "parameter") are not counted since their requests are."""
+        with self._lock:
+            return sum(
+                record.histogram.count
+                for (operation, _), record in self._records.items()
+                if operation in MODBUS_OPERATIONS
+            )
+
+    def record_reconnect(self) -> None:
+        """Counts one reconnect of the Modbus connection"""
+        with self._lock:
+            self._reconnects += 1
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Returns the statistics of all operations since the last reset
+
+        :return: Snapshot of all statistics
+        :rtype: MetricsSnapshot
+        """
+        with self._lock:
+            snapshot = MetricsSnapshot(
+                reconnects=self._reconnects,
+                duration=time.perf_counter() - self._start,
+            )
+            for (operation, region), record in self._records.items():
+                snapshot.operations.setdefault(operation, {})[
+                    region
+                ] = record.statistics()
+        return snapshot
+
+    def reset(self) -> None:
+        """Discards all recorded values"""
+        with self._lock:
+            self._records = {}
+            self._reconnects = 0
+            self._start = time.perf_counter()
+
+
+@contextmanager
+def _timed(record):
+    """Times the with block and calls record(duration_ns, error) when it is left"""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    except BaseException:
+        record(time.perf_counter_ns() - start, True)
+        raise
+    record(time.perf_counter_ns() - start, False)
+
+
+class MeteredTransportMixin:
+    """Mixin of CpxBase and AsyncCpxBase that provides the statistics of the
+    TransportMetrics in self.metrics and of the read_policy and write_policy"""
+
+    # (first register, end register, name) of the register regions used in the metrics
+    REGISTER_REGIONS = ()
+
+    def stats(self) -> MetricsSnapshot:
+        """Returns request counts, bytes, errors and latency percentiles per operation
+        ("read", "write", "execute", ...) and register region since the last
+        reset_stats(), together with the retry counters of the read and write policy.
+
+        :return: Snapshot of the transport metrics
+        :rtype: MetricsSnapshot
+        """
+        snapshot = self.metrics.snapshot()
+        for policy in (self.read_policy, self.write_policy):
+            policy_statistics = policy.statistics()
+            snapshot.retries += policy_statistics.retries
+            snapshot.failures += policy_statistics.failures
+        return snapshot
+
+    def reset_stats(self) -> None:
+        """Resets the transport metrics and the counters of the read and write policy"""
+        self.metrics.reset()
+        self.read_policy.reset_statistics()
+        self.write_policy.reset_statistics()
+
+    def _register_region(self, register: int) -> str:
+        """Returns the name of the register region of register for the metrics"""
+        for start, end, name in self.REGISTER_REGIONS:
+            if start <= register < end:
+                return name
+        return "system"
+
+    def _measure(self, operation: str, register: int, nbytes: int = 0):
+        """Returns a context manager that records the with block as one request of
+        the register region of register"""
+        return self.metrics.measure(operation, self._register_region(register), nbytes)
+
+
+def measured(operation: str, region: str, owner: str = None):
+    """Decorator that records the duration of a method as one request of operation in
+    region. The collector is taken from self.metrics or, if owner is given, from the
+    metrics of that attribute (e.g. owner="base" for modules). Coroutine functions
+    are measured until they are finished.
+
+    :param operation: Operation type, e.g. "parameter"
+    :type operation: str
+    :param region: Register region, e.g. "parameters"
+    :type region: str
+    :param owner: (optional) Name of the attribute that holds the metrics
+    :type owner: str
+    """
+
+    def measure(self):
+        # the collector is looked up when the call is finished
+        return _timed(
+            lambda duration, error: (
+                self if owner is None else getattr(self, owner)
+            ).metrics.record(operation, region, duration, error=error)
+        )
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                with measure(self):
+                    return await func(self, *args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with measure(self):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,52 +1,171 @@
-"""Helper functions for converting lists of boolean values"""
-
-
-def bytes_to_boollist(data: bytes, num_bytes: int = None, byteorder="little") -> list:
-    """Converts data in byte representation to a list of bools"""
-    # Compose list of single bytes
-    chunkeddata = [data[i : i + 1] for i in range(0, len(data), 1)]
-
-    if byteorder == "big":
-        chunkeddata = chunkeddata[::-1]
-
-    # Compose a list of single boolean values
-    boollist = sum(
-        (
-            [int.from_bytes(chunk, "little") >> i & 1 == 1 for i in range(8)]
-            for chunk in chunkeddata
-        ),
-        [],
-    )
-
-    if num_bytes is None:
-        num_bytes = len(data)
-
-    if num_bytes > len(data):
-        boollist += [False] * ((num_bytes - len(data)) * 8)
-
-    boollist = boollist[: num_bytes * 8]
-
-    return boollist
-
-
-def boollist_to_bytes(boollist: list) -> bytes:
-    """Converts a list of bools to byte representation"""
-    # Compose list of chunks of 8 bools
-    chunkedlist = [boollist[i : i + 8] for i in range(0, len(boollist), 8)]
-    # Compose a list where every chunk is an int
-    intlist = [
-        sum(int(bit) << position for (position, bit) in enumerate(chunk))
-        for chunk in chunkedlist
-    ]
-    return bytes(intlist)
-
-
-def boollist_to_int(boollist: list) -> int:
-    """Converts a list of bools to int representation"""
-    return int.from_bytes(boollist_to_bytes(boollist), byteorder="little")
-
-
-def int_to_boollist(number: int) -> list:
-    """Converts an int to a list of bool values"""
-    num_bytes = (number.bit_length() + 7) // 8
-    return bytes_to_boollist(number.to_bytes(num_bytes, byteorder="little"))
+"""Helper functions for converting lists of boolean values"""
+
+from itertools import chain
+
+# bools of every byte value, least significant bit first
+_BYTE_TO_BOOLS = tuple(tuple(b >> i & 1 == 1 for i in range(8)) for b in range(256))
+_BOOLS_TO_BYTE = {bools: b for b, bools in enumerate(_BYTE_TO_BOOLS)}
+
+
+def bytes_to_boollist(data: bytes, num_bytes: int = None, byteorder="little") -> list:
+    """Converts data in byte representation to a list of bools"""
+    if byteorder == "big":
+        data = data[::-1]
+
+    if num_bytes is None:
+        num_bytes = len(data)
+
+    boollist = list(chain.from_iterable(map(_BYTE_TO_BOOLS.__getitem__, data)))
+
+    if num_bytes > len(data):
+        boollist += [False] * ((num_bytes - len(data)) * 8)
+
+    return boollist[: num_bytes * 8]
+
+
+def boollist_to_bytes(boollist: list) -> bytes:
+    """Converts a list of bools to byte representation"""
+    bits = [bool(bit) for bit in boollist]
+    # fill up the last byte
+    bits += [False] * (-len(bits) % 8)
+    return bytes(_BOOLS_TO_BYTE[tuple(bits[i : i + 8])] for i in range(0, len(bits), 8))
+
+
+def boollist_to_int(boollist: list) -> int:
+    """Converts a list of bools to int representation"""
+    return int.from_bytes(boollist_to_bytes(boollist), byteorder="little")
+
+
+def int_to_boollist(number: int) -> list:
+    """Converts an int to a list of bool values"""
+    num_bytes = (number.bit_length() + 7) // 8
+    return bytes_to_boollist(number.to_bytes(num_bytes, byteorder="little"))
+
+
+class BitVector:
+    """Compact sequence of bools stored in one int, bit 0 is the first element. It
+    can be used like a list of bools (indexing, slicing, iteration, comparison with
+    lists) and supports diff and bulk set/clear."""
+
+    __slots__ = ("_value", "_length")
+
+    def __init__(self, length: int = 0, value: int = 0):
+        """Constructor of the BitVector class.
+
+        :param length: Number of bools
+        :type length: int
+        :param value: Bools as int, bit 0 is the first element
+        :type value: int
+        """
+        self._length = length
+        self._value = value & ((1 << length) - 1)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, length: int = None):
+        """Initializes a BitVector from a byte representation (little endian)
+
+        :param data: Bools as bytes, bit 0 of the first byte is the first element
+        :type data: bytes
+        :param length: (optional) Number of bools, default all bits of data
+        :type length: int
+        """
+        if length is None:
+            length = len(data) * 8
+        return cls(length, int.from_bytes(data, "little"))
+
+    @classmethod
+    def from_bools(cls, bools):
+        """Initializes a BitVector from an iterable of bools"""
+        bools = list(bools)
+        return cls(len(bools), boollist_to_int(bools))
+
+    def to_bytes(self) -> bytes:
+        """Returns the bytes representation (little endian)"""
+        return self._value.to_bytes((self._length + 7) // 8, "little")
+
+    def tolist(self) -> list:
+        """Returns the bools as list"""
+        return bytes_to_boollist(self.to_bytes())[: self._length]
+
+    def count(self) -> int:
+        """Returns the number of True elements"""
+        return bin(self._value).count("1")
+
+    def diff(self, other) -> list[int]:
+        """Returns the indices of the elements that differ from other
+
+        :param other: BitVector or sequence of bools of the same length
+        :type other: BitVector | list
+        :return: Indices of the changed elements in ascending order
+        :rtype: list[int]
+        """
+        if not isinstance(other, BitVector):
+            other = BitVector.from_bools(other)
+        if len(other) != self._length:
+            raise ValueError(f"Length {len(other)} does not match {self._length}")
+        changed = self._value ^ int(other)
+        indices = []
+        while changed:
+            lowest = changed & -changed
+            indices.append(lowest.bit_length() - 1)
+            changed ^= lowest
+        return indices
+
+    def _mask(self, indices) -> int:
+        if indices is None:
+            return (1 << self._length) - 1
+        mask = 0
+        for index in indices:
+            mask |= 1 << self._index(index)
+        return mask
+
+    def set(self, indices=None) -> None:
+        """Sets the elements at indices (default all) to True"""
+        self._value |= self._mask(indices)
+
+    def clear(self, indices=None) -> None:
+        """Sets the elements at indices (default all) to False"""
+        self._value &= ~self._mask(indices)
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(f"Index {index} out of range")
+        return index
+
+    def __len__(self):
+        return self._length
+
+    def __int__(self):
+        return self._value
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step == 1:
+                length = max(stop - start, 0)
+                return BitVector(length, self._value >> start)
+            return BitVector.from_bools(self.tolist()[key])
+        return (self._value >> self._index(key)) & 1 == 1
+
+    def __setitem__(self, key: int, value: bool):
+        if value:
+            self._value |= 1 << self._index(key)
+        else:
+            self._value &= ~(1 << self._index(key))
+
+    def __eq__(self, other):
+        if isinstance(other, BitVector):
+            return self._length == other._length and self._value == other._value
+        if isinstance(other, (list, tuple)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.tolist()})"
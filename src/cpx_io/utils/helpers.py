@@ -13,6 +13,39 @@ def div_ceil(x_val: int, y_val: int) -> int:
     return (x_val + y_val - 1) // y_val
 
 
+def register_chunks(
+    register: int, length: int, max_length: int
+) -> list[tuple[int, int]]:
+    """Splits a register range into (register, length) chunks of at most max_length"""
+    return [
+        (register + offset, min(max_length, length - offset))
+        for offset in range(0, length, max_length)
+    ]
+
+
+def library_version() -> str:
+    """Returns the installed version of festo-cpx-io or None if it is not installed"""
+    # pylint: disable=import-outside-toplevel
+    from importlib import metadata
+
+    try:
+        return metadata.version("festo-cpx-io")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def import_numpy():
+    """Returns the numpy module, which is an optional dependency"""
+    try:
+        # pylint: disable=import-outside-toplevel
+        import numpy
+    except ModuleNotFoundError as error:
+        raise ModuleNotFoundError(
+            f"{error}. Please install numpy with: pip install festo-cpx-io[numpy]"
+        ) from error
+    return numpy
+
+
 def convert_uint32_to_octett(value: int) -> str:
     """Convert one uint32 value to octett. Usually used for displaying ip addresses."""
     return f"{(value >> 24) & 0xFF}.{(value >> 16) & 0xFF}.{(value >> 8) & 0xFF}.{(value) & 0xFF}"
@@ -0,0 +1,280 @@
+"""Contains tests for ChannelCodec class"""
+
+import pickle
+import pytest
+
+from cpx_io.cpx_system.cpx_ap.ap_channel_codec import ChannelCodec
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+
+
+def channel(data_type, bit_offset, bits=None, array_size=None, byte_swap=None):
+    """Returns a channel with the given layout"""
+    return Channel(
+        array_size=array_size,
+        bits=bits,
+        bit_offset=bit_offset,
+        byte_swap_needed=byte_swap,
+        channel_id=0,
+        data_type=data_type,
+        description="",
+        direction="out",
+        name="Channel %d",
+        parameter_group_ids=None,
+        profile_list=[3],
+    )
+
+
+class TestChannelCodec:
+    "Test ChannelCodec"
+
+    def test_decode_mixed_channels(self):
+        """Test decode"""
+        # Arrange
+        codec = ChannelCodec(
+            [
+                channel("INT8", 0, 8),
+                channel("INT16", 8, 16, byte_swap=True),
+                channel("UINT16", 24, 16),
+                channel("BOOL", 42, 1),
+                channel("BOOL", 43, 1),
+                channel("UINT8", 48, 8),
+            ]
+        )
+
+        # Act
+        result = codec.decode(b"\xff\xf0\xff\xa5\xc0\x0c\x36\x00")
+
+        # Assert
+        assert result == [-1, -16, 0xA5C0, True, True, 0x36]
+
+    def test_decode_arrays(self):
+        """Test decode"""
+        # Arrange
+        codec = ChannelCodec(
+            [
+                channel("BOOL", 4, 8, array_size=8),
+                channel("UINT16", 16, 32, array_size=2, byte_swap=True),
+            ]
+        )
+
+        # Act
+        result = codec.decode(bytearray(b"\x50\x0a\x01\x02\x03\x04"))
+
+        # Assert
+        assert result == [
+            [True, False, True, False, False, True, False, True],
+            [0x0201, 0x0403],
+        ]
+
+    def test_decode_not_implemented(self):
+        """Test decode"""
+        # Arrange
+        codec = ChannelCodec([channel("FLOAT32", 0, 32)])
+
+        # Act & Assert
+        with pytest.raises(NotImplementedError):
+            codec.decode(b"\x00\x00\x00\x00")
+
+    @pytest.mark.parametrize(
+        "layout, expected_span",
+        [
+            (("BOOL", 17, 1), (1, 1)),
+            (("BOOL", 12, 8, 8), (0, 2)),
+            (("UINT8", 8, 8), (0, 1)),
+            (("INT16", 40, 16), (2, 2)),
+            (("UINT16", 32, 32, 2), (2, 2)),
+        ],
+    )
+    def test_span(self, layout, expected_span):
+        """Test span"""
+        # Arrange
+        codec = ChannelCodec([channel("UINT16", 0, 16), channel(*layout)])
+
+        # Act & Assert
+        assert codec.span(1) == expected_span
+
+    def test_decode_channel(self):
+        """Test decode_channel of the registers given by span"""
+        # Arrange
+        codec = ChannelCodec(
+            [
+                channel("INT8", 0, 8),
+                channel("INT16", 8, 16, byte_swap=True),
+                channel("UINT16", 24, 16),
+                channel("BOOL", 42, 1),
+                channel("BOOL", 43, 1),
+                channel("UINT8", 48, 8),
+                channel("BOOL", 52, 4, array_size=4),
+            ]
+        )
+        data = b"\xff\xf0\xff\xa5\xc0\x0c\x36\x00"
+
+        # Act
+        values = []
+        for i in range(len(codec)):
+            offset, length = codec.span(i)
+            values.append(
+                codec.decode_channel(
+                    i, data[offset * 2 : (offset + length) * 2], offset
+                )
+            )
+
+        # Assert
+        assert values == codec.decode(data)
+
+    def test_decode_channel_not_implemented(self):
+        """Test decode_channel"""
+        # Arrange
+        codec = ChannelCodec([channel("FLOAT32", 0, 32)])
+
+        # Act & Assert
+        assert not codec.is_supported(0)
+        assert codec.bit_span(0) == (0, 32)
+        assert codec.span(0) == (0, 2)
+        with pytest.raises(NotImplementedError):
+            codec.decode_channel(0, b"\x00\x00\x00\x00")
+
+    def test_encode_mixed_channels(self):
+        """Test encode"""
+        # Arrange
+        codec = ChannelCodec(
+            [
+                channel("INT8", 0, 8),
+                channel("INT16", 8, 16, byte_swap=True),
+                channel("UINT16", 24, 16),
+                channel("BOOL", 42, 1),
+                channel("BOOL", 43, 1),
+                channel("UINT8", 48, 8),
+            ]
+        )
+        buffer = bytearray(8)
+
+        # Act
+        codec.encode([-1, -16, 0xA5C0, True, True, 0x36], buffer)
+
+        # Assert
+        assert buffer == bytearray(b"\xff\xf0\xff\xa5\xc0\x0c\x36\x00")
+
+    def test_encode_channel_keeps_other_bits(self):
+        """Test encode_channel"""
+        # Arrange
+        codec = ChannelCodec([channel("BOOL", i, 1) for i in range(16)])
+        buffer = bytearray(b"\xff\xff")
+
+        # Act
+        codec.encode_channel(9, False, buffer)
+
+        # Assert
+        assert buffer == bytearray(b"\xff\xfd")
+
+    def test_encode_bool_array_clears_bits(self):
+        """Test encode"""
+        # Arrange
+        codec = ChannelCodec([channel("BOOL", 8, 4, array_size=4)])
+        buffer = bytearray(b"\xff\xff")
+
+        # Act
+        codec.encode([[False, True, False, True]], buffer)
+
+        # Assert
+        assert buffer == bytearray(b"\xff\xfa")
+
+    def test_encode_out_of_range(self):
+        """Test encode"""
+        # Arrange
+        codec = ChannelCodec([channel("UINT8", 0, 8), channel("INT8", 8, 8)])
+
+        # Act & Assert
+        with pytest.raises(OverflowError):
+            codec.encode([256, 0], bytearray(2))
+        with pytest.raises(OverflowError):
+            codec.encode([0, -129], bytearray(2))
+
+    def test_encode_list_for_single_channel(self):
+        """Test encode"""
+        # Arrange
+        codec = ChannelCodec([channel("UINT16", 0, 16)])
+
+        # Act & Assert
+        with pytest.raises(TypeError):
+            codec.encode([[1, 2]], bytearray(2))
+
+    def test_encode_not_implemented(self):
+        """Test encode"""
+        # Arrange
+        codec = ChannelCodec([channel("UNKNOWN", 0, 1)])
+
+        # Act & Assert
+        with pytest.raises(NotImplementedError):
+            codec.encode([True], bytearray(2))
+
+    def test_pickle(self):
+        """Test that the codec is compiled again after unpickling"""
+        # Arrange
+        codec = ChannelCodec([channel("UINT16", 0, 16), channel("BOOL", 16, 1)])
+
+        # Act
+        restored = pickle.loads(pickle.dumps(codec))
+
+        # Assert
+        assert len(restored) == 2
+        assert restored.decode(b"\x12\x34\x01\x00") == [0x1234, True]
+
+    def test_decode_array_samples(self):
+        """Test decode_array of many samples at once"""
+        # Arrange
+        np = pytest.importorskip("numpy")
+        codec = ChannelCodec(
+            [
+                channel("BOOL", 0, 1),
+                channel("BOOL", 4, 4, array_size=4),
+                channel("INT16", 8, 16, byte_swap=True),
+                channel("UINT8", 24, 16, array_size=2),
+            ]
+        )
+        samples = [
+            b"\xf1\xf0\xff\x01\x02\x00",
+            b"\x50\x01\x00\xff\x00\x00",
+        ]
+
+        # Act
+        result = codec.decode_array(
+            np.frombuffer(b"".join(samples), np.uint8).reshape(2, 6)
+        )
+
+        # Assert
+        assert result.shape == (2,)
+        assert [r.tolist() for r in result["channel_1"]] == [
+            [True] * 4,
+            [True, False, True, False],
+        ]
+        assert result["channel_0"].tolist() == [True, False]
+        assert result["channel_2"].tolist() == [-16, 1]
+        assert result["channel_3"].tolist() == [[1, 2], [255, 0]]
+        for sample, row in zip(samples, result):
+            assert [np.asarray(v).tolist() for v in row.tolist()] == codec.decode(
+                sample
+            )
+
+    def test_decode_array_bool(self):
+        """Test decode_array of single BOOL channels"""
+        # Arrange
+        np = pytest.importorskip("numpy")
+        codec = ChannelCodec([channel("BOOL", i, 1) for i in range(12)])
+
+        # Act
+        result = codec.decode_array(b"\x0a\x05")
+
+        # Assert
+        assert result.dtype == np.bool_
+        assert result.tolist() == codec.decode(b"\x0a\x05")
+
+    def test_decode_array_not_implemented(self):
+        """Test decode_array"""
+        # Arrange
+        pytest.importorskip("numpy")
+        codec = ChannelCodec([channel("FLOAT32", 0, 32)])
+
+        # Act & Assert
+        with pytest.raises(NotImplementedError):
+            codec.decode_array(b"\x00\x00\x00\x00")
@@ -0,0 +1,88 @@
+"""Contains tests for the ap_docu_generator"""
+
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from cpx_io.cpx_system.cpx_ap.ap_docu_generator import (
+    generate_system_information_file,
+    topology_hash,
+)
+
+
+class TestGenerateSystemInformationFile:
+    "Test generate_system_information_file"
+
+    @pytest.fixture(scope="function")
+    def system_fixture(self, tmp_path):
+        """system fixture"""
+        yield Mock(
+            ip_address="192.168.1.1",
+            docu_path=str(tmp_path),
+            apdd_path="apdd_path",
+            modules=[],
+        )
+
+    def test_generate(self, system_fixture, tmp_path):
+        """Test json and markdown are written with the topology hash"""
+        # Act
+        ret = generate_system_information_file(system_fixture)
+
+        # Assert
+        assert ret is True
+        with open(
+            tmp_path / "system_information_192-168-1-1.json", encoding="utf-8"
+        ) as f:
+            data = json.load(f)
+        assert data["Topology Hash"] == topology_hash(system_fixture)
+        assert (tmp_path / "system_information_192-168-1-1.md").is_file()
+
+    def test_up_to_date(self, system_fixture, tmp_path):
+        """Test an unchanged system is not written again"""
+        # Arrange
+        generate_system_information_file(system_fixture)
+        (tmp_path / "system_information_192-168-1-1.md").unlink()
+
+        # Act
+        ret = generate_system_information_file(system_fixture)
+
+        # Assert
+        assert ret is False
+        assert not (tmp_path / "system_information_192-168-1-1.md").exists()
+
+    def test_force(self, system_fixture):
+        """Test force writes an up to date documentation"""
+        # Arrange
+        generate_system_information_file(system_fixture)
+
+        # Act
+        ret = generate_system_information_file(system_fixture, force=True)
+
+        # Assert
+        assert ret is True
+
+    def test_changed(self, system_fixture):
+        """Test a changed system is written again"""
+        # Arrange
+        generate_system_information_file(system_fixture)
+        system_fixture.apdd_path = "other_apdd_path"
+
+        # Act
+        ret = generate_system_information_file(system_fixture)
+
+        # Assert
+        assert ret is True
+
+    def test_corrupt_file(self, system_fixture, tmp_path):
+        """Test an unreadable existing documentation is overwritten"""
+        # Arrange
+        (tmp_path / "system_information_192-168-1-1.json").write_text(
+            "[", encoding="utf-8"
+        )
+
+        # Act
+        ret = generate_system_information_file(system_fixture)
+
+        # Assert
+        assert ret is True
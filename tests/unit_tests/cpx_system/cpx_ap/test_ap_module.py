@@ -7,7 +7,12 @@ import pytest
 from cpx_io.cpx_system.cpx_base import CpxRequestError
 from cpx_io.cpx_system.cpx_ap.cpx_ap import CpxAp
 from cpx_io.cpx_system.cpx_ap.ap_module import ApModule
+from cpx_io.cpx_system.cpx_ap.ap_process_image import (
+    InputProcessImage,
+    OutputProcessImage,
+)
 from cpx_io.cpx_system.cpx_ap.dataclasses.apdd_information import ApddInformation
+from cpx_io.cpx_system.cpx_ap.dataclasses.module_diagnosis import ModuleDiagnosis
 from cpx_io.cpx_system.cpx_ap.dataclasses.system_parameters import SystemParameters
 from cpx_io.cpx_system.cpx_ap.ap_product_categories import ProductCategory
 from cpx_io.cpx_system.cpx_ap.ap_parameter import Parameter
@@ -66,6 +71,72 @@ class TestApModule:
         # Act & Assert
         assert module.is_function_supported(input_value) == expected_output
 
+    @pytest.fixture(scope="function")
+    def lazy_module_fixture(self):
+        """module fixture with tables that are built on first access"""
+        apdd_information = ApddInformation(*["x"] * 10)
+        parameter_factory = Mock(
+            return_value=[Parameter(1, {}, True, 0, "INT", 0, "test parameter", "test")]
+        )
+        diagnosis_factory = Mock(
+            return_value=[ModuleDiagnosis("Description", "0x0101", "Guideline", "Name")]
+        )
+        module = ApModule(
+            apdd_information,
+            ([], [], []),
+            parameter_factory,
+            diagnosis_factory,
+            variant_list=["variant"],
+            variant_switch_parameter=None,
+        )
+        yield module, parameter_factory, diagnosis_factory
+
+    def test_lazy_module_dicts(self, lazy_module_fixture):
+        """Test parameters and diagnosis are built once on the first access"""
+        # Arrange
+        module, parameter_factory, diagnosis_factory = lazy_module_fixture
+
+        # Act
+        parameters = module.module_dicts.parameters
+        diagnosis = module.module_dicts.diagnosis
+
+        # Assert
+        assert list(parameters) == [1]
+        assert list(diagnosis) == [0x0101]
+        assert module.variant_list == ["variant"]
+        parameter_factory.assert_called_once_with()
+        diagnosis_factory.assert_called_once_with()
+
+    def test_lazy_module_dicts_not_built(self, lazy_module_fixture):
+        """Test the tables are not built without access"""
+        # Arrange
+        module, parameter_factory, diagnosis_factory = lazy_module_fixture
+
+        # Act
+        channels = module.channels
+
+        # Assert
+        assert channels.inputs == []
+        parameter_factory.assert_not_called()
+        diagnosis_factory.assert_not_called()
+
+    def test_shared_copy(self, module_fixture):
+        """Test shared_copy shares the definitions but not the per module state"""
+        # Arrange
+        module_fixture.position = 3
+        module_fixture.information = Mock()
+
+        # Act
+        module = module_fixture.shared_copy()
+
+        # Assert
+        assert module is not module_fixture
+        assert module.channels is module_fixture.channels
+        assert module.module_dicts is module_fixture.module_dicts
+        assert module.position is None
+        assert module.information is None
+        assert module._codecs is not module_fixture._codecs
+
     @pytest.mark.parametrize(
         "input_value, expected_output",
         [
@@ -269,6 +340,151 @@ class TestApModule:
         # Assert
         assert channel_values == expected_value[:input_value]
 
+    def test_read_channels_from_process_image(self, module_fixture):
+        """Test read channels served from the input process image"""
+        # Arrange
+        module = module_fixture
+        module.apdd_information.product_category = ProductCategory.DIGITAL.value
+        module.information = CpxAp.ApInformation(input_size=2, output_size=0)
+        module.system_entry_registers.inputs = 5001
+
+        module.channels.inputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=0,
+                data_type="BOOL",
+                description="",
+                direction="in",
+                name="Input %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(4)
+        ]
+        module.input_image = InputProcessImage(5000, 2)
+        module.input_image.update(Mock(return_value=b"\x00\x00\x0a\x00"))
+        module.base = Mock(read_reg_data=Mock())
+
+        # Act
+        channel_values = module.read_channels()
+
+        # Assert
+        assert channel_values == [False, True, False, True]
+        module.base.read_reg_data.assert_not_called()
+
+    def test_read_channels_as_array_bool(self, module_fixture):
+        """Test read channels decoded into a numpy bool array"""
+        # Arrange
+        np = pytest.importorskip("numpy")
+        module = module_fixture
+        module.apdd_information.product_category = ProductCategory.DIGITAL.value
+        module.information = CpxAp.ApInformation(input_size=2, output_size=2)
+        module.system_entry_registers.outputs = 0
+
+        module.channels.inputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=0,
+                data_type="BOOL",
+                description="",
+                direction="in",
+                name="Input %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(4)
+        ]
+        module.channels.outputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=1,
+                data_type="BOOL",
+                description="",
+                direction="out",
+                name="Output %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(2)
+        ]
+        module.base = Mock(read_reg_data=Mock(side_effect=[b"\x0a\x00", b"\x01\x00"]))
+
+        # Act
+        channel_values = module.read_channels(as_array=True)
+
+        # Assert
+        assert channel_values.dtype == np.bool_
+        assert channel_values.tolist() == [False, True, False, True, True, False]
+
+    def test_read_channels_as_array_structured(self, module_fixture):
+        """Test read channels decoded into a numpy structured record"""
+        # Arrange
+        pytest.importorskip("numpy")
+        module = module_fixture
+        module.apdd_information.product_category = ProductCategory.ANALOG.value
+        module.information = CpxAp.ApInformation(input_size=2, output_size=2)
+
+        module.channels.inputs = [
+            Channel(
+                array_size=None,
+                bits=8,
+                bit_offset=i * 8,
+                byte_swap_needed=None,
+                channel_id=1,
+                data_type="INT8",
+                description="",
+                direction="in",
+                name="Input %d",
+                parameter_group_ids=[1],
+                profile_list=[3],
+            )
+            for i in range(2)
+        ]
+        module.channels.outputs = [
+            Channel(
+                array_size=None,
+                bits=16,
+                bit_offset=0,
+                byte_swap_needed=True,
+                channel_id=2,
+                data_type="UINT16",
+                description="",
+                direction="out",
+                name="Output %d",
+                parameter_group_ids=[1],
+                profile_list=[3],
+            )
+        ]
+        module.base = Mock(read_reg_data=Mock(side_effect=[b"\x80\x7f", b"\x34\x12"]))
+
+        # Act
+        channel_values = module.read_channels(as_array=True)
+
+        # Assert
+        assert channel_values.dtype.names == ("channel_0", "channel_1", "channel_2")
+        assert channel_values.tolist() == (-128, 127, 0x1234)
+
+    def test_read_channels_as_array_io_link(self, module_fixture):
+        """Test read channels as array is not supported for IO-Link"""
+        # Arrange
+        module = module_fixture
+        module.apdd_information.product_category = ProductCategory.IO_LINK.value
+        module.channels.inputs = [1]
+        module.base = Mock()
+
+        # Act & Assert
+        with pytest.raises(NotImplementedError):
+            module.read_channels(as_array=True)
+
     @pytest.mark.parametrize("input_value", [4, 8, 16])
     def test_read_channels_outputs(self, module_fixture, input_value):
         """Test read channels"""
@@ -709,6 +925,118 @@ class TestApModule:
         expected_calls = [call(i) for i in range(input_value)]
         module.read_channel.assert_has_calls(expected_calls)
 
+    def test_read_channel_reads_only_its_registers(self, module_fixture):
+        """Test read_channel reads only the registers that contain the channel"""
+        # Arrange
+        module = module_fixture
+        module.apdd_information.product_category = ProductCategory.ANALOG.value
+        module.information = CpxAp.ApInformation(input_size=8, output_size=4)
+        module.system_entry_registers.inputs = 5000
+        module.system_entry_registers.outputs = 0
+        module.channels.inputs = [
+            Channel(
+                array_size=None,
+                bits=16,
+                bit_offset=i * 16,
+                byte_swap_needed=True,
+                channel_id=0,
+                data_type="INT16",
+                description="",
+                direction="in",
+                name="Input %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(4)
+        ]
+        module.channels.outputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=16 + i,
+                byte_swap_needed=None,
+                channel_id=0,
+                data_type="BOOL",
+                description="",
+                direction="out",
+                name="Output %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(4)
+        ]
+        module.base = Mock(read_reg_data=Mock(side_effect=[b"\xfe\xff", b"\x04\x00"]))
+
+        # Act
+        values = [module.read_channel(2), module.read_channel(6)]
+
+        # Assert
+        assert values == [-2, True]
+        assert module.base.read_reg_data.call_args_list == [call(5002, 1), call(1, 1)]
+
+    def test_read_channel_from_process_image(self, module_fixture):
+        """Test read_channel served from the input process image"""
+        # Arrange
+        module = module_fixture
+        module.apdd_information.product_category = ProductCategory.DIGITAL.value
+        module.information = CpxAp.ApInformation(input_size=4, output_size=0)
+        module.system_entry_registers.inputs = 5001
+        module.channels.inputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=0,
+                data_type="BOOL",
+                description="",
+                direction="in",
+                name="Input %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(32)
+        ]
+        module.input_image = InputProcessImage(5000, 3)
+        module.input_image.update(Mock(return_value=b"\x00\x00\x00\x00\x00\x80"))
+        module.base = Mock(read_reg_data=Mock())
+
+        # Act
+        values = [module.read_channel(31), module.read_channel(0)]
+
+        # Assert
+        assert values == [True, False]
+        module.base.read_reg_data.assert_not_called()
+
+    def test_read_channel_out_of_range(self, module_fixture):
+        """Test read_channel with a channel number that is not in the module"""
+        # Arrange
+        module = module_fixture
+        module.apdd_information.product_category = ProductCategory.DIGITAL.value
+        module.base = Mock()
+        module.channels.inputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=0,
+                data_type="BOOL",
+                description="",
+                direction="in",
+                name="Input %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(2)
+        ]
+        module.channels.outputs = []
+
+        # Act & Assert
+        with pytest.raises(IndexError):
+            module.read_channel(2)
+        module.base.read_reg_data.assert_not_called()
+
     @pytest.mark.parametrize(
         "input_value, expected_value",
         [
@@ -1332,6 +1660,83 @@ class TestApModule:
         # Assert
         module.base.write_reg_data.assert_called_with(b"\x02\x00", 0)
 
+    def test_write_channel_bool_output_image(self, module_fixture):
+        """Test write_channel with output shadow image"""
+        # Arrange
+        module = module_fixture
+        module.information = CpxAp.ApInformation(output_size=2)
+        module.system_entry_registers = SystemEntryRegisters(outputs=1)
+        module.apdd_information.product_category = ProductCategory.DIGITAL.value
+        module.base = Mock(
+            read_reg_data=Mock(),
+            write_reg_data=Mock(),
+            io_thread_stopped=Mock(return_value=False),
+        )
+        module.output_byte_size = 2
+        module.output_image = OutputProcessImage(0, 2)
+        module.output_image.write(b"\x01\x00", 1)
+        module.channels.outputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=0,
+                data_type="BOOL",
+                description="",
+                direction="out",
+                name="Output %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(4)
+        ]
+
+        # Act
+        module.write_channel(1, True)
+
+        # Assert
+        module.base.read_reg_data.assert_not_called()
+        module.base.write_reg_data.assert_not_called()
+        module.base.flush_outputs.assert_not_called()
+        assert module.output_image.read(1, 1) == b"\x03\x00"
+        assert module.read_output_channels() == [True, True, False, False]
+
+    def test_write_channel_output_image_io_thread_stopped(self, module_fixture):
+        """Test write_channel flushes the output image if the IOThread stopped"""
+        # Arrange
+        module = module_fixture
+        module.information = CpxAp.ApInformation(output_size=2)
+        module.system_entry_registers = SystemEntryRegisters(outputs=1)
+        module.apdd_information.product_category = ProductCategory.DIGITAL.value
+        module.base = Mock(io_thread_stopped=Mock(return_value=True))
+        module.output_byte_size = 2
+        module.output_image = OutputProcessImage(0, 2)
+        module.output_image.write(b"\x01\x00", 1)
+        module.channels.outputs = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=0,
+                data_type="BOOL",
+                description="",
+                direction="out",
+                name="Output %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(4)
+        ]
+
+        # Act
+        module.write_channel(1, True)
+
+        # Assert
+        module.base.flush_outputs.assert_called_once()
+        assert module.output_image.read(1, 1) == b"\x03\x00"
+
     def test_write_channel_int16(self, module_fixture):
         """Test write_channel"""
         # Arrange
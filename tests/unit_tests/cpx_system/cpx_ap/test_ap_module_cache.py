@@ -0,0 +1,236 @@
+"""Contains tests for ApModuleCache class"""
+
+import json
+import os
+import pytest
+
+from cpx_io.cpx_system.cpx_ap.ap_module import ApModule
+from cpx_io.cpx_system.cpx_ap.ap_module_cache import ApModuleCache
+from cpx_io.cpx_system.cpx_ap.ap_parameter import Parameter, ParameterEnum
+from cpx_io.cpx_system.cpx_ap.builder.apdd_information_builder import Variant
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+from cpx_io.cpx_system.cpx_ap.dataclasses.apdd_information import ApddInformation
+from cpx_io.cpx_system.cpx_ap.dataclasses.module_diagnosis import ModuleDiagnosis
+
+KEY = ("CPX-AP-I-4DI4DO-M12-5P", "1.2.3", 8323)
+
+
+class TestApModuleCache:
+    "Test ApModuleCache"
+
+    @pytest.fixture(scope="function")
+    def module_fixture(self):
+        """module fixture"""
+        apdd_information = ApddInformation(
+            "Description",
+            "Name",
+            "Module Type",
+            "Configurator Code",
+            "Part Number",
+            "Module Class",
+            "Module Code",
+            "Order Text",
+            "Product Category",
+            "Product Family",
+        )
+        channels = [
+            Channel(
+                array_size=None,
+                bits=1,
+                bit_offset=i,
+                byte_swap_needed=None,
+                channel_id=i,
+                data_type="BOOL",
+                description="",
+                direction="in",
+                name="Input %d",
+                parameter_group_ids=None,
+                profile_list=[3],
+            )
+            for i in range(4)
+        ]
+        parameters = [Parameter(0, {}, True, 0, "INT", 0, "test parameter", "test")]
+
+        yield ApModule(
+            apdd_information,
+            (channels, [], []),
+            parameters,
+            [],
+            variant_list=[],
+            variant_switch_parameter=None,
+        )
+
+    @pytest.fixture(scope="function")
+    def apdd_file(self, tmp_path):
+        """apdd file fixture"""
+        path = tmp_path / "CPX-AP-I-4DI4DO-M12-5P_v1-2-3.json"
+        path.write_text("{}", encoding="utf-8")
+        yield str(path)
+
+    def test_get_empty(self, tmp_path, apdd_file):
+        """Test get without entry"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+
+        # Act
+        module = cache.get(KEY, apdd_file)
+
+        # Assert
+        assert module is None
+        assert len(cache) == 0
+
+    def test_put_get(self, tmp_path, apdd_file, module_fixture):
+        """Test get returns a new copy of the stored module"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+        cache.put(KEY, apdd_file, module_fixture)
+
+        # Act
+        first = cache.get(KEY, apdd_file)
+        second = cache.get(KEY, apdd_file)
+
+        # Assert
+        assert isinstance(first, ApModule)
+        assert first is not second
+        assert first.channels.inputs[0] is not second.channels.inputs[0]
+        assert first.channels.inputs == module_fixture.channels.inputs
+        assert first.module_dicts.parameters[0].name == "test"
+
+    def test_save_load(self, tmp_path, apdd_file, module_fixture):
+        """Test the cache is persisted in the apdd path"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+        cache.put(KEY, apdd_file, module_fixture)
+
+        # Act
+        cache.save()
+        loaded = ApModuleCache(str(tmp_path))
+
+        # Assert
+        assert os.path.isfile(tmp_path / ApModuleCache.FILE_NAME)
+        assert loaded.get(KEY, apdd_file).name == "Name"
+
+    def test_apdd_changed(self, tmp_path, apdd_file, module_fixture):
+        """Test an entry is invalid after the apdd changed"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+        cache.put(KEY, apdd_file, module_fixture)
+
+        # Act
+        with open(apdd_file, "w", encoding="utf-8") as f:
+            f.write('{"changed": true}')
+
+        # Assert
+        assert cache.get(KEY, apdd_file) is None
+
+    def test_put_without_apdd_file(self, tmp_path, module_fixture):
+        """Test nothing is stored without an apdd file"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+
+        # Act
+        cache.put(KEY, str(tmp_path / "missing.json"), module_fixture)
+
+        # Assert
+        assert len(cache) == 0
+
+    def test_unreadable_file(self, tmp_path, apdd_file):
+        """Test a corrupt cache file is ignored"""
+        # Arrange
+        (tmp_path / ApModuleCache.FILE_NAME).write_bytes(b"corrupt")
+
+        # Act
+        cache = ApModuleCache(str(tmp_path))
+
+        # Assert
+        assert cache.get(KEY, apdd_file) is None
+
+    def test_outdated_format(self, tmp_path, apdd_file, module_fixture):
+        """Test a cache file of another library version is discarded"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+        cache.put(KEY, apdd_file, module_fixture)
+        cache._header = {"format": 0, "version": None}
+        cache.save()
+
+        # Act
+        loaded = ApModuleCache(str(tmp_path))
+
+        # Assert
+        assert len(loaded) == 0
+
+    def test_definitions_round_trip(self, tmp_path, apdd_file, module_fixture):
+        """Test all definitions are restored from the json file"""
+        # Arrange
+        enum = ParameterEnum(1, 2, "UINT8", {"Off": 0, "On": 1}, None, "Switch")
+        switch = Parameter(
+            20090, {"FirstIndex": 0}, True, None, "UINT8", 0, "", "Variant", "", enum
+        )
+        inout = Channel(None, 8, 8, None, 0, "UINT8", "", "inout", "IO %d", [1], [3])
+        module = ApModule(
+            module_fixture.apdd_information,
+            (module_fixture.channels.inputs, [], [inout]),
+            [switch],
+            [ModuleDiagnosis("Description", "0x0101", "Guideline", "Name")],
+            [Variant([1], "", "Variant", [2], [3], {"ModuleCode": 8323})],
+            switch,
+        )
+        cache = ApModuleCache(str(tmp_path))
+        cache.put(KEY, apdd_file, module)
+        cache.save()
+
+        # Act
+        loaded = ApModuleCache(str(tmp_path)).get(KEY, apdd_file)
+
+        # Assert
+        assert loaded.apdd_information == module.apdd_information
+        assert loaded.channels == module.channels
+        assert loaded.module_dicts == module.module_dicts
+        assert loaded.variant_list == module.variant_list
+        assert loaded.variant_switch_parameter == switch
+
+    def test_file_contains_plain_data(self, tmp_path, apdd_file, module_fixture):
+        """Test the cache file is json with the field values of the definitions"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+        cache.put(KEY, apdd_file, module_fixture)
+
+        # Act
+        cache.save()
+
+        # Assert
+        with open(tmp_path / ApModuleCache.FILE_NAME, "r", encoding="utf-8") as f:
+            content = json.load(f)
+        entry = content["modules"][0]
+        assert entry["key"] == list(KEY)
+        assert entry["module"]["parameters"][0]["name"] == "test"
+
+    def test_unexpected_entry(self, tmp_path, apdd_file, module_fixture):
+        """Test an entry with unexpected fields is dropped"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+        cache.put(KEY, apdd_file, module_fixture)
+        cache.save()
+        path = tmp_path / ApModuleCache.FILE_NAME
+        content = json.loads(path.read_text(encoding="utf-8"))
+        content["modules"][0]["module"]["apdd_information"]["__class__"] = "os.system"
+        path.write_text(json.dumps(content), encoding="utf-8")
+        loaded = ApModuleCache(str(tmp_path))
+
+        # Act
+        module = loaded.get(KEY, apdd_file)
+
+        # Assert
+        assert module is None
+        assert len(loaded) == 0
+
+    def test_save_unchanged(self, tmp_path):
+        """Test save does not write an unchanged cache"""
+        # Arrange
+        cache = ApModuleCache(str(tmp_path))
+
+        # Act
+        cache.save()
+
+        # Assert
+        assert not os.path.exists(tmp_path / ApModuleCache.FILE_NAME)
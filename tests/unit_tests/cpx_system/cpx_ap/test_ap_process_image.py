@@ -0,0 +1,212 @@
+"""Contains tests for InputProcessImage class"""
+
+from unittest.mock import Mock, call
+import pytest
+
+from cpx_io.cpx_system.cpx_ap.ap_process_image import (
+    InputProcessImage,
+    OutputProcessImage,
+    ProcessImageSnapshot,
+)
+
+
+class TestInputProcessImage:
+    "Test InputProcessImage"
+
+    def test_constructor(self):
+        """Test constructor"""
+        # Arrange
+
+        # Act
+        image = InputProcessImage(5000, 10)
+
+        # Assert
+        assert image.start_register == 5000
+        assert image.length == 10
+        assert image.snapshot is None
+
+    def test_update_single_read(self):
+        """Test update with a small input area"""
+        # Arrange
+        image = InputProcessImage(5000, 3)
+        read_reg_data = Mock(return_value=b"\x01\x02\x03\x04\x05\x06")
+
+        # Act
+        ret = image.update(read_reg_data)
+
+        # Assert
+        read_reg_data.assert_called_once_with(5000, 3)
+        assert isinstance(ret, ProcessImageSnapshot)
+        assert ret.data == b"\x01\x02\x03\x04\x05\x06"
+        assert ret.cycle == 1
+        assert image.snapshot is ret
+
+    def test_update_chunked_read(self):
+        """Test update with an input area that exceeds one modbus request"""
+        # Arrange
+        image = InputProcessImage(5000, 300)
+        read_reg_data = Mock(side_effect=lambda register, length: bytes(length * 2))
+
+        # Act
+        ret = image.update(read_reg_data)
+
+        # Assert
+        read_reg_data.assert_has_calls(
+            [call(5000, 125), call(5125, 125), call(5250, 50)]
+        )
+        assert len(ret.data) == 600
+
+    def test_update_increments_cycle(self):
+        """Test cycle counter"""
+        # Arrange
+        image = InputProcessImage(5000, 1)
+        read_reg_data = Mock(return_value=b"\x00\x00")
+
+        # Act
+        image.update(read_reg_data)
+        ret = image.update(read_reg_data)
+
+        # Assert
+        assert ret.cycle == 2
+
+    def test_update_error_invalidates_snapshot(self):
+        """Test that a failing read does not leave stale data"""
+        # Arrange
+        image = InputProcessImage(5000, 1)
+        image.update(Mock(return_value=b"\x00\x00"))
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            image.update(Mock(side_effect=ConnectionAbortedError))
+        assert image.snapshot is None
+        assert image.read(5000, 1) is None
+
+    @pytest.mark.parametrize(
+        "register, length, expected_output",
+        [
+            (5000, 1, b"\x01\x02"),
+            (5001, 2, b"\x03\x04\x05\x06"),
+            (4999, 1, None),
+            (5002, 2, None),
+        ],
+    )
+    def test_read(self, register, length, expected_output):
+        """Test read from snapshot"""
+        # Arrange
+        image = InputProcessImage(5000, 3)
+        image.update(Mock(return_value=b"\x01\x02\x03\x04\x05\x06"))
+
+        # Act
+        ret = image.read(register, length)
+
+        # Assert
+        assert ret == expected_output
+
+    def test_read_without_snapshot(self):
+        """Test read before first update"""
+        # Arrange
+        image = InputProcessImage(5000, 3)
+
+        # Act
+        ret = image.read(5000, 1)
+
+        # Assert
+        assert ret is None
+
+
+class TestOutputProcessImage:
+    "Test OutputProcessImage"
+
+    def test_load(self):
+        """Test load of the current outputs"""
+        # Arrange
+        image = OutputProcessImage(0, 2)
+        read_reg_data = Mock(return_value=b"\x01\x02\x03\x04")
+
+        # Act
+        image.load(read_reg_data)
+
+        # Assert
+        read_reg_data.assert_called_once_with(0, 2)
+        assert image.read(0, 2) == b"\x01\x02\x03\x04"
+        assert not image.dirty
+
+    def test_write_marks_dirty_without_device_access(self):
+        """Test write only updates the shadow"""
+        # Arrange
+        image = OutputProcessImage(0, 4)
+
+        # Act
+        image.write(b"\xff", 1)
+
+        # Assert
+        assert image.dirty
+        assert image.read(1, 1) == b"\xff\x00"
+
+    def test_write_out_of_range(self):
+        """Test write outside of the output area"""
+        # Arrange
+        image = OutputProcessImage(0, 2)
+
+        # Act & Assert
+        with pytest.raises(IndexError):
+            image.write(b"\x00\x00", 2)
+
+    def test_flush_coalesces_writes(self):
+        """Test that writes of one cycle are flushed with one request"""
+        # Arrange
+        image = OutputProcessImage(0, 10)
+        write_reg_data = Mock()
+        image.write(b"\x01\x00", 1)
+        image.write(b"\x02\x00", 2)
+        image.write(b"\x03\x00", 5)
+
+        # Act
+        ret = image.flush(write_reg_data)
+
+        # Assert
+        assert ret == 1
+        write_reg_data.assert_called_once_with(
+            b"\x01\x00\x02\x00\x00\x00\x00\x00\x03\x00", 1
+        )
+        assert not image.dirty
+
+    def test_flush_splits_into_spec_compliant_requests(self):
+        """Test that a flush never exceeds the maximum write length"""
+        # Arrange
+        image = OutputProcessImage(0, 300)
+        write_reg_data = Mock()
+        image.write(bytes(600), 0)
+
+        # Act
+        ret = image.flush(write_reg_data)
+
+        # Assert
+        assert ret == 3
+        write_reg_data.assert_has_calls(
+            [call(bytes(246), 0), call(bytes(246), 123), call(bytes(108), 246)]
+        )
+
+    def test_flush_nothing_dirty(self):
+        """Test flush without pending writes"""
+        # Arrange
+        image = OutputProcessImage(0, 2)
+        write_reg_data = Mock()
+
+        # Act
+        ret = image.flush(write_reg_data)
+
+        # Assert
+        assert ret == 0
+        write_reg_data.assert_not_called()
+
+    def test_flush_error_keeps_registers_dirty(self):
+        """Test that failed writes are retried with the next flush"""
+        # Arrange
+        image = OutputProcessImage(0, 2)
+        image.write(b"\x01\x00", 0)
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            image.flush(Mock(side_effect=ConnectionAbortedError))
+        assert image.dirty
@@ -0,0 +1,84 @@
+"""Contains tests for ApTopologySnapshot class"""
+
+from cpx_io.cpx_system.cpx_ap.ap_topology import ApTopologySnapshot
+from cpx_io.cpx_system.cpx_ap.cpx_ap import CpxAp
+
+
+class TestApTopologySnapshot:
+    "Test ApTopologySnapshot"
+
+    def test_path(self, tmp_path):
+        """Test every ip address has its own file"""
+        # Arrange
+        snapshot = ApTopologySnapshot(str(tmp_path), "192.168.1.1")
+
+        # Assert
+        assert snapshot.path == str(tmp_path / "topology_192.168.1.1.json")
+
+    def test_load_missing(self, tmp_path):
+        """Test load without a stored topology"""
+        # Arrange
+        snapshot = ApTopologySnapshot(str(tmp_path), "192.168.1.1")
+
+        # Act
+        ret = snapshot.load(1, CpxAp.ApInformation)
+
+        # Assert
+        assert ret is None
+
+    def test_save_load(self, tmp_path):
+        """Test the module information is restored"""
+        # Arrange
+        infos = [
+            CpxAp.ApInformation(
+                module_code=8323,
+                fw_version="1.2.3",
+                serial_number="0x1234",
+                order_text="CPX-AP-I-EP-M12",
+            ),
+            CpxAp.ApInformation(module_code=8200, order_text="CPX-AP-I-4DI-M8-3P"),
+        ]
+        ApTopologySnapshot(str(tmp_path), "192.168.1.1").save(infos)
+
+        # Act
+        ret = ApTopologySnapshot(str(tmp_path), "192.168.1.1").load(
+            2, CpxAp.ApInformation
+        )
+
+        # Assert
+        assert ret == infos
+
+    def test_load_other_module_count(self, tmp_path):
+        """Test a topology with another module count is not used"""
+        # Arrange
+        snapshot = ApTopologySnapshot(str(tmp_path), "192.168.1.1")
+        snapshot.save([CpxAp.ApInformation()])
+
+        # Act
+        ret = snapshot.load(2, CpxAp.ApInformation)
+
+        # Assert
+        assert ret is None
+
+    def test_load_corrupt(self, tmp_path):
+        """Test an unreadable topology is ignored"""
+        # Arrange
+        snapshot = ApTopologySnapshot(str(tmp_path), "192.168.1.1")
+        (tmp_path / "topology_192.168.1.1.json").write_text("{", encoding="utf-8")
+
+        # Act
+        ret = snapshot.load(1, CpxAp.ApInformation)
+
+        # Assert
+        assert ret is None
+
+    def test_save_without_path(self, tmp_path):
+        """Test save does not raise if the path does not exist"""
+        # Arrange
+        snapshot = ApTopologySnapshot(str(tmp_path / "missing"), "192.168.1.1")
+
+        # Act
+        snapshot.save([CpxAp.ApInformation()])
+
+        # Assert
+        assert snapshot.load(1, CpxAp.ApInformation) is None
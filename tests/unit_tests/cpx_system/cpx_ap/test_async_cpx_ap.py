@@ -0,0 +1,425 @@
+"""Contains tests for AsyncCpxAp class"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, call, patch
+import pytest
+
+from cpx_io.cpx_system.cpx_base import CpxInitError
+from cpx_io.cpx_system.cpx_ap.async_cpx_ap import AsyncCpxAp
+from cpx_io.cpx_system.cpx_ap.ap_module import ApModule
+from cpx_io.cpx_system.cpx_ap.ap_parameter import Parameter
+from cpx_io.cpx_system.cpx_ap.ap_product_categories import ProductCategory
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+from cpx_io.cpx_system.cpx_ap.dataclasses.apdd_information import ApddInformation
+
+
+def bool_channel(bit_offset, direction):
+    """Creates a digital channel"""
+    return Channel(
+        array_size=None,
+        bits=1,
+        bit_offset=bit_offset,
+        byte_swap_needed=None,
+        channel_id=0,
+        data_type="BOOL",
+        description="",
+        direction=direction,
+        name="Channel %d",
+        parameter_group_ids=None,
+        profile_list=[3],
+    )
+
+
+class TestAsyncCpxAp:
+    "Test AsyncCpxAp"
+
+    @pytest.fixture(scope="function")
+    def module_fixture(self):
+        """digital 4 input / 4 output module fixture"""
+        apdd_information = ApddInformation(
+            "Description",
+            "Name",
+            "Module Type",
+            "Configurator Code",
+            "Part Number",
+            "Module Class",
+            "Module Code",
+            "Order Text",
+            ProductCategory.DIGITAL.value,
+            "Product Family",
+        )
+        channels = (
+            [bool_channel(i, "in") for i in range(4)],
+            [bool_channel(i, "out") for i in range(4)],
+            [],
+        )
+        yield ApModule(
+            apdd_information,
+            channels,
+            [],
+            [],
+            variant_list=[],
+            variant_switch_parameter=None,
+        )
+
+    @pytest.fixture(scope="function")
+    def ap_fixture(self, module_fixture):
+        """AsyncCpxAp fixture with one module and mocked register access"""
+        cpxap = AsyncCpxAp()
+        cpxap.read_reg_data = AsyncMock()
+        cpxap.write_reg_data = AsyncMock()
+        asyncio.run(
+            cpxap._add_module(
+                module_fixture, AsyncCpxAp.ApInformation(input_size=2, output_size=2)
+            )
+        )
+        yield cpxap
+
+    def test_constructor_does_not_connect(self):
+        "Test that the constructor does not access the system"
+        # Arrange & Act
+        cpxap = AsyncCpxAp(ip_address="192.168.1.1", timeout=0.5)
+
+        # Assert
+        assert cpxap.client is None
+        assert cpxap.timeout == 0.5
+        assert not cpxap.modules
+
+    def test_add_module(self, ap_fixture, module_fixture):
+        "Test the register layout of an added module"
+        # Arrange & Act in fixture
+
+        # Assert
+        assert ap_fixture.modules == [module_fixture]
+        assert module_fixture.base is ap_fixture
+        assert module_fixture.position == 0
+        assert module_fixture.system_entry_registers.inputs == 5000
+        assert module_fixture.system_entry_registers.outputs == 0
+        assert module_fixture.system_entry_registers.diagnosis == 11006
+        assert ap_fixture.next_input_register == 5001
+        assert ap_fixture.next_output_register == 1
+        assert getattr(ap_fixture, module_fixture.name) is module_fixture
+        ap_fixture.read_reg_data.assert_not_awaited()
+
+    def test_read_module_count(self):
+        "Test read_module_count"
+        # Arrange
+        cpxap = AsyncCpxAp()
+        cpxap.read_reg_data = AsyncMock(return_value=b"\x03\x00")
+
+        # Act
+        count = asyncio.run(cpxap.read_module_count())
+
+        # Assert
+        assert count == 3
+        cpxap.read_reg_data.assert_awaited_once_with(12000, 1)
+
+    def test_set_timeout(self):
+        "Test set_timeout writes the timeout register"
+        # Arrange
+        cpxap = AsyncCpxAp()
+        cpxap.read_reg_data = AsyncMock(return_value=b"\xf4\x01\x00\x00")
+        cpxap.write_reg_data = AsyncMock()
+
+        # Act
+        asyncio.run(cpxap.set_timeout(500))
+
+        # Assert
+        cpxap.write_reg_data.assert_awaited_once_with(b"\xf4\x01\x00\x00", 14000)
+
+    @patch("cpx_io.cpx_system.cpx_ap.async_cpx_ap.download_apdds", spec=True)
+    def test_download_apdds_shares_session_download(self, mock_download):
+        "Test the APDDs are downloaded with the pooled download of CpxAp"
+        # Arrange
+        cpxap = AsyncCpxAp(ip_address="192.168.1.1", apdd_path="apdds")
+        mock_download.return_value = {"a.json": {}}
+        infos = [AsyncCpxAp.ApInformation()]
+
+        # Act
+        apdds = asyncio.run(cpxap._download_apdds({"a.json": 0}, infos))
+
+        # Assert
+        assert apdds == {"a.json": {}}
+        mock_download.assert_called_once_with(
+            "192.168.1.1", "apdds", {"a.json": 0}, infos, workers=8
+        )
+
+    def test_read_apdd_information_single_request(self):
+        "Test read_apdd_information reads the whole block at once"
+        # Arrange
+        cpxap = AsyncCpxAp()
+        data = bytearray(74)
+        data[0:4] = (8323).to_bytes(4, "little")  # module code
+        data[8:10] = (2).to_bytes(2, "little")  # input size
+        data[18:24] = b"\x01\x00\x02\x00\x03\x00"  # fw version
+        data[40:48] = b"CPX-AP-A"  # order text
+        cpxap.read_reg_data = AsyncMock(return_value=bytes(data))
+
+        # Act
+        info = asyncio.run(cpxap.read_apdd_information(2))
+
+        # Assert
+        cpxap.read_reg_data.assert_awaited_once_with(15074, 37)
+        assert info.module_code == 8323
+        assert info.input_size == 2
+        assert info.fw_version == "1.2.3"
+        assert info.order_text == "CPX-AP-A"
+
+    def test_read_all_apdd_information(self):
+        "Test read_all_apdd_information reads the blocks of all modules together"
+        # Arrange
+        cpxap = AsyncCpxAp()
+        cpxap.read_module_count = AsyncMock(return_value=2)
+        cpxap.read_reg_data = AsyncMock(
+            return_value=(1).to_bytes(4, "little")
+            + bytes(70)
+            + (2).to_bytes(4, "little")
+            + bytes(70)
+        )
+
+        # Act
+        infos = asyncio.run(cpxap.read_all_apdd_information())
+
+        # Assert
+        cpxap.read_reg_data.assert_awaited_once_with(15000, 74)
+        assert [info.module_code for info in infos] == [1, 2]
+
+    def test_startup(self, module_fixture, tmp_path):
+        "Test startup builds the modules from the apdds"
+        # Arrange
+        cpxap = AsyncCpxAp(apdd_path=str(tmp_path))
+        cpxap.connect = AsyncMock()
+        cpxap.connected = Mock(return_value=True)
+        cpxap.read_all_apdd_information = AsyncMock(
+            return_value=[
+                AsyncCpxAp.ApInformation(
+                    order_text="CPX-AP-I-EP-M12",
+                    fw_version="1.0.0",
+                    input_size=2,
+                    output_size=2,
+                )
+            ]
+        )
+        cpxap._download_apdds = AsyncMock(
+            side_effect=lambda missing, infos: {
+                name: {"apdd": True} for name in missing
+            }
+        )
+
+        # Act
+        with (
+            patch(
+                "cpx_io.cpx_system.cpx_ap.cpx_ap.build_ap_module",
+                return_value=module_fixture,
+            ) as mock_build,
+            patch("cpx_io.cpx_system.cpx_ap.cpx_ap.os.listdir", return_value=[]),
+        ):
+            asyncio.run(cpxap.startup())
+
+        # Assert
+        mock_build.assert_called_once_with({"apdd": True}, None)
+        assert cpxap.modules == [module_fixture]
+        assert cpxap.gateway_module_id == 0
+
+    def test_startup_shares_definitions(self, module_fixture, tmp_path):
+        "Test startup builds identical modules once and shares the definitions"
+        # Arrange
+        cpxap = AsyncCpxAp(apdd_path=str(tmp_path))
+        cpxap.connect = AsyncMock()
+        cpxap.connected = Mock(return_value=True)
+        cpxap.read_all_apdd_information = AsyncMock(
+            return_value=[
+                AsyncCpxAp.ApInformation(
+                    order_text="CPX-AP-I-EP-M12",
+                    fw_version="1.0.0",
+                    input_size=2,
+                    output_size=2,
+                )
+            ]
+            * 3
+        )
+        cpxap._download_apdds = AsyncMock(
+            side_effect=lambda missing, infos: {
+                name: {"apdd": True} for name in missing
+            }
+        )
+
+        # Act
+        with (
+            patch(
+                "cpx_io.cpx_system.cpx_ap.cpx_ap.build_ap_module",
+                return_value=module_fixture,
+            ) as mock_build,
+            patch("cpx_io.cpx_system.cpx_ap.cpx_ap.os.listdir", return_value=[]),
+        ):
+            asyncio.run(cpxap.startup())
+
+        # Assert
+        mock_build.assert_called_once()
+        cpxap._download_apdds.assert_awaited_once()
+        assert len(cpxap._download_apdds.call_args.args[0]) == 1
+        assert cpxap.modules[0] is module_fixture
+        assert [m.position for m in cpxap.modules] == [0, 1, 2]
+        assert all(m.channels is module_fixture.channels for m in cpxap.modules)
+        assert cpxap.modules[2].system_entry_registers.inputs == 5002
+
+    def test_startup_without_gateway(self, module_fixture, tmp_path):
+        "Test startup raises if there is no gateway"
+        # Arrange
+        cpxap = AsyncCpxAp(apdd_path=str(tmp_path))
+        cpxap.connect = AsyncMock()
+        cpxap.connected = Mock(return_value=True)
+        cpxap.read_all_apdd_information = AsyncMock(
+            return_value=[
+                AsyncCpxAp.ApInformation(
+                    order_text="CPX-AP-I-4DI",
+                    fw_version="1.0.0",
+                    input_size=2,
+                    output_size=2,
+                )
+            ]
+        )
+        cpxap._download_apdds = AsyncMock(
+            side_effect=lambda missing, infos: {name: {} for name in missing}
+        )
+
+        # Act & Assert
+        with (
+            patch(
+                "cpx_io.cpx_system.cpx_ap.cpx_ap.build_ap_module",
+                return_value=module_fixture,
+            ),
+            patch("cpx_io.cpx_system.cpx_ap.cpx_ap.os.listdir", return_value=[]),
+        ):
+            with pytest.raises(CpxInitError):
+                asyncio.run(cpxap.startup())
+
+    def test_read_channels(self, ap_fixture):
+        "Test read_channels returns inputs and outputs"
+        # Arrange
+        ap_fixture.read_reg_data.side_effect = [b"\x05\x00", b"\x0a\x00"]
+
+        # Act
+        values = asyncio.run(ap_fixture.read_channels(0))
+
+        # Assert
+        assert values == [True, False, True, False, False, True, False, True]
+        ap_fixture.read_reg_data.assert_has_awaits([call(5000, 1), call(0, 1)])
+
+    def test_read_channel(self, ap_fixture):
+        "Test read_channel reads only the register that contains the channel"
+        # Arrange
+        ap_fixture.read_reg_data.side_effect = [b"\x05\x00", b"\x02\x00"]
+
+        # Act
+        values = [asyncio.run(ap_fixture.read_channel(0, i)) for i in (2, 5)]
+
+        # Assert
+        assert values == [True, True]
+        assert ap_fixture.read_reg_data.await_args_list == [call(5000, 1), call(0, 1)]
+
+    def test_read_channels_wrong_position(self, ap_fixture):
+        "Test read_channels with a position that is not in the system"
+        # Act & Assert
+        with pytest.raises(IndexError):
+            asyncio.run(ap_fixture.read_channels(3))
+
+    def test_write_channels(self, ap_fixture):
+        "Test write_channels"
+        # Act
+        asyncio.run(ap_fixture.write_channels(0, [True, False, True, True]))
+
+        # Assert
+        ap_fixture.write_reg_data.assert_awaited_once_with(bytearray(b"\x0d\x00"), 0)
+
+    def test_write_channels_wrong_length(self, ap_fixture):
+        "Test write_channels with the wrong number of values"
+        # Act & Assert
+        with pytest.raises(ValueError):
+            asyncio.run(ap_fixture.write_channels(0, [True]))
+
+    def test_write_channel(self, ap_fixture):
+        "Test write_channel keeps the other outputs"
+        # Arrange
+        ap_fixture.read_reg_data.return_value = b"\x01\x00"
+
+        # Act
+        asyncio.run(ap_fixture.write_channel(0, 3, True))
+
+        # Assert
+        ap_fixture.read_reg_data.assert_awaited_once_with(0, 1)
+        ap_fixture.write_reg_data.assert_awaited_once_with(b"\x09\x00", 0)
+
+    def test_read_parameter(self, ap_fixture):
+        "Test read_parameter handshake"
+        # Arrange
+        parameter = Parameter(
+            parameter_id=20022,
+            parameter_instances={},
+            is_writable=False,
+            array_size=None,
+            data_type="UINT16",
+            default_value=0,
+            description="",
+            name="",
+        )
+        ap_fixture.read_reg_data.side_effect = [
+            b"\x03\x00",  # busy
+            b"\x10\x00",  # completed
+            b"\x02\x00",  # length
+            b"\x2a\x00",  # data
+        ]
+
+        # Act
+        value = asyncio.run(ap_fixture.read_parameter(0, parameter, 1))
+
+        # Assert
+        assert value == 42
+        ap_fixture.write_reg_data.assert_awaited_once_with(
+            b"\x01\x00\x36\x4e\x01\x00\x01\x00", 10000
+        )
+        assert ap_fixture.read_reg_data.await_args_list[-1] == call(10010, 1)
+
+    def test_write_parameter(self, ap_fixture):
+        "Test write_parameter handshake"
+        # Arrange
+        parameter = Parameter(
+            parameter_id=20022,
+            parameter_instances={},
+            is_writable=True,
+            array_size=None,
+            data_type="UINT16",
+            default_value=0,
+            description="",
+            name="",
+        )
+        ap_fixture.read_reg_data.return_value = b"\x10\x00"
+
+        # Act
+        asyncio.run(ap_fixture.write_parameter(0, parameter, 42, 1))
+
+        # Assert
+        ap_fixture.write_reg_data.assert_has_awaits(
+            [
+                call(b"\x01\x00\x36\x4e\x01\x00", 10000),
+                call(b"\x02\x00", 10004),
+                call(b"\x2a\x00", 10010),
+                call(b"\x02\x00", 10003),
+            ]
+        )
+
+    def test_concurrent_systems(self, ap_fixture):
+        "Test that several systems can be read from one event loop"
+        # Arrange
+        ap_fixture.read_reg_data.side_effect = [b"\x01\x00"] * 3
+
+        async def run():
+            return await asyncio.gather(
+                *(ap_fixture.read_channel(0, 0) for _ in range(3))
+            )
+
+        # Act
+        values = asyncio.run(run())
+
+        # Assert
+        assert values == [True, True, True]
@@ -169,6 +169,8 @@ class TestBuildApModule:
         ap_module = build_ap_module(None, None)
 
         # Assert
+        mock_build_parameter_list.assert_not_called()
+        mock_build_diagnosis_list.assert_not_called()
         assert isinstance(ap_module, ApModule)
 
         assert ap_module.apdd_information == apdd_information
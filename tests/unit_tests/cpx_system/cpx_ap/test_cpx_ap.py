@@ -1,13 +1,20 @@
 """Contains tests for CpxAp class"""
 
+import threading
+import time
 from unittest.mock import Mock, call, patch
 import pytest
 
 from pymodbus.client import ModbusTcpClient
 from cpx_io.cpx_system.cpx_ap.cpx_ap import CpxAp
+from cpx_io.cpx_system.startup_trace import StartupTrace
+from cpx_io.cpx_system.io_scheduler import ACYCLIC, CYCLIC
 from cpx_io.cpx_system.cpx_ap.ap_module import ApModule
 from cpx_io.cpx_system.cpx_ap.dataclasses.apdd_information import ApddInformation
 from cpx_io.cpx_system.cpx_ap.ap_parameter import Parameter
+from cpx_io.cpx_system.cpx_ap.ap_product_categories import ProductCategory
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+from cpx_io.cpx_system.change_detector import FALLING, RISING
 
 
 class TestCpxAp:
@@ -31,8 +38,8 @@ class TestCpxAp:
         spec=CpxAp.read_module_count,
     )
     @patch(
-        "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_apdd_information",
-        spec=CpxAp.read_apdd_information,
+        "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_all_apdd_information",
+        spec=CpxAp.read_all_apdd_information,
     )
     @patch(
         "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp._grab_apdd",
@@ -68,7 +75,7 @@ class TestCpxAp:
         mock_build_ap_module,
         mock_add_module,
         mock__grab_apdd,
-        mock_read_apdd_information,
+        mock_read_all_apdd_information,
         mock_read_module_count,
         mock_create_docu_path,
         mock_create_apdd_path,
@@ -81,7 +88,7 @@ class TestCpxAp:
             mock_create_apdd_path,
             mock_create_docu_path,
             mock_read_module_count,
-            mock_read_apdd_information,
+            mock_read_all_apdd_information,
             mock__grab_apdd,
             mock_build_ap_module,
             mock_add_module,
@@ -96,9 +103,9 @@ class TestCpxAp:
         mock_create_apdd_path.return_value = "apdd_path"
         mock_create_docu_path.return_value = "docu_path"
         mock_read_module_count.return_value = 1
-        mock_read_apdd_information.return_value = CpxAp.ApInformation(
-            order_text="CPX-AP-I-EP-M12", fw_version="0.0.1"
-        )
+        mock_read_all_apdd_information.return_value = [
+            CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", fw_version="0.0.1")
+        ]
         mock__grab_apdd.return_value = {}
         mock_add_module.return_value = ["Dummy"]
         mock_build_ap_module.return_value = None
@@ -123,8 +130,10 @@ class TestCpxAp:
         assert cpx_ap.docu_path == "docu_path"
 
         mock_add_module.assert_called_once()
-        mock_generate_system_information_file.assert_called_once()
+        cpx_ap.docu_thread.join()
+        mock_generate_system_information_file.assert_called_once_with(cpx_ap)
 
+    @patch("cpx_io.cpx_system.cpx_ap.cpx_ap.ApTopologySnapshot", spec=True)
     @patch("pymodbus.client.ModbusTcpClient.__new__", spec=True)
     @patch(
         "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.set_timeout",
@@ -135,8 +144,8 @@ class TestCpxAp:
         spec=CpxAp.read_module_count,
     )
     @patch(
-        "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_apdd_information",
-        spec=CpxAp.read_apdd_information,
+        "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_all_apdd_information",
+        spec=CpxAp.read_all_apdd_information,
     )
     @patch(
         "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp._grab_apdd",
@@ -170,16 +179,17 @@ class TestCpxAp:
         mock_build_ap_module,
         mock_add_module,
         mock__grab_apdd,
-        mock_read_apdd_information,
+        mock_read_all_apdd_information,
         mock_read_module_count,
         mock_set_timeout,
         mock_modbus_tcp_client,
+        mock_topology_snapshot,
     ):
         """Test constructor with timeout"""
         # Debugging: Check if mocks are callable
         for mock in [
             mock_read_module_count,
-            mock_read_apdd_information,
+            mock_read_all_apdd_information,
             mock__grab_apdd,
             mock_build_ap_module,
             mock_add_module,
@@ -190,12 +200,13 @@ class TestCpxAp:
             print(f"{mock} is callable: {callable(mock)}")
         # Arrange
         mock_read_module_count.return_value = 1
-        mock_read_apdd_information.return_value = CpxAp.ApInformation(
-            order_text="CPX-AP-I-EP-M12", fw_version="0.0.1"
-        )
+        mock_read_all_apdd_information.return_value = [
+            CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", fw_version="0.0.1")
+        ]
         mock_set_timeout.return_value = None
         mock_connected.return_value = True
         mock_modbus_tcp_client.return_value = Mock()
+        mock_topology_snapshot.return_value.load.return_value = None
 
         # Act
         cpx_ap = CpxAp(ip_address="0.0.0.0", timeout=0.1, cycle_time=None)
@@ -221,8 +232,8 @@ class TestCpxAp:
         spec=CpxAp.read_module_count,
     )
     @patch(
-        "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_apdd_information",
-        spec=CpxAp.read_apdd_information,
+        "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_all_apdd_information",
+        spec=CpxAp.read_all_apdd_information,
     )
     @patch(
         "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp._grab_apdd",
@@ -256,7 +267,7 @@ class TestCpxAp:
         mock_build_ap_module,
         mock_add_module,
         mock__grab_apdd,
-        mock_read_apdd_information,
+        mock_read_all_apdd_information,
         mock_read_module_count,
         mock_create_docu_path,
         mock_create_apdd_path,
@@ -269,9 +280,9 @@ class TestCpxAp:
         mock_create_apdd_path.return_value = "apdd_path"
         mock_create_docu_path.return_value = "docu_path"
         mock_read_module_count.return_value = 1
-        mock_read_apdd_information.return_value = CpxAp.ApInformation(
-            order_text="CPX-AP-I-EP-M12", fw_version="0.0.1"
-        )
+        mock_read_all_apdd_information.return_value = [
+            CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", fw_version="0.0.1")
+        ]
         mock__grab_apdd.return_value = {}
         mock_add_module.return_value = ["Dummy"]
         mock_build_ap_module.return_value = None
@@ -294,11 +305,12 @@ class TestCpxAp:
         assert not mock_set_timeout.called
         assert cpx_ap.apdd_path == "myApddPath"
         assert cpx_ap.docu_path == "myDocuPath"
-        mock_read_apdd_information.assert_called_once()
+        mock_read_all_apdd_information.assert_called_once()
         mock__grab_apdd.assert_called_once()
         mock_build_ap_module.assert_called_once()
         mock_add_module.assert_called_once()
-        mock_generate_system_information_file.assert_called_once()
+        cpx_ap.docu_thread.join()
+        mock_generate_system_information_file.assert_called_once_with(cpx_ap)
 
     @pytest.fixture(scope="function")
     def ap_fixture(self, mocker):
@@ -329,12 +341,12 @@ class TestCpxAp:
             spec=CpxAp._grab_apdd,
             return_value={},
         )
-        mock_read_apdd_information = mocker.patch(
-            "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_apdd_information",
-            spec=CpxAp.read_apdd_information,
-            return_value=CpxAp.ApInformation(
-                order_text="CPX-AP-I-EP-M12", fw_version="0.0.1"
-            ),
+        mock_read_all_apdd_information = mocker.patch(
+            "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_all_apdd_information",
+            spec=CpxAp.read_all_apdd_information,
+            return_value=[
+                CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", fw_version="0.0.1")
+            ],
         )
         mock_read_module_count = mocker.patch(
             "cpx_io.cpx_system.cpx_ap.cpx_ap.CpxAp.read_module_count",
@@ -357,7 +369,9 @@ class TestCpxAp:
         mock_modbus_tcp_client = mocker.patch(
             "pymodbus.client.ModbusTcpClient.__new__", spec=True, return_value=Mock()
         )
-        yield CpxAp(ip_address="0.0.0.0", cycle_time=None)
+        cpxap = CpxAp(ip_address="0.0.0.0", cycle_time=None)
+        cpxap.docu_thread.join()
+        yield cpxap
 
     def test_connected(self, ap_fixture):
         # Arrange
@@ -371,6 +385,231 @@ class TestCpxAp:
         # is called twice. once for fixture and once for Act
         assert ap_fixture.connected.call_count == 2
 
+    def test_download_apdds_parallel(self, ap_fixture):
+        """Test missing apdds are downloaded at the same time over one session"""
+        # Arrange
+        running, max_running, sessions = [0], [0], set()
+        lock = threading.Lock()
+
+        def grab_apdd(ip_address, module_index, apdd_path, fw_version, session):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+                sessions.add(session)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return {"index": module_index}
+
+        ap_fixture._grab_apdd = Mock(side_effect=grab_apdd)
+        infos = [CpxAp.ApInformation(fw_version="1.0.0") for _ in range(4)]
+        missing = {f"apdd{i}": i for i in range(4)}
+
+        # Act
+        apdds = ap_fixture._download_apdds(missing, infos)
+
+        # Assert
+        assert apdds == {f"apdd{i}": {"index": i} for i in range(4)}
+        assert max_running[0] > 1
+        assert len(sessions) == 1
+
+    def test_download_apdds_keepalive(self, ap_fixture):
+        """Test the modbus connection is kept alive during slow downloads"""
+        # Arrange
+        ap_fixture.APDD_KEEPALIVE_INTERVAL = 0.01
+        ap_fixture.check_connection_and_try_reconnect = Mock()
+        ap_fixture._grab_apdd = Mock(side_effect=lambda *_: time.sleep(0.1) or {})
+        infos = [CpxAp.ApInformation(fw_version="1.0.0")]
+
+        # Act
+        ap_fixture._download_apdds({"apdd": 0}, infos)
+
+        # Assert
+        assert ap_fixture.check_connection_and_try_reconnect.call_count > 1
+
+    def test_download_apdds_error(self, ap_fixture):
+        """Test a failed download is raised"""
+        # Arrange
+        ap_fixture._grab_apdd = Mock(side_effect=ConnectionError("Failed"))
+        infos = [CpxAp.ApInformation(fw_version="1.0.0")]
+
+        # Act & Assert
+        with pytest.raises(ConnectionError):
+            ap_fixture._download_apdds({"apdd": 0}, infos)
+
+    def test_setup_modules_downloads_each_apdd_once(self, ap_fixture):
+        """Test modules with the same apdd share one download"""
+        # Arrange
+        info = CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", fw_version="1.0.0")
+        ap_fixture.read_all_apdd_information = Mock(return_value=[info, info])
+        ap_fixture._download_apdds = Mock(return_value={info.apdd_name: {}})
+        ap_fixture._add_module = Mock()
+
+        # Act
+        with patch("cpx_io.cpx_system.cpx_ap.cpx_ap.os.listdir", return_value=[]):
+            ap_fixture._setup_modules()
+
+        # Assert
+        ap_fixture._download_apdds.assert_called_once_with(
+            {"CPX-AP-I-EP-M12_v1-0-0.json": 0}, [info, info]
+        )
+        assert ap_fixture._add_module.call_count == 2
+
+    def test_setup_modules_uses_module_cache(self, ap_fixture, tmp_path):
+        """Test a warm start restores the modules from the cache instead of building"""
+        # Arrange
+        info = CpxAp.ApInformation(
+            order_text="CPX-AP-I-EP-M12", fw_version="1.0.0", module_code=8323
+        )
+        (tmp_path / info.apdd_name).write_text("{}", encoding="utf-8")
+        ap_fixture._apdd_path = str(tmp_path)
+        ap_fixture.read_all_apdd_information = Mock(return_value=[info, info])
+        ap_fixture._add_module = Mock()
+        built = ApModule(
+            ApddInformation(*["CPX-AP-I-EP-M12"] * 10), ([], [], []), [], [], [], None
+        )
+
+        # Act
+        with patch(
+            "cpx_io.cpx_system.cpx_ap.cpx_ap.build_ap_module", return_value=built
+        ) as mock_build:
+            ap_fixture._setup_modules()
+            ap_fixture._setup_modules()
+
+        # Assert
+        mock_build.assert_called_once_with({}, 8323)
+        modules = [c.args[0] for c in ap_fixture._add_module.call_args_list]
+        assert modules[0] is built
+        assert all(isinstance(m, ApModule) for m in modules)
+        assert len({id(m) for m in modules}) == 4
+
+    def test_setup_modules_shares_definitions(self, ap_fixture, tmp_path):
+        """Test identical modules share the definitions of the first one"""
+        # Arrange
+        info = CpxAp.ApInformation(
+            order_text="CPX-AP-I-EP-M12", fw_version="1.0.0", module_code=8323
+        )
+        (tmp_path / info.apdd_name).write_text("{}", encoding="utf-8")
+        ap_fixture._apdd_path = str(tmp_path)
+        ap_fixture.read_all_apdd_information = Mock(return_value=[info] * 3)
+        ap_fixture._add_module = Mock()
+        built = ApModule(
+            ApddInformation(*["CPX-AP-I-EP-M12"] * 10), ([], [], []), [], [], [], None
+        )
+
+        # Act
+        with (
+            patch(
+                "cpx_io.cpx_system.cpx_ap.cpx_ap.build_ap_module", return_value=built
+            ),
+            patch(
+                "cpx_io.cpx_system.cpx_ap.cpx_ap.ApModuleCache.get", return_value=None
+            ) as mock_cache_get,
+        ):
+            ap_fixture._setup_modules()
+
+        # Assert
+        modules = [c.args[0] for c in ap_fixture._add_module.call_args_list]
+        assert modules[0] is built
+        assert len({id(m) for m in modules}) == 3
+        assert all(m.channels is built.channels for m in modules)
+        assert all(m.module_dicts is built.module_dicts for m in modules)
+        mock_cache_get.assert_called_once()
+
+    def test_startup_report_disabled(self, ap_fixture):
+        """Test there is no startup report without startup_trace"""
+        # Act
+        report = ap_fixture.startup_report
+
+        # Assert
+        assert report is None
+
+    def test_startup_report_setup_modules(self, ap_fixture, tmp_path):
+        """Test the phases of every module are traced"""
+        # Arrange
+        info = CpxAp.ApInformation(
+            order_text="CPX-AP-I-EP-M12", fw_version="1.0.0", module_code=8323
+        )
+        (tmp_path / info.apdd_name).write_text("{}", encoding="utf-8")
+        ap_fixture._apdd_path = str(tmp_path)
+        ap_fixture.read_all_apdd_information = Mock(return_value=[info, info])
+        ap_fixture._add_module = Mock(
+            side_effect=lambda *_: ap_fixture.metrics.record("read", "system", 1000)
+        )
+        ap_fixture._startup_trace = StartupTrace(ap_fixture.metrics)
+        built = ApModule(
+            ApddInformation(*["CPX-AP-I-EP-M12"] * 10), ([], [], []), [], [], [], None
+        )
+
+        # Act
+        with (
+            patch(
+                "cpx_io.cpx_system.cpx_ap.cpx_ap.build_ap_module", return_value=built
+            ),
+            patch(
+                "cpx_io.cpx_system.cpx_ap.cpx_ap.os.listdir",
+                return_value=[info.apdd_name],
+            ),
+        ):
+            ap_fixture._setup_modules()
+        report = ap_fixture.startup_report
+
+        # Assert
+        assert [(p.name, p.module) for p in report.phases] == [
+            ("module_information", None),
+            ("module_cache", 0),
+            ("apdd_load", 0),
+            ("module_build", 0),
+            ("module_configure", 0),
+            ("module_configure", 1),
+        ]
+        assert [p.requests for p in report.phases if p.name == "module_configure"] == [
+            1,
+            1,
+        ]
+        assert set(report.durations_by_module()) == {0, 1}
+
+    def test_startup_report_apdd_download(self, ap_fixture):
+        """Test every download is traced as a phase of its module"""
+        # Arrange
+        infos = [CpxAp.ApInformation(fw_version="1.0.0") for _ in range(2)]
+        ap_fixture._grab_apdd = Mock(return_value={})
+        ap_fixture._startup_trace = StartupTrace(ap_fixture.metrics)
+
+        # Act
+        ap_fixture._download_apdds({"a.json": 0, "b.json": 1}, infos)
+
+        # Assert
+        phases = ap_fixture.startup_report.phases
+        assert sorted((p.name, p.module) for p in phases) == [
+            ("apdd_download", 0),
+            ("apdd_download", 1),
+        ]
+
+    @patch("cpx_io.cpx_system.cpx_ap.cpx_ap.open")
+    def test_grab_apdd_with_session(self, mock_open):
+        """Test _grab_apdd uses the given session"""
+        # Arrange
+        response = Mock(status_code=200)
+        response.json.return_value = {
+            "Variants": {
+                "VariantList": [{"VariantIdentification": {"OrderText": "CPX-AP-A"}}]
+            }
+        }
+        session = Mock(get=Mock(return_value=response))
+
+        # Act
+        ret = CpxAp._grab_apdd("0.0.0.0", 1, "path", "1.2.3", session)
+
+        # Assert
+        session.get.assert_called_once_with(
+            "http://0.0.0.0/cgi-bin/ap-file-get?slot=2&filenumber=6", timeout=100
+        )
+        mock_open.assert_called_once_with(
+            "path/CPX-AP-A_v1-2-3.json", "w", encoding="utf-8"
+        )
+        assert ret == response.json.return_value
+
     def test_delete_apdds(self, ap_fixture, mocker):
         # Arrange
         mock_remove = mocker.patch(
@@ -611,13 +850,187 @@ class TestCpxAp:
         # Arrange
         # stop mocking the read_apdd_information function
         mocker.stopall()
-        ap_fixture.read_reg_data = Mock(return_value=b"\x34\x35\x36\x37\x38\x39")
+        data = bytearray(74)
+        data[0:4] = (8323).to_bytes(4, "little")  # module code
+        data[18:24] = b"\x01\x00\x02\x00\x03\x00"  # fw version
+        data[40:55] = b"CPX-AP-I-EP-M12"  # order text
+        ap_fixture.read_reg_data = Mock(return_value=bytes(data))
 
         # Act
-        ret = ap_fixture.read_apdd_information(0)
+        ret = ap_fixture.read_apdd_information(2)
 
         # Assert
+        ap_fixture.read_reg_data.assert_called_once_with(15074, 37)
         assert isinstance(ret, CpxAp.ApInformation)
+        assert ret.module_code == 8323
+        assert ret.fw_version == "1.2.3"
+        assert ret.order_text == "CPX-AP-I-EP-M12"
+
+    def test_read_all_apdd_information(self, ap_fixture, mocker):
+        # Arrange
+        mocker.stopall()
+        # module code, 36 bytes up to the order text, order text, padding
+        blocks = [
+            (i + 1).to_bytes(4, "little") + bytes(36) + b"CPX-AP-A" + bytes(26)
+            for i in range(4)
+        ]
+        ap_fixture.read_reg_data = Mock(return_value=b"".join(blocks))
+
+        # Act
+        ret = ap_fixture.read_all_apdd_information(4)
+
+        # Assert
+        ap_fixture.read_reg_data.assert_called_once_with(15000, 148)
+        assert [info.module_code for info in ret] == [1, 2, 3, 4]
+        assert all(info.order_text == "CPX-AP-A" for info in ret)
+
+    def test_read_all_apdd_information_module_count(self, ap_fixture, mocker):
+        # Arrange
+        mocker.stopall()
+        ap_fixture.read_module_count = Mock(return_value=1)
+        ap_fixture.read_reg_data = Mock(return_value=bytes(74))
+
+        # Act
+        ret = ap_fixture.read_all_apdd_information()
+
+        # Assert
+        ap_fixture.read_reg_data.assert_called_once_with(15000, 37)
+        assert len(ret) == 1
+
+    def test_generate_documentation(self, ap_fixture):
+        """Test generate_documentation waits for the background generation"""
+        # Arrange
+        ap_fixture.docu_thread = Mock()
+
+        # Act
+        with patch(
+            "cpx_io.cpx_system.cpx_ap.cpx_ap.generate_system_information_file",
+            return_value=True,
+        ) as mock_generate:
+            ret = ap_fixture.generate_documentation(force=True)
+
+        # Assert
+        assert ret is True
+        ap_fixture.docu_thread.join.assert_called_once_with()
+        mock_generate.assert_called_once_with(ap_fixture, force=True)
+
+    def test_generate_documentation_in_background_error(self, ap_fixture):
+        """Test an error of the background generation does not propagate"""
+        # Arrange
+        with patch(
+            "cpx_io.cpx_system.cpx_ap.cpx_ap.generate_system_information_file",
+            side_effect=OSError("read-only file system"),
+        ) as mock_generate:
+            # Act
+            ap_fixture._generate_documentation_in_background()
+
+        # Assert
+        mock_generate.assert_called_once_with(ap_fixture)
+
+    def test_read_module_fingerprints(self, ap_fixture, mocker):
+        """Test four neighbouring fingerprints are read with one request"""
+        # Arrange
+        mocker.stopall()
+        blocks = [(i + 1).to_bytes(4, "little") + bytes(70) for i in range(6)]
+        ap_fixture.read_reg_blocks = Mock(
+            return_value=[b"".join(blocks[:4])[:250], b"".join(blocks[4:])[:102]]
+        )
+
+        # Act
+        ret = ap_fixture.read_module_fingerprints(6)
+
+        # Assert
+        ap_fixture.read_reg_blocks.assert_called_once_with([(15000, 125), (15148, 51)])
+        assert [fingerprint[0] for fingerprint in ret] == [1, 2, 3, 4, 5, 6]
+        assert ret[0] == CpxAp.ApInformation.from_bytes(blocks[0]).fingerprint()
+
+    def test_read_topology_cold(self, ap_fixture, tmp_path):
+        """Test the module information is read and stored without a topology"""
+        # Arrange
+        ap_fixture._apdd_path = str(tmp_path)
+        ap_fixture.read_module_count = Mock(return_value=1)
+        info = CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", fw_version="0.0.1")
+        ap_fixture.read_all_apdd_information = Mock(return_value=[info])
+        ap_fixture.read_module_fingerprints = Mock()
+
+        # Act
+        ret = ap_fixture._read_topology()
+
+        # Assert
+        assert ret == [info]
+        ap_fixture.read_all_apdd_information.assert_called_once_with(1)
+        ap_fixture.read_module_fingerprints.assert_not_called()
+        assert (tmp_path / "topology_0.0.0.0.json").is_file()
+
+    def test_read_topology_warm(self, ap_fixture, tmp_path):
+        """Test the stored topology is used if the fingerprints are unchanged"""
+        # Arrange
+        ap_fixture._apdd_path = str(tmp_path)
+        ap_fixture.read_module_count = Mock(return_value=1)
+        info = CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", fw_version="0.0.1")
+        ap_fixture.read_all_apdd_information = Mock(return_value=[info])
+        ap_fixture.read_module_fingerprints = Mock(return_value=[info.fingerprint()])
+        ap_fixture._read_topology()
+
+        # Act
+        ret = ap_fixture._read_topology()
+
+        # Assert
+        assert ret == [info]
+        ap_fixture.read_all_apdd_information.assert_called_once_with(1)
+        ap_fixture.read_module_fingerprints.assert_called_once_with(1)
+
+    def test_read_topology_changed(self, ap_fixture, tmp_path):
+        """Test the module information is read again if a fingerprint differs"""
+        # Arrange
+        ap_fixture._apdd_path = str(tmp_path)
+        ap_fixture.read_module_count = Mock(return_value=1)
+        old = CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", serial_number="0x1")
+        new = CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12", serial_number="0x2")
+        ap_fixture.read_all_apdd_information = Mock(side_effect=[[old], [new]])
+        ap_fixture.read_module_fingerprints = Mock(return_value=[new.fingerprint()])
+        ap_fixture._read_topology()
+
+        # Act
+        ret = ap_fixture._read_topology()
+
+        # Assert
+        assert ret == [new]
+        assert ap_fixture.read_all_apdd_information.call_count == 2
+
+    def test_read_topology_module_count_changed(self, ap_fixture, tmp_path):
+        """Test the fingerprints are not read if the module count changed"""
+        # Arrange
+        ap_fixture._apdd_path = str(tmp_path)
+        info = CpxAp.ApInformation(order_text="CPX-AP-I-EP-M12")
+        ap_fixture.read_module_count = Mock(side_effect=[1, 2])
+        ap_fixture.read_all_apdd_information = Mock(side_effect=[[info], [info, info]])
+        ap_fixture.read_module_fingerprints = Mock()
+        ap_fixture._read_topology()
+
+        # Act
+        ret = ap_fixture._read_topology()
+
+        # Assert
+        assert len(ret) == 2
+        ap_fixture.read_module_fingerprints.assert_not_called()
+
+    def test_read_all_channels(self, ap_fixture):
+        """Test the channels of all modules are read, None for modules without"""
+        # Arrange
+        first, second = Mock(), Mock()
+        first.is_function_supported = Mock(return_value=True)
+        first.read_channels = Mock(return_value=[True, False])
+        second.is_function_supported = Mock(return_value=False)
+        ap_fixture._modules = [first, second]
+
+        # Act
+        ret = ap_fixture.read_all_channels(as_array=True)
+
+        # Assert
+        assert ret == [[True, False], None]
+        first.read_channels.assert_called_once_with(as_array=True)
+        second.read_channels.assert_not_called()
 
     def test_read_diagnostics_status(self, ap_fixture):
         # Arrange
@@ -765,6 +1178,23 @@ class TestCpxAp:
 
         assert ret == 2
 
+    def test_read_parameter_raw_stats(self, ap_fixture):
+        """Test the parameter handshake is recorded as one parameter operation"""
+        # Arrange
+        ap_fixture.write_reg_data = Mock()
+        ap_fixture.read_reg_data = Mock(
+            side_effect=[b"\x10\x00", b"\x02\x00", b"\x05\x00"]
+        )
+
+        # Act
+        ret = ap_fixture._read_parameter_raw(0, 20022, 0)
+
+        # Assert
+        assert ret == b"\x05\x00"
+        stats = ap_fixture.stats().operations["parameter"]["parameters"]
+        assert stats.count == 1
+        assert stats.errors == 0
+
     def test_read_parameter_with_instance(self, ap_fixture):
         # Arrange
         position = 12
@@ -860,3 +1290,448 @@ class TestCpxAp:
         assert ap_fixture.modules[0].name == "name1"
         assert ap_fixture.modules[1].name == "name2"
         assert ap_fixture.modules[2].name == "name3"
+
+    def test_enable_process_image(self, ap_fixture):
+        """Test enable_process_image"""
+        # Arrange
+        ap_fixture.next_input_register = 5003
+        module = Mock(input_image=None)
+        ap_fixture._modules = [module]
+        ap_fixture.read_reg_data = Mock(return_value=b"\x01\x02\x03\x04\x05\x06")
+
+        # Act
+        image = ap_fixture.enable_process_image()
+
+        # Assert
+        ap_fixture.read_reg_data.assert_called_once_with(5000, 3)
+        assert ap_fixture.input_image is image
+        assert module.input_image is image
+        assert image.snapshot.data == b"\x01\x02\x03\x04\x05\x06"
+
+    def test_disable_process_image(self, ap_fixture):
+        """Test disable_process_image"""
+        # Arrange
+        ap_fixture.next_input_register = 5001
+        module = Mock(input_image=None)
+        ap_fixture._modules = [module]
+        ap_fixture.read_reg_data = Mock(return_value=b"\x00\x00")
+        ap_fixture.enable_process_image()
+
+        # Act
+        ap_fixture.disable_process_image()
+
+        # Assert
+        assert ap_fixture.input_image is None
+        assert module.input_image is None
+
+    @staticmethod
+    def digital_input_module(position, input_register):
+        """Returns a module with 8 digital inputs"""
+        apdd_information = ApddInformation(
+            *["CPX-AP-I-8DI-M8-3P"] * 8, ProductCategory.DIGITAL.value, "CPX-AP"
+        )
+        channels = (
+            [
+                Channel(
+                    array_size=None,
+                    bits=1,
+                    bit_offset=i,
+                    byte_swap_needed=None,
+                    channel_id=0,
+                    data_type="BOOL",
+                    description="",
+                    direction="in",
+                    name="Input %d",
+                    parameter_group_ids=None,
+                    profile_list=[3],
+                )
+                for i in range(8)
+            ],
+            [],
+            [],
+        )
+        module = ApModule(apdd_information, channels, [], [], [], None)
+        module.position = position
+        module.system_entry_registers.inputs = input_register
+        return module
+
+    def test_detect_changes(self, ap_fixture):
+        """Test detect_changes reads the input area and reports the changed channels"""
+        # Arrange
+        ap_fixture.next_input_register = 5002
+        ap_fixture._modules = [
+            self.digital_input_module(0, 5000),
+            self.digital_input_module(1, 5001),
+        ]
+        ap_fixture.read_reg_data = Mock(
+            side_effect=[b"\x01\x00\x00\x00", b"\x00\x00\x04\x00"]
+        )
+
+        # Act
+        baseline = ap_fixture.detect_changes()
+        changes = ap_fixture.detect_changes()
+
+        # Assert
+        assert baseline == []
+        assert [(c.position, c.channel, c.kind) for c in changes] == [
+            (0, 0, FALLING),
+            (1, 2, RISING),
+        ]
+        assert ap_fixture.read_reg_data.call_args_list == [call(5000, 2)] * 2
+
+    def test_detect_changes_from_process_image(self, ap_fixture):
+        """Test detect_changes compares each snapshot of the process image once"""
+        # Arrange
+        ap_fixture.next_input_register = 5001
+        ap_fixture._modules = [self.digital_input_module(0, 5000)]
+        ap_fixture.read_reg_data = Mock(side_effect=[b"\x00\x00", b"\x81\x00"])
+        ap_fixture.enable_process_image()
+        ap_fixture.enable_change_detection()
+
+        # Act
+        ap_fixture.input_image.update(ap_fixture.read_reg_data)
+        changes = ap_fixture.detect_changes()
+        unchanged = ap_fixture.detect_changes()
+
+        # Assert
+        assert [(c.channel, c.kind) for c in changes] == [(0, RISING), (7, RISING)]
+        assert changes[0].timestamp == ap_fixture.input_image.snapshot.timestamp
+        assert unchanged == []
+        assert ap_fixture.read_reg_data.call_count == 2
+
+    def test_subscribe_evaluated_in_perform_io(self, ap_fixture):
+        """Test a channel subscription is notified from the I/O cycle"""
+        # Arrange
+        ap_fixture.next_input_register = 5001
+        ap_fixture._modules = [self.digital_input_module(0, 5000)]
+        ap_fixture.read_reg_data = Mock(side_effect=[b"\x00\x00", b"\x06\x00"])
+        ap_fixture._update_diagnosis_status = Mock()
+        received = []
+        done = threading.Event()
+
+        def callback(change):
+            received.append(change)
+            done.set()
+
+        # Act
+        subscription = ap_fixture.subscribe(0, 2, callback)
+        ap_fixture.perform_io()
+
+        # Assert
+        assert done.wait(2.0)
+        assert [(c.position, c.channel, c.kind) for c in received] == [(0, 2, RISING)]
+        assert ap_fixture.subscriptions == [subscription]
+        ap_fixture.unsubscribe(subscription)
+        assert ap_fixture.subscriptions == []
+        assert ap_fixture.change_detector is None
+
+    def test_subscribe_channel_out_of_range(self, ap_fixture):
+        """Test subscribe with a channel that the module does not have"""
+        # Arrange
+        ap_fixture._modules = [self.digital_input_module(0, 5000)]
+
+        # Act & Assert
+        with pytest.raises(IndexError):
+            ap_fixture.subscribe(0, 8, Mock())
+
+    def test_subscribe_diagnosis(self, ap_fixture):
+        """Test a diagnosis subscription is notified when the status changes"""
+        # Arrange
+        ok_status = CpxAp.Diagnostics.from_int(0x40)
+        error_status = CpxAp.Diagnostics.from_int(0x48)
+        ap_fixture.read_reg_data = Mock(
+            side_effect=[b"\x00" * 12, b"\x01\x00\x01\x00\x02\x00" + b"\x00" * 6]
+        )
+        ap_fixture.read_diagnostic_status = Mock(
+            side_effect=[[ok_status, ok_status], [ok_status, error_status]]
+        )
+        received = []
+        done = threading.Event()
+
+        def callback(change):
+            received.append(change)
+            done.set()
+
+        # Act
+        ap_fixture.subscribe_diagnosis(callback, module=1)
+        ap_fixture.perform_io()
+        ap_fixture.perform_io()
+
+        # Assert
+        assert done.wait(2.0)
+        assert [(c.position, c.old_value, c.new_value) for c in received] == [
+            (1, ok_status, error_status)
+        ]
+
+    def test_perform_io_updates_process_image(self, ap_fixture):
+        """Test perform_io with enabled process image"""
+        # Arrange
+        ap_fixture.next_input_register = 5001
+        ap_fixture.read_reg_data = Mock(return_value=b"\x00\x00")
+        ap_fixture.enable_process_image()
+        ap_fixture.read_diagnostic_status = Mock(return_value=[])
+
+        # Act
+        ap_fixture.perform_io()
+
+        # Assert
+        assert ap_fixture.input_image.snapshot.cycle == 2
+        ap_fixture.read_diagnostic_status.assert_called_once()
+
+    def test_perform_io_uses_cyclic_lane(self, ap_fixture):
+        """Test perform_io reads the process image in the cyclic lane"""
+        # Arrange
+        lanes = []
+        ap_fixture.next_input_register = 5001
+        ap_fixture.read_reg_data = Mock(
+            side_effect=lambda *_, **__: lanes.append(ap_fixture.io_lock.current_lane)
+            or b"\x00\x00"
+        )
+        ap_fixture.enable_process_image()
+        lanes.clear()
+        ap_fixture.read_diagnostic_status = Mock(return_value=[])
+
+        # Act
+        ap_fixture.perform_io()
+
+        # Assert
+        # process data and then the global diagnosis registers
+        assert lanes == [CYCLIC, ACYCLIC]
+        assert ap_fixture.io_lock.current_lane == ACYCLIC
+
+    def test_perform_io_skips_diagnosis_during_acyclic_transaction(self, ap_fixture):
+        """Test perform_io keeps the last diagnosis and returns promptly while another
+        thread holds the interface"""
+        # Arrange
+        ap_fixture.diagnosis_status = ["previous"]
+        ap_fixture.read_reg_data = Mock(return_value=b"\x00" * 12)
+        ap_fixture.read_diagnostic_status = Mock(return_value=[])
+        locked, release = threading.Event(), threading.Event()
+
+        def transaction():
+            with ap_fixture.interface_lock:
+                locked.set()
+                release.wait(5.0)
+
+        thread = threading.Thread(target=transaction)
+        thread.start()
+        locked.wait(1.0)
+
+        # Act
+        start = time.perf_counter()
+        ap_fixture.perform_io()
+        duration = time.perf_counter() - start
+        release.set()
+        thread.join()
+
+        # Assert
+        assert duration < 1.0
+        ap_fixture.read_reg_data.assert_not_called()
+        ap_fixture.read_diagnostic_status.assert_not_called()
+        assert ap_fixture.diagnosis_status == ["previous"]
+
+    def test_perform_io_reads_diagnosis_status_on_change(self, ap_fixture):
+        """Test the diagnosis status is only read when the global diagnosis changes"""
+        # Arrange
+        no_diagnosis = b"\x01\x00" + b"\x00" * 10
+        one_diagnosis = b"\x01\x00\x01\x00\x02\x00\x03\x00\x04\x00\x00\x00"
+        ap_fixture.read_reg_data = Mock(
+            side_effect=[no_diagnosis, no_diagnosis, one_diagnosis, one_diagnosis]
+        )
+        ap_fixture.read_diagnostic_status = Mock(side_effect=[["ok"], ["error"]])
+
+        # Act
+        for _ in range(4):
+            ap_fixture.perform_io()
+
+        # Assert
+        assert ap_fixture.read_diagnostic_status.call_count == 2
+        assert ap_fixture.diagnosis_status == ["error"]
+        ap_fixture.read_reg_data.assert_called_with(11000, length=6)
+
+    def test_read_diagnostic_status_caches_module_count(self, ap_fixture, mocker):
+        """Test the module count of read_module_count() is used again"""
+        # Arrange
+        mocker.stopall()
+        ap_fixture.read_reg_data = Mock(return_value=b"\x02\x00")
+        ap_fixture.read_parameter = Mock(return_value=[0, 0, 0])
+        ap_fixture.read_module_count()
+        ap_fixture.read_reg_data.reset_mock()
+
+        # Act
+        ap_fixture.read_diagnostic_status()
+        ap_fixture.read_diagnostic_status()
+
+        # Assert
+        ap_fixture.read_reg_data.assert_not_called()
+        parameter = ap_fixture.read_parameter.call_args.args[1]
+        assert parameter.array_size == 3
+
+    def test_perform_io_catches_up_skipped_diagnosis(self, ap_fixture):
+        """Test the cycle after a busy interface reads the changed diagnosis status"""
+        # Arrange
+        one_diagnosis = b"\x01\x00\x01\x00\x02\x00\x03\x00\x04\x00\x00\x00"
+        ap_fixture.diagnosis_status = ["previous"]
+        ap_fixture.read_reg_data = Mock(return_value=one_diagnosis)
+        ap_fixture.read_diagnostic_status = Mock(return_value=["error"])
+        locked, release = threading.Event(), threading.Event()
+
+        def transaction():
+            with ap_fixture.interface_lock:
+                locked.set()
+                release.wait(5.0)
+
+        thread = threading.Thread(target=transaction)
+        thread.start()
+        locked.wait(1.0)
+        ap_fixture.perform_io()
+        release.set()
+        thread.join()
+
+        # Act
+        ap_fixture.perform_io()
+
+        # Assert
+        ap_fixture.read_reg_data.assert_called_once_with(11000, length=6)
+        ap_fixture.read_diagnostic_status.assert_called_once()
+        assert ap_fixture.diagnosis_status == ["error"]
+
+    def test_reconnect_resets_module_count_and_diagnosis(self, ap_fixture, mocker):
+        """Test the module count and the global diagnosis are read again after a
+        reconnect"""
+        # Arrange
+        mocker.patch("cpx_io.cpx_system.cpx_base.CpxBase.reconnect")
+        ap_fixture._module_count = 3
+        ap_fixture._diagnosis_summary = b"\x00" * 12
+
+        # Act
+        ap_fixture.reconnect()
+
+        # Assert
+        assert ap_fixture._module_count is None
+        assert ap_fixture._diagnosis_summary is None
+
+    def test_stats_register_regions(self, ap_fixture):
+        """Test requests are recorded in the CPX-AP register regions"""
+        # Arrange
+        response = Mock(registers=[0], isError=Mock(return_value=False))
+        ap_fixture.client = Mock(read_holding_registers=Mock(return_value=response))
+
+        # Act
+        for register in (0, 5000, 10003, 11000, 34000, 12000):
+            ap_fixture.read_reg_data(register)
+        stats = ap_fixture.stats()
+
+        # Assert
+        assert set(stats.operations["read"]) == {
+            "outputs",
+            "inputs",
+            "parameters",
+            "diagnosis",
+            "isdu",
+            "system",
+        }
+
+    def test_enable_output_image(self, ap_fixture):
+        """Test enable_output_image"""
+        # Arrange
+        ap_fixture.next_output_register = 2
+        module = Mock(output_image=None)
+        ap_fixture._modules = [module]
+        ap_fixture.read_reg_data = Mock(return_value=b"\x01\x02\x03\x04")
+
+        # Act
+        image = ap_fixture.enable_output_image()
+
+        # Assert
+        ap_fixture.read_reg_data.assert_called_once_with(0, 2)
+        assert ap_fixture.output_image is image
+        assert module.output_image is image
+
+    def test_flush_outputs(self, ap_fixture):
+        """Test flush_outputs"""
+        # Arrange
+        ap_fixture.next_output_register = 2
+        ap_fixture.read_reg_data = Mock(return_value=b"\x00\x00\x00\x00")
+        ap_fixture.write_reg_data = Mock()
+        ap_fixture.enable_output_image()
+        ap_fixture.output_image.write(b"\x01\x00", 0)
+        ap_fixture.output_image.write(b"\x02\x00", 1)
+
+        # Act
+        ret = ap_fixture.flush_outputs()
+
+        # Assert
+        assert ret == 1
+        ap_fixture.write_reg_data.assert_called_once_with(b"\x01\x00\x02\x00", 0)
+
+    def test_flush_outputs_without_image(self, ap_fixture):
+        """Test flush_outputs without output image"""
+        # Arrange
+        ap_fixture.write_reg_data = Mock()
+
+        # Act
+        ret = ap_fixture.flush_outputs()
+
+        # Assert
+        assert ret == 0
+        ap_fixture.write_reg_data.assert_not_called()
+
+    def test_perform_io_flushes_outputs(self, ap_fixture):
+        """Test perform_io with output image"""
+        # Arrange
+        ap_fixture.next_output_register = 1
+        ap_fixture.read_reg_data = Mock(return_value=b"\x00\x00")
+        ap_fixture.write_reg_data = Mock()
+        ap_fixture.read_diagnostic_status = Mock(return_value=[])
+        ap_fixture.enable_output_image()
+        ap_fixture.output_image.write(b"\x01\x00", 0)
+
+        # Act
+        ap_fixture.perform_io()
+
+        # Assert
+        ap_fixture.write_reg_data.assert_called_once_with(b"\x01\x00", 0)
+
+    def test_perform_io_keeps_outputs_after_failed_flush(self, ap_fixture):
+        """Test a failed flush does not raise and the outputs are written later"""
+        # Arrange
+        error = ConnectionAbortedError("flush failed")
+        ap_fixture.next_output_register = 1
+        ap_fixture.read_reg_data = Mock(return_value=b"\x00\x00")
+        ap_fixture.write_reg_data = Mock(side_effect=[error, None])
+        ap_fixture.read_diagnostic_status = Mock(return_value=[])
+        ap_fixture.enable_output_image()
+        ap_fixture.output_image.write(b"\x01\x00", 0)
+
+        # Act
+        ap_fixture.perform_io()
+        ap_fixture.output_image.write(b"\x02\x00", 0)
+        ap_fixture.perform_io()
+
+        # Assert
+        assert ap_fixture.last_io_error is error
+        assert ap_fixture.io_errors == 1
+        ap_fixture.write_reg_data.assert_called_with(b"\x02\x00", 0)
+        assert not ap_fixture.output_image.dirty
+        ap_fixture.read_diagnostic_status.assert_called_once()
+
+    def test_perform_io_raise_errors(self, ap_fixture):
+        """Test perform_io raises the first error of the cycle on request"""
+        # Arrange
+        ap_fixture.read_reg_data = Mock(side_effect=ConnectionAbortedError)
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            ap_fixture.perform_io(raise_errors=True)
+        assert ap_fixture.io_errors == 1
+
+    def test_io_thread_stopped(self, ap_fixture):
+        """Test io_thread_stopped"""
+        # Arrange
+        ap_fixture.io_thread = Mock(is_alive=Mock(return_value=False))
+
+        # Act & Assert
+        assert ap_fixture.io_thread_stopped()
+        ap_fixture.io_thread = None
+        assert not ap_fixture.io_thread_stopped()
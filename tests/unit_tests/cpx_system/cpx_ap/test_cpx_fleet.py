@@ -0,0 +1,205 @@
+"""Contains tests for CpxFleet class"""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+import pytest
+
+from cpx_io.cpx_system.cpx_ap.cpx_fleet import CpxFleet, DeviceStatistics
+from cpx_io.cpx_system.cpx_base import CpxConnectionError
+
+
+class TestDeviceStatistics:
+    "Test DeviceStatistics"
+
+    def test_add_cycle(self):
+        "Test latency statistics"
+        # Arrange
+        stats = DeviceStatistics()
+
+        # Act
+        stats.add_cycle(0.002)
+        stats.add_cycle(0.004)
+
+        # Assert
+        assert stats.cycles == 2
+        assert stats.min_latency == 0.002
+        assert stats.max_latency == 0.004
+        assert stats.last_latency == 0.004
+        assert stats.mean_latency == pytest.approx(0.003)
+
+    def test_add_error(self):
+        "Test error statistics"
+        # Arrange
+        stats = DeviceStatistics()
+
+        # Act
+        stats.add_error(ConnectionAbortedError("lost"))
+
+        # Assert
+        assert stats.cycles == 1
+        assert stats.errors == 1
+        assert "lost" in stats.last_error
+        assert stats.mean_latency is None
+
+
+class TestCpxFleet:
+    "Test CpxFleet"
+
+    @pytest.fixture(scope="function")
+    def mock_cpx_ap(self):
+        """patch CpxAp so that every ip address gets its own mocked system"""
+        with patch("cpx_io.cpx_system.cpx_ap.cpx_fleet.CpxAp") as mock_cpx_ap:
+            mock_cpx_ap.side_effect = lambda ip_address, **kwargs: Mock(
+                ip_address=ip_address, diagnosis_status=[ip_address]
+            )
+            yield mock_cpx_ap
+
+    def test_constructor_starts_all_systems(self, mock_cpx_ap):
+        "Test constructor"
+        # Arrange
+        ips = ["192.168.1.1", "192.168.1.2", "192.168.1.3"]
+
+        # Act
+        fleet = CpxFleet(ips, cycle_time=None, generate_docu=False)
+
+        # Assert
+        assert list(fleet.systems) == ips
+        assert not fleet.failed_systems
+        assert fleet.io_thread is None
+        for ip in ips:
+            mock_cpx_ap.assert_any_call(
+                ip_address=ip, generate_docu=False, process_image=True, cycle_time=None
+            )
+            assert fleet.statistics[ip].startup_time is not None
+
+    def test_constructor_failed_system(self, mock_cpx_ap):
+        "Test that a failing system does not prevent the others from starting"
+
+        # Arrange
+        def create(ip_address, **kwargs):
+            if ip_address == "192.168.1.2":
+                raise CpxConnectionError()
+            return Mock(ip_address=ip_address)
+
+        mock_cpx_ap.side_effect = create
+
+        # Act
+        fleet = CpxFleet(["192.168.1.1", "192.168.1.2"], cycle_time=None)
+
+        # Assert
+        assert list(fleet.systems) == ["192.168.1.1"]
+        assert isinstance(fleet.failed_systems["192.168.1.2"], CpxConnectionError)
+
+    def test_perform_io(self, mock_cpx_ap):
+        "Test perform_io runs one cycle of every system"
+        # Arrange
+        fleet = CpxFleet(["192.168.1.1", "192.168.1.2"], cycle_time=None)
+
+        # Act
+        fleet.perform_io()
+
+        # Assert
+        for system in fleet.systems.values():
+            system.perform_io.assert_called_once_with(raise_errors=True)
+        stats = fleet.read_statistics()
+        assert stats["192.168.1.1"].cycles == 1
+        assert stats["192.168.1.1"].errors == 0
+
+    def test_perform_io_error_is_recorded(self, mock_cpx_ap):
+        "Test a failing system is recorded and the others are still polled"
+        # Arrange
+        fleet = CpxFleet(["192.168.1.1", "192.168.1.2"], cycle_time=None)
+        fleet.systems["192.168.1.1"].perform_io.side_effect = ConnectionAbortedError()
+
+        # Act
+        fleet.perform_io()
+
+        # Assert
+        stats = fleet.read_statistics()
+        assert stats["192.168.1.1"].errors == 1
+        assert stats["192.168.1.2"].errors == 0
+        fleet.systems["192.168.1.2"].perform_io.assert_called_once()
+
+    def test_perform_io_does_not_wait_for_slow_system(self, mock_cpx_ap):
+        "Test a hanging system neither stalls the cycle nor is polled twice"
+        # Arrange
+        fleet = CpxFleet(
+            ["192.168.1.1", "192.168.1.2"], cycle_time=None, io_timeout=0.05
+        )
+        release = threading.Event()
+        fleet.systems["192.168.1.1"].perform_io.side_effect = lambda **_: release.wait(
+            5
+        )
+
+        # Act
+        start = time.perf_counter()
+        fleet.perform_io()
+        fleet.perform_io()
+        duration = time.perf_counter() - start
+        release.set()
+
+        # Assert
+        assert duration < 1.0
+        fleet.systems["192.168.1.1"].perform_io.assert_called_once()
+        assert fleet.systems["192.168.1.2"].perform_io.call_count == 2
+        assert fleet.read_statistics()["192.168.1.1"].skipped_cycles == 1
+        fleet.shutdown()
+
+    def test_perform_io_backoff_after_error(self, mock_cpx_ap):
+        "Test a failing system is not polled again before its backoff expired"
+        # Arrange
+        fleet = CpxFleet(["192.168.1.1"], cycle_time=None)
+        system = fleet.systems["192.168.1.1"]
+        system.perform_io.side_effect = ConnectionAbortedError()
+
+        # Act
+        fleet.perform_io()
+        fleet.perform_io()
+        time.sleep(CpxFleet.RETRY_BACKOFF * 1.5)
+        fleet.perform_io()
+
+        # Assert
+        stats = fleet.read_statistics()["192.168.1.1"]
+        assert system.perform_io.call_count == 2
+        assert stats.skipped_cycles == 1
+        assert stats.consecutive_errors == 2
+
+    def test_read_all_inputs(self, mock_cpx_ap):
+        "Test read_all_inputs returns the snapshots"
+        # Arrange
+        fleet = CpxFleet(["192.168.1.1", "192.168.1.2"], cycle_time=None)
+        fleet.systems["192.168.1.2"].input_image = None
+
+        # Act
+        inputs = fleet.read_all_inputs()
+
+        # Assert
+        assert (
+            inputs["192.168.1.1"] is fleet.systems["192.168.1.1"].input_image.snapshot
+        )
+        assert inputs["192.168.1.2"] is None
+
+    def test_read_all_diagnosis(self, mock_cpx_ap):
+        "Test read_all_diagnosis"
+        # Arrange
+        fleet = CpxFleet(["192.168.1.1"], cycle_time=None)
+
+        # Act
+        diagnosis = fleet.read_all_diagnosis()
+
+        # Assert
+        assert diagnosis == {"192.168.1.1": ["192.168.1.1"]}
+
+    @patch("cpx_io.cpx_system.cpx_ap.cpx_fleet.IOThread")
+    def test_shutdown(self, mock_io_thread, mock_cpx_ap):
+        "Test the context manager stops the scheduler and all systems"
+        # Arrange & Act
+        with CpxFleet(["192.168.1.1"], cycle_time=0.05) as fleet:
+            system = fleet.systems["192.168.1.1"]
+
+        # Assert
+        mock_io_thread.assert_called_once_with(fleet.perform_io, cycle_time=0.05)
+        mock_io_thread.return_value.start.assert_called_once()
+        mock_io_thread.return_value.stop.assert_called_once()
+        system.shutdown.assert_called_once()
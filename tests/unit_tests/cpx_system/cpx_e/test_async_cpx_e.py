@@ -0,0 +1,231 @@
+"""Contains tests for AsyncCpxE class"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, call
+import pytest
+
+from cpx_io.cpx_system.cpx_e.async_cpx_e import AsyncCpxE
+from cpx_io.cpx_system.cpx_e.cpx_e import CpxE
+from cpx_io.cpx_system.cpx_e.eep import CpxEEp
+from cpx_io.cpx_system.cpx_e.e16di import CpxE16Di
+from cpx_io.cpx_system.cpx_e.e8do import CpxE8Do
+from cpx_io.cpx_system.cpx_e.e4aiui import CpxE4AiUI
+from cpx_io.cpx_system.cpx_e.e4aoui import CpxE4AoUI
+from cpx_io.cpx_system.cpx_e.e1ci import CpxE1Ci
+
+
+class TestAsyncCpxE:
+    """Test for AsyncCpxE"""
+
+    @pytest.fixture(scope="function")
+    def cpxe_fixture(self):
+        """AsyncCpxE fixture with mocked register access"""
+        cpxe = AsyncCpxE(
+            modules=[CpxEEp(), CpxE16Di(), CpxE8Do(), CpxE4AiUI(), CpxE4AoUI()]
+        )
+        cpxe.read_reg_data = AsyncMock()
+        cpxe.write_reg_data = AsyncMock()
+        cpxe.write_reg_data_with_single_cmds = AsyncMock()
+        yield cpxe
+
+    def test_default_constructor(self):
+        """Test default constructor"""
+        # Act
+        cpxe = AsyncCpxE()
+
+        # Assert
+        assert cpxe.client is None
+        assert len(cpxe.modules) == 1
+        assert isinstance(cpxe.cpxeep, CpxEEp)  # pylint: disable="no-member"
+
+    def test_constructor_module_layout(self, cpxe_fixture):
+        """Test that the register layout matches CpxE"""
+        # Assert
+        assert cpxe_fixture.modules[1].system_entry_registers.inputs == 45395
+        assert cpxe_fixture.modules[2].system_entry_registers.outputs == 40003
+        assert cpxe_fixture.modules[2].base is cpxe_fixture
+
+    def test_constructor_typecode(self):
+        """Test constructor with typecode"""
+        # Act
+        cpxe = AsyncCpxE(modules="60E-EP-MLP")
+
+        # Assert
+        assert [type(m) for m in cpxe.modules] == [CpxEEp, CpxE16Di, CpxE8Do]
+
+    def test_constructor_typecode_multiple_modules(self):
+        """Test the typecode is unwrapped without a CpxE object"""
+        # Act
+        cpxe = AsyncCpxE(modules="60E-EP-3L")
+
+        # Assert
+        assert not isinstance(cpxe, CpxE)
+        assert [type(m) for m in cpxe.modules] == [CpxEEp] + [CpxE8Do] * 3
+
+    def test_startup_sets_timeout(self):
+        """Test startup"""
+        # Arrange
+        cpxe = AsyncCpxE(timeout=0.5)
+        cpxe.connect = AsyncMock()
+        cpxe.connected = Mock(return_value=True)
+        cpxe.set_timeout = AsyncMock()
+
+        # Act
+        asyncio.run(cpxe.startup())
+
+        # Assert
+        cpxe.set_timeout.assert_awaited_once_with(500)
+
+    def test_set_timeout(self, cpxe_fixture):
+        """Test set_timeout"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\xf4\x01"
+
+        # Act
+        asyncio.run(cpxe_fixture.set_timeout(500))
+
+        # Assert
+        cpxe_fixture.write_reg_data_with_single_cmds.assert_awaited_once_with(
+            b"\xf4\x01", 46100
+        )
+
+    def test_read_function_number(self, cpxe_fixture):
+        """Test read_function_number"""
+        # Arrange
+        cpxe_fixture.read_reg_data.side_effect = [b"\x00\x80", b"\x2a\x00"]
+
+        # Act
+        value = asyncio.run(cpxe_fixture.read_function_number(43))
+
+        # Assert
+        assert value == 42
+        cpxe_fixture.write_reg_data.assert_has_awaits(
+            [call(b"\x00\x00", 40001), call(b"\x2b\x80", 40001)]
+        )
+
+    def test_write_function_number(self, cpxe_fixture):
+        """Test write_function_number"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\x00\x80"
+
+        # Act
+        asyncio.run(cpxe_fixture.write_function_number(4402, 1))
+
+        # Assert
+        cpxe_fixture.write_reg_data.assert_has_awaits(
+            [
+                call(b"\x01\x00", 40002),
+                call(b"\x00\x00", 40001),
+                call((0xA000 | 4402).to_bytes(2, "little"), 40001),
+            ]
+        )
+
+    def test_function_number_is_recorded(self, cpxe_fixture):
+        """Test the function number handshake is recorded in the metrics"""
+        # Arrange
+        cpxe_fixture.read_reg_data.side_effect = [b"\x00\x80", b"\x2a\x00"]
+
+        # Act
+        asyncio.run(cpxe_fixture.read_function_number(43))
+
+        # Assert
+        stats = cpxe_fixture.stats().operations["parameter"]["function_number"]
+        assert stats.count == 1
+
+    def test_read_status(self, cpxe_fixture):
+        """Test read_status"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\x00\x88"
+
+        # Act
+        status = asyncio.run(cpxe_fixture.read_status())
+
+        # Assert
+        assert status == (True, True)
+
+    def test_module_count(self, cpxe_fixture):
+        """Test module_count"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\x0f\x00\x00\x00\x00\x00"
+
+        # Act
+        count = asyncio.run(cpxe_fixture.module_count())
+
+        # Assert
+        assert count == 4
+
+    def test_read_channels_16di(self, cpxe_fixture):
+        """Test read_channels for CpxE16Di"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\x05\x80"
+
+        # Act
+        values = asyncio.run(cpxe_fixture.read_channels(1))
+
+        # Assert
+        assert values == [True, False, True] + [False] * 12 + [True]
+        cpxe_fixture.read_reg_data.assert_awaited_once_with(45395)
+
+    def test_read_channels_4aiui(self, cpxe_fixture):
+        """Test read_channels for CpxE4AiUI"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\x01\x00\xff\xff\x02\x00\x00\x00"
+
+        # Act
+        values = asyncio.run(cpxe_fixture.read_channels(3))
+
+        # Assert
+        assert values == [1, -1, 2, 0]
+
+    def test_read_channel(self, cpxe_fixture):
+        """Test read_channel"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\x02\x00"
+
+        # Act
+        value = asyncio.run(cpxe_fixture.read_channel(2, 1))
+
+        # Assert
+        assert value is True
+
+    def test_write_channels_8do(self, cpxe_fixture):
+        """Test write_channels for CpxE8Do"""
+        # Act
+        asyncio.run(cpxe_fixture.write_channels(2, [True] + [False] * 6 + [True]))
+
+        # Assert
+        cpxe_fixture.write_reg_data.assert_awaited_once_with(b"\x81", 40003)
+
+    def test_write_channel_8do(self, cpxe_fixture):
+        """Test write_channel for CpxE8Do keeps the other outputs"""
+        # Arrange
+        cpxe_fixture.read_reg_data.return_value = b"\x01\x00"
+
+        # Act
+        asyncio.run(cpxe_fixture.write_channel(2, 1, True))
+
+        # Assert
+        cpxe_fixture.write_reg_data.assert_awaited_once_with(b"\x03", 40003)
+
+    def test_write_channel_4aoui(self, cpxe_fixture):
+        """Test write_channel for CpxE4AoUI"""
+        # Act
+        asyncio.run(cpxe_fixture.write_channel(4, 2, -1))
+
+        # Assert
+        cpxe_fixture.write_reg_data.assert_awaited_once_with(b"\xff\xff", 40006)
+
+    def test_write_channels_wrong_module(self, cpxe_fixture):
+        """Test write_channels on an input module"""
+        # Act & Assert
+        with pytest.raises(NotImplementedError):
+            asyncio.run(cpxe_fixture.write_channels(1, [True] * 16))
+
+    def test_read_channels_unsupported_module(self):
+        """Test read_channels on a module without async support"""
+        # Arrange
+        cpxe = AsyncCpxE(modules=[CpxEEp(), CpxE1Ci()])
+
+        # Act & Assert
+        with pytest.raises(NotImplementedError):
+            asyncio.run(cpxe.read_channels(1))
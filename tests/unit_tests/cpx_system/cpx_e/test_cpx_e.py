@@ -11,6 +11,7 @@ from cpx_io.cpx_system.cpx_e.e4aiui import CpxE4AiUI
 from cpx_io.cpx_system.cpx_e.e4aoui import CpxE4AoUI
 
 from cpx_io.cpx_system.cpx_e.cpx_e import CpxInitError
+from cpx_io.cpx_system.change_detector import CHANGED, RISING
 import cpx_io.cpx_system.cpx_e.cpx_e_modbus_registers as cpx_e_modbus_registers
 
 from cpx_io.utils.logging import Logging
@@ -422,3 +423,41 @@ class TestCpxE:
                 call(*cpx_e_modbus_registers.DATA_SYSTEM_TABLE_READ),
             ]
         )
+
+    def test_detect_changes(self):
+        """Test detect_changes reads the input area and reports the changed channels"""
+        # Arrange
+        cpx_e = CpxE(modules=[CpxEEp(), CpxE16Di(), CpxE4AiUI()])
+        start = cpx_e_modbus_registers.PROCESS_DATA_INPUTS.register_address
+        baseline = bytearray(20)
+        changed = bytearray(20)
+        changed[0] = 0xFF  # bus module, not watched
+        changed[7] = 0x80  # CPX-E-16DI channel 15
+        changed[8] = 0x01  # CPX-E-16DI status, not watched
+        changed[12:14] = (-2).to_bytes(2, "little", signed=True)  # CPX-E-4AI-UI ch 1
+        cpx_e.read_reg_data = Mock(side_effect=[bytes(baseline), bytes(changed)])
+
+        # Act
+        first = cpx_e.detect_changes()
+        changes = cpx_e.detect_changes()
+
+        # Assert
+        assert first == []
+        assert [(c.position, c.channel, c.kind, c.new_value) for c in changes] == [
+            (1, 15, RISING, True),
+            (2, 1, CHANGED, -2),
+        ]
+        assert cpx_e.read_reg_data.call_args_list == [call(start, 10)] * 2
+
+    def test_add_module_resets_change_detection(self):
+        """Test that a new module invalidates the change detector"""
+        # Arrange
+        cpx_e = CpxE(modules=[CpxEEp(), CpxE16Di()])
+        cpx_e.read_reg_data = Mock(return_value=bytes(10))
+        cpx_e.enable_change_detection()
+
+        # Act
+        cpx_e.add_module(CpxE8Do())
+
+        # Assert
+        assert cpx_e.change_detector is None
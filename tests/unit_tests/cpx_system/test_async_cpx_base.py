@@ -0,0 +1,261 @@
+"""Contains tests for AsyncCpxBase class"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+import pytest
+
+from pymodbus.exceptions import ConnectionException
+from cpx_io.cpx_system.async_cpx_base import AsyncCpxBase
+from cpx_io.cpx_system.cpx_base import CpxConnectionError
+from cpx_io.cpx_system.retry_policy import RetryPolicy
+
+
+class TestAsyncCpxBase:
+    "Test AsyncCpxBase methods"
+
+    @patch("cpx_io.cpx_system.async_cpx_base.AsyncModbusTcpClient", spec=True)
+    def test_connect_successful(self, mock_modbus_client):
+        "Test successful modbus connection"
+        # Arrange
+        mock_client_instance = mock_modbus_client.return_value
+        mock_client_instance.connect = AsyncMock(return_value=True)
+        cpx = AsyncCpxBase("192.168.1.1")
+
+        # Act
+        asyncio.run(cpx.connect())
+
+        # Assert
+        assert cpx.client == mock_client_instance
+        mock_modbus_client.assert_called_once_with(host="192.168.1.1")
+        mock_client_instance.connect.assert_awaited_once()
+
+    @patch("cpx_io.cpx_system.async_cpx_base.AsyncModbusTcpClient", spec=True)
+    def test_connect_error(self, mock_modbus_client):
+        "Test modbus connection error handling if modbus can not connect"
+        # Arrange
+        mock_modbus_client.return_value.connect = AsyncMock(return_value=False)
+        cpx = AsyncCpxBase("192.168.1.1")
+
+        # Act & Assert
+        with pytest.raises(CpxConnectionError):
+            asyncio.run(cpx.connect())
+
+    def test_connect_no_ip(self):
+        "Test connect without ip address"
+        # Arrange
+        cpx = AsyncCpxBase()
+
+        # Act
+        asyncio.run(cpx.connect())
+
+        # Assert
+        assert cpx.client is None
+        assert not cpx.connected()
+
+    def test_context_manager_closes_client(self):
+        "Test async context manager"
+        # Arrange
+        cpx = AsyncCpxBase()
+        cpx.client = Mock()
+
+        async def run():
+            async with cpx as base:
+                assert base is cpx
+
+        # Act
+        asyncio.run(run())
+
+        # Assert
+        cpx.client.close.assert_called_once()
+
+    def test_read_reg_data(self):
+        "Test read_reg_data"
+        # Arrange
+        cpx = AsyncCpxBase()
+        response = Mock(registers=[0x0201, 0x0403])
+        response.isError.return_value = False
+        cpx.client = Mock(read_holding_registers=AsyncMock(return_value=response))
+
+        # Act
+        data = asyncio.run(cpx.read_reg_data(5000, 2))
+
+        # Assert
+        assert data == b"\x01\x02\x03\x04"
+        cpx.client.read_holding_registers.assert_awaited_once_with(
+            address=5000, count=2
+        )
+
+    def test_read_reg_data_connection_error(self):
+        "Test read_reg_data converts the pymodbus exception"
+        # Arrange
+        cpx = AsyncCpxBase()
+        cpx.client = Mock(
+            read_holding_registers=AsyncMock(side_effect=ConnectionException())
+        )
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            asyncio.run(cpx.read_reg_data(5000))
+
+    def test_write_reg_data(self):
+        "Test write_reg_data pads odd data"
+        # Arrange
+        cpx = AsyncCpxBase()
+        response = Mock()
+        response.isError.return_value = False
+        cpx.client = Mock(write_registers=AsyncMock(return_value=response))
+
+        # Act
+        asyncio.run(cpx.write_reg_data(b"\x01\x02\x03", 0))
+
+        # Assert
+        cpx.client.write_registers.assert_awaited_once_with(0, [0x0201, 0x0003])
+
+    def test_write_reg_data_final_failure(self):
+        "Test write_reg_data raises after the last attempt of the write policy"
+        # Arrange
+        cpx = AsyncCpxBase(write_policy=RetryPolicy(attempts=2))
+        cpx.client = Mock(write_registers=AsyncMock(side_effect=ConnectionException))
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            asyncio.run(cpx.write_reg_data(b"\x01\x02", 0))
+        assert cpx.client.write_registers.await_count == 2
+
+    def test_write_reg_data_with_single_cmds(self):
+        "Test write_reg_data_with_single_cmds"
+        # Arrange
+        cpx = AsyncCpxBase()
+        response = Mock()
+        response.isError.return_value = False
+        cpx.client = Mock(write_register=AsyncMock(return_value=response))
+
+        # Act
+        asyncio.run(cpx.write_reg_data_with_single_cmds(b"\x01\x00\x02\x00", 10))
+
+        # Assert
+        assert [c.args for c in cpx.client.write_register.await_args_list] == [
+            (10, 1),
+            (11, 2),
+        ]
+
+    def test_concurrent_reads_are_serialized(self):
+        "Test that the io_lock allows only one request at a time"
+        # Arrange
+        cpx = AsyncCpxBase()
+        active = []
+        max_active = []
+
+        async def read_holding_registers(**_):
+            active.append(1)
+            max_active.append(len(active))
+            await asyncio.sleep(0)
+            active.pop()
+            response = Mock(registers=[0])
+            response.isError.return_value = False
+            return response
+
+        cpx.client = Mock(read_holding_registers=read_holding_registers)
+
+        async def run():
+            await asyncio.gather(*(cpx.read_reg_data(i) for i in range(5)))
+
+        # Act
+        asyncio.run(run())
+
+        # Assert
+        assert max(max_active) == 1
+
+    def test_read_reg_data_chunked(self):
+        "Test that a read above the modbus limit is split into chunks"
+        # Arrange
+        cpx = AsyncCpxBase()
+
+        async def read_holding_registers(address, count):
+            response = Mock(registers=[address] * count)
+            response.isError.return_value = False
+            return response
+
+        cpx.client = Mock(read_holding_registers=read_holding_registers)
+
+        # Act
+        data = asyncio.run(cpx.read_reg_data(0, 130))
+
+        # Assert
+        assert data == b"\x00\x00" * 125 + b"\x7d\x00" * 5
+
+    def test_write_reg_data_chunked(self):
+        "Test that a write above the modbus limit is split into chunks"
+        # Arrange
+        cpx = AsyncCpxBase()
+        response = Mock()
+        response.isError.return_value = False
+        cpx.client = Mock(write_registers=AsyncMock(return_value=response))
+
+        # Act
+        asyncio.run(cpx.write_reg_data(b"\x01\x00" * 124, 0))
+
+        # Assert
+        assert [c.args for c in cpx.client.write_registers.await_args_list] == [
+            (0, [1] * 123),
+            (123, [1]),
+        ]
+
+    def test_requests_are_recorded_in_metrics(self):
+        "Test that reads and writes are recorded in the transport metrics"
+        # Arrange
+        cpx = AsyncCpxBase(read_policy=RetryPolicy(attempts=1))
+        response = Mock(registers=[0, 0])
+        response.isError.return_value = False
+        cpx.client = Mock(
+            read_holding_registers=AsyncMock(return_value=response),
+            write_registers=AsyncMock(side_effect=ConnectionException),
+        )
+
+        # Act
+        asyncio.run(cpx.read_reg_data(0, 2))
+        with pytest.raises(ConnectionAbortedError):
+            asyncio.run(cpx.write_reg_data(b"\x01\x00", 0))
+
+        # Assert
+        snapshot = cpx.stats()
+        assert snapshot.operations["read"]["system"].count == 1
+        assert snapshot.operations["read"]["system"].bytes == 4
+        assert snapshot.operations["write"]["system"].errors == 1
+
+    def test_startup_sets_timeout(self):
+        "Test startup connects and configures the timeout"
+        # Arrange
+        cpx = AsyncCpxBase("192.168.1.1", timeout=0.5)
+        cpx.connect = AsyncMock()
+        cpx.connected = Mock(return_value=True)
+        cpx.set_timeout = AsyncMock()
+
+        # Act
+        asyncio.run(cpx.startup())
+
+        # Assert
+        cpx.connect.assert_awaited_once()
+        cpx.set_timeout.assert_awaited_once_with(500)
+
+    def test_read_device_info(self):
+        "Test read_device_info decodes both device information categories"
+        # Arrange
+        cpx = AsyncCpxBase()
+        basic = Mock(information={0: b"Festo", 1: b"123", 2: b"1.0"})
+        regular = Mock(information={3: b"festo.com", 4: b"CPX", 5: b"AP"})
+        cpx.client = Mock(execute=AsyncMock(side_effect=[basic, regular]))
+
+        # Act
+        info = asyncio.run(cpx.read_device_info())
+
+        # Assert
+        assert info == {
+            "vendor_name": "Festo",
+            "product_code": "123",
+            "revision": "1.0",
+            "vendor_url": "festo.com",
+            "product_name": "CPX",
+            "model_name": "AP",
+        }
+        assert cpx.stats().operations["execute"]["device"].count == 2
@@ -0,0 +1,120 @@
+"""Contains tests for ChangeDetector class"""
+
+from cpx_io.cpx_system.change_detector import (
+    CHANGED,
+    FALLING,
+    RISING,
+    ChangeDetector,
+    ChannelChange,
+)
+from cpx_io.cpx_system.cpx_ap.ap_channel_codec import ChannelCodec
+from cpx_io.cpx_system.cpx_ap.builder.channel_builder import Channel
+
+
+def channel(data_type, bit_offset, bits=None, array_size=None):
+    """Returns an input channel with the given layout"""
+    return Channel(
+        array_size=array_size,
+        bits=bits,
+        bit_offset=bit_offset,
+        byte_swap_needed=True,
+        channel_id=0,
+        data_type=data_type,
+        description="",
+        direction="in",
+        name="Input %d",
+        parameter_group_ids=None,
+        profile_list=[3],
+    )
+
+
+class TestChangeDetector:
+    "Test ChangeDetector"
+
+    def test_first_update_is_baseline(self):
+        """Test the first snapshot only records the baseline"""
+        # Arrange
+        detector = ChangeDetector()
+        detector.watch(0, 0, ChannelCodec([channel("BOOL", i, 1) for i in range(8)]))
+
+        # Act & Assert
+        assert len(detector) == 8
+        assert detector.update(b"\xff\x00") == []
+        assert detector.update(b"\xff\x00") == []
+
+    def test_edges(self):
+        """Test rising and falling edges of BOOL channels"""
+        # Arrange
+        detector = ChangeDetector()
+        detector.watch(2, 0, ChannelCodec([channel("BOOL", i, 1) for i in range(16)]))
+        detector.update(b"\x01\x80")
+
+        # Act
+        changes = detector.update(b"\x02\x00", timestamp=1.5)
+
+        # Assert
+        assert changes == [
+            ChannelChange(2, 0, FALLING, True, False, 1.5),
+            ChannelChange(2, 1, RISING, False, True, 1.5),
+            ChannelChange(2, 15, FALLING, True, False, 1.5),
+        ]
+
+    def test_value_changes_of_several_modules(self):
+        """Test value channels are reported once and mapped to their module"""
+        # Arrange
+        detector = ChangeDetector()
+        detector.watch(0, 0, ChannelCodec([channel("BOOL", i, 1) for i in range(4)]))
+        detector.watch(
+            1,
+            1,
+            ChannelCodec(
+                [
+                    channel("INT16", 0, 16),
+                    channel("UINT8", 16, 16, array_size=2),
+                    channel("BOOL", 32, 4, array_size=4),
+                ]
+            ),
+        )
+        detector.update(b"\x00\x00\x00\x00\x01\x02\x00\x00")
+
+        # Act
+        changes = detector.update(b"\x00\x00\xff\xff\x01\x03\x05\x00", timestamp=0)
+
+        # Assert
+        assert changes == [
+            ChannelChange(1, 0, CHANGED, 0, -1, 0),
+            ChannelChange(1, 1, CHANGED, [1, 2], [1, 3], 0),
+            ChannelChange(1, 2, CHANGED, [False] * 4, [True, False, True, False], 0),
+        ]
+
+    def test_unwatched_bits_are_ignored(self):
+        """Test changes outside of the watched channels"""
+        # Arrange
+        detector = ChangeDetector()
+        detector.watch(
+            0,
+            0,
+            ChannelCodec([channel("BOOL", 0, 1), channel("FLOAT32", 16, 32)]),
+        )
+        detector.update(b"\x00\x00\x00\x00\x00\x00")
+
+        # Act
+        changes = detector.update(b"\xfe\xff\xff\xff\xff\xff")
+
+        # Assert
+        assert len(detector) == 1
+        assert changes == []
+
+    def test_reset(self):
+        """Test reset records a new baseline"""
+        # Arrange
+        detector = ChangeDetector()
+        detector.watch(0, 0, ChannelCodec([channel("BOOL", 0, 1)]))
+        detector.update(b"\x00\x00")
+
+        # Act
+        detector.reset()
+
+        # Assert
+        assert detector.update(b"\x01\x00") == []
+        assert [c.kind for c in detector.update(b"\x00\x00")] == [FALLING]
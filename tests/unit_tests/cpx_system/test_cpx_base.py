@@ -1,11 +1,15 @@
 """Contains tests for CpxBase class"""
 
-from unittest.mock import Mock, patch
+import struct
+from unittest.mock import Mock, call, patch
 from dataclasses import dataclass
 import pytest
 
 from pymodbus.client import ModbusTcpClient
+from pymodbus.exceptions import ConnectionException
 from cpx_io.cpx_system.cpx_base import CpxBase, CpxInitError, CpxConnectionError
+from cpx_io.cpx_system.io_scheduler import ACYCLIC, CYCLIC
+from cpx_io.cpx_system.retry_policy import RetryPolicy
 
 
 class TestCpxBase:
@@ -112,6 +116,7 @@ class TestCpxBase:
         assert info["vendor_url"] == "http://www.festo.com"
         assert info["product_name"] == "Modbus TCP"
         assert info["model_name"] == "CPX-E-Terminal"
+        assert cpx.stats().operations["execute"]["device"].count == 2
 
     def test_bitwiseReg8_from_bytes(self):
         "Test bitwiseReg functions"
@@ -376,6 +381,32 @@ class TestCpxBase:
         # Assert
         assert data == b"\x00\x00"
 
+    def test_io_statistics(self):
+        "Test io_statistics counts the requests of the cyclic lane"
+
+        # Arrange
+        class response:
+            """mock response object"""
+
+            def __init__(self):
+                self.registers = [0]
+
+            def isError(self):
+                "mock error function"
+                return False
+
+        cpx = CpxBase()
+        cpx.client = Mock(read_holding_registers=Mock(return_value=response()))
+
+        # Act
+        with cpx.io_lock.lane(CYCLIC):
+            cpx.read_reg_data(0)
+        stats = cpx.io_statistics()
+
+        # Assert
+        assert stats[CYCLIC].requests == 1
+        assert stats[ACYCLIC].requests == 0
+
     def test_read_reg_data_with_length(self):
         "Test read_reg_data function"
 
@@ -435,7 +466,9 @@ class TestCpxBase:
 
         # Arrange
         cpx = CpxBase()
-        cpx.client = Mock(write_registers=Mock())
+        cpx.client = Mock(
+            write_registers=Mock(return_value=Mock(isError=Mock(return_value=False)))
+        )
 
         # Act
         cpx.write_reg_data(input_value, 0)
@@ -443,6 +476,367 @@ class TestCpxBase:
         # Assert
         cpx.client.write_registers.assert_called_with(0, expected_value)
 
+    def test_write_reg_data_final_failure(self):
+        "Test write_reg_data raises after the last attempt of the write policy"
+
+        # Arrange
+        cpx = CpxBase(write_policy=RetryPolicy(attempts=3))
+        cpx.client = Mock(
+            write_registers=Mock(return_value=Mock(isError=Mock(return_value=True)))
+        )
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            cpx.write_reg_data(b"\x00\x00", 0)
+        assert cpx.client.write_registers.call_count == 3
+        assert cpx.write_policy.statistics().failures == 1
+
+    def test_write_reg_data_with_single_cmds_retry(self):
+        "Test write_reg_data_with_single_cmds repeats a failed register write"
+
+        # Arrange
+        ok = Mock(isError=Mock(return_value=False))
+        cpx = CpxBase()
+        cpx.client = Mock(write_register=Mock(side_effect=[ConnectionException, ok]))
+
+        # Act
+        cpx.write_reg_data_with_single_cmds(b"\x01\x00", 5)
+
+        # Assert
+        assert cpx.client.write_register.call_args_list == [call(5, 1), call(5, 1)]
+        assert cpx.write_policy.statistics().retries == 1
+
+    def test_read_reg_data_read_policy(self):
+        "Test read_reg_data repeats failed reads according to the read policy"
+
+        # Arrange
+        response = Mock(registers=[0x0201], isError=Mock(return_value=False))
+        cpx = CpxBase(read_policy=RetryPolicy(attempts=2))
+        cpx.client = Mock(
+            read_holding_registers=Mock(side_effect=[ConnectionException, response])
+        )
+
+        # Act
+        data = cpx.read_reg_data(0)
+
+        # Assert
+        assert data == b"\x01\x02"
+        assert cpx.client.read_holding_registers.call_count == 2
+
+    def test_stats(self):
+        "Test stats records reads and writes per operation and register region"
+
+        # Arrange
+        response = Mock(registers=[0, 0], isError=Mock(return_value=False))
+        cpx = CpxBase()
+        cpx.REGISTER_REGIONS = ((0, 5000, "outputs"), (5000, 10000, "inputs"))
+        cpx.client = Mock(
+            read_holding_registers=Mock(return_value=response),
+            write_registers=Mock(return_value=response),
+        )
+
+        # Act
+        cpx.read_reg_data(5000, 2)
+        cpx.write_reg_data(b"\x01\x00", 0)
+        cpx.write_reg_data(b"\x01\x00", 14000)
+        stats = cpx.stats()
+
+        # Assert
+        assert stats.operations["read"]["inputs"].count == 1
+        assert stats.operations["read"]["inputs"].bytes == 4
+        assert stats.operations["write"]["outputs"].count == 1
+        assert stats.operations["write"]["system"].count == 1
+
+    def test_stats_errors_and_retries(self):
+        "Test stats counts failed requests and the retries of the policies"
+
+        # Arrange
+        cpx = CpxBase(read_policy=RetryPolicy(attempts=2))
+        cpx.client = Mock(read_holding_registers=Mock(side_effect=ConnectionException))
+
+        # Act
+        with pytest.raises(ConnectionAbortedError):
+            cpx.read_reg_data(0)
+        stats = cpx.stats()
+
+        # Assert
+        assert stats.operations["read"]["system"].errors == 1
+        assert stats.retries == 1
+        assert stats.failures == 1
+
+    def test_reset_stats(self):
+        "Test reset_stats"
+
+        # Arrange
+        response = Mock(registers=[0], isError=Mock(return_value=False))
+        cpx = CpxBase()
+        cpx.client = Mock(read_holding_registers=Mock(return_value=response))
+        cpx.read_reg_data(0)
+
+        # Act
+        cpx.reset_stats()
+
+        # Assert
+        assert cpx.stats().operations == {}
+
+    def test_read_reg_blocks_without_pipeline(self):
+        "Test read_reg_blocks reads the blocks one after another"
+        # Arrange
+        cpx = CpxBase()
+        cpx.read_reg_data = Mock(side_effect=[b"\x01\x00", b"\x02\x00\x03\x00"])
+
+        # Act
+        data = cpx.read_reg_blocks([(0, 1), (10, 2)])
+
+        # Assert
+        assert data == [b"\x01\x00", b"\x02\x00\x03\x00"]
+        cpx.read_reg_data.assert_has_calls([call(0, 1), call(10, 2)])
+
+    def test_pipelined_requests(self):
+        "Test that reads and writes use the pipeline if enabled"
+        # Arrange
+        cpx = CpxBase()
+        cpx.client = Mock()
+        cpx.pipeline = Mock()
+        cpx.pipeline.read_holding_registers.return_value = b"\x01\x00"
+        cpx.pipeline.read_blocks.return_value = [b"\x01\x00"]
+
+        # Act
+        data = cpx.read_reg_data(5000)
+        blocks = cpx.read_reg_blocks([(5000, 1)])
+        cpx.write_reg_data(b"\x01", 0)
+
+        # Assert
+        assert data == b"\x01\x00"
+        assert blocks == [b"\x01\x00"]
+        cpx.pipeline.read_holding_registers.assert_called_once_with(5000, 1)
+        cpx.pipeline.write_registers.assert_called_once_with(b"\x01\x00", 0)
+        cpx.client.read_holding_registers.assert_not_called()
+        cpx.client.write_registers.assert_not_called()
+
+    def test_pipelined_write_retries(self):
+        "Test that a failed pipelined write is retried"
+        # Arrange
+        cpx = CpxBase()
+        cpx.pipeline = Mock()
+        cpx.pipeline.write_registers.side_effect = [ConnectionAbortedError(), None]
+
+        # Act
+        cpx.write_reg_data(b"\x01\x00", 0)
+
+        # Assert
+        assert cpx.pipeline.write_registers.call_count == 2
+
+    @patch("cpx_io.cpx_system.cpx_base.ModbusPipeline", spec=True)
+    def test_enable_pipelining(self, mock_pipeline):
+        "Test enable and disable pipelining"
+        # Arrange
+        cpx = CpxBase()
+        cpx.ip_address = "192.168.1.1"
+        mock_pipeline.return_value.connect.return_value = True
+
+        # Act
+        pipeline = cpx.enable_pipelining(4)
+        cpx.disable_pipelining()
+
+        # Assert
+        mock_pipeline.assert_called_once_with("192.168.1.1", depth=4)
+        pipeline.close.assert_called_once()
+        assert cpx.pipeline is None
+
+    @patch("cpx_io.cpx_system.cpx_base.ModbusPipeline", spec=True)
+    def test_enable_pipelining_connection_error(self, mock_pipeline):
+        "Test enable pipelining if the connection fails"
+        # Arrange
+        cpx = CpxBase()
+        mock_pipeline.return_value.connect.return_value = False
+
+        # Act & Assert
+        with pytest.raises(CpxConnectionError):
+            cpx.enable_pipelining()
+        assert cpx.pipeline is None
+
+    @patch("cpx_io.cpx_system.cpx_base.ModbusPipeline", spec=True)
+    @patch("cpx_io.cpx_system.cpx_base.ModbusTcpClient", spec=True)
+    def test_reconnect_reopens_pipeline(self, mock_client, mock_pipeline):
+        "Test reconnect replaces the pipelined connection with the same depth"
+        # Arrange
+        cpx = CpxBase()
+        cpx.ip_address = "192.168.1.1"
+        cpx.client = Mock()
+        old_pipeline = Mock(depth=4)
+        cpx.pipeline = old_pipeline
+        mock_client.return_value.connect.return_value = True
+        mock_pipeline.return_value.connect.return_value = True
+
+        # Act
+        cpx.reconnect()
+
+        # Assert
+        old_pipeline.close.assert_called_once()
+        mock_pipeline.assert_called_once_with("192.168.1.1", depth=4)
+        assert cpx.pipeline is mock_pipeline.return_value
+
+    @patch("cpx_io.cpx_system.cpx_base.ModbusPipeline", spec=True)
+    def test_check_connection_reopens_lost_pipeline(self, mock_pipeline):
+        "Test the connection check reopens a pipeline that lost its connection"
+        # Arrange
+        cpx = CpxBase()
+        cpx.ip_address = "192.168.1.1"
+        cpx.client = Mock()
+        lost_pipeline = Mock(depth=8, connected=False)
+        cpx.pipeline = lost_pipeline
+        mock_pipeline.return_value.connect.side_effect = [False, True]
+
+        # Act
+        cpx.check_connection_and_try_reconnect()
+        kept_after_failure = cpx.pipeline
+        cpx.check_connection_and_try_reconnect()
+
+        # Assert
+        assert kept_after_failure is lost_pipeline
+        mock_pipeline.assert_called_with("192.168.1.1", depth=8)
+        assert cpx.pipeline is mock_pipeline.return_value
+        assert mock_pipeline.call_count == 2
+
+    def test_read_reg_data_chunked(self):
+        "Test that a read above the modbus limit is split into chunks"
+        # Arrange
+        cpx = CpxBase()
+        cpx.client = Mock()
+
+        def read_holding_registers(address, count):
+            response = Mock(registers=list(range(address, address + count)))
+            response.isError.return_value = False
+            return response
+
+        cpx.client.read_holding_registers.side_effect = read_holding_registers
+
+        # Act
+        data = cpx.read_reg_data(0, 300)
+
+        # Assert
+        assert data == struct.pack("<300H", *range(300))
+        cpx.client.read_holding_registers.assert_has_calls(
+            [
+                call(address=0, count=125),
+                call(address=125, count=125),
+                call(address=250, count=50),
+            ]
+        )
+
+    def test_read_reg_data_chunked_pipelined(self):
+        "Test that the chunks of a large read are pipelined if enabled"
+        # Arrange
+        cpx = CpxBase()
+        cpx.pipeline = Mock()
+        cpx.pipeline.read_blocks.return_value = [b"\x01\x00" * 125, b"\x02\x00"]
+
+        # Act
+        data = cpx.read_reg_data(5000, 126)
+
+        # Assert
+        assert data == b"\x01\x00" * 125 + b"\x02\x00"
+        cpx.pipeline.read_blocks.assert_called_once_with([(5000, 125), (5125, 1)])
+
+    def test_write_reg_data_chunked(self):
+        "Test that a write above the modbus limit is split into chunks"
+        # Arrange
+        cpx = CpxBase()
+        cpx.client = Mock()
+        cpx.client.write_registers.return_value.isError.return_value = False
+        data = struct.pack("<200H", *range(200))
+
+        # Act
+        cpx.write_reg_data(data, 10)
+
+        # Assert
+        assert cpx.client.write_registers.call_args_list == [
+            call(10, list(range(123))),
+            call(133, list(range(123, 200))),
+        ]
+
+    def test_write_reg_data_chunked_pipelined(self):
+        "Test that the chunks of a large write are sent before awaiting responses"
+        # Arrange
+        cpx = CpxBase()
+        cpx.pipeline = Mock()
+        data = bytes(range(250))
+
+        # Act
+        cpx.write_reg_data(data, 0)
+
+        # Assert
+        cpx.pipeline.submit_write.assert_has_calls(
+            [call(data[:246], 0), call(data[246:], 123)]
+        )
+        assert cpx.pipeline.write_result.call_count == 2
+        cpx.pipeline.write_registers.assert_not_called()
+
+    def test_read_reg_into(self):
+        "Test that a read into a buffer is chunked and packed into the buffer"
+        # Arrange
+        cpx = CpxBase()
+        cpx.client = Mock()
+
+        def read_holding_registers(address, count):
+            response = Mock(registers=list(range(address, address + count)))
+            response.isError.return_value = False
+            return response
+
+        cpx.client.read_holding_registers.side_effect = read_holding_registers
+        buffer = bytearray(302)
+
+        # Act
+        size = cpx.read_reg_into(buffer, 0, 150)
+
+        # Assert
+        assert size == 300
+        assert buffer[:300] == struct.pack("<150H", *range(150))
+        assert buffer[300:] == b"\x00\x00"
+        assert cpx.client.read_holding_registers.call_count == 2
+
+    def test_read_reg_into_pipelined(self):
+        "Test that a read into a buffer uses the pipeline if enabled"
+        # Arrange
+        cpx = CpxBase()
+        cpx.pipeline = Mock()
+        cpx.pipeline.read_blocks.return_value = [b"\x01\x00" * 125, b"\x02\x00"]
+        buffer = bytearray(252)
+
+        # Act
+        size = cpx.read_reg_into(memoryview(buffer), 5000, 126)
+
+        # Assert
+        assert size == 252
+        assert buffer == b"\x01\x00" * 125 + b"\x02\x00"
+
+    def test_read_reg_into_buffer_too_small(self):
+        "Test that a too small buffer is rejected"
+        # Arrange
+        cpx = CpxBase()
+        cpx.client = Mock()
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            cpx.read_reg_into(bytearray(3), 0, 2)
+        cpx.client.read_holding_registers.assert_not_called()
+
+    def test_write_reg_from(self):
+        "Test that a memoryview is written without changing the buffer"
+        # Arrange
+        cpx = CpxBase()
+        cpx.client = Mock()
+        cpx.client.write_registers.return_value.isError.return_value = False
+        buffer = bytearray(b"\x01\x00\x02\x00\x03")
+
+        # Act
+        cpx.write_reg_from(memoryview(buffer)[2:], 7)
+
+        # Assert
+        cpx.client.write_registers.assert_called_once_with(7, [2, 3])
+        assert buffer == b"\x01\x00\x02\x00\x03"
+
     def test_require_base_missing(self):
         "Test require_base function"
 
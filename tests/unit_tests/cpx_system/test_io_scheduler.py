@@ -0,0 +1,166 @@
+"""Contains tests for IoScheduler class"""
+
+import threading
+import time
+import pytest
+
+from cpx_io.cpx_system.io_scheduler import (
+    ACYCLIC,
+    CYCLIC,
+    IoScheduler,
+    LaneStatistics,
+)
+
+
+class TestIoScheduler:
+    "Test IoScheduler"
+
+    def test_lane_default(self):
+        """Test acyclic lane is used without selection"""
+        # Arrange
+        scheduler = IoScheduler()
+
+        # Act
+        lane = scheduler.current_lane
+
+        # Assert
+        assert lane == ACYCLIC
+
+    def test_lane_context(self):
+        """Test lane is selected only inside the context"""
+        # Arrange
+        scheduler = IoScheduler()
+
+        # Act
+        with scheduler.lane(CYCLIC):
+            inside = scheduler.current_lane
+        outside = scheduler.current_lane
+
+        # Assert
+        assert inside == CYCLIC
+        assert outside == ACYCLIC
+
+    def test_lane_is_thread_local(self):
+        """Test lane selection does not affect other threads"""
+        # Arrange
+        scheduler = IoScheduler()
+        lanes = []
+
+        # Act
+        with scheduler.lane(CYCLIC):
+            thread = threading.Thread(
+                target=lambda: lanes.append(scheduler.current_lane)
+            )
+            thread.start()
+            thread.join()
+
+        # Assert
+        assert lanes == [ACYCLIC]
+
+    def test_lane_invalid(self):
+        """Test unknown lane raises ValueError"""
+        # Arrange
+        scheduler = IoScheduler()
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            with scheduler.lane("realtime"):
+                pass
+
+    def test_context_manager(self):
+        """Test scheduler is locked inside the context"""
+        # Arrange
+        scheduler = IoScheduler()
+
+        # Act
+        with scheduler:
+            locked = scheduler.locked()
+
+        # Assert
+        assert locked
+        assert not scheduler.locked()
+
+    def test_cyclic_served_before_acyclic(self):
+        """Test a waiting cyclic request is granted before a waiting acyclic request"""
+        # Arrange
+        scheduler = IoScheduler()
+        order = []
+
+        def request(lane):
+            with scheduler.lane(lane):
+                with scheduler:
+                    order.append(lane)
+
+        def wait_for_queue(lane):
+            while scheduler.statistics()[lane].queue_depth == 0:
+                time.sleep(0.001)
+
+        # Act
+        with scheduler:
+            acyclic = threading.Thread(target=request, args=(ACYCLIC,))
+            acyclic.start()
+            wait_for_queue(ACYCLIC)
+            cyclic = threading.Thread(target=request, args=(CYCLIC,))
+            cyclic.start()
+            wait_for_queue(CYCLIC)
+        acyclic.join()
+        cyclic.join()
+
+        # Assert
+        assert order == [CYCLIC, ACYCLIC]
+
+    def test_statistics(self):
+        """Test requests and queue depth are counted per lane"""
+        # Arrange
+        scheduler = IoScheduler()
+
+        # Act
+        with scheduler.lane(CYCLIC):
+            with scheduler:
+                pass
+            with scheduler:
+                pass
+        with scheduler:
+            pass
+        stats = scheduler.statistics()
+
+        # Assert
+        assert stats[CYCLIC].requests == 2
+        assert stats[CYCLIC].max_queue_depth == 1
+        assert stats[CYCLIC].queue_depth == 0
+        assert stats[ACYCLIC].requests == 1
+        assert stats[ACYCLIC].mean_wait_time >= 0.0
+
+    def test_statistics_returns_copy(self):
+        """Test statistics are not changed by later requests"""
+        # Arrange
+        scheduler = IoScheduler()
+        stats = scheduler.statistics()
+
+        # Act
+        with scheduler:
+            pass
+
+        # Assert
+        assert stats[ACYCLIC].requests == 0
+
+    def test_reset_statistics(self):
+        """Test reset_statistics"""
+        # Arrange
+        scheduler = IoScheduler()
+        with scheduler:
+            pass
+
+        # Act
+        scheduler.reset_statistics()
+
+        # Assert
+        assert scheduler.statistics()[ACYCLIC] == LaneStatistics()
+
+    def test_mean_wait_time_without_requests(self):
+        """Test mean_wait_time is 0 without requests"""
+        # Arrange
+        stats = LaneStatistics()
+
+        # Act & Assert
+        assert stats.mean_wait_time == 0.0
@@ -0,0 +1,215 @@
+"""Contains tests for ModbusPipeline class"""
+
+import socket
+import struct
+import threading
+import pytest
+
+from cpx_io.cpx_system.modbus_pipeline import ModbusPipeline, MBAP_HEADER
+
+
+class FakeModbusServer:
+    """Minimal Modbus TCP server with 16 bit registers. It collects batch_size requests
+    before answering them in reverse order to check the transaction id matching."""
+
+    def __init__(self, batch_size=1):
+        self.registers = {i: i for i in range(100)}
+        self.batch_size = batch_size
+        self.max_outstanding = 0
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _receive(self, conn, size):
+        data = b""
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _answer(self, transaction_id, pdu):
+        if pdu[0] == 0x03:
+            _, address, count = struct.unpack(">BHH", pdu)
+            if address + count > len(self.registers):
+                return transaction_id, bytes([0x83, 0x02])
+            values = [self.registers[address + i] for i in range(count)]
+            return transaction_id, struct.pack(f">BB{count}H", 0x03, count * 2, *values)
+        _, address, count, _ = struct.unpack(">BHHB", pdu[:6])
+        values = struct.unpack(f">{count}H", pdu[6:])
+        for i, value in enumerate(values):
+            self.registers[address + i] = value
+        return transaction_id, pdu[:5]
+
+    def _serve(self):
+        conn, _ = self._server.accept()
+        try:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    header = self._receive(conn, MBAP_HEADER.size)
+                    transaction_id, _, length, _ = MBAP_HEADER.unpack(header)
+                    batch.append((transaction_id, self._receive(conn, length - 1)))
+                self.max_outstanding = max(self.max_outstanding, len(batch))
+                for transaction_id, pdu in reversed(batch):
+                    transaction_id, response = self._answer(transaction_id, pdu)
+                    conn.sendall(
+                        MBAP_HEADER.pack(transaction_id, 0, len(response) + 1, 1)
+                        + response
+                    )
+        except (ConnectionError, OSError):
+            conn.close()
+
+    def close(self):
+        self._server.close()
+
+
+class TestModbusPipeline:
+    "Test ModbusPipeline"
+
+    def test_connect_failed(self):
+        "Test connect to a port without server"
+        # Arrange
+        server = socket.create_server(("127.0.0.1", 0))
+        port = server.getsockname()[1]
+        server.close()
+        pipeline = ModbusPipeline("127.0.0.1", port=port, timeout=0.5)
+
+        # Act & Assert
+        assert not pipeline.connect()
+        assert not pipeline.connected
+
+    def test_depth_check(self):
+        "Test invalid depth"
+        # Act & Assert
+        with pytest.raises(ValueError):
+            ModbusPipeline("127.0.0.1", depth=0)
+
+    def test_read_holding_registers(self):
+        "Test a single read is returned little endian per register"
+        # Arrange
+        server = FakeModbusServer()
+        server.registers[5] = 0x0201
+        pipeline = ModbusPipeline("127.0.0.1", port=server.port)
+        pipeline.connect()
+
+        # Act
+        data = pipeline.read_holding_registers(5, 2)
+
+        # Assert
+        assert data == b"\x01\x02\x06\x00"
+        pipeline.close()
+        server.close()
+
+    def test_write_registers(self):
+        "Test a write is sent big endian per register and padded"
+        # Arrange
+        server = FakeModbusServer()
+        pipeline = ModbusPipeline("127.0.0.1", port=server.port)
+        pipeline.connect()
+
+        # Act
+        pipeline.write_registers(b"\x01\x02\x03", 10)
+
+        # Assert
+        assert server.registers[10] == 0x0201
+        assert server.registers[11] == 0x0003
+        pipeline.close()
+        server.close()
+
+    def test_read_blocks_out_of_order_responses(self):
+        "Test all blocks are in flight at once and matched by transaction id"
+        # Arrange
+        server = FakeModbusServer(batch_size=4)
+        pipeline = ModbusPipeline("127.0.0.1", port=server.port, depth=4)
+        pipeline.connect()
+
+        # Act
+        data = pipeline.read_blocks([(0, 1), (10, 1), (20, 2), (30, 1)])
+
+        # Assert
+        assert data == [
+            b"\x00\x00",
+            b"\x0a\x00",
+            b"\x14\x00\x15\x00",
+            b"\x1e\x00",
+        ]
+        assert server.max_outstanding == 4
+        pipeline.close()
+        server.close()
+
+    def test_exception_response(self):
+        "Test a Modbus exception response raises ConnectionAbortedError"
+        # Arrange
+        server = FakeModbusServer()
+        pipeline = ModbusPipeline("127.0.0.1", port=server.port)
+        pipeline.connect()
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            pipeline.read_holding_registers(99, 5)
+        pipeline.close()
+        server.close()
+
+    def test_not_connected(self):
+        "Test request without connection"
+        # Arrange
+        pipeline = ModbusPipeline("127.0.0.1")
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            pipeline.read_holding_registers(0, 1)
+
+    def test_close_fails_pending_requests(self):
+        "Test requests in flight fail when the connection is closed"
+        # Arrange
+        server = FakeModbusServer(batch_size=2)
+        pipeline = ModbusPipeline("127.0.0.1", port=server.port, depth=2)
+        pipeline.connect()
+        future = pipeline.submit_read(0, 1)
+
+        # Act
+        pipeline.close()
+
+        # Assert
+        with pytest.raises(ConnectionAbortedError):
+            pipeline.read_result(future)
+        server.close()
+
+    def test_timeout_frees_slot(self):
+        "Test a request without response times out and frees its pipeline slot"
+        # Arrange
+        server = FakeModbusServer(batch_size=2)
+        pipeline = ModbusPipeline("127.0.0.1", port=server.port, depth=1, timeout=0.1)
+        pipeline.connect()
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            pipeline.read_holding_registers(0, 1)
+        # the slot is free again, the server answers both requests in one batch
+        # but the first response is dropped since its request timed out
+        future = pipeline.submit_read(1, 1)
+        assert pipeline.read_result(future) == b"\x01\x00"
+        pipeline.close()
+        server.close()
+
+    def test_timeout_without_any_response(self):
+        "Test every request to a server that never answers frees its slot and fails"
+        # Arrange
+        server = socket.create_server(("127.0.0.1", 0))
+        pipeline = ModbusPipeline(
+            "127.0.0.1", port=server.getsockname()[1], depth=1, timeout=0.05
+        )
+        pipeline.connect()
+
+        # Act & Assert
+        for _ in range(3):
+            with pytest.raises(ConnectionAbortedError, match="no response"):
+                pipeline.read_holding_registers(0, 1)
+            assert not pipeline._pending
+        assert pipeline._slots.acquire(blocking=False)
+        pipeline._slots.release()
+        pipeline.close()
+        server.close()
@@ -0,0 +1,88 @@
+"""Contains tests for the register transactions"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, call
+
+from cpx_io.cpx_system.cpx_ap import ap_modbus_registers
+from cpx_io.cpx_system.register_transaction import (
+    Step,
+    read,
+    run,
+    run_async,
+    set_timeout,
+    write,
+)
+
+
+def transaction():
+    """Writes the doubled value that is read from register 1"""
+    data = yield read(1)
+    yield write(data * 2, 2)
+    return data
+
+
+class TestRegisterTransaction:
+    "Test the transaction drivers"
+
+    def test_steps(self):
+        """Test the steps of a transaction"""
+        # Arrange
+        steps = transaction()
+
+        # Act & Assert
+        assert next(steps) == Step("read_reg_data", (1,), {})
+        assert steps.send(b"\x01") == Step("write_reg_data", (b"\x01\x01", 2), {})
+
+    def test_run(self):
+        """Test run executes the steps with the base"""
+        # Arrange
+        base = Mock(read_reg_data=Mock(return_value=b"\x01"))
+
+        # Act
+        result = run(transaction(), base)
+
+        # Assert
+        assert result == b"\x01"
+        base.read_reg_data.assert_called_once_with(1)
+        base.write_reg_data.assert_called_once_with(b"\x01\x01", 2)
+
+    def test_run_async(self):
+        """Test run_async awaits the steps with the base"""
+        # Arrange
+        base = Mock(
+            read_reg_data=AsyncMock(return_value=b"\x01"), write_reg_data=AsyncMock()
+        )
+
+        # Act
+        result = asyncio.run(run_async(transaction(), base))
+
+        # Assert
+        assert result == b"\x01"
+        base.read_reg_data.assert_awaited_once_with(1)
+        base.write_reg_data.assert_awaited_once_with(b"\x01\x01", 2)
+
+    def test_set_timeout_limited(self):
+        """Test set_timeout limits the timeout to 100 ms"""
+        # Arrange
+        base = Mock(read_reg_data=Mock(return_value=b"\x64\x00\x00\x00"))
+
+        # Act
+        run(set_timeout(10, ap_modbus_registers.TIMEOUT), base)
+
+        # Assert
+        base.write_reg_data.assert_called_once_with(b"\x64\x00\x00\x00", 14000)
+        base.read_reg_data.assert_called_once_with(14000, 2)
+
+    def test_set_timeout_single_cmds(self):
+        """Test set_timeout with single register writes"""
+        # Arrange
+        base = Mock(read_reg_data=Mock(return_value=b"\xf4\x01\x00\x00"))
+
+        # Act
+        run(set_timeout(500, ap_modbus_registers.TIMEOUT, single_cmds=True), base)
+
+        # Assert
+        assert base.write_reg_data_with_single_cmds.call_args == call(
+            b"\xf4\x01\x00\x00", 14000
+        )
+        base.write_reg_data.assert_not_called()
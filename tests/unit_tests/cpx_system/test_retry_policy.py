@@ -0,0 +1,148 @@
+"""Contains tests for RetryPolicy class"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+import pytest
+
+from cpx_io.cpx_system.retry_policy import RetryPolicy, RetryStatistics
+
+
+class TestRetryPolicy:
+    "Test RetryPolicy"
+
+    def test_constructor_invalid_attempts(self):
+        """Test at least one attempt is required"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            RetryPolicy(attempts=0)
+
+    def test_constructor_invalid_jitter(self):
+        """Test jitter must be a fraction"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            RetryPolicy(jitter=1.5)
+
+    def test_delay_exponential(self):
+        """Test delay grows exponentially up to max_delay"""
+        # Arrange
+        policy = RetryPolicy(initial_delay=0.01, max_delay=0.05, jitter=0.0)
+
+        # Act
+        delays = [policy.delay(retry) for retry in range(4)]
+
+        # Assert
+        assert delays == pytest.approx([0.01, 0.02, 0.04, 0.05])
+
+    @patch("cpx_io.cpx_system.retry_policy.random.uniform", return_value=1.1)
+    def test_delay_jitter(self, mock_uniform):
+        """Test jitter varies the delay"""
+        # Arrange
+        policy = RetryPolicy(initial_delay=0.01, jitter=0.1)
+
+        # Act
+        delay = policy.delay(0)
+
+        # Assert
+        mock_uniform.assert_called_once_with(0.9, 1.1)
+        assert delay == pytest.approx(0.011)
+
+    def test_call_success(self):
+        """Test call returns the result of the first successful attempt"""
+        # Arrange
+        policy = RetryPolicy(attempts=3)
+        operation = Mock(return_value=b"\x00\x00")
+
+        # Act
+        ret = policy.call(operation, 1, 2)
+
+        # Assert
+        assert ret == b"\x00\x00"
+        operation.assert_called_once_with(1, 2)
+        assert policy.statistics() == RetryStatistics(calls=1)
+
+    def test_call_retries(self):
+        """Test failed attempts are repeated with backoff"""
+        # Arrange
+        on_retry = Mock()
+        policy = RetryPolicy(
+            attempts=3, initial_delay=0.001, jitter=0.0, on_retry=on_retry
+        )
+        error = ConnectionAbortedError("timeout")
+        operation = Mock(side_effect=[error, error, 42])
+
+        # Act
+        ret = policy.call(operation)
+
+        # Assert
+        assert ret == 42
+        assert operation.call_count == 3
+        assert [c.args for c in on_retry.call_args_list] == [
+            (1, error, pytest.approx(0.001)),
+            (2, error, pytest.approx(0.002)),
+        ]
+        assert policy.statistics() == RetryStatistics(calls=1, retries=2)
+
+    def test_call_final_failure(self):
+        """Test the error is raised and reported after the last attempt"""
+        # Arrange
+        on_failure = Mock()
+        policy = RetryPolicy(attempts=2, on_failure=on_failure)
+        error = ConnectionAbortedError("timeout")
+        operation = Mock(side_effect=error)
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            policy.call(operation)
+        assert operation.call_count == 2
+        on_failure.assert_called_once_with(error)
+        assert policy.statistics() == RetryStatistics(calls=1, retries=1, failures=1)
+
+    def test_call_deadline(self):
+        """Test no retry is started that would exceed the deadline"""
+        # Arrange
+        policy = RetryPolicy(attempts=5, initial_delay=0.5, jitter=0.0, deadline=0.2)
+        operation = Mock(side_effect=ConnectionAbortedError)
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            policy.call(operation)
+        operation.assert_called_once()
+        assert policy.statistics() == RetryStatistics(calls=1, failures=1)
+
+    def test_call_other_errors_are_not_retried(self):
+        """Test only ConnectionAbortedError is retried"""
+        # Arrange
+        policy = RetryPolicy(attempts=3)
+        operation = Mock(side_effect=ValueError)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            policy.call(operation)
+        operation.assert_called_once()
+
+    @patch("cpx_io.cpx_system.retry_policy.asyncio.sleep", new_callable=AsyncMock)
+    def test_call_async_retries(self, mock_sleep):
+        """Test failed awaitable attempts are repeated"""
+        # Arrange
+        policy = RetryPolicy(attempts=2, initial_delay=0.01, jitter=0.0)
+        operation = AsyncMock(side_effect=[ConnectionAbortedError, 7])
+
+        # Act
+        ret = asyncio.run(policy.call_async(operation, 1))
+
+        # Assert
+        assert ret == 7
+        operation.assert_awaited_with(1)
+        mock_sleep.assert_awaited_once_with(pytest.approx(0.01))
+
+    def test_reset_statistics(self):
+        """Test reset_statistics"""
+        # Arrange
+        policy = RetryPolicy()
+        policy.call(Mock())
+
+        # Act
+        policy.reset_statistics()
+
+        # Assert
+        assert policy.statistics() == RetryStatistics()
@@ -0,0 +1,107 @@
+"""Contains tests for StartupTrace class"""
+
+import pytest
+
+from cpx_io.cpx_system.startup_trace import StartupPhase, StartupReport, StartupTrace
+from cpx_io.cpx_system.transport_metrics import TransportMetrics
+
+
+class TestStartupTrace:
+    "Test StartupTrace"
+
+    def test_phase(self):
+        """Test a phase records its duration and Modbus requests"""
+        # Arrange
+        metrics = TransportMetrics()
+        metrics.record("read", "system", 1000)
+        trace = StartupTrace(metrics)
+
+        # Act
+        with trace.phase("module_information"):
+            metrics.record("read", "system", 1000)
+            metrics.record("read", "system", 1000)
+
+        # Assert
+        (phase,) = trace.report().phases
+        assert phase.name == "module_information"
+        assert phase.module is None
+        assert phase.requests == 2
+        assert phase.duration >= 0
+
+    def test_phase_error(self):
+        """Test a phase is recorded if it raises"""
+        # Arrange
+        trace = StartupTrace(TransportMetrics())
+
+        # Act
+        with pytest.raises(ValueError):
+            with trace.phase("apdd_load", 3):
+                raise ValueError
+
+        # Assert
+        assert [(p.name, p.module) for p in trace.report().phases] == [("apdd_load", 3)]
+
+    def test_report_is_copy(self):
+        """Test a report does not change with later phases"""
+        # Arrange
+        trace = StartupTrace(TransportMetrics())
+        report = trace.report()
+
+        # Act
+        trace.add("documentation", None, 0.5)
+
+        # Assert
+        assert report.phases == []
+        assert len(trace.report().phases) == 1
+
+
+class TestStartupReport:
+    "Test StartupReport"
+
+    @pytest.fixture(scope="function")
+    def report_fixture(self):
+        """report fixture"""
+        yield StartupReport(
+            [
+                StartupPhase("connect", None, 0.01),
+                StartupPhase("module_build", 0, 0.2),
+                StartupPhase("module_configure", 0, 0.1, 4),
+                StartupPhase("module_build", 1, 0.3),
+                StartupPhase("module_configure", 1, 0.05, 2),
+                StartupPhase("total", None, 0.7, 7),
+            ]
+        )
+
+    def test_totals(self, report_fixture):
+        """Test duration and requests of the complete startup"""
+        # Assert
+        assert report_fixture.duration == 0.7
+        assert report_fixture.requests == 7
+
+    def test_durations_by_phase(self, report_fixture):
+        """Test the durations are summed per phase name"""
+        # Act
+        durations = report_fixture.durations_by_phase()
+
+        # Assert
+        assert durations["module_build"] == pytest.approx(0.5)
+        assert durations["module_configure"] == pytest.approx(0.15)
+
+    def test_durations_by_module(self, report_fixture):
+        """Test the durations are summed per module"""
+        # Act
+        durations = report_fixture.durations_by_module()
+
+        # Assert
+        assert durations == pytest.approx({0: 0.3, 1: 0.35})
+
+    def test_slowest(self, report_fixture):
+        """Test the slowest module phases"""
+        # Act
+        slowest = report_fixture.slowest(2)
+
+        # Assert
+        assert [(p.name, p.module) for p in slowest] == [
+            ("module_build", 1),
+            ("module_build", 0),
+        ]
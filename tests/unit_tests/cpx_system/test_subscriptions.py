@@ -0,0 +1,230 @@
+"""Contains tests for Subscription and EventDispatcher classes"""
+
+import threading
+from unittest.mock import Mock
+import pytest
+
+from cpx_io.cpx_system.change_detector import CHANGED, FALLING, RISING, ChannelChange
+from cpx_io.cpx_system.subscriptions import (
+    COALESCE,
+    DROP_OLDEST,
+    DiagnosisChange,
+    EventDispatcher,
+    Subscription,
+)
+
+
+def change(channel, old_value, new_value, position=0):
+    """Returns a ChannelChange"""
+    kind = CHANGED
+    if isinstance(new_value, bool):
+        kind = RISING if new_value else FALLING
+    return ChannelChange(position, channel, kind, old_value, new_value, 0.0)
+
+
+def subscription(**kwargs):
+    """Returns a subscription of all channels of module 0 with a mocked dispatcher"""
+    sub = Subscription(ChannelChange, 0, None, Mock(), **kwargs)
+    sub._dispatcher = Mock()
+    return sub
+
+
+class TestSubscription:
+    "Test Subscription"
+
+    def test_matches(self):
+        """Test matches"""
+        # Arrange
+        sub = Subscription(ChannelChange, 1, 2, Mock())
+
+        # Act & Assert
+        assert sub.matches(change(2, False, True, position=1))
+        assert not sub.matches(change(3, False, True, position=1))
+        assert not sub.matches(change(2, False, True, position=0))
+        assert not sub.matches(DiagnosisChange(1, None, None, 0.0))
+
+    def test_invalid_arguments(self):
+        """Test invalid overflow policy and queue size"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            Subscription(ChannelChange, 0, None, Mock(), overflow="block")
+        with pytest.raises(ValueError):
+            Subscription(ChannelChange, 0, None, Mock(), queue_size=0)
+
+    def test_evaluate_submits_matching_events(self):
+        """Test evaluate without debounce and min_interval"""
+        # Arrange
+        sub = subscription()
+        events = [change(0, False, True), change(1, 0, 5, position=1)]
+
+        # Act
+        sub.evaluate(events, now=1.0)
+
+        # Assert
+        sub._dispatcher.submit.assert_called_once_with(sub, events[0])
+
+    def test_debounce(self):
+        """Test a change is reported after it was stable for the debounce time"""
+        # Arrange
+        sub = subscription(debounce=0.1)
+
+        # Act & Assert
+        sub.evaluate([change(0, False, True)], now=1.0)
+        sub.evaluate([], now=1.05)
+        sub._dispatcher.submit.assert_not_called()
+        sub.evaluate([], now=1.1)
+        sub._dispatcher.submit.assert_called_once_with(sub, change(0, False, True))
+
+    def test_debounce_suppresses_glitch(self):
+        """Test a change that is reverted within the debounce time is not reported"""
+        # Arrange
+        sub = subscription(debounce=0.1)
+
+        # Act
+        sub.evaluate([change(0, False, True)], now=1.0)
+        sub.evaluate([change(0, True, False)], now=1.02)
+        sub.evaluate([], now=1.5)
+
+        # Assert
+        sub._dispatcher.submit.assert_not_called()
+
+    def test_min_interval(self):
+        """Test changes within min_interval are merged and reported afterwards"""
+        # Arrange
+        sub = subscription(min_interval=1.0)
+
+        # Act
+        sub.evaluate([change(0, 1, 2)], now=10.0)
+        sub.evaluate([change(0, 2, 3)], now=10.2)
+        sub.evaluate([change(0, 3, 4)], now=10.4)
+        sub.evaluate([], now=10.9)
+        submitted_early = sub._dispatcher.submit.call_count
+        sub.evaluate([], now=11.0)
+
+        # Assert
+        assert submitted_early == 1
+        assert [c.args[1] for c in sub._dispatcher.submit.call_args_list] == [
+            change(0, 1, 2),
+            change(0, 2, 4),
+        ]
+
+    def test_overflow_drop_oldest(self):
+        """Test a full queue drops its oldest event"""
+        # Arrange
+        sub = Subscription(
+            ChannelChange, 0, None, Mock(), overflow=DROP_OLDEST, queue_size=2
+        )
+
+        # Act
+        for i in range(3):
+            sub._push(change(i, False, True))
+
+        # Assert
+        assert [e.channel for e in sub._queue] == [1, 2]
+        assert sub.dropped == 1
+
+    def test_overflow_coalesce(self):
+        """Test events of the same channel are merged into the pending one"""
+        # Arrange
+        sub = Subscription(ChannelChange, 0, None, Mock(), overflow=COALESCE)
+
+        # Act
+        sub._push(change(0, 1, 2))
+        sub._push(change(1, False, True))
+        sub._push(change(0, 2, 3))
+        sub._push(change(1, True, False))
+
+        # Assert
+        assert list(sub._queue) == [change(0, 1, 3)]
+        assert sub.coalesced == 2
+        assert sub.dropped == 0
+
+
+class TestEventDispatcher:
+    "Test EventDispatcher"
+
+    def test_callbacks_run_in_order(self):
+        """Test the callbacks of one subscription run in the order of the events"""
+        # Arrange
+        dispatcher = EventDispatcher(workers=2)
+        received = []
+        done = threading.Event()
+
+        def callback(event):
+            received.append(event.channel)
+            if len(received) == 5:
+                done.set()
+
+        sub = dispatcher.add(Subscription(ChannelChange, 0, None, callback))
+
+        # Act
+        for i in range(5):
+            dispatcher.submit(sub, change(i, False, True))
+
+        # Assert
+        assert done.wait(2.0)
+        assert received == [0, 1, 2, 3, 4]
+        dispatcher.shutdown(timeout=1.0)
+        assert sub.delivered == 5
+
+    def test_slow_callback_does_not_block_others(self):
+        """Test a blocked callback neither blocks submit nor other subscriptions"""
+        # Arrange
+        dispatcher = EventDispatcher(workers=2)
+        release = threading.Event()
+        fast_done = threading.Event()
+        slow = dispatcher.add(
+            Subscription(
+                ChannelChange, 0, None, lambda _: release.wait(2.0), queue_size=2
+            )
+        )
+        fast = dispatcher.add(
+            Subscription(ChannelChange, 1, None, lambda _: fast_done.set())
+        )
+
+        # Act
+        for i in range(10):
+            dispatcher.submit(slow, change(i, 0, i + 1))
+        dispatcher.submit(fast, change(0, False, True, position=1))
+
+        # Assert
+        assert fast_done.wait(2.0)
+        assert slow.dropped >= 7
+        release.set()
+        dispatcher.shutdown(timeout=1.0)
+
+    def test_failing_callback(self):
+        """Test an exception in a callback is counted and the worker continues"""
+        # Arrange
+        dispatcher = EventDispatcher(workers=1)
+        done = threading.Event()
+        failing = dispatcher.add(
+            Subscription(ChannelChange, 0, None, Mock(side_effect=RuntimeError))
+        )
+        working = dispatcher.add(
+            Subscription(ChannelChange, 0, None, lambda _: done.set())
+        )
+
+        # Act
+        dispatcher.submit(failing, change(0, False, True))
+        dispatcher.submit(working, change(0, False, True))
+
+        # Assert
+        assert done.wait(2.0)
+        dispatcher.shutdown(timeout=1.0)
+        assert failing.errors == 1
+
+    def test_cancelled_subscription(self):
+        """Test events of a cancelled subscription are not delivered"""
+        # Arrange
+        dispatcher = EventDispatcher(workers=1)
+        callback = Mock()
+        sub = dispatcher.add(Subscription(ChannelChange, 0, None, callback))
+
+        # Act
+        sub.cancel()
+        dispatcher.submit(sub, change(0, False, True))
+        dispatcher.shutdown(timeout=1.0)
+
+        # Assert
+        callback.assert_not_called()
@@ -0,0 +1,237 @@
+"""Contains tests for TransportMetrics class"""
+
+import asyncio
+from unittest.mock import Mock
+import pytest
+
+from cpx_io.cpx_system.transport_metrics import (
+    LatencyHistogram,
+    MetricsSnapshot,
+    OperationStatistics,
+    TransportMetrics,
+    measured,
+)
+
+
+class TestLatencyHistogram:
+    "Test LatencyHistogram"
+
+    def test_record(self):
+        """Test count, total, min and max"""
+        # Arrange
+        histogram = LatencyHistogram()
+
+        # Act
+        for value in (300, 100, 200):
+            histogram.record(value)
+
+        # Assert
+        assert histogram.count == 3
+        assert histogram.total == 600
+        assert histogram.min == 100
+        assert histogram.max == 300
+
+    def test_percentile_empty(self):
+        """Test percentile of an empty histogram"""
+        # Arrange
+        histogram = LatencyHistogram()
+
+        # Act & Assert
+        assert histogram.percentile(50) is None
+
+    def test_percentile_small_values_exact(self):
+        """Test values below the bucket resolution are exact"""
+        # Arrange
+        histogram = LatencyHistogram(significant_bits=5)
+        for value in range(1, 11):
+            histogram.record(value)
+
+        # Act & Assert
+        assert histogram.percentile(50) == 5
+        assert histogram.percentile(100) == 10
+
+    def test_percentile_relative_resolution(self):
+        """Test large values are resolved to the bucket resolution"""
+        # Arrange
+        histogram = LatencyHistogram()
+        for value in range(1_000_000, 2_000_000, 1000):
+            histogram.record(value)
+
+        # Act
+        p90 = histogram.percentile(90)
+
+        # Assert
+        assert p90 == pytest.approx(1_900_000, rel=2**-6)
+
+
+class TestTransportMetrics:
+    "Test TransportMetrics"
+
+    def test_record_snapshot(self):
+        """Test requests are grouped by operation and region"""
+        # Arrange
+        metrics = TransportMetrics()
+
+        # Act
+        metrics.record("read", "inputs", 1_000_000, 4)
+        metrics.record("read", "inputs", 3_000_000, 4)
+        metrics.record("read", "inputs", 2_000_000, 4, error=True)
+        metrics.record("write", "outputs", 500_000, 2)
+        snapshot = metrics.snapshot()
+
+        # Assert
+        inputs = snapshot.operations["read"]["inputs"]
+        assert inputs.count == 3
+        assert inputs.errors == 1
+        assert inputs.bytes == 8
+        assert inputs.min_time == pytest.approx(0.001)
+        assert inputs.max_time == pytest.approx(0.003)
+        assert inputs.mean_time == pytest.approx(0.002)
+        assert inputs.p50 == pytest.approx(0.002, rel=2**-6)
+        assert snapshot.operations["write"]["outputs"].count == 1
+
+    def test_record_reconnect(self):
+        """Test record_reconnect"""
+        # Arrange
+        metrics = TransportMetrics()
+
+        # Act
+        metrics.record_reconnect()
+
+        # Assert
+        assert metrics.snapshot().reconnects == 1
+
+    def test_request_count(self):
+        """Test request_count counts Modbus requests but no composite operations"""
+        # Arrange
+        metrics = TransportMetrics()
+        metrics.record("read", "inputs", 1000)
+        metrics.record("write", "outputs", 1000, error=True)
+        metrics.record("execute", "device", 1000)
+        metrics.record("parameter", "parameters", 3000)
+
+        # Act
+        count = metrics.request_count()
+
+        # Assert
+        assert count == 3
+
+    def test_reset(self):
+        """Test reset discards all values"""
+        # Arrange
+        metrics = TransportMetrics()
+        metrics.record("read", "inputs", 1000)
+        metrics.record_reconnect()
+
+        # Act
+        metrics.reset()
+        snapshot = metrics.snapshot()
+
+        # Assert
+        assert snapshot.operations == {}
+        assert snapshot.reconnects == 0
+
+    def test_measure(self):
+        """Test measure records the with block and failed blocks as error"""
+        # Arrange
+        metrics = TransportMetrics()
+
+        # Act
+        with metrics.measure("read", "inputs", 4):
+            pass
+        with pytest.raises(ConnectionAbortedError):
+            with metrics.measure("read", "inputs", 4):
+                raise ConnectionAbortedError
+
+        # Assert
+        inputs = metrics.snapshot().operations["read"]["inputs"]
+        assert inputs.count == 2
+        assert inputs.errors == 1
+        assert inputs.bytes == 4
+
+    def test_mean_time_without_requests(self):
+        """Test mean_time is None without requests"""
+        # Act & Assert
+        assert OperationStatistics().mean_time is None
+        assert MetricsSnapshot().operations == {}
+
+
+class TestMeasured:
+    "Test measured decorator"
+
+    def test_measured(self):
+        """Test the duration of a method is recorded"""
+
+        # Arrange
+        class Device:
+            "device with metrics"
+
+            def __init__(self):
+                self.metrics = TransportMetrics()
+
+            @measured("parameter", "parameters")
+            def handshake(self, value):
+                "measured method"
+                return value
+
+        device = Device()
+
+        # Act
+        ret = device.handshake(5)
+
+        # Assert
+        assert ret == 5
+        stats = device.metrics.snapshot().operations["parameter"]["parameters"]
+        assert stats.count == 1
+        assert stats.errors == 0
+
+    def test_measured_error_with_owner(self):
+        """Test failed calls are recorded as error at the owner's metrics"""
+
+        # Arrange
+        class Module:
+            "module with a base"
+
+            def __init__(self):
+                self.base = Mock(metrics=TransportMetrics())
+
+            @measured("isdu", "isdu", owner="base")
+            def read(self):
+                "measured method"
+                raise ConnectionAbortedError
+
+        module = Module()
+
+        # Act & Assert
+        with pytest.raises(ConnectionAbortedError):
+            module.read()
+        stats = module.base.metrics.snapshot().operations["isdu"]["isdu"]
+        assert stats.count == 1
+        assert stats.errors == 1
+
+    def test_measured_coroutine(self):
+        """Test coroutine functions are recorded when they are finished"""
+
+        # Arrange
+        class Device:
+            "device with metrics"
+
+            def __init__(self):
+                self.metrics = TransportMetrics()
+
+            @measured("parameter", "parameters")
+            async def handshake(self, value):
+                "measured coroutine"
+                await asyncio.sleep(0)
+                return value
+
+        device = Device()
+
+        # Act
+        ret = asyncio.run(device.handshake(5))
+
+        # Assert
+        assert ret == 5
+        stats = device.metrics.snapshot().operations["parameter"]["parameters"]
+        assert stats.count == 1
+        assert stats.errors == 0
@@ -0,0 +1,72 @@
+"""Contains the import time budget of the public entry points"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# cumulative import time budget (in ms) of the public entry points. The budgets leave
+# room for slow machines, the typical import time is about a third of the budget.
+IMPORT_BUDGETS = {
+    "cpx_io.cpx_system.cpx_ap.cpx_ap": 500,
+    "cpx_io.cpx_system.cpx_e.cpx_e": 400,
+    "cpx_io.cli.cli": 600,
+}
+
+# heavy or rarely used modules that are imported on demand
+LAZY_MODULES = (
+    "numpy",
+    "requests",
+    "importlib.metadata",
+    "cpx_io.cpx_system.cpx_ap.ap_docu_generator",
+    "cpx_io.cpx_system.cpx_ap.builder.ap_module_builder",
+    "cpx_io.cpx_system.cpx_ap.checker.apdd_checker",
+)
+
+
+def measure_import(module: str) -> dict:
+    """Imports module in a new interpreter with -X importtime and returns the
+    cumulative import time (in us) of every imported module"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime:
+    "Test import time of the public entry points"
+
+    @pytest.mark.parametrize("module", IMPORT_BUDGETS)
+    def test_lazy_modules_not_imported(self, module):
+        """Test heavy dependencies are not imported by the entry points"""
+        # Act
+        times = measure_import(module)
+
+        # Assert
+        assert module in times
+        assert not [m for m in LAZY_MODULES if m in times]
+
+    @pytest.mark.parametrize("module, budget_ms", IMPORT_BUDGETS.items())
+    def test_import_time_budget(self, module, budget_ms):
+        """Test the entry points are imported within their budget"""
+        # Arrange
+        # the first import writes the bytecode cache
+        measure_import(module)
+
+        # Act
+        best = min(measure_import(module)[module] for _ in range(3))
+
+        # Assert
+        assert best / 1000 < budget_ms
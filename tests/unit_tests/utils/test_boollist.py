@@ -0,0 +1,136 @@
+"""Contains tests for boollist functions and the BitVector class"""
+
+import pytest
+
+from cpx_io.utils.boollist import (
+    BitVector,
+    boollist_to_bytes,
+    boollist_to_int,
+    bytes_to_boollist,
+    int_to_boollist,
+)
+
+
+class TestBoollist:
+    "Test boollist functions"
+
+    @pytest.mark.parametrize(
+        "data, num_bytes, byteorder, expected_output",
+        [
+            (b"\x05", None, "little", [True, False, True] + [False] * 5),
+            (b"\x01\x80", None, "big", [False] * 7 + [True, True] + [False] * 7),
+            (b"\x01\x02", 1, "little", [True] + [False] * 7),
+            (b"\x01", 2, "little", [True] + [False] * 15),
+            (b"", None, "little", []),
+        ],
+    )
+    def test_bytes_to_boollist(self, data, num_bytes, byteorder, expected_output):
+        """Test bytes_to_boollist"""
+        # Act
+        result = bytes_to_boollist(data, num_bytes, byteorder)
+
+        # Assert
+        assert result == expected_output
+
+    @pytest.mark.parametrize(
+        "boollist, expected_output",
+        [
+            ([True, False, True], b"\x05"),
+            ([False] * 8 + [True], b"\x00\x01"),
+            ([1, 0, 0, 0, 0, 0, 0, 1], b"\x81"),
+            ([], b""),
+        ],
+    )
+    def test_boollist_to_bytes(self, boollist, expected_output):
+        """Test boollist_to_bytes"""
+        # Act
+        result = boollist_to_bytes(boollist)
+
+        # Assert
+        assert result == expected_output
+
+    def test_roundtrip(self):
+        """Test conversion to bytes and back for all byte values"""
+        # Arrange
+        data = bytes(range(256))
+
+        # Act
+        result = boollist_to_bytes(bytes_to_boollist(data))
+
+        # Assert
+        assert result == data
+
+    def test_int_conversion(self):
+        """Test boollist_to_int and int_to_boollist"""
+        # Act
+        boollist = int_to_boollist(0x0102)
+
+        # Assert
+        assert boollist == [False, True] + [False] * 6 + [True] + [False] * 7
+        assert boollist_to_int(boollist) == 0x0102
+
+
+class TestBitVector:
+    "Test BitVector"
+
+    def test_from_bytes(self):
+        """Test from_bytes and the sequence interface"""
+        # Act
+        vector = BitVector.from_bytes(b"\x05\x80")
+
+        # Assert
+        assert len(vector) == 16
+        assert vector[0] and not vector[1] and vector[2] and vector[-1]
+        assert vector == bytes_to_boollist(b"\x05\x80")
+        assert list(vector) == bytes_to_boollist(b"\x05\x80")
+        assert vector.to_bytes() == b"\x05\x80"
+        assert int(vector) == 0x8005
+        assert vector.count() == 3
+
+    def test_slice(self):
+        """Test slicing"""
+        # Arrange
+        vector = BitVector.from_bools([True, False, True, True, False])
+
+        # Act & Assert
+        assert vector[1:4] == [False, True, True]
+        assert vector[::2] == [True, True, False]
+        assert vector[4:1] == []
+
+    def test_index_error(self):
+        """Test index out of range"""
+        # Arrange
+        vector = BitVector(4)
+
+        # Act & Assert
+        with pytest.raises(IndexError):
+            _ = vector[4]
+
+    def test_diff(self):
+        """Test diff"""
+        # Arrange
+        old = BitVector.from_bytes(b"\x0f\x00")
+        new = BitVector.from_bytes(b"\x0e\x01")
+
+        # Act & Assert
+        assert new.diff(old) == [0, 8]
+        assert new.diff(old.tolist()) == [0, 8]
+        with pytest.raises(ValueError):
+            new.diff(BitVector(8))
+
+    def test_set_clear(self):
+        """Test bulk and single set and clear"""
+        # Arrange
+        vector = BitVector(10)
+
+        # Act
+        vector.set([0, 3, -1])
+        vector[5] = True
+        vector.clear([3])
+
+        # Assert
+        assert vector.diff(BitVector(10)) == [0, 5, 9]
+        vector.set()
+        assert vector.count() == 10
+        vector.clear()
+        assert vector == BitVector(10)